@@ -10,40 +10,122 @@ Cette API expose le modèle de prédiction de départ des employés avec :
 - Interface Gradio optionnelle pour utilisation interactive
 - Endpoint batch pour traitement de fichiers CSV
 """
-import io
+import asyncio
 import time
+import uuid
+from collections import Counter
 from contextlib import asynccontextmanager
-from typing import Any, Callable
+from typing import Any, Callable, Literal, Optional
 
 import pandas as pd
-from fastapi import Depends, FastAPI, File, HTTPException, Request, Response, UploadFile
+from fastapi import (
+    Depends,
+    FastAPI,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
 from src.auth import verify_api_key
+from src.batching import MicroBatcher
 from src.config import get_settings
-from src.logger import log_model_load, log_request, logger
-from src.models import get_model_info, load_model
-from src.preprocessing import (
-    merge_csv_dataframes,
-    preprocess_dataframe_for_prediction,
-    preprocess_for_prediction,
+from src.database import get_prediction_log_queue
+from src.executor import InferenceExecutor, PoolSaturatedError
+from src.jobs import (
+    JOB_FORMATS,
+    SUCCEEDED,
+    BatchJobManager,
+    get_job,
+    parquet_available,
+)
+from src.artifacts import ArtifactCacheError, ModelArtifactCache
+from src.logger import get_request_summary, log_model_load, logger
+from src.metrics import (
+    metrics_available,
+    record_prediction,
+    record_summary,
+    render_metrics,
+    suppress_metrics,
 )
+from src.middleware import RequestLoggingMiddleware
+from src.model_reload import ModelReloader
+from src.models import current_model_version, get_model_info, load_model
+from src.parallel_scoring import get_sharded_scorer
+from src.prediction_cache import get_prediction_cache
 from src.rate_limit import limiter
 from src.schemas import (
+    BatchJobStatus,
     BatchPredictionOutput,
     EmployeeInput,
-    EmployeePrediction,
     HealthCheck,
+    ModelStatus,
     PredictionOutput,
 )
+from src.scoring import score_csv_batch, score_employees, score_merged_chunk
+from src.streaming import (
+    STREAM_MEDIA_TYPES,
+    ChunkedCsvJoin,
+    format_header,
+    format_trailer,
+)
+from src.timing import get_stage_histograms, mark, record_offloaded, stage
+from src.warmup import warm_up_inference
 
 # Charger la configuration
 settings = get_settings()
 API_VERSION = settings.API_VERSION
 GRADIO_ENABLED = settings.GRADIO_ENABLED
 
+# Pool d'inférence hors boucle d'événements et micro-batching des
+# prédictions unitaires (démarrés dans le lifespan)
+inference_executor = InferenceExecutor.from_settings(settings)
+micro_batcher = MicroBatcher.from_settings(settings, executor=inference_executor)
+
+# Résumé périodique des requêtes (les lignes individuelles sont échantillonnées)
+request_summary = get_request_summary()
+
+# Scoring parallèle des gros /predict/batch (shards en mémoire partagée)
+sharded_scorer = get_sharded_scorer()
+
+# Jobs batch asynchrones (pool local, progression dans batch_jobs)
+batch_jobs = BatchJobManager.from_settings(settings)
+
+# Rechargement à chaud du modèle (admin et surveillance du cache)
+# Cache des prédictions unitaires, vidé à chaque rechargement du modèle
+prediction_cache = get_prediction_cache()
+model_reloader = ModelReloader.from_settings(
+    settings,
+    pools=[inference_executor, sharded_scorer],
+    on_swap=[prediction_cache.clear],
+)
+
+
+def overloaded_exception(retry_after: int) -> HTTPException:
+    """
+    Construit la réponse 503 du contrôle d'admission.
+
+    Args:
+        retry_after: Délai conseillé avant de réessayer (secondes).
+
+    Returns:
+        HTTPException 503 avec header Retry-After.
+    """
+    return HTTPException(
+        status_code=503,
+        detail={
+            "error": "Server overloaded",
+            "message": "Trop de prédictions en attente, réessayez plus tard.",
+        },
+        headers={"Retry-After": str(retry_after)},
+    )
+
 
 def conditional_rate_limit(
     limit: str,
@@ -75,16 +157,20 @@ async def lifespan(app: FastAPI):
     """
     Gestion du cycle de vie de l'application.
 
-    Charge le modèle au démarrage et le garde en cache.
+    Charge le modèle au démarrage, le préchauffe puis déclare l'API prête
+    (/ready) : seulement si le chargement et le préchauffage ont réussi.
     """
+    app.state.ready = False
     logger.info(
         "🚀 Démarrage de l'API Employee Turnover...", extra={"version": API_VERSION}
     )
 
     start_time = time.time()
+    ready = False
     try:
         # Pré-charger le modèle au démarrage
         model = load_model()
+        ready = True
         duration_ms = (time.time() - start_time) * 1000
 
         model_type = type(model).__name__
@@ -92,11 +178,76 @@ async def lifespan(app: FastAPI):
         logger.info("✅ Modèle chargé avec succès")
     except Exception as e:
         duration_ms = (time.time() - start_time) * 1000
-        log_model_load("Unknown", duration_ms, False)
+        model_type = "Unknown"
+        log_model_load(model_type, duration_ms, False)
         logger.error("Le modèle n'a pas pu être chargé", extra={"error": str(e)})
 
+    inference_executor.start()
+    # Workers forkés avant toute prédiction (préchauffage compris)
+    sharded_scorer.start()
+    model_reloader.start()
+    get_prediction_log_queue().start()
+    request_summary.start()
+    try:
+        # Reprend les jobs batch interrompus par un arrêt de l'API
+        batch_jobs.start(resume=settings.JOBS_RESUME_ON_START)
+    except Exception as e:
+        logger.warning("Jobs batch indisponibles", extra={"error": str(e)})
+    if settings.MICRO_BATCH_ENABLED:
+        await micro_batcher.start()
+
+    if settings.WARMUP_ENABLED:
+        # Trafic synthétique sur chaque chemin d'inférence : la première
+        # vraie requête ne paie pas l'initialisation
+        start_time = time.time()
+        try:
+            # Trafic synthétique hors des métriques de /metrics
+            with suppress_metrics():
+                timings = await warm_up_inference(
+                    inference_executor,
+                    micro_batcher,
+                    batch_rows=settings.WARMUP_BATCH_ROWS,
+                    rounds=settings.WARMUP_ROUNDS,
+                )
+            log_model_load(
+                model_type,
+                (time.time() - start_time) * 1000,
+                True,
+                phase="warmup",
+                steps_ms=timings,
+            )
+        except Exception as e:
+            # Un worker non préchauffé reste hors du load balancer
+            ready = False
+            log_model_load(
+                model_type,
+                (time.time() - start_time) * 1000,
+                False,
+                phase="warmup",
+                error=str(e),
+            )
+    app.state.ready = ready
+
     yield  # L'application tourne
 
+    app.state.ready = False
+
+    if micro_batcher.running:
+        logger.info("Micro-batching", extra=micro_batcher.stats())
+        await micro_batcher.stop()
+    model_reloader.stop()
+    inference_executor.shutdown()
+    sharded_scorer.shutdown()
+    batch_jobs.shutdown()
+
+    # Écrire les logs de prédiction encore en file avant l'arrêt
+    prediction_log_queue = get_prediction_log_queue()
+    prediction_log_queue.stop()
+    logger.info("Prediction logging", extra=prediction_log_queue.stats())
+
+    # Dernier intervalle du résumé des requêtes
+    request_summary.stop()
+
     logger.info("🛑 Arrêt de l'API")
 
 
@@ -144,34 +295,12 @@ app.add_middleware(
 )
 
 
-# Middleware de logging des requêtes
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """
-    Middleware pour logger toutes les requêtes HTTP.
-    """
-    start_time = time.time()
-
-    # Traiter la requête
-    response = await call_next(request)
-
-    # Calculer la durée
-    duration_ms = (time.time() - start_time) * 1000
-
-    # Logger
-    log_request(
-        method=request.method,
-        path=request.url.path,
-        status_code=response.status_code,
-        duration_ms=duration_ms,
-        client_host=request.client.host if request.client else None,
-    )
-
-    return response
+# Middleware de logging des requêtes (ASGI pur, le plus externe)
+app.add_middleware(RequestLoggingMiddleware)
 
 
 @app.get("/health", response_model=HealthCheck, tags=["Monitoring"])
-async def health_check():
+async def health_check(request: Request):
     """
     Health check endpoint pour monitoring.
 
@@ -191,6 +320,7 @@ async def health_check():
             model_loaded=model_info.get("cached", False),
             model_type=model_info.get("model_type", "Unknown"),
             version=API_VERSION,
+            ready=getattr(request.app.state, "ready", False),
         )
     except Exception as e:
         raise HTTPException(
@@ -203,6 +333,52 @@ async def health_check():
         )
 
 
+@app.get("/ready", tags=["Monitoring"])
+async def readiness_check(request: Request):
+    """
+    Readiness probe : 200 une fois le modèle chargé et préchauffé.
+
+    uvicorn n'accepte aucune connexion avant la fin du lifespan : un worker
+    qui démarre n'est simplement pas joignable.
+
+    Raises:
+        HTTPException: 503 si le modèle n'a pas pu être chargé ou
+            préchauffé au démarrage, et pendant l'arrêt.
+    """
+    if not getattr(request.app.state, "ready", False):
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "status": "not_ready",
+                "message": "Modèle non chargé ou préchauffage en échec",
+            },
+            headers={"Retry-After": "1"},
+        )
+    return {"status": "ready"}
+
+
+@app.get("/metrics", tags=["Monitoring"])
+async def metrics():
+    """
+    Métriques au format texte Prometheus (scrape).
+
+    Agrège tous les workers quand METRICS_MULTIPROC_DIR (ou server.py)
+    fournit un dossier partagé. Sans authentification, comme /health.
+
+    Raises:
+        HTTPException: 503 si prometheus_client n'est pas installé ou si
+            METRICS_ENABLED=False.
+    """
+    if not metrics_available():
+        raise HTTPException(
+            status_code=503,
+            detail={"status": "disabled", "message": "Métriques indisponibles"},
+        )
+    # Lecture des fichiers des workers hors de la boucle d'événements
+    content, content_type = await asyncio.to_thread(render_metrics)
+    return Response(content=content, media_type=content_type)
+
+
 @app.post(
     "/predict",
     response_model=PredictionOutput,
@@ -227,6 +403,7 @@ async def predict(request: Request, employee: EmployeeInput):
 
     Raises:
         HTTPException: 401 si API key invalide ou manquante.
+        HTTPException: 503 (+ Retry-After) si le pool d'inférence est saturé.
         HTTPException: 500 si erreur lors de la prédiction.
 
     Examples:
@@ -238,64 +415,63 @@ async def predict(request: Request, employee: EmployeeInput):
           -d '{...}'
         ```
     """
+    # Lecture du corps, JSON, Pydantic et dépendances (API key, rate limit)
+    mark("validation")
     try:
-        # 1. Charger le modèle
-        model = load_model()
-
-        # 2. Préprocessing
-        X = preprocess_for_prediction(employee)
-
-        # 3. Prédiction
-        prediction = int(model.predict(X)[0])
-
-        # 4. Probabilités (si le modèle supporte predict_proba)
-        try:
-            probabilities = model.predict_proba(X)[0]
-            prob_0 = float(probabilities[0])
-            prob_1 = float(probabilities[1])
-        except AttributeError:
-            # Si le modèle ne supporte pas predict_proba
-            prob_0 = 1.0 if prediction == 0 else 0.0
-            prob_1 = 1.0 if prediction == 1 else 0.0
-
-        # 5. Niveau de risque
-        if prob_1 < 0.3:
-            risk_level = "Low"
-        elif prob_1 < 0.7:
-            risk_level = "Medium"
-        else:
-            risk_level = "High"
-
-        # 6. Enregistrer dans la base de données
-        try:
-            from sqlalchemy import create_engine
-            from sqlalchemy.orm import sessionmaker
-
-            from db_models import MLLog
-
-            engine = create_engine(settings.DATABASE_URL)
-            Session = sessionmaker(bind=engine)
-            session = Session()
-
-            log_entry = MLLog(
-                input_json=employee.model_dump(),
-                prediction="Oui" if prediction == 1 else "Non",
+        # Même employé, même version du modèle : résultat déjà calculé
+        with stage("cache"):
+            model_version = current_model_version()
+            cache_key = prediction_cache.key_for(employee, model_version)
+            result = prediction_cache.get(cache_key) if cache_key else None
+
+        # 1-3. Préprocessing, prédiction, probabilités et niveau de risque,
+        # exécutés dans le pool d'inférence (un seul passage predict_proba)
+        if result is None:
+            start_time = time.perf_counter()
+            try:
+                if micro_batcher.running:
+                    # Regroupé avec les requêtes concurrentes
+                    result = await micro_batcher.submit(employee)
+                else:
+                    result = await inference_executor.run(score_employees, [employee])
+            except asyncio.QueueFull:
+                raise overloaded_exception(settings.INFERENCE_RETRY_AFTER_S)
+            except PoolSaturatedError as e:
+                raise overloaded_exception(e.retry_after)
+            # Attente (file, pool) + preprocess + model mesurés dans le pool
+            record_offloaded(result.timings, (time.perf_counter() - start_time) * 1000)
+
+            # Pas de mise en cache si le modèle a changé pendant la requête
+            if cache_key and result.model_version == model_version:
+                with stage("cache"):
+                    # Sans les durées de la requête qui l'a calculé
+                    prediction_cache.set(cache_key, result._replace(timings=None))
+
+        prediction = int(result.predictions[0])
+        prob_0 = float(result.probabilities[0, 0])
+        prob_1 = float(result.probabilities[0, 1])
+        risk_level = str(result.risk_levels[0])
+        request_summary.record_prediction(risk_level)
+        record_prediction("single", risk_level)
+
+        # 4. Enregistrer dans la base de données (écriture par lots en arrière-plan)
+        with stage("db_log"):
+            logged = get_prediction_log_queue().enqueue(
+                employee.model_dump(mode="json"), "Oui" if prediction == 1 else "Non"
             )
-            session.add(log_entry)
-            session.commit()
-            session.close()
-
-            logger.info(f"Prediction logged to database: {prediction}")
-        except Exception as db_error:
-            logger.warning(f"Failed to log prediction to database: {db_error}")
+        if not logged:
+            logger.warning("Prediction log dropped: database log queue is full")
 
         return PredictionOutput(
             prediction=prediction,
             probability_0=prob_0,
             probability_1=prob_1,
             risk_level=risk_level,
+            model_version=result.model_version,
         )
 
+    except HTTPException:
+        raise
     except Exception:
         logger.exception("Unexpected error during prediction")
         raise HTTPException(
@@ -339,6 +515,7 @@ async def predict_batch(
 
     Raises:
         HTTPException: 400 si les fichiers sont invalides.
+        HTTPException: 503 (+ Retry-After) si le pool d'inférence est saturé.
         HTTPException: 500 si erreur lors du traitement.
     """
     try:
@@ -347,81 +524,118 @@ async def predict_batch(
         eval_content = await eval_file.read()
         sirh_content = await sirh_file.read()
 
-        sondage_df = pd.read_csv(io.BytesIO(sondage_content))
-        eval_df = pd.read_csv(io.BytesIO(eval_content))
-        sirh_df = pd.read_csv(io.BytesIO(sirh_content))
-
-        logger.info(
-            f"Fichiers CSV chargés: sondage={len(sondage_df)}, "
-            f"eval={len(eval_df)}, sirh={len(sirh_df)} lignes"
+        # 2-5. Parsing, fusion, preprocessing, prédiction et sérialisation
+        # dans le pool d'inférence : la boucle d'événements reste disponible
+        content, summary = await inference_executor.run(
+            score_csv_batch, sondage_content, eval_content, sirh_content
         )
+        record_summary("batch", summary)
 
-        # 2. Fusionner les DataFrames
-        merged_df = merge_csv_dataframes(sondage_df, eval_df, sirh_df)
-        employee_ids = merged_df["original_employee_id"].tolist()
-        merged_df = merged_df.drop(columns=["original_employee_id"])
+        return Response(content=content, media_type="application/json")
 
-        # Supprimer la colonne cible si présente
-        if "a_quitte_l_entreprise" in merged_df.columns:
-            merged_df = merged_df.drop(columns=["a_quitte_l_entreprise"])
+    except PoolSaturatedError as e:
+        raise overloaded_exception(e.retry_after)
+    except pd.errors.EmptyDataError:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Empty CSV file",
+                "message": "Un des fichiers CSV est vide.",
+            },
+        )
+    except KeyError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Missing column",
+                "message": f"Colonne manquante dans les CSV: {e}",
+            },
+        )
+    except Exception as e:
+        logger.exception("Unexpected error during batch prediction")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Batch prediction failed",
+                "message": str(e),
+            },
+        )
 
-        logger.info(f"DataFrame fusionné: {len(merged_df)} employés")
 
-        # 3. Preprocessing
-        X = preprocess_dataframe_for_prediction(merged_df)
+async def score_stream_chunk(
+    merged_df: pd.DataFrame, output_format: str, batch_id: Optional[str]
+) -> tuple[bytes, dict, Optional[str]]:
+    """
+    Score un chunk du flux dans le pool d'inférence.
 
-        # 4. Charger le modèle et prédire
-        model = load_model()
-        predictions = model.predict(X.values)
-        probabilities = model.predict_proba(X.values)
-
-        # 5. Construire la réponse
-        results = []
-        risk_counts = {"Low": 0, "Medium": 0, "High": 0}
-        leave_count = 0
-
-        for i, emp_id in enumerate(employee_ids):
-            prob_stay = float(probabilities[i][0])
-            prob_leave = float(probabilities[i][1])
-            pred = int(predictions[i])
-
-            if prob_leave < 0.3:
-                risk = "Low"
-            elif prob_leave < 0.7:
-                risk = "Medium"
-            else:
-                risk = "High"
-
-            risk_counts[risk] += 1
-            if pred == 1:
-                leave_count += 1
-
-            results.append(
-                EmployeePrediction(
-                    employee_id=int(emp_id),
-                    prediction=pred,
-                    probability_stay=prob_stay,
-                    probability_leave=prob_leave,
-                    risk_level=risk,
-                )
+    Le statut HTTP est déjà envoyé : si le pool est saturé, le flux attend
+    Retry-After secondes et réessaie au lieu de répondre 503.
+    """
+    while True:
+        try:
+            content, summary, version = await inference_executor.run(
+                score_merged_chunk, merged_df, output_format, batch_id
             )
+        except PoolSaturatedError as e:
+            await asyncio.sleep(e.retry_after)
+            continue
+        record_summary("chunk", summary)
+        return content, summary, version
+
+
+@app.post(
+    "/predict/batch/stream",
+    tags=["Prediction"],
+    response_class=StreamingResponse,
+    dependencies=[Depends(verify_api_key)] if settings.is_api_key_required else [],
+)
+@conditional_rate_limit("5/minute")
+async def predict_batch_stream(
+    request: Request,
+    sondage_file: UploadFile = File(..., description="Fichier CSV du sondage"),
+    eval_file: UploadFile = File(..., description="Fichier CSV des évaluations"),
+    sirh_file: UploadFile = File(..., description="Fichier CSV SIRH"),
+    output_format: Literal["ndjson", "csv"] = Query(
+        "ndjson", alias="format", description="Format de sortie (ndjson ou csv)"
+    ),
+):
+    """
+    Endpoint de prédiction batch en streaming à partir de fichiers CSV.
 
-        summary = {
-            "total_stay": len(results) - leave_count,
-            "total_leave": leave_count,
-            "high_risk_count": risk_counts["High"],
-            "medium_risk_count": risk_counts["Medium"],
-            "low_risk_count": risk_counts["Low"],
-        }
+    **PROTÉGÉ PAR API KEY** : Requiert le header `X-API-Key` en production.
 
-        logger.info(f"Prédictions terminées: {summary}")
+    Variante de `/predict/batch` à mémoire bornée : les CSV sont lus par
+    chunks (STREAM_CHUNK_SIZE lignes), joints par identifiant employé,
+    scorés chunk par chunk et renvoyés au fil de l'eau. Une ligne par
+    employé (NDJSON ou CSV), puis un enregistrement final de résumé
+    (en CSV, une ligne de commentaire `# {...}`). Une erreur survenant
+    après le début du flux est signalée par un enregistrement final `error`.
 
-        return BatchPredictionOutput(
-            total_employees=len(results),
-            predictions=results,
-            summary=summary,
-        )
+    Args:
+        sondage_file: Fichier CSV contenant les données de sondage.
+        eval_file: Fichier CSV contenant les données d'évaluation.
+        sirh_file: Fichier CSV contenant les données SIRH.
+        output_format: "ndjson" (défaut) ou "csv".
+
+    Returns:
+        StreamingResponse: Prédictions puis résumé (header X-Batch-Id si
+        les prédictions sont enregistrées dans ml_logs).
+
+    Raises:
+        HTTPException: 400 si les fichiers sont invalides.
+    """
+    csv_join = ChunkedCsvJoin(
+        sondage_file.file,
+        eval_file.file,
+        sirh_file.file,
+        chunk_size=settings.STREAM_CHUNK_SIZE,
+    )
+    joined = iter(csv_join)
 
+    # Lire le premier chunk avant d'envoyer le statut : les fichiers vides
+    # ou incomplets donnent encore une erreur 400
+    try:
+        first_chunk = await asyncio.to_thread(next, joined, None)
     except pd.errors.EmptyDataError:
         raise HTTPException(
             status_code=400,
@@ -438,15 +652,313 @@ async def predict_batch(
                 "message": f"Colonne manquante dans les CSV: {e}",
             },
         )
+
+    batch_id = str(uuid.uuid4()) if settings.DB_LOG_BATCH_ENABLED else None
+
+    async def stream_predictions():
+        summary: Counter = Counter()
+        model_versions: set = set()
+        total_employees = 0
+        yield format_header(output_format)
+
+        try:
+            chunk = first_chunk
+            while chunk is not None:
+                content, chunk_summary, version = await score_stream_chunk(
+                    chunk, output_format, batch_id
+                )
+                summary.update(chunk_summary)
+                model_versions.add(version)
+                total_employees += len(chunk)
+                yield content
+                chunk = await asyncio.to_thread(next, joined, None)
+        except Exception as e:
+            logger.exception("Unexpected error during streaming batch prediction")
+            yield format_trailer(
+                {"error": "Batch prediction failed", "message": str(e)},
+                output_format,
+            )
+            return
+
+        logger.info(f"Prédictions streaming terminées: {total_employees} employés")
+        yield format_trailer(
+            {
+                "total_employees": total_employees,
+                "unmatched_rows": csv_join.unmatched,
+                "summary": dict(summary),
+                "batch_id": batch_id,
+                # Plusieurs versions si un rechargement a eu lieu pendant le flux
+                "model_versions": sorted(v for v in model_versions if v),
+            },
+            output_format,
+        )
+
+    return StreamingResponse(
+        stream_predictions(),
+        media_type=STREAM_MEDIA_TYPES[output_format],
+        headers={"X-Batch-Id": batch_id} if batch_id else None,
+    )
+
+
+def job_status(job: dict) -> BatchJobStatus:
+    """Construit le statut d'un job à partir de sa ligne batch_jobs."""
+    total_rows = job["total_rows"]
+    if job["status"] == SUCCEEDED:
+        progress = 1.0
+    elif total_rows:
+        progress = min(job["processed_rows"] / total_rows, 1.0)
+    else:
+        progress = 0.0
+
+    return BatchJobStatus(
+        job_id=job["id"],
+        status=job["status"],
+        output_format=job["output_format"],
+        total_rows=total_rows,
+        processed_rows=job["processed_rows"] or 0,
+        chunks_done=job["chunks_done"] or 0,
+        progress=progress,
+        summary=job["summary"],
+        error=job["error"],
+        result_url=(
+            f"/jobs/{job['id']}/result" if job["status"] == SUCCEEDED else None
+        ),
+        created_at=job["created_at"],
+        updated_at=job["updated_at"],
+    )
+
+
+def job_not_found(job_id: str) -> HTTPException:
+    """Construit la réponse 404 d'un job inconnu."""
+    return HTTPException(
+        status_code=404,
+        detail={"error": "Job not found", "message": f"Job inconnu: {job_id}"},
+    )
+
+
+@app.post(
+    "/jobs/batch",
+    response_model=BatchJobStatus,
+    status_code=202,
+    tags=["Jobs"],
+    dependencies=[Depends(verify_api_key)] if settings.is_api_key_required else [],
+)
+@conditional_rate_limit("5/minute")
+async def create_batch_job(
+    request: Request,
+    sondage_file: UploadFile = File(..., description="Fichier CSV du sondage"),
+    eval_file: UploadFile = File(..., description="Fichier CSV des évaluations"),
+    sirh_file: UploadFile = File(..., description="Fichier CSV SIRH"),
+    output_format: Literal["csv", "parquet"] = Query(
+        "csv", alias="format", description="Format du résultat (csv ou parquet)"
+    ),
+):
+    """
+    Crée un job de prédiction batch asynchrone.
+
+    **PROTÉGÉ PAR API KEY** : Requiert le header `X-API-Key` en production.
+
+    Pour les gros exports : les CSV sont enregistrés sur disque et traités
+    par chunks dans un pool local. La réponse (202) est immédiate ; suivre
+    la progression avec `GET /jobs/{job_id}` puis télécharger le résultat
+    avec `GET /jobs/{job_id}/result`.
+
+    Args:
+        sondage_file: Fichier CSV contenant les données de sondage.
+        eval_file: Fichier CSV contenant les données d'évaluation.
+        sirh_file: Fichier CSV contenant les données SIRH.
+        output_format: "csv" (défaut) ou "parquet".
+
+    Returns:
+        BatchJobStatus: Statut initial du job.
+
+    Raises:
+        HTTPException: 400 si le format Parquet est indisponible.
+        HTTPException: 503 si la base des jobs est indisponible.
+    """
+    if output_format == "parquet" and not parquet_available():
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Unsupported format",
+                "message": "Format Parquet indisponible (pyarrow non installé).",
+            },
+        )
+
+    try:
+        job_id = await asyncio.to_thread(
+            batch_jobs.create_job,
+            sondage_file.file,
+            eval_file.file,
+            sirh_file.file,
+            output_format,
+        )
+        job = await asyncio.to_thread(get_job, job_id)
     except Exception as e:
-        logger.exception("Unexpected error during batch prediction")
+        logger.exception("Unable to create batch job")
         raise HTTPException(
-            status_code=500,
+            status_code=503,
+            detail={"error": "Jobs unavailable", "message": str(e)},
+        )
+
+    return job_status(job)
+
+
+@app.get(
+    "/jobs/{job_id}",
+    response_model=BatchJobStatus,
+    tags=["Jobs"],
+    dependencies=[Depends(verify_api_key)] if settings.is_api_key_required else [],
+)
+async def get_batch_job(job_id: str):
+    """
+    Statut et progression d'un job batch.
+
+    Raises:
+        HTTPException: 404 si le job n'existe pas.
+    """
+    job = await asyncio.to_thread(get_job, job_id)
+    if job is None:
+        raise job_not_found(job_id)
+    return job_status(job)
+
+
+@app.get(
+    "/jobs/{job_id}/result",
+    tags=["Jobs"],
+    response_class=FileResponse,
+    dependencies=[Depends(verify_api_key)] if settings.is_api_key_required else [],
+)
+async def download_batch_job_result(job_id: str):
+    """
+    Télécharge le résultat d'un job terminé (CSV ou Parquet).
+
+    Raises:
+        HTTPException: 404 si le job n'existe pas.
+        HTTPException: 409 si le job n'est pas terminé avec succès.
+    """
+    job = await asyncio.to_thread(get_job, job_id)
+    if job is None:
+        raise job_not_found(job_id)
+    if job["status"] != SUCCEEDED:
+        raise HTTPException(
+            status_code=409,
             detail={
-                "error": "Batch prediction failed",
-                "message": str(e),
+                "error": "Job not finished",
+                "message": f"Job {job['status']}, résultat indisponible.",
+            },
+        )
+
+    extension, media_type = JOB_FORMATS[job["output_format"]]
+    return FileResponse(
+        job["result_path"],
+        media_type=media_type,
+        filename=f"predictions_{job_id}.{extension}",
+    )
+
+
+@app.post(
+    "/jobs/{job_id}/cancel",
+    response_model=BatchJobStatus,
+    status_code=202,
+    tags=["Jobs"],
+    dependencies=[Depends(verify_api_key)] if settings.is_api_key_required else [],
+)
+async def cancel_batch_job(job_id: str):
+    """
+    Annule un job batch (effectif avant le prochain chunk).
+
+    Raises:
+        HTTPException: 404 si le job n'existe pas.
+    """
+    job = await asyncio.to_thread(batch_jobs.cancel, job_id)
+    if job is None:
+        raise job_not_found(job_id)
+    return job_status(job)
+
+
+@app.get(
+    "/admin/model",
+    response_model=ModelStatus,
+    tags=["Admin"],
+    dependencies=[Depends(verify_api_key)] if settings.is_api_key_required else [],
+)
+async def get_model_status():
+    """
+    Version du modèle servie, état des rechargements et versions en cache.
+    """
+    status = await asyncio.to_thread(model_reloader.status)
+    return ModelStatus(**status, prediction_cache=prediction_cache.stats())
+
+
+@app.get(
+    "/admin/timings",
+    tags=["Admin"],
+    dependencies=[Depends(verify_api_key)] if settings.is_api_key_required else [],
+)
+async def get_stage_timings():
+    """
+    Histogrammes des durées par étape de /predict depuis le démarrage du worker.
+
+    Étapes : validation, cache, queue (micro-batcher / pool), preprocess,
+    model, db_log (mise en file) et db_insert (écriture en base, en
+    arrière-plan). Détail par requête dans l'en-tête Server-Timing.
+    """
+    return {
+        "enabled": settings.STAGE_TIMING_ENABLED,
+        "stages": get_stage_histograms().snapshot(),
+    }
+
+
+@app.post(
+    "/admin/model/reload",
+    response_model=ModelStatus,
+    status_code=202,
+    tags=["Admin"],
+    dependencies=[Depends(verify_api_key)] if settings.is_api_key_required else [],
+)
+async def reload_model(
+    version: Optional[str] = Query(
+        None, description="Version du cache à installer (sha256 ou préfixe)"
+    ),
+    refresh: bool = Query(
+        False, description="Télécharger la dernière version depuis HF Hub"
+    ),
+):
+    """
+    Recharge le modèle à chaud, sans redémarrer l'API.
+
+    **PROTÉGÉ PAR API KEY** : Requiert le header `X-API-Key` en production.
+
+    La version est chargée et préchauffée en arrière-plan puis installée
+    atomiquement : les requêtes en cours se terminent sur l'ancienne
+    version. Une version précise devient la version courante du cache
+    (conservée au redémarrage). Suivre l'état avec `GET /admin/model`.
+
+    Raises:
+        HTTPException: 404 si la version est absente du cache.
+        HTTPException: 409 si un rechargement est déjà en cours.
+    """
+    if version:
+        try:
+            await asyncio.to_thread(
+                ModelArtifactCache(settings.MODEL_CACHE_DIR).find, version
+            )
+        except ArtifactCacheError as e:
+            raise HTTPException(
+                status_code=404,
+                detail={"error": "Model version not found", "message": str(e)},
+            )
+
+    if not model_reloader.request_reload(version=version, refresh=refresh):
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "error": "Reload in progress",
+                "message": "Un rechargement du modèle est déjà en cours.",
             },
         )
+    return await asyncio.to_thread(model_reloader.status)
 
 
 if GRADIO_ENABLED:
@@ -465,11 +977,12 @@ if __name__ == "__main__":
     import uvicorn
 
     print("\U0001f680 Lancement de l'API en mode d\u00e9veloppement...")
+    print("\U0001f3ed Production multi-workers : python server.py")
     print("\U0001f4d6 Documentation : http://localhost:8000/docs")
     print("\U0001f3a8 Interface Gradio : http://localhost:8000/")
 
     uvicorn.run(
-        "app:app",
+        "api:app",
         host="0.0.0.0",
         port=8000,
         reload=True,
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime, func
+from sqlalchemy import Boolean, Column, Integer, String, JSON, DateTime, Text, func
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -17,3 +17,24 @@ class MLLog(Base):
     input_json = Column(JSON)  # Inputs flexibles (JSON for features variables)
     prediction = Column(String)  # Output ML ('Oui' or 'Non')
     created_at = Column(DateTime, default=func.now())  # Timestamp auto pour traçabilité
+    batch_id = Column(String(36), index=True)  # Lot /predict/batch (NULL pour /predict)
+
+
+class BatchJob(Base):
+    __tablename__ = "batch_jobs"
+    id = Column(String(36), primary_key=True)  # Job id (= batch_id dans ml_logs)
+    # Statut : pending, running, succeeded, failed, cancelled
+    status = Column(String(16), index=True)
+    output_format = Column(String(16))  # Format du résultat ('csv' ou 'parquet')
+    job_dir = Column(String)  # Dossier du job (CSV d'entrée, chunks, résultat)
+    total_rows = Column(Integer)  # Estimation du nombre d'employés (lignes sondage)
+    processed_rows = Column(Integer, default=0)  # Employés déjà scorés
+    chunks_done = Column(Integer, default=0)  # Chunks écrits sur disque (reprise)
+    cancel_requested = Column(Boolean, default=False)  # Annulation demandée
+    claimed_by = Column(String(32))  # Exécution qui détient le job (reprise)
+    lease_until = Column(DateTime)  # Fin du bail de cette exécution
+    summary = Column(JSON)  # Résumé des prédictions (job terminé)
+    result_path = Column(String)  # Fichier de résultat (job terminé)
+    error = Column(Text)  # Message d'erreur (job en échec)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
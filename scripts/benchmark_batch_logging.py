@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'écriture bulk des prédictions batch dans ml_logs.
+
+Écrit un lot synthétique (rééchantillonné depuis data/) dans la base
+DATABASE_URL via bulk_log_predictions (COPY FROM STDIN sur PostgreSQL,
+executemany sinon), puis supprime les lignes du lot.
+
+Usage:
+    poetry run python scripts/benchmark_batch_logging.py
+    DATABASE_URL=sqlite:///bench.db poetry run python scripts/benchmark_batch_logging.py --rows 10000
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+# Ajouter la racine du projet au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import delete  # noqa: E402
+
+from db_models import Base, MLLog  # noqa: E402
+from src.database import bulk_log_predictions, get_engine  # noqa: E402
+from src.preprocessing import merge_csv_dataframes  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+def _synthetic_inputs(n_rows: int) -> pd.DataFrame:
+    """Rééchantillonne les employés de data/ jusqu'à n_rows lignes."""
+    merged = merge_csv_dataframes(
+        pd.read_csv(os.path.join(DATA_DIR, "extrait_sondage.csv")),
+        pd.read_csv(os.path.join(DATA_DIR, "extrait_eval.csv")),
+        pd.read_csv(os.path.join(DATA_DIR, "extrait_sirh.csv")),
+    )
+    merged = merged.drop(columns=["a_quitte_l_entreprise"], errors="ignore")
+    return merged.sample(n_rows, replace=True, random_state=0).reset_index(drop=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+
+    inputs = _synthetic_inputs(args.rows)
+    predictions = np.random.default_rng(0).integers(0, 2, args.rows)
+    batch_id = str(uuid.uuid4())
+
+    start = time.perf_counter()
+    written = bulk_log_predictions(inputs, predictions, batch_id)
+    duration_s = time.perf_counter() - start
+
+    print(f"Base: {engine.dialect.name} ({engine.dialect.driver})")
+    print(
+        f"{written} lignes écrites en {duration_s:.2f} s "
+        f"({written / duration_s:,.0f} lignes/s)"
+    )
+
+    with engine.begin() as conn:
+        conn.execute(delete(MLLog.__table__).where(MLLog.batch_id == batch_id))
+
+
+if __name__ == "__main__":
+    main()
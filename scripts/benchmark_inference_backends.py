@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Benchmark des backends d'inférence (INFERENCE_BACKEND).
+
+Compare joblib (Pipeline imblearn), xgboost (booster.inplace_predict),
+numpy (évaluateur NumPy des arbres) et onnx (ONNX Runtime) : latence
+d'une ligne, coût par appel pour des batchs de 32 / 1k / 10k et débit
+sur 100k employés, puis le temps de chargement de chaque backend. Les
+probabilités sont comparées au Pipeline (identiques pour xgboost, à
+1e-6 pour numpy et onnx).
+
+Sans --model-file, un Pipeline SMOTE + XGBClassifier de même structure
+que le modèle de production est entraîné sur data/. Le backend onnx est
+ignoré si onnxruntime / onnxmltools ne sont pas installés.
+
+Usage:
+    poetry run python scripts/benchmark_inference_backends.py
+    poetry run python scripts/benchmark_inference_backends.py --model-file model_cache/<sha256>/model.pkl
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Ajouter la racine du projet au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.models import (  # noqa: E402
+    NATIVE_MODEL_NAME,
+    ONNX_MODEL_NAME,
+    NumpyTreeEnsemble,
+    OnnxBackend,
+    PipelineBackend,
+    export_onnx,
+    load_native_booster,
+    save_native_booster,
+    unwrap_native_booster,
+)
+from src.preprocessing import (  # noqa: E402
+    merge_csv_dataframes,
+    preprocess_batch_for_prediction,
+)
+
+
+def _features_and_target() -> tuple[np.ndarray, np.ndarray]:
+    """Features préprocessées et cible des employés de data/."""
+    data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
+    merged = merge_csv_dataframes(
+        pd.read_csv(os.path.join(data_dir, "extrait_sondage.csv")),
+        pd.read_csv(os.path.join(data_dir, "extrait_eval.csv")),
+        pd.read_csv(os.path.join(data_dir, "extrait_sirh.csv")),
+    )
+    y = (merged["a_quitte_l_entreprise"] == "Oui").astype(int).values
+    return preprocess_batch_for_prediction(merged), y
+
+
+def _train_pipeline(X: np.ndarray, y: np.ndarray):
+    """Pipeline SMOTE + XGBClassifier comparable au modèle de production."""
+    from imblearn.over_sampling import SMOTE
+    from imblearn.pipeline import Pipeline
+    from xgboost import XGBClassifier
+
+    pipeline = Pipeline(
+        [
+            ("sampler", SMOTE(random_state=42)),
+            ("clf", XGBClassifier(n_estimators=300, max_depth=6, random_state=42)),
+        ]
+    )
+    return pipeline.fit(X, y)
+
+
+def _time_per_call(func, number: int) -> float:
+    """Retourne le meilleur temps moyen par appel (en microsecondes)."""
+    timings = timeit.repeat(func, number=number, repeat=5)
+    return min(timings) / number * 1e6
+
+
+def build_backends(model_file: Path, tmp_dir: Path) -> dict:
+    """
+    Construit chaque backend et mesure son temps de chargement.
+
+    Returns:
+        Dict nom -> (backend, temps de chargement en secondes).
+    """
+    pipeline = joblib.load(model_file)
+    native = unwrap_native_booster(pipeline)
+    if native is pipeline:
+        sys.exit("❌ Modèle non compatible avec les backends xgboost / onnx")
+
+    native_file = tmp_dir / NATIVE_MODEL_NAME
+    save_native_booster(native, native_file)
+    loaders = {
+        "joblib": lambda: PipelineBackend(joblib.load(model_file)),
+        "xgboost": lambda: load_native_booster(native_file),
+        "numpy": lambda: NumpyTreeEnsemble.from_booster(
+            native.booster, native.iteration_range[1]
+        ),
+    }
+
+    try:
+        onnx_file = tmp_dir / ONNX_MODEL_NAME
+        export_onnx(pipeline, onnx_file)
+        OnnxBackend.from_file(onnx_file)
+        loaders["onnx"] = lambda: OnnxBackend.from_file(onnx_file)
+    except ImportError as e:
+        print(f"ℹ️ Backend onnx ignoré ({e})")
+
+    backends = {}
+    for name, loader in loaders.items():
+        start = time.perf_counter()
+        backend = loader()
+        backends[name] = (backend, time.perf_counter() - start)
+    return backends
+
+
+def check_parity(backends: dict, X: np.ndarray) -> None:
+    """Vérifie que chaque backend reproduit les probabilités du Pipeline."""
+    expected = backends["joblib"][0].predict_proba(X)
+    for name, (backend, _) in backends.items():
+        atol = 0.0 if name in ("joblib", "xgboost") else 1e-6
+        np.testing.assert_allclose(
+            backend.predict_proba(X), expected, rtol=0, atol=atol
+        )
+
+
+def benchmark_latency(backends: dict, X: np.ndarray, sizes: list[int]) -> None:
+    """Mesure le coût par appel de predict_proba selon la taille du batch."""
+    rng = np.random.default_rng(42)
+    names = list(backends)
+    print("=== predict_proba par appel (µs) ===")
+    print(f"  {'lignes':>7} | " + " | ".join(f"{name:>10}" for name in names))
+
+    for n_rows in sizes:
+        batch = X[rng.integers(0, len(X), size=n_rows)]
+        number = max(1, 20_000 // n_rows)
+        timings = [
+            _time_per_call(lambda: backends[name][0].predict_proba(batch), number)
+            for name in names
+        ]
+        print(f"  {n_rows:>7} | " + " | ".join(f"{t:>10.1f}" for t in timings))
+
+
+def benchmark_throughput(backends: dict, X: np.ndarray, n_rows: int) -> None:
+    """Mesure le débit (lignes/s) sur un batch de n_rows employés."""
+    batch = X[np.random.default_rng(0).integers(0, len(X), size=n_rows)]
+    print(f"=== Débit sur {n_rows} lignes ===")
+    for name, (backend, _) in backends.items():
+        duration_s = min(
+            timeit.repeat(lambda: backend.predict_proba(batch), number=1, repeat=3)
+        )
+        print(f"  {name:>8} : {n_rows / duration_s:>12,.0f} lignes/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model-file", help="Pipeline sérialisé (joblib)")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1, 32, 1_000, 10_000],
+        help="Tailles de batch pour la latence par appel",
+    )
+    parser.add_argument(
+        "--throughput-rows",
+        type=int,
+        default=100_000,
+        help="Taille du batch pour la mesure de débit",
+    )
+    args = parser.parse_args()
+
+    X, y = _features_and_target()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        if args.model_file:
+            model_file = Path(args.model_file)
+        else:
+            model_file = tmp_dir / "model.pkl"
+            joblib.dump(_train_pipeline(X, y), model_file)
+
+        backends = build_backends(model_file, tmp_dir)
+        check_parity(backends, X)
+
+        print("=== Chargement (processus déjà chaud) ===")
+        for name, (_, load_s) in backends.items():
+            print(f"  {name:>8} : {load_s * 1000:8.1f} ms")
+        print()
+        benchmark_latency(backends, X, args.sizes)
+        print()
+        benchmark_throughput(backends, X, args.throughput_rows)
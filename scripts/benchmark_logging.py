@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark du logging structuré (src.logger).
+
+1. Débit : --records appels log_request sur un logger synchrone (handlers
+   dans l'appelant) puis sur un logger avec file (QueueHandler) ; temps
+   côté appelant par log, temps jusqu'à l'écriture complète sur disque et
+   logs ignorés quand la file (LOG_QUEUE_SIZE) est pleine.
+2. Volume : octets écrits dans api.log sans échantillonnage puis avec
+   --sample-rates (le résumé périodique est compris).
+3. Latence : --requests requêtes GET /ready sur l'application FastAPI en
+   processus (httpx.ASGITransport, --concurrency clients), logging
+   synchrone, en file ou désactivé ; p50 / p99 côté client.
+
+La sortie console des loggers est redirigée vers /dev/null, les fichiers
+sont écrits dans un dossier temporaire.
+
+Usage:
+    poetry run python scripts/benchmark_logging.py
+    poetry run python scripts/benchmark_logging.py --records 200000 --requests 5000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+# Ajouter la racine du projet au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src import logger as logger_module  # noqa: E402
+from src.logger import log_request, setup_logger  # noqa: E402
+
+API_LOGGER = "employee_turnover_api"
+
+# Sortie console des loggers (ouverte pendant tout le benchmark)
+DEVNULL = open(os.devnull, "w")
+
+
+def configure(log_dir: Path, mode: str) -> logging.Logger:
+    """Reconfigure le logger de l'API : "sync", "queue" ou "off"."""
+    logger_module.stop_log_listeners()
+    logger_module._listeners.clear()
+    logger = logging.getLogger(API_LOGGER)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+    with redirect_stdout(DEVNULL):
+        setup_logger(API_LOGGER, log_dir=log_dir, queued=mode == "queue")
+    logger.disabled = mode == "off"
+    return logger
+
+
+def bench_throughput(
+    log_dir: Path, mode: str, n_records: int
+) -> tuple[float, float, int]:
+    """(µs par log côté appelant, secondes jusqu'à l'écriture, logs ignorés)."""
+    logger = configure(log_dir, mode)
+    start = time.perf_counter()
+    for i in range(n_records):
+        log_request("POST", "/predict", 200, 12.3, client_host="127.0.0.1", row=i)
+    caller_s = time.perf_counter() - start
+    logger_module.stop_log_listeners()
+    dropped = sum(getattr(handler, "dropped", 0) for handler in logger.handlers)
+    return caller_s / n_records * 1e6, time.perf_counter() - start, dropped
+
+
+def bench_volume(log_dir: Path, rates: str, n_records: int) -> int:
+    """Octets écrits dans api.log pour n_records requêtes /predict."""
+    logger_module.get_request_sampler.cache_clear()
+    logger_module.settings.LOG_SAMPLE_RATES = rates
+    summary = logger_module.get_request_summary()
+    configure(log_dir, "queue")
+    summary.start()
+    for i in range(n_records):
+        log_request("POST", "/predict", 200, 12.3, client_host="127.0.0.1", row=i)
+        summary.record_prediction("Low")
+    summary.stop()
+    logger_module.stop_log_listeners()
+    return (log_dir / "api.log").stat().st_size
+
+
+async def bench_latency(n_requests: int, concurrency: int) -> np.ndarray:
+    """Latences (ms) de GET /ready sur l'application en processus."""
+    import api
+
+    api.app.state.ready = True
+    latencies = []
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def client_loop(count: int) -> None:
+            for _ in range(count):
+                start = time.perf_counter()
+                await client.get("/ready")
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        await asyncio.gather(
+            *(client_loop(n_requests // concurrency) for _ in range(concurrency))
+        )
+    return np.array(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--sample-rates", default="/predict:2xx=0.001")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"=== Débit ({args.records:,} logs) ===")
+        print(
+            f"{'mode':<8} {'appelant (µs/log)':>18} {'écrit en (s)':>13} "
+            f"{'ignorés':>8}"
+        )
+        for mode in ("sync", "queue"):
+            per_log_us, total_s, dropped = bench_throughput(
+                Path(tmp) / mode, mode, args.records
+            )
+            print(f"{mode:<8} {per_log_us:>18.1f} {total_s:>13.2f} {dropped:>8}")
+
+        print(f"\n=== Volume ({args.records:,} requêtes /predict) ===")
+        print(f"{'LOG_SAMPLE_RATES':<22} {'api.log (Ko)':>13}")
+        for rates in ("", args.sample_rates):
+            size = bench_volume(Path(tmp) / f"volume-{len(rates)}", rates, args.records)
+            print(f"{rates or '(tout garder)':<22} {size / 1024:>13.1f}")
+
+        print(f"\n=== Latence GET /ready ({args.requests:,} requêtes) ===")
+        print(f"{'mode':<8} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+        for mode in ("off", "sync", "queue"):
+            configure(Path(tmp) / f"latency-{mode}", mode)
+            latencies = asyncio.run(bench_latency(args.requests, args.concurrency))
+            print(
+                f"{mode:<8} {np.percentile(latencies, 50):>10.2f} "
+                f"{np.percentile(latencies, 99):>10.2f}"
+            )
+        logger_module.stop_log_listeners()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark du middleware de logging des requêtes (src.middleware).
+
+Compare le débit de l'application FastAPI en processus (lifespan exécuté,
+httpx.ASGITransport, --concurrency clients) sur GET /health et POST
+/predict avec :
+- aucun middleware de logging (référence) ;
+- l'ancien middleware @app.middleware("http") (BaseHTTPMiddleware) ;
+- RequestLoggingMiddleware (ASGI pur) ;
+- RequestLoggingMiddleware avec l'instrumentation par étape (Server-Timing,
+  STAGE_TIMING_ENABLED), désactivée dans les autres modes.
+
+Les lignes de log sont désactivées (l'échantillonnage et le résumé
+agrégé restent actifs), le cache des prédictions et le rate limiting
+aussi : seul le coût du middleware diffère entre les modes.
+
+Usage:
+    poetry run python scripts/benchmark_middleware.py
+    poetry run python scripts/benchmark_middleware.py --requests 20000 --concurrency 32
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+os.environ.update(
+    PREDICTION_CACHE_ENABLED="False",
+    GRADIO_ENABLED="False",
+    DEBUG="True",  # rate limiting et authentification désactivés
+)
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+from starlette.middleware import Middleware  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+# Ajouter la racine du projet au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.config import get_settings  # noqa: E402
+from src.logger import log_request  # noqa: E402
+from src.middleware import RequestLoggingMiddleware  # noqa: E402
+from src.schemas import EmployeeInput  # noqa: E402
+
+API_LOGGER = "employee_turnover_api"
+
+
+async def legacy_log_requests(request, call_next):
+    """Ancien middleware @app.middleware("http") de api.py."""
+    start_time = time.time()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    log_request(
+        method=request.method,
+        path=request.url.path,
+        route=getattr(route, "path", None),
+        status_code=response.status_code,
+        duration_ms=(time.time() - start_time) * 1000,
+        client_host=request.client.host if request.client else None,
+    )
+    return response
+
+
+MODES = {
+    "aucun": None,
+    "BaseHTTPMiddleware": Middleware(BaseHTTPMiddleware, dispatch=legacy_log_requests),
+    "ASGI": Middleware(RequestLoggingMiddleware, timing=False),
+    "ASGI + étapes": Middleware(RequestLoggingMiddleware, timing=True),
+}
+
+
+def use_middleware(app, mode: str) -> None:
+    """Remplace le middleware de logging de l'application."""
+    # Collecte des durées dans les tâches du pool d'inférence
+    get_settings().STAGE_TIMING_ENABLED = mode == "ASGI + étapes"
+    app.user_middleware = [
+        middleware
+        for middleware in app.user_middleware
+        if middleware.cls not in (RequestLoggingMiddleware, BaseHTTPMiddleware)
+    ]
+    if MODES[mode] is not None:
+        app.user_middleware.insert(0, MODES[mode])
+    # Pile reconstruite à la prochaine requête
+    app.middleware_stack = None
+
+
+async def throughput(
+    client: httpx.AsyncClient, request: dict, n_requests: int, concurrency: int
+) -> tuple[float, np.ndarray]:
+    """(requêtes/s, latences en ms) pour n_requests requêtes concurrentes."""
+    latencies = []
+
+    async def client_loop(count: int) -> None:
+        for _ in range(count):
+            start = time.perf_counter()
+            response = await client.request(**request)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(client_loop(n_requests // concurrency) for _ in range(concurrency))
+    )
+    return len(latencies) / (time.perf_counter() - start), np.array(latencies)
+
+
+async def run(args) -> None:
+    import api
+
+    requests = {
+        "GET /health": {"method": "GET", "url": "/health"},
+        "POST /predict": {
+            "method": "POST",
+            "url": "/predict",
+            "json": EmployeeInput.model_config["json_schema_extra"]["example"],
+        },
+    }
+
+    async with api.app.router.lifespan_context(api.app):
+        logging.getLogger(API_LOGGER).disabled = True
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            for name, request in requests.items():
+                print(f"\n=== {name} ({args.requests:,} requêtes) ===")
+                print(
+                    f"{'middleware':<20} {'req/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9}"
+                )
+                for mode in MODES:
+                    use_middleware(api.app, mode)
+                    # Tour de chauffe (pile de middlewares, caches)
+                    await throughput(
+                        client, request, args.concurrency, args.concurrency
+                    )
+                    rps, latencies = await throughput(
+                        client, request, args.requests, args.concurrency
+                    )
+                    print(
+                        f"{mode:<20} {rps:>9,.0f} {np.percentile(latencies, 50):>9.2f} "
+                        f"{np.percentile(latencies, 99):>9.2f}"
+                    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
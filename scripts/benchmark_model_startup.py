@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark du démarrage à froid de load_model.
+
+Chaque mesure tourne dans un nouveau processus Python (import de l'API
+exclu) pour comparer :
+- hub : téléchargement / revalidation HF Hub puis mise à jour du cache
+  (MODEL_CACHE_REFRESH=True)
+- cache : version courante du cache local, sha256 vérifié
+- offline : cache local sans aucun accès réseau (MODEL_OFFLINE=True)
+
+Usage:
+    poetry run python scripts/benchmark_model_startup.py
+    poetry run python scripts/benchmark_model_startup.py --modes cache offline --repeat 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Code exécuté dans le processus mesuré (temps de load_model uniquement)
+CHILD_CODE = """
+import time
+from src.models import load_model
+start = time.perf_counter()
+load_model()
+print(time.perf_counter() - start)
+"""
+
+MODES = {
+    "hub": {"MODEL_CACHE_REFRESH": "True", "MODEL_OFFLINE": "False"},
+    "cache": {"MODEL_CACHE_REFRESH": "False", "MODEL_OFFLINE": "False"},
+    "offline": {"MODEL_CACHE_REFRESH": "False", "MODEL_OFFLINE": "True"},
+}
+
+
+def measure(mode: str) -> float:
+    """Mesure un démarrage à froid (secondes) dans un processus neuf."""
+    env = {**os.environ, **MODES[mode]}
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD_CODE],
+        cwd=ROOT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print("=== Démarrage à froid de load_model ===")
+    print(f"  {'mode':>8} | {'médiane (s)':>11} | {'min (s)':>8}")
+    for mode in args.modes:
+        timings = [measure(mode) for _ in range(args.repeat)]
+        print(
+            f"  {mode:>8} | {statistics.median(timings):>11.3f} | {min(timings):>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark du scoring batch parallèle par shards (src.parallel_scoring).
+
+Rééchantillonne les employés de data/ jusqu'à --rows lignes, puis compare
+le scoring d'un bloc (preprocessing + predict_proba du modèle configuré) au
+ShardedScorer avec 1, 2, 4 et N processus. Vérifie que les probabilités
+sont identiques et affiche le temps, le débit, l'accélération et
+l'efficacité (accélération / processus, 1.00 = passage à l'échelle
+linéaire). Seuls les cœurs utilisables par le processus (affinité, taskset)
+comptent : au-delà, les processus se partagent les mêmes cœurs.
+
+Usage:
+    poetry run python scripts/benchmark_parallel_scoring.py
+    poetry run python scripts/benchmark_parallel_scoring.py --rows 200000 --workers 1 2 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Ajouter la racine du projet au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.models import load_model, predict_with_model  # noqa: E402
+from src.parallel_scoring import ShardedScorer  # noqa: E402
+from src.preprocessing import (  # noqa: E402
+    merge_csv_dataframes,
+    preprocess_batch_for_prediction,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+def _synthetic_inputs(n_rows: int) -> pd.DataFrame:
+    """Rééchantillonne les employés de data/ jusqu'à n_rows lignes."""
+    merged = merge_csv_dataframes(
+        pd.read_csv(os.path.join(DATA_DIR, "extrait_sondage.csv")),
+        pd.read_csv(os.path.join(DATA_DIR, "extrait_eval.csv")),
+        pd.read_csv(os.path.join(DATA_DIR, "extrait_sirh.csv")),
+    )
+    return merged.sample(n_rows, replace=True, random_state=0).reset_index(drop=True)
+
+
+def usable_cores() -> int:
+    """Cœurs utilisables par le processus (affinité CPU), sinon cpu_count."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def main() -> None:
+    cores = usable_cores()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=sorted({1, 2, 4, cores})
+    )
+    parser.add_argument("--shard-rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    inputs = _synthetic_inputs(args.rows)
+    model = load_model()
+    print(
+        f"{args.rows:,} lignes, {cores} cœurs utilisables "
+        f"({os.cpu_count()} sur l'hôte), modèle {type(model).__name__}\n"
+    )
+
+    start = time.perf_counter()
+    expected = predict_with_model(model, preprocess_batch_for_prediction(inputs))
+    baseline_s = time.perf_counter() - start
+
+    print(
+        f"{'mode':<14} {'temps (s)':>10} {'lignes/s':>12} {'accélération':>13} "
+        f"{'efficacité':>11}"
+    )
+    print(
+        f"{'un bloc':<14} {baseline_s:>10.2f} {args.rows / baseline_s:>12,.0f} "
+        f"{1:>12.2f}x {1:>11.2f}"
+    )
+    for workers in args.workers:
+        # Le pool est démarré avant la mesure (fork + chargement du modèle)
+        scorer = ShardedScorer(
+            max_workers=workers, min_rows=1, shard_rows=args.shard_rows
+        )
+        scorer.start()
+        try:
+            start = time.perf_counter()
+            result = scorer.score(inputs)
+            duration_s = time.perf_counter() - start
+        finally:
+            scorer.shutdown()
+
+        assert np.array_equal(result.probabilities, expected.probabilities)
+        speedup = baseline_s / duration_s
+        print(
+            f"{f'{workers} processus':<14} {duration_s:>10.2f} "
+            f"{args.rows / duration_s:>12,.0f} {speedup:>12.2f}x "
+            f"{speedup / workers:>11.2f}"
+        )
+
+    if max(args.workers) > cores:
+        print(
+            f"\n⚠️ {cores} cœur(s) utilisable(s) : les mesures au-delà ne montrent "
+            "pas le passage à l'échelle"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark du preprocessing d'inférence.
+
+Compare le pipeline pandas historique (create_input_dataframe ->
+engineer_features -> encode_and_scale) au plan précompilé FeaturePlan,
+pour une ligne et pour des batchs de 1k / 100k / 1M employés.
+
+Usage:
+    poetry run python scripts/benchmark_preprocessing.py
+    poetry run python scripts/benchmark_preprocessing.py --sizes 1000 100000
+"""
+import argparse
+import os
+import sys
+import time
+import timeit
+
+import numpy as np
+import pandas as pd
+
+# Ajouter la racine du projet au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.preprocessing import (  # noqa: E402
+    create_input_dataframe,
+    encode_and_scale,
+    engineer_features,
+    get_feature_plan,
+    merge_csv_dataframes,
+    preprocess_batch_for_prediction,
+)
+from src.schemas import EmployeeInput  # noqa: E402
+
+
+def _example_employee() -> EmployeeInput:
+    """Construit l'employé d'exemple du schéma Pydantic."""
+    example = EmployeeInput.model_config["json_schema_extra"]["example"]
+    return EmployeeInput(**example)
+
+
+def _time_per_call(func, number: int) -> float:
+    """Retourne le meilleur temps moyen par appel (en microsecondes)."""
+    timings = timeit.repeat(func, number=number, repeat=5)
+    return min(timings) / number * 1e6
+
+
+def benchmark_single_row() -> None:
+    """Mesure la latence de preprocessing d'une ligne."""
+    employee = _example_employee()
+    plan = get_feature_plan()
+
+    def pandas_path():
+        df = engineer_features(create_input_dataframe(employee))
+        return encode_and_scale(df).values
+
+    def plan_path():
+        return plan.transform_employee(employee)
+
+    assert np.array_equal(pandas_path(), plan_path())
+
+    pandas_us = _time_per_call(pandas_path, number=50)
+    plan_us = _time_per_call(plan_path, number=5000)
+
+    print("=== Preprocessing 1 ligne ===")
+    print(f"  pandas      : {pandas_us:10.1f} µs/appel")
+    print(f"  FeaturePlan : {plan_us:10.1f} µs/appel")
+    print(f"  speedup     : {pandas_us / plan_us:10.1f}x")
+
+
+def _synthetic_batch(n_rows: int) -> pd.DataFrame:
+    """Construit un batch de n_rows employés en rééchantillonnant data/."""
+    data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
+    merged = merge_csv_dataframes(
+        pd.read_csv(os.path.join(data_dir, "extrait_sondage.csv")),
+        pd.read_csv(os.path.join(data_dir, "extrait_eval.csv")),
+        pd.read_csv(os.path.join(data_dir, "extrait_sirh.csv")),
+    )
+    rng = np.random.default_rng(42)
+    indices = rng.integers(0, len(merged), size=n_rows)
+    return merged.iloc[indices].reset_index(drop=True)
+
+
+def benchmark_batch(sizes: list[int], skip_pandas_above: int) -> None:
+    """Mesure le débit du preprocessing batch."""
+    print("=== Preprocessing batch ===")
+    print(
+        f"  {'lignes':>9} | {'pandas (s)':>10} | {'vectorisé (s)':>13} | {'speedup':>7}"
+    )
+
+    for n_rows in sizes:
+        df = _synthetic_batch(n_rows)
+
+        start = time.perf_counter()
+        X = preprocess_batch_for_prediction(df)
+        vectorized_s = time.perf_counter() - start
+
+        if n_rows <= skip_pandas_above:
+            start = time.perf_counter()
+            expected = encode_and_scale(engineer_features(df)).values
+            pandas_s = time.perf_counter() - start
+            assert np.array_equal(X, expected)
+            print(
+                f"  {n_rows:>9} | {pandas_s:>10.3f} | {vectorized_s:>13.3f} | "
+                f"{pandas_s / vectorized_s:>6.1f}x"
+            )
+        else:
+            print(f"  {n_rows:>9} | {'-':>10} | {vectorized_s:>13.3f} | {'-':>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1_000, 100_000, 1_000_000],
+        help="Tailles de batch à mesurer",
+    )
+    parser.add_argument(
+        "--skip-pandas-above",
+        type=int,
+        default=1_000_000,
+        help="Ne pas mesurer le pipeline pandas au-delà de cette taille",
+    )
+    args = parser.parse_args()
+
+    benchmark_single_row()
+    print()
+    benchmark_batch(args.sizes, args.skip_pandas_above)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark du débit de server.py selon le nombre de workers.
+
+Pour chaque nombre de workers (1, 2, 4, N cœurs par défaut), démarre
+server.py, attend /ready, envoie des /predict concurrents pendant une
+durée fixe puis affiche le débit, les latences p50 / p99 et la mémoire
+réellement occupée par worker (PSS : pages partagées divisées entre les
+processus qui les partagent, Linux uniquement).
+
+Le cache des prédictions est désactivé : chaque requête passe par le modèle.
+
+Usage:
+    poetry run python scripts/benchmark_server_workers.py
+    poetry run python scripts/benchmark_server_workers.py --workers 1 2 4 8 --duration 20
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+# Ajouter la racine du projet au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.config import get_settings  # noqa: E402
+from src.schemas import EmployeeInput  # noqa: E402
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def pss_mb(pid: int) -> float:
+    """PSS (Mo) d'un processus, 0 si /proc n'est pas disponible."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def worker_pids(master_pid: int) -> list[int]:
+    """Workers forkés par le maître (Linux uniquement)."""
+    try:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+            return [int(pid) for pid in f.read().split()]
+    except OSError:
+        return []
+
+
+def wait_ready(url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/ready", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"{url} pas prêt après {timeout} s")
+
+
+async def drive_load(
+    url: str, api_key: str, concurrency: int, duration: float
+) -> tuple[int, list[float]]:
+    """concurrency clients en boucle pendant duration secondes."""
+    payload = EmployeeInput.model_config["json_schema_extra"]["example"]
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        nonlocal errors
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            response = await client.post(f"{url}/predict", json=payload)
+            if response.status_code == 200:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        headers={"X-API-Key": api_key}, limits=limits, timeout=30
+    ) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+    return errors, latencies
+
+
+def run_case(args, workers: int) -> dict:
+    url = f"http://127.0.0.1:{args.port}"
+    env = {
+        **os.environ,
+        "PREDICTION_CACHE_ENABLED": "False",
+        "GRADIO_ENABLED": "False",
+        "DEBUG": "True",  # rate limiting désactivé
+    }
+    process = subprocess.Popen(
+        [sys.executable, "server.py", "--workers", str(workers)]
+        + ["--host", "127.0.0.1", "--port", str(args.port)],
+        cwd=ROOT_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(url, timeout=120)
+        time.sleep(1)  # tous les workers ont terminé leur préchauffage
+        errors, latencies = asyncio.run(
+            drive_load(url, get_settings().API_KEY, args.concurrency, args.duration)
+        )
+        pids = worker_pids(process.pid)
+        return {
+            "workers": workers,
+            "rps": len(latencies) / args.duration,
+            "p50": float(np.percentile(latencies, 50)) if latencies else 0.0,
+            "p99": float(np.percentile(latencies, 99)) if latencies else 0.0,
+            "errors": errors,
+            "master_mb": pss_mb(process.pid),
+            "worker_mb": (sum(pss_mb(pid) for pid in pids) / len(pids)) if pids else 0,
+        }
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=60)
+
+
+def main() -> None:
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, cores}),
+    )
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=4 * cores)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(
+        f"{cores} cœurs, {args.concurrency} clients, {args.duration:.0f} s par essai\n"
+    )
+    print(
+        f"{'workers':>8} {'req/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10} "
+        f"{'erreurs':>8} {'PSS maître':>11} {'PSS/worker':>11}"
+    )
+    for workers in args.workers:
+        result = run_case(args, workers)
+        print(
+            f"{result['workers']:>8} {result['rps']:>10.1f} {result['p50']:>10.1f} "
+            f"{result['p99']:>10.1f} {result['errors']:>8} "
+            f"{result['master_mb']:>9.0f} Mo {result['worker_mb']:>8.0f} Mo"
+        )
+
+
+if __name__ == "__main__":
+    main()
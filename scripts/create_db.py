@@ -10,9 +10,10 @@ Usage:
 
 Tables créées:
     - dataset : Stockage des données d'entraînement (features_json, target)
-    - ml_logs : Logs des prédictions de l'API (inputs, outputs, timestamps)
+    - ml_logs : Logs des prédictions de l'API (inputs, outputs, timestamps, lot)
+    - batch_jobs : Jobs de prédiction batch asynchrones (statut, progression)
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 
 from db_models import Base
 from src.config import get_settings
@@ -28,10 +29,34 @@ def main():
     # Création de toutes les tables
     Base.metadata.create_all(engine)
 
+    # Migration des tables existantes (colonnes ajoutées depuis)
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "ALTER TABLE ml_logs ADD COLUMN IF NOT EXISTS batch_id VARCHAR(36)"
+                )
+            )
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_ml_logs_batch_id "
+                    "ON ml_logs (batch_id)"
+                )
+            )
+            # Bail des jobs batch (reprise entre workers)
+            conn.execute(
+                text(
+                    "ALTER TABLE batch_jobs "
+                    "ADD COLUMN IF NOT EXISTS claimed_by VARCHAR(32), "
+                    "ADD COLUMN IF NOT EXISTS lease_until TIMESTAMP"
+                )
+            )
+
     print("✅ Base de données et tables créées avec succès !")
     print("📊 Tables créées :")
     print("   - dataset : Stockage des données d'entraînement")
     print("   - ml_logs : Logs des prédictions de l'API")
+    print("   - batch_jobs : Jobs de prédiction batch asynchrones")
     print("\n💡 Prochaine étape : Insérer les données avec insert_dataset.py")
 
 
@@ -4,22 +4,48 @@ Script pour insérer le dataset complet dans PostgreSQL.
 
 Ce script :
 1. Lit les fichiers CSV (sondage, eval, sirh)
-2. Fusionne les données selon les clés communes
-3. Insère dans la table dataset de PostgreSQL
+2. Fusionne les données par identifiant employé (comme merge_csv_dataframes)
+3. Insère dans la table dataset en bulk : COPY FROM STDIN sur PostgreSQL,
+   INSERT multi-lignes en executemany sinon (SQLite), par chunks
+
+Par défaut la table est vidée et rechargée dans une seule transaction : un
+échec en cours de chargement laisse la table intacte. Avec --append, les
+chunks sont validés un par un et peuvent être chargés en parallèle
+(--workers).
+
+Usage:
+    poetry run python scripts/insert_dataset.py
+    poetry run python scripts/insert_dataset.py --chunk-size 50000
+    poetry run python scripts/insert_dataset.py --append --workers 4
 """
+import argparse
+import json
 import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from src.config import get_settings
+from sqlalchemy import create_engine, insert, text
+
+# Ajouter la racine du projet au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
+from db_models import Dataset  # noqa: E402
+from src.config import get_settings  # noqa: E402
+from src.database import (  # noqa: E402
+    copy_json_rows,
+    records_to_json_lines,
+    supports_copy,
+)
+from src.preprocessing import merge_csv_dataframes  # noqa: E402
 
-def load_csv_files():
+
+def load_csv_files(data_dir="data"):
     """Charge les fichiers CSV."""
     print("📂 Chargement des fichiers CSV...")
 
     # Chemins des fichiers
-    data_dir = "data"
     sondage_file = os.path.join(data_dir, "extrait_sondage.csv")
     eval_file = os.path.join(data_dir, "extrait_eval.csv")
     sirh_file = os.path.join(data_dir, "extrait_sirh.csv")
@@ -37,15 +63,12 @@ def load_csv_files():
 
 
 def merge_datasets(df_sondage, df_eval, df_sirh):
-    """Fusionne les datasets selon les clés communes."""
+    """Fusionne les datasets par identifiant employé."""
     print("🔗 Fusion des datasets...")
 
-    # Les datasets semblent déjà avoir le même nombre de lignes et être dans le même ordre
-    # On peut les concaténer horizontalement
-    df_merged = pd.concat([df_sondage, df_eval, df_sirh], axis=1)
-
-    # Supprimer les colonnes dupliquées si elles existent
-    df_merged = df_merged.loc[:, ~df_merged.columns.duplicated()]
+    # Même jointure sur l'identifiant que l'API (et non une concaténation
+    # positionnelle qui suppose des fichiers alignés ligne à ligne)
+    df_merged = merge_csv_dataframes(df_sondage, df_eval, df_sirh)
 
     print(
         f"✅ Dataset fusionné: {len(df_merged)} lignes, {len(df_merged.columns)} colonnes"
@@ -65,13 +88,13 @@ def prepare_for_db(df):
 
     if target_col in df.columns:
         features_df = df.drop(columns=[target_col])
-        target_df = df[target_col]
+        target_df = df[target_col].astype(str)
     else:
         print(
             "⚠️ Colonne target non trouvée, utilisation de toutes les colonnes comme features"
         )
         features_df = df
-        target_df = pd.Series(["Non"] * len(df))  # Valeur par défaut
+        target_df = pd.Series(["Non"] * len(df), index=df.index)  # Valeur par défaut
 
     print(f"✅ Features: {len(features_df.columns)} colonnes")
     print(f"✅ Target: {len(target_df)} valeurs")
@@ -79,64 +102,147 @@ def prepare_for_db(df):
     return features_df, target_df
 
 
-def insert_into_db(features_df, target_df, db_url):
-    """Insère les données dans PostgreSQL."""
+def truncate_dataset(conn):
+    """Vide la table dataset (TRUNCATE sur PostgreSQL) dans la transaction."""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(f"TRUNCATE TABLE {Dataset.__tablename__} RESTART IDENTITY"))
+    else:
+        conn.execute(text(f"DELETE FROM {Dataset.__tablename__}"))
+
+
+def insert_chunk(engine, features_df, target_df, conn=None):
+    """
+    Insère un chunk en une opération bulk et retourne le nombre de lignes.
+
+    Avec conn, le chunk est écrit dans la transaction de cette connexion
+    (validée par l'appelant) ; sinon dans sa propre transaction.
+    """
+    json_lines = records_to_json_lines(features_df)
+    targets = target_df.tolist()
+
+    if supports_copy(engine):
+        copy_json_rows(
+            engine,
+            Dataset.__tablename__,
+            ["features_json", "target"],
+            json_lines,
+            targets,
+            connection=conn,
+        )
+    else:
+        rows = [
+            {"features_json": json.loads(line), "target": target}
+            for line, target in zip(json_lines, targets)
+        ]
+        if conn is not None:
+            conn.execute(insert(Dataset.__table__), rows)
+        else:
+            with engine.begin() as chunk_conn:
+                chunk_conn.execute(insert(Dataset.__table__), rows)
+
+    return len(json_lines)
+
+
+def insert_into_db(
+    features_df, target_df, db_url, chunk_size=10000, workers=1, truncate=True
+):
+    """
+    Insère les données dans la table dataset en bulk.
+
+    Avec truncate, la table est vidée et rechargée dans une seule
+    transaction (chargement séquentiel) : en cas d'erreur, rien n'est
+    modifié. Sinon chaque chunk est validé séparément.
+
+    Returns:
+        Nombre de lignes insérées.
+    """
     print("💾 Insertion en base de données...")
 
-    # Créer la connexion
+    if truncate and workers > 1:
+        # Une transaction = une connexion
+        print("ℹ️ Rechargement complet: une seule transaction (workers=1)")
+        workers = 1
+
     engine = create_engine(db_url)
-    Session = sessionmaker(bind=engine)
-    session = Session()
+    if engine.dialect.name == "sqlite" and workers > 1:
+        # SQLite n'accepte qu'un écrivain à la fois
+        print("ℹ️ SQLite: chargement séquentiel (workers=1)")
+        workers = 1
+    elif workers > 1:
+        engine = create_engine(db_url, pool_size=workers, max_overflow=0)
+
+    chunks = [
+        (features_df.iloc[rows], target_df.iloc[rows])
+        for rows in (
+            slice(start, start + chunk_size)
+            for start in range(0, len(features_df), chunk_size)
+        )
+    ]
 
+    start_time = time.perf_counter()
+    inserted_count = 0
     try:
-        # Importer le modèle
-        from db_models import Dataset
-
-        # Vider la table existante (optionnel, pour éviter les doublons)
-        session.query(Dataset).delete()
-        session.commit()
-        print("🗑️ Table dataset vidée")
-
-        # Insérer les données
-        inserted_count = 0
-        for idx, row in features_df.iterrows():
-            # Convertir la ligne en dict JSON
-            features_dict = row.to_dict()
-
-            # Nettoyer les valeurs (remplacer NaN par None)
-            features_dict = {
-                k: (v if pd.notna(v) else None) for k, v in features_dict.items()
-            }
-
-            # Récupérer la target
-            target = str(target_df.iloc[idx]) if idx < len(target_df) else "Non"
-
-            # Créer l'enregistrement
-            dataset_entry = Dataset(features_json=features_dict, target=target)
-
-            session.add(dataset_entry)
-            inserted_count += 1
-
-            # Commit par batch de 100 pour performance
-            if inserted_count % 100 == 0:
-                session.commit()
-                print(f"📊 {inserted_count} enregistrements insérés...")
-
-        # Commit final
-        session.commit()
-        print(f"✅ Insertion terminée: {inserted_count} enregistrements")
+        if truncate:
+            # Vider la table (pour éviter les doublons) et recharger en une
+            # transaction : un échec annule aussi le TRUNCATE
+            with engine.begin() as conn:
+                truncate_dataset(conn)
+                print("🗑️ Table dataset vidée (validé en fin de chargement)")
+                for chunk in chunks:
+                    inserted_count += insert_chunk(engine, *chunk, conn=conn)
+                    print(f"📊 {inserted_count} enregistrements insérés...")
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for count in pool.map(
+                    lambda chunk: insert_chunk(engine, *chunk), chunks
+                ):
+                    inserted_count += count
+                    print(f"📊 {inserted_count} enregistrements insérés...")
+        duration_s = time.perf_counter() - start_time
+
+        rate = inserted_count / duration_s if duration_s > 0 else float("inf")
+        print(
+            f"✅ Insertion terminée: {inserted_count} enregistrements "
+            f"en {duration_s:.2f} s ({rate:,.0f} lignes/s)"
+        )
+        return inserted_count
 
     except Exception as e:
-        session.rollback()
         print(f"❌ Erreur lors de l'insertion: {e}")
+        if truncate:
+            print("↩️ Transaction annulée: la table dataset n'a pas été modifiée")
+        else:
+            print(
+                f"⚠️ Mode --append: au moins {inserted_count} enregistrements "
+                "déjà validés restent dans la table dataset"
+            )
         raise
     finally:
-        session.close()
+        engine.dispose()
 
 
-def main():
+def parse_args(argv=None):
+    """Parse les arguments de la ligne de commande."""
+    parser = argparse.ArgumentParser(description="Insère le dataset en base.")
+    parser.add_argument("--data-dir", default="data", help="Dossier des CSV")
+    parser.add_argument(
+        "--chunk-size", type=int, default=10000, help="Lignes par opération bulk"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Chunks chargés en parallèle"
+    )
+    parser.add_argument(
+        "--append",
+        action="store_true",
+        help="Ne pas vider la table avant l'insertion",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Fonction principale."""
     print("🚀 Insertion du dataset complet dans PostgreSQL\n")
+    args = parse_args(argv)
 
     try:
         # Charger la configuration
@@ -144,7 +250,7 @@ def main():
         db_url = settings.DATABASE_URL
 
         # Étape 1: Charger les CSV
-        df_sondage, df_eval, df_sirh = load_csv_files()
+        df_sondage, df_eval, df_sirh = load_csv_files(args.data_dir)
 
         # Étape 2: Fusionner
         df_merged = merge_datasets(df_sondage, df_eval, df_sirh)
@@ -153,7 +259,14 @@ def main():
         features_df, target_df = prepare_for_db(df_merged)
 
         # Étape 4: Insérer en DB
-        insert_into_db(features_df, target_df, db_url)
+        insert_into_db(
+            features_df,
+            target_df,
+            db_url,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            truncate=not args.append,
+        )
 
         print("\n🎉 Dataset inséré avec succès !")
         print("📊 Vérifiez avec: SELECT COUNT(*) FROM dataset;")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Rapport du coût d'import au démarrage de l'API.
+
+Importe le module dans un processus neuf avec `python -X importtime` et
+affiche le temps total, les modules les plus coûteux (temps cumulé, sous-
+imports compris) et le temps propre agrégé par paquet de premier niveau.
+
+Usage:
+    poetry run python scripts/report_import_time.py
+    poetry run python scripts/report_import_time.py --gradio --top 40
+    poetry run python scripts/report_import_time.py --budget 2.5  # code 1 si dépassé
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import NamedTuple
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+class ImportTiming(NamedTuple):
+    """Une ligne de `-X importtime` (microsecondes)."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(stderr: str) -> list[ImportTiming]:
+    """
+    Parse la sortie de `python -X importtime`.
+
+    Format : `import time: <self> | <cumulative> | <indentation><module>`.
+    """
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line.split(":", 1)[1].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # ligne d'en-tête
+        timings.append(
+            ImportTiming(
+                module=fields[2].strip(),
+                self_us=int(fields[0]),
+                cumulative_us=int(fields[1]),
+            )
+        )
+    return timings
+
+
+def by_package(timings: list[ImportTiming]) -> dict[str, int]:
+    """Temps propre (µs) agrégé par paquet de premier niveau."""
+    totals: dict[str, int] = defaultdict(int)
+    for timing in timings:
+        totals[timing.module.split(".")[0]] += timing.self_us
+    return dict(totals)
+
+
+def measure(module: str, gradio: bool) -> tuple[float, list[ImportTiming]]:
+    """Importe le module dans un processus neuf : (secondes, détail)."""
+    env = {**os.environ, "GRADIO_ENABLED": str(gradio)}
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if completed.returncode != 0:
+        sys.stderr.write(completed.stderr[-2000:])
+        raise SystemExit(f"Import de {module} impossible")
+    return elapsed, parse_importtime(completed.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="api")
+    parser.add_argument(
+        "--gradio", action="store_true", help="GRADIO_ENABLED=True (UI montée)"
+    )
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument(
+        "--budget", type=float, default=None, help="Temps max (s) : code 1 si dépassé"
+    )
+    args = parser.parse_args()
+
+    elapsed, timings = measure(args.module, args.gradio)
+    total_us = sum(t.self_us for t in timings)
+
+    print(f"=== import {args.module} (GRADIO_ENABLED={args.gradio}) ===")
+    print(f"Processus : {elapsed:.2f} s   imports : {total_us / 1e6:.2f} s")
+
+    print(f"\n{'Module':<55} {'cumulé (ms)':>12} {'propre (ms)':>12}")
+    slowest = sorted(timings, key=lambda t: t.cumulative_us, reverse=True)
+    for timing in slowest[: args.top]:
+        print(
+            f"{timing.module[:55]:<55} {timing.cumulative_us / 1000:>12.1f} "
+            f"{timing.self_us / 1000:>12.1f}"
+        )
+
+    print(f"\n{'Paquet':<30} {'propre (ms)':>12} {'part':>7}")
+    packages = sorted(by_package(timings).items(), key=lambda p: p[1], reverse=True)
+    for package, self_us in packages[: args.top]:
+        print(f"{package:<30} {self_us / 1000:>12.1f} {self_us / total_us:>7.1%}")
+
+    if args.budget is not None and elapsed > args.budget:
+        print(f"\n❌ Budget de démarrage dépassé : {elapsed:.2f} s > {args.budget} s")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
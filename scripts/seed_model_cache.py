@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Pré-remplit le cache local des artefacts du modèle (MODEL_CACHE_DIR).
+
+Permet de démarrer des workers sans accès réseau (MODEL_OFFLINE=True) :
+le cache est rempli sur une machine connectée (téléchargement HF Hub) ou
+à partir d'un fichier de modèle fourni, puis copié tel quel sur les
+workers.
+
+Usage:
+    # Télécharger la version courante depuis HF Hub
+    poetry run python scripts/seed_model_cache.py
+
+    # Depuis un fichier local (environnement air-gapped)
+    poetry run python scripts/seed_model_cache.py --from-file model.pkl --cache-dir /opt/model_cache
+"""
+import argparse
+import json
+import os
+import sys
+
+# Ajouter la racine du projet au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.artifacts import ModelArtifactCache, _download_from_hub  # noqa: E402
+from src.config import get_settings  # noqa: E402
+from src.models import HF_MODEL_REPO, MODEL_FILENAME  # noqa: E402
+
+
+def main() -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cache-dir", default=settings.MODEL_CACHE_DIR)
+    parser.add_argument("--from-file", help="Fichier de modèle local à importer")
+    parser.add_argument("--repo-id", default=HF_MODEL_REPO)
+    parser.add_argument("--filename", default=MODEL_FILENAME)
+    parser.add_argument("--revision", help="Révision à enregistrer (avec --from-file)")
+    args = parser.parse_args()
+
+    if args.from_file:
+        source, revision = args.from_file, args.revision
+    else:
+        print(f"🔄 Téléchargement depuis HF Hub: {args.repo_id}/{args.filename}")
+        source, revision = _download_from_hub(args.repo_id, args.filename)
+
+    cache = ModelArtifactCache(args.cache_dir)
+    entry = cache.add(
+        source, repo_id=args.repo_id, filename=args.filename, revision=revision
+    )
+    cache.resolve(entry)
+
+    print(f"✅ Modèle ajouté au cache {args.cache_dir} (version courante)")
+    print(json.dumps(entry, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
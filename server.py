@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Serveur de production multi-workers de l'API FastAPI.
+
+Le maître charge le modèle une seule fois puis crée N workers uvicorn par
+fork : les poids du modèle sont partagés en copy-on-write entre workers au
+lieu d'être désérialisés N fois. Tous les workers acceptent les connexions
+sur la même socket.
+
+- Threads OpenMP / BLAS / XGBoost par worker : cœurs / workers (pas de
+  sursouscription quand tous les workers prédisent en même temps).
+- SIGTERM / SIGINT : arrêt gracieux (requêtes en cours terminées dans
+  SERVER_GRACEFUL_TIMEOUT_S).
+- SIGHUP : redémarrage progressif, worker par worker. Le maître recharge
+  d'abord la version courante du cache modèle : les nouveaux workers la
+  partagent.
+- Un worker qui meurt est remplacé.
+- Jobs batch : le worker 0 (et celui qui le remplace) reprend les jobs
+  interrompus, puis ceux abandonnés par un worker arrêté (bail échu,
+  JOBS_LEASE_S) ; un job en cours dans un autre worker n'est pas relancé.
+- Métriques Prometheus : les workers écrivent dans un dossier partagé
+  (METRICS_MULTIPROC_DIR, sinon un dossier temporaire), GET /metrics
+  agrège tous les workers quel que soit celui qui répond.
+
+Le maître ne fait aucune prédiction avant le fork (OpenMP ne survit pas au
+fork) : le préchauffage a lieu dans chaque worker (lifespan).
+
+Usage:
+    python server.py                      # un worker par cœur
+    python server.py --workers 4 --port 8000
+    kill -HUP <pid du maître>             # redémarrage progressif
+"""
+import argparse
+import gc
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from src.config import get_settings
+
+logger = logging.getLogger("employee_turnover_api.server")
+
+# Variables lues par OpenMP (XGBoost) et les BLAS de NumPy à leur import
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+def threads_per_worker(workers: int, cpu_count: Optional[int] = None) -> int:
+    """Répartit les cœurs entre les workers (au moins un thread chacun)."""
+    return max(1, (cpu_count or os.cpu_count() or 1) // workers)
+
+
+def limit_threads(threads: int) -> None:
+    """Fixe le nombre de threads natifs, avant l'import de NumPy / XGBoost."""
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Socket d'écoute partagée par tous les workers."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    """
+    Maître qui précharge le modèle et supervise N workers uvicorn.
+
+    Examples:
+        >>> PreforkServer(workers=4, port=8000).run()
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        host: str = "0.0.0.0",
+        port: int = 8000,
+        graceful_timeout: float = 30.0,
+        log_level: str = "info",
+    ):
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+
+        self.sock: Optional[socket.socket] = None
+        self.children: dict[int, int] = {}  # pid -> index du worker
+        self._stopping = False
+        self._restart_requested = False
+        self._metrics_tmpdir: Optional[str] = None
+
+    def prepare_metrics_dir(self) -> None:
+        """
+        Dossier des métriques partagé par les workers, avant tout import de
+        prometheus_client.
+
+        Vidé au démarrage : des fichiers d'une exécution précédente
+        fausseraient les compteurs.
+        """
+        settings = get_settings()
+        if not settings.METRICS_ENABLED:
+            return
+        path = (
+            os.environ.get("PROMETHEUS_MULTIPROC_DIR") or settings.METRICS_MULTIPROC_DIR
+        )
+        if not path:
+            path = self._metrics_tmpdir = tempfile.mkdtemp(prefix="turnover-metrics-")
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.endswith(".db"):
+                os.remove(os.path.join(path, name))
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+
+    def preload(self) -> None:
+        """Importe l'application et charge le modèle dans le maître."""
+        from src.models import load_model
+
+        import api  # noqa: F401  (construit l'application une seule fois)
+
+        start = time.perf_counter()
+        load_model()
+        logger.info(
+            f"Modèle préchargé dans le maître en {time.perf_counter() - start:.2f} s"
+        )
+        # Objets du maître hors du ramasse-miettes : un gc dans un worker ne
+        # réécrit pas leurs en-têtes, les pages restent partagées
+        gc.collect()
+        gc.freeze()
+
+    def spawn(self, index: int, resume_jobs: bool) -> tuple[int, int]:
+        """
+        Crée un worker par fork.
+
+        Returns:
+            (pid, descripteur de lecture signalé quand le worker est prêt).
+        """
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover - exécuté dans le worker
+            os.close(ready_read)
+            try:
+                self._serve(index, resume_jobs, ready_write)
+            finally:
+                # os._exit n'exécute pas atexit : écrire les logs en file
+                from src.logger import stop_log_listeners
+
+                stop_log_listeners()
+                os._exit(0)
+
+        os.close(ready_write)
+        self.children[pid] = index
+        return pid, ready_read
+
+    def _serve(self, index: int, resume_jobs: bool, ready_fd: int) -> None:
+        """Boucle d'un worker : uvicorn sur la socket héritée du maître."""
+        import uvicorn
+
+        from src.config import Settings
+
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(sig, signal.SIG_DFL)
+        # Un seul worker reprend les jobs batch interrompus ou abandonnés
+        Settings.JOBS_RESUME_ON_START = resume_jobs
+
+        from api import app
+
+        server = uvicorn.Server(
+            uvicorn.Config(
+                app,
+                log_level=self.log_level,
+                timeout_graceful_shutdown=self.graceful_timeout,
+            )
+        )
+
+        def notify_ready() -> None:
+            while not server.started and not server.should_exit:
+                time.sleep(0.05)
+            try:
+                os.write(ready_fd, b"1" if server.started else b"0")
+            except OSError:
+                pass  # le maître n'attend pas ce worker
+            finally:
+                os.close(ready_fd)
+
+        threading.Thread(target=notify_ready, daemon=True).start()
+        logger.info(f"Worker {index} démarré (pid {os.getpid()})")
+        server.run(sockets=[self.sock])
+
+    def wait_ready(self, ready_fd: int, timeout: float) -> bool:
+        """Attend que le worker ait terminé son lifespan (modèle préchauffé)."""
+        import select
+
+        readable, _, _ = select.select([ready_fd], [], [], timeout)
+        ok = bool(readable) and os.read(ready_fd, 1) == b"1"
+        os.close(ready_fd)
+        return ok
+
+    def stop_worker(self, pid: int) -> None:
+        """Arrêt gracieux d'un worker, forcé après graceful_timeout."""
+        from src.metrics import mark_process_dead
+
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while time.monotonic() < deadline:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+            if done:
+                break
+            time.sleep(0.05)
+        else:
+            logger.warning(f"Worker {pid} arrêté de force")
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.children.pop(pid, None)
+        mark_process_dead(pid)
+
+    def rolling_restart(self) -> None:
+        """Remplace les workers un par un (aucune interruption de service)."""
+        from src.models import ensure_current_model
+
+        gc.unfreeze()
+        ensure_current_model()
+        gc.collect()
+        gc.freeze()
+
+        for pid, index in list(self.children.items()):
+            _, ready_fd = self.spawn(index, resume_jobs=index == 0)
+            if not self.wait_ready(ready_fd, self.graceful_timeout * 4):
+                logger.warning(f"Worker {index} pas prêt à temps")
+            self.stop_worker(pid)
+        logger.info("Redémarrage progressif terminé")
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _handle_restart(self, signum, frame) -> None:
+        self._restart_requested = True
+
+    def run(self) -> None:
+        """Démarre les workers et les supervise jusqu'à SIGTERM / SIGINT."""
+        self.sock = bind_socket(self.host, self.port)
+        self.prepare_metrics_dir()
+        self.preload()
+        # Importé après le choix du dossier des métriques
+        from src.metrics import mark_process_dead
+
+        # Avant le fork : un SIGTERM reçu pendant le démarrage des workers
+        # arrête proprement le serveur (les workers rétablissent SIG_DFL)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_restart)
+
+        started = [
+            self.spawn(index, resume_jobs=index == 0) for index in range(self.workers)
+        ]
+        for pid, ready_fd in started:
+            if not self.wait_ready(ready_fd, self.graceful_timeout * 4):
+                logger.warning(f"Worker pid {pid} pas prêt à temps")
+        logger.info(
+            f"🚀 API servie sur http://{self.host}:{self.port} "
+            f"par {self.workers} workers (maître pid {os.getpid()})"
+        )
+
+        while not self._stopping:
+            if self._restart_requested:
+                self._restart_requested = False
+                self.rolling_restart()
+
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid and pid in self.children:
+                index = self.children.pop(pid)
+                mark_process_dead(pid)
+                logger.warning(
+                    f"Worker {index} (pid {pid}) arrêté (statut {status}), remplacé"
+                )
+                _, ready_fd = self.spawn(index, resume_jobs=index == 0)
+                os.close(ready_fd)
+            time.sleep(0.1)
+
+        logger.info("Arrêt des workers...")
+        for pid in list(self.children):
+            os.kill(pid, signal.SIGTERM)
+        for pid in list(self.children):
+            self.stop_worker(pid)
+        self.sock.close()
+        if self._metrics_tmpdir:
+            shutil.rmtree(self._metrics_tmpdir, ignore_errors=True)
+        logger.info("🛑 Serveur arrêté")
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.SERVER_WORKERS or os.cpu_count() or 1,
+    )
+    parser.add_argument("--host", default=settings.API_HOST)
+    parser.add_argument("--port", type=int, default=settings.API_PORT)
+    parser.add_argument(
+        "--threads-per-worker",
+        type=int,
+        default=settings.SERVER_THREADS_PER_WORKER,
+        help="0 = cœurs / workers",
+    )
+    parser.add_argument(
+        "--graceful-timeout", type=float, default=settings.SERVER_GRACEFUL_TIMEOUT_S
+    )
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        sys.exit("server.py nécessite fork (Linux / macOS)")
+
+    limit_threads(args.threads_per_worker or threads_per_worker(args.workers))
+
+    PreforkServer(
+        workers=args.workers,
+        host=args.host,
+        port=args.port,
+        graceful_timeout=args.graceful_timeout,
+        log_level=settings.LOG_LEVEL.lower(),
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Cache local des artefacts du modèle.
+
+Le fichier du modèle est conservé dans MODEL_CACHE_DIR avec un manifest
+des versions (dépôt, fichier, révision, sha256, taille). Au démarrage,
+load_model utilise la version courante du cache après vérification de
+son sha256 : pas d'appel réseau, pas de latence de téléchargement.
+
+En mode hors ligne (MODEL_OFFLINE=True), HF Hub n'est jamais contacté :
+les workers sans accès réseau démarrent depuis un cache pré-rempli
+(voir scripts/seed_model_cache.py).
+
+Structure du cache :
+    MODEL_CACHE_DIR/
+        manifest.json
+        <sha256>/model.pkl
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from src.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+
+class ArtifactCacheError(Exception):
+    """Le cache ne contient pas d'artefact utilisable (absent ou corrompu)."""
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    """
+    Calcule le sha256 d'un fichier par blocs.
+
+    Args:
+        path: Fichier à hacher.
+        chunk_size: Taille des blocs lus (octets).
+
+    Returns:
+        Empreinte hexadécimale.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelArtifactCache:
+    """
+    Cache local des fichiers du modèle, indexé par sha256.
+
+    Examples:
+        >>> cache = ModelArtifactCache("model_cache")
+        >>> entry = cache.add("/tmp/model.pkl", repo_id="org/model",
+        ...                   filename="model/model.pkl")
+        >>> cache.resolve()
+        PosixPath('model_cache/3b1f.../model.pkl')
+    """
+
+    def __init__(self, cache_dir: str, verify: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.verify = verify
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.cache_dir / MANIFEST_NAME
+
+    def read_manifest(self) -> dict[str, Any]:
+        """Lit le manifest (vide si le cache n'existe pas encore)."""
+        if not self.manifest_path.exists():
+            return {"current": None, "versions": {}}
+        with open(self.manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest: dict[str, Any]) -> None:
+        """Écrit le manifest de façon atomique."""
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def current(self) -> Optional[dict[str, Any]]:
+        """Retourne l'entrée de la version courante, ou None."""
+        manifest = self.read_manifest()
+        sha256 = manifest.get("current")
+        return manifest["versions"].get(sha256) if sha256 else None
+
+    def add(
+        self,
+        source_path: str,
+        repo_id: str,
+        filename: str,
+        revision: Optional[str] = None,
+        make_current: bool = True,
+    ) -> dict[str, Any]:
+        """
+        Copie un fichier de modèle dans le cache et l'enregistre au manifest.
+
+        Args:
+            source_path: Fichier du modèle (téléchargé ou fourni).
+            repo_id: Dépôt HF Hub d'origine.
+            filename: Chemin du fichier dans le dépôt.
+            revision: Révision HF Hub (commit), si connue.
+            make_current: Si True, devient la version courante.
+
+        Returns:
+            Entrée du manifest pour cette version.
+        """
+        source = Path(source_path)
+        sha256 = file_sha256(source)
+        target = self.cache_dir / sha256 / Path(filename).name
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        if not target.exists():
+            tmp_path = target.with_suffix(target.suffix + ".tmp")
+            shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, target)
+
+        entry = {
+            "sha256": sha256,
+            "repo_id": repo_id,
+            "filename": filename,
+            "revision": revision,
+            "size": target.stat().st_size,
+            "path": str(target.relative_to(self.cache_dir)),
+            "added_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+        manifest = self.read_manifest()
+        manifest["versions"][sha256] = entry
+        if make_current:
+            manifest["current"] = sha256
+        self._write_manifest(manifest)
+        return entry
+
+    def find(self, version: str) -> dict[str, Any]:
+        """
+        Retourne l'entrée d'une version du cache.
+
+        Args:
+            version: sha256 complet ou préfixe non ambigu (version abrégée).
+
+        Raises:
+            ArtifactCacheError: Si aucune ou plusieurs versions correspondent.
+        """
+        versions = self.read_manifest()["versions"]
+        matches = [sha256 for sha256 in versions if sha256.startswith(version)]
+        if len(matches) != 1 or not version:
+            raise ArtifactCacheError(
+                f"Version {version!r} introuvable ou ambiguë dans le cache"
+            )
+        return versions[matches[0]]
+
+    def set_current(self, sha256: str) -> None:
+        """Définit la version courante du cache."""
+        manifest = self.read_manifest()
+        if sha256 not in manifest["versions"]:
+            raise ArtifactCacheError(f"Version inconnue du cache: {sha256}")
+        manifest["current"] = sha256
+        self._write_manifest(manifest)
+
+    def resolve(
+        self,
+        entry: Optional[dict[str, Any]] = None,
+        expected_sha256: str = "",
+        repo_id: Optional[str] = None,
+        filename: Optional[str] = None,
+    ) -> Path:
+        """
+        Retourne le chemin d'une version du cache après validation.
+
+        Args:
+            entry: Entrée du manifest (défaut: version courante).
+            expected_sha256: Empreinte imposée (MODEL_SHA256), vide sinon.
+            repo_id: Dépôt attendu (None = pas de vérification).
+            filename: Fichier attendu dans le dépôt (None = pas de vérification).
+
+        Returns:
+            Chemin du fichier du modèle.
+
+        Raises:
+            ArtifactCacheError: Si la version est absente ou corrompue.
+        """
+        entry = entry or self.current()
+        if entry is None:
+            raise ArtifactCacheError(f"Aucun modèle dans le cache {self.cache_dir}")
+
+        if (repo_id, filename) != (None, None) and (
+            entry["repo_id"],
+            entry["filename"],
+        ) != (repo_id, filename):
+            raise ArtifactCacheError(
+                f"Version en cache issue de {entry['repo_id']}/{entry['filename']}, "
+                f"attendu {repo_id}/{filename}"
+            )
+
+        if expected_sha256 and entry["sha256"] != expected_sha256:
+            raise ArtifactCacheError(
+                f"Version en cache {entry['sha256'][:12]} différente de "
+                f"MODEL_SHA256 {expected_sha256[:12]}"
+            )
+
+        path = self.cache_dir / entry["path"]
+        if not path.exists():
+            raise ArtifactCacheError(f"Fichier absent du cache: {path}")
+        if self.verify and file_sha256(path) != entry["sha256"]:
+            raise ArtifactCacheError(f"sha256 invalide pour {path} (fichier corrompu)")
+        return path
+
+
+def _download_from_hub(repo_id: str, filename: str) -> tuple[str, Optional[str]]:
+    """Télécharge le fichier depuis HF Hub et retourne (chemin, révision)."""
+    # Import à la demande : jamais chargé en mode hors ligne
+    from huggingface_hub import hf_hub_download
+
+    path = hf_hub_download(repo_id=repo_id, filename=filename, repo_type="model")
+    # Chemin du cache HF : .../snapshots/<revision>/<filename>
+    parts = Path(path).parts
+    revision = (
+        parts[parts.index("snapshots") + 1] if "snapshots" in parts[:-1] else None
+    )
+    return path, revision
+
+
+def resolve_model_path(
+    repo_id: str,
+    filename: str,
+    settings: Optional[Settings] = None,
+    refresh: Optional[bool] = None,
+) -> Path:
+    """
+    Résout le fichier du modèle à charger, en privilégiant le cache local.
+
+    - MODEL_OFFLINE : cache uniquement, aucun accès réseau.
+    - MODEL_CACHE_REFRESH : télécharge depuis HF Hub et met le cache à jour
+      (repli sur le cache si le hub est injoignable).
+    - Sinon : version courante du cache si valide, téléchargement sinon.
+
+    Args:
+        repo_id: Dépôt HF Hub du modèle.
+        filename: Chemin du fichier dans le dépôt.
+        settings: Configuration (défaut: get_settings()).
+        refresh: Force (ou non) le téléchargement, au lieu de
+            MODEL_CACHE_REFRESH.
+
+    Returns:
+        Chemin local du fichier du modèle (sha256 vérifié).
+
+    Raises:
+        ArtifactCacheError: En mode hors ligne sans cache valide, ou si le
+            modèle téléchargé ne correspond pas à MODEL_SHA256.
+    """
+    settings = settings or get_settings()
+    if refresh is None:
+        refresh = settings.MODEL_CACHE_REFRESH
+    cache = ModelArtifactCache(
+        settings.MODEL_CACHE_DIR, verify=settings.MODEL_CACHE_VERIFY
+    )
+    checks = {
+        "expected_sha256": settings.MODEL_SHA256,
+        "repo_id": repo_id,
+        "filename": filename,
+    }
+
+    if settings.MODEL_OFFLINE:
+        path = cache.resolve(**checks)
+        logger.info(f"📦 Modèle chargé depuis le cache (hors ligne): {path}")
+        return path
+
+    if not refresh:
+        try:
+            path = cache.resolve(**checks)
+            logger.info(f"📦 Modèle chargé depuis le cache: {path}")
+            return path
+        except ArtifactCacheError as cache_error:
+            logger.info(f"Cache modèle inutilisable ({cache_error}), téléchargement")
+
+    try:
+        logger.info(f"🔄 Téléchargement du modèle depuis HF Hub: {repo_id}")
+        downloaded, revision = _download_from_hub(repo_id, filename)
+    except Exception as download_error:
+        logger.error(f"Erreur téléchargement HF Hub: {download_error}")
+        if refresh:
+            logger.warning("HF Hub injoignable, utilisation du cache local")
+            return cache.resolve(**checks)
+        raise
+
+    entry = cache.add(
+        downloaded,
+        repo_id=repo_id,
+        filename=filename,
+        revision=revision,
+        make_current=False,
+    )
+    path = cache.resolve(entry, **checks)
+    cache.set_current(entry["sha256"])
+    return path
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Module de micro-batching pour les prédictions unitaires.
+
+Sous charge, chaque requête /predict concurrente appelait XGBoost sur une
+seule ligne, de manière synchrone dans le handler async. Le MicroBatcher
+regroupe les EmployeeInput en attente (jusqu'à N lignes ou T millisecondes),
+les préprocesse en une seule matrice, exécute un unique predict_proba dans
+le pool d'inférence puis résout le future de chaque requête.
+
+Plusieurs lots sont scorés en parallèle, un par worker du pool : le lot
+suivant est collecté dès qu'un worker se libère, et grossit tant qu'ils
+sont tous occupés.
+"""
+import asyncio
+import logging
+from typing import Any, Optional
+
+from src.config import Settings
+from src.executor import InferenceExecutor, PoolSaturatedError
+from src.metrics import metrics_recording, observe_batch_rows
+from src.models import InferenceResult
+from src.schemas import EmployeeInput
+from src.scoring import score_employees
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Ordonnanceur asyncio qui regroupe les prédictions unitaires.
+
+    Examples:
+        >>> batcher = MicroBatcher(max_batch_size=32, max_wait_ms=5)
+        >>> await batcher.start()
+        >>> result = await batcher.submit(employee)
+        >>> await batcher.stop()
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_queue_size: int = 1024,
+        executor: Optional[InferenceExecutor] = None,
+    ):
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue_size = max_queue_size
+        # Pool d'inférence (défaut: executor de la boucle asyncio)
+        self.executor = executor
+        # Lots scorés en parallèle (un par worker du pool dédié)
+        self.max_in_flight = executor.max_workers if executor is not None else 1
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight: set[asyncio.Task] = set()
+
+        # Métriques
+        self.batches = 0
+        self.rows = 0
+        self.rejected = 0
+        self.max_observed_batch = 0
+
+    @classmethod
+    def from_settings(
+        cls, settings: Settings, executor: Optional[InferenceExecutor] = None
+    ) -> "MicroBatcher":
+        """Construit le batcher depuis la configuration de l'application."""
+        return cls(
+            max_batch_size=settings.MICRO_BATCH_MAX_SIZE,
+            max_wait_ms=settings.MICRO_BATCH_MAX_WAIT_MS,
+            max_queue_size=settings.MICRO_BATCH_QUEUE_SIZE,
+            executor=executor,
+        )
+
+    @property
+    def running(self) -> bool:
+        """Indique si la boucle de batching tourne."""
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Démarre la boucle de batching sur la boucle d'événements courante."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run(), name="micro-batcher")
+
+    async def stop(self) -> None:
+        """
+        Arrête la boucle, laisse se terminer les lots en cours et fait
+        échouer les requêtes encore en attente.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("Micro-batcher arrêté"))
+            self._queue = None
+
+    async def submit(self, employee: EmployeeInput) -> InferenceResult:
+        """
+        Soumet un employé et attend sa prédiction.
+
+        Args:
+            employee: Données validées d'un employé.
+
+        Returns:
+            InferenceResult d'une seule ligne.
+
+        Raises:
+            asyncio.QueueFull: Si la file d'attente est pleine.
+            PoolSaturatedError: Si le pool d'inférence refuse le batch.
+            RuntimeError: Si le batcher n'est pas démarré.
+        """
+        if not self.running or self._queue is None:
+            raise RuntimeError("Micro-batcher non démarré")
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            # Métriques décidées dans le contexte de l'appelant (préchauffage)
+            self._queue.put_nowait((employee, future, metrics_recording()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise
+
+        return await future
+
+    async def _collect(self) -> list[tuple[EmployeeInput, asyncio.Future, bool]]:
+        """Attend une première requête puis complète le batch (N lignes ou T ms)."""
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait_ms / 1000
+
+        while len(batch) < self.max_batch_size:
+            # Vider sans attendre ce qui est déjà en file
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        # Ignorer les requêtes annulées entre-temps (client déconnecté)
+        return [item for item in batch if not item[1].done()]
+
+    async def _run(self) -> None:
+        """
+        Boucle principale : collecte un lot dès qu'un worker est libre et
+        le score dans une tâche (au plus max_in_flight lots en cours).
+        """
+        slots = asyncio.Semaphore(self.max_in_flight)
+
+        def release(task: asyncio.Task) -> None:
+            self._in_flight.discard(task)
+            slots.release()
+
+        while True:
+            await slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                slots.release()
+                raise
+            if not batch:
+                slots.release()
+                continue
+
+            task = asyncio.create_task(self._score(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(release)
+
+    async def _score(
+        self, batch: list[tuple[EmployeeInput, asyncio.Future, bool]]
+    ) -> None:
+        """Inférence d'un lot dans le pool puis résolution de ses futures."""
+        employees = [employee for employee, _, _ in batch]
+        try:
+            if self.executor is not None:
+                result = await self.executor.run(score_employees, employees)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(None, score_employees, employees)
+        except Exception as e:
+            if not isinstance(e, PoolSaturatedError):
+                logger.exception("Erreur lors de l'inférence micro-batch")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for i, (_, future, _) in enumerate(batch):
+            if not future.done():
+                row = slice(i, i + 1)
+                future.set_result(result.take(row))
+
+        self.batches += 1
+        self.rows += len(batch)
+        if any(recorded for _, _, recorded in batch):
+            observe_batch_rows("micro_batch", len(batch))
+        self.max_observed_batch = max(self.max_observed_batch, len(batch))
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Retourne les métriques du batcher.
+
+        Returns:
+            Dict avec le nombre de batchs et de lignes, la taille moyenne,
+            le taux de remplissage (lignes / (batchs * taille max)),
+            les rejets, les lots en cours et la profondeur de file courante.
+        """
+        avg_batch_size = self.rows / self.batches if self.batches else 0.0
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "avg_batch_size": round(avg_batch_size, 2),
+            "max_batch_size_observed": self.max_observed_batch,
+            "fill_rate": round(avg_batch_size / self.max_batch_size, 4),
+            "rejected": self.rejected,
+            "in_flight": len(self._in_flight),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+        }
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Module d'accès à la base de données.
+
+Fournit :
+- Un engine SQLAlchemy unique par processus, avec un pool de connexions réglé
+- Une file bornée de logs de prédiction, vidée dans ml_logs par un thread
+  de fond en INSERT multi-lignes (jamais sur le chemin de la requête)
+- L'écriture bulk des prédictions batch (COPY FROM STDIN sur PostgreSQL,
+  executemany sinon), identifiées par un batch_id
+
+SQLAlchemy est importé à la demande pour ne pas alourdir le démarrage.
+"""
+import io
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from itertools import repeat
+from typing import Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import Settings, get_settings
+from src.metrics import (
+    DB_LOG_DROPPED,
+    DB_LOG_FAILED,
+    DB_LOG_QUEUE_DEPTH,
+    DB_LOG_WRITTEN,
+)
+from src.timing import observe_stage
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache()
+def get_engine():
+    """
+    Retourne l'engine SQLAlchemy partagé du processus.
+
+    Le pool est créé une seule fois (au lieu d'un create_engine par requête),
+    avec pre-ping et recyclage des connexions. Pour PostgreSQL, un timeout
+    de connexion court évite de bloquer quand la base est indisponible.
+
+    Returns:
+        Engine: Engine SQLAlchemy configuré depuis les settings.
+    """
+    from sqlalchemy import create_engine
+
+    settings = get_settings()
+    url = settings.DATABASE_URL
+
+    if url.startswith("sqlite"):
+        return create_engine(url, pool_pre_ping=True)
+
+    connect_args = {}
+    if url.startswith("postgresql"):
+        connect_args["connect_timeout"] = settings.DB_CONNECT_TIMEOUT_S
+
+    return create_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_S,
+        pool_recycle=settings.DB_POOL_RECYCLE_S,
+        pool_pre_ping=True,
+        connect_args=connect_args,
+    )
+
+
+class PredictionLogQueue:
+    """
+    File bornée de logs de prédiction vidée par lots dans ml_logs.
+
+    enqueue() ne bloque jamais : si la file est pleine, la politique de
+    débordement s'applique ("drop_newest" ignore le nouveau log,
+    "drop_oldest" évince le plus ancien). Un thread de fond écrit les logs
+    en INSERT multi-lignes toutes les flush_rows lignes ou flush_interval_ms.
+
+    Examples:
+        >>> log_queue = get_prediction_log_queue()
+        >>> log_queue.enqueue({"age": 41, ...}, "Non")
+        True
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        flush_rows: int = 500,
+        flush_interval_ms: float = 200,
+        overflow_policy: str = "drop_newest",
+    ):
+        if overflow_policy not in ("drop_newest", "drop_oldest"):
+            raise ValueError(f"Politique de débordement inconnue: {overflow_policy}")
+
+        self.flush_rows = flush_rows
+        self.flush_interval_ms = flush_interval_ms
+        self.overflow_policy = overflow_policy
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+        # Compteurs
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "PredictionLogQueue":
+        """Construit la file depuis la configuration de l'application."""
+        return cls(
+            max_size=settings.DB_LOG_QUEUE_SIZE,
+            flush_rows=settings.DB_LOG_FLUSH_ROWS,
+            flush_interval_ms=settings.DB_LOG_FLUSH_INTERVAL_MS,
+            overflow_policy=settings.DB_LOG_OVERFLOW_POLICY,
+        )
+
+    @property
+    def running(self) -> bool:
+        """Indique si le thread d'écriture tourne."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Démarre le thread d'écriture (idempotent)."""
+        with self._lock:
+            if self.running:
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="ml-logs-writer", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Arrête le thread après avoir écrit les logs restants."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def enqueue(self, input_json: dict, prediction: str) -> bool:
+        """
+        Ajoute un log de prédiction sans bloquer.
+
+        Args:
+            input_json: Inputs de la prédiction (sérialisables en JSON).
+            prediction: Prédiction ("Oui" ou "Non").
+
+        Returns:
+            True si le log est en file, False s'il a été ignoré (file pleine).
+        """
+        if not self.running:
+            self.start()
+
+        row = {
+            "input_json": input_json,
+            "prediction": prediction,
+            "created_at": datetime.now(),
+        }
+
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            if self.overflow_policy == "drop_newest":
+                self.dropped += 1
+                DB_LOG_DROPPED.inc()
+                return False
+            # drop_oldest : évincer le plus ancien pour faire de la place
+            try:
+                self._queue.get_nowait()
+                self.dropped += 1
+                DB_LOG_DROPPED.inc()
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self.dropped += 1
+                DB_LOG_DROPPED.inc()
+                return False
+
+        self.enqueued += 1
+        DB_LOG_QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+
+    def _drain(self) -> list[dict]:
+        """Attend un premier log puis complète le lot (N lignes ou T ms)."""
+        try:
+            rows = [self._queue.get(timeout=self.flush_interval_ms / 1000)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval_ms / 1000
+        while len(rows) < self.flush_rows:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                rows.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return rows
+
+    def _run(self) -> None:
+        """Boucle du thread d'écriture."""
+        while not self._stop_event.is_set():
+            rows = self._drain()
+            if rows:
+                DB_LOG_QUEUE_DEPTH.set(self._queue.qsize())
+                self._write(rows)
+
+        # Écrire ce qui reste à l'arrêt
+        rows = []
+        while True:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for start in range(0, len(rows), self.flush_rows):
+            self._write(rows[slice(start, start + self.flush_rows)])
+
+    def _write(self, rows: list[dict]) -> None:
+        """Écrit un lot de logs en un seul INSERT multi-lignes."""
+        start_time = time.perf_counter()
+        try:
+            from sqlalchemy import insert
+
+            from db_models import MLLog
+
+            with get_engine().begin() as conn:
+                conn.execute(insert(MLLog.__table__).values(rows))
+
+            observe_stage("db_insert", (time.perf_counter() - start_time) * 1000)
+            self.written += len(rows)
+            DB_LOG_WRITTEN.inc(len(rows))
+            self.flushes += 1
+            logger.debug(f"{len(rows)} predictions logged to database")
+        except Exception as db_error:
+            self.failed += len(rows)
+            DB_LOG_FAILED.inc(len(rows))
+            logger.warning(
+                f"Failed to log {len(rows)} predictions to database: {db_error}"
+            )
+
+    def stats(self) -> dict[str, Any]:
+        """Retourne les compteurs de la file."""
+        return {
+            "queue_depth": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+        }
+
+
+@lru_cache()
+def get_prediction_log_queue() -> PredictionLogQueue:
+    """
+    Retourne la file singleton de logs de prédiction.
+
+    Returns:
+        PredictionLogQueue: File configurée depuis les settings.
+    """
+    return PredictionLogQueue.from_settings(get_settings())
+
+
+# Colonnes écrites par le chemin bulk (ordre du COPY)
+BULK_LOG_COLUMNS = ["input_json", "prediction", "created_at", "batch_id"]
+
+
+def records_to_json_lines(df: pd.DataFrame) -> list[str]:
+    """
+    Sérialise chaque ligne d'un DataFrame en JSON, en une seule passe pandas.
+
+    Les NaN deviennent null. Avec ensure_ascii (défaut de pandas), les sauts
+    de ligne et tabulations sont échappés : une ligne JSON correspond donc
+    exactement à une ligne du DataFrame.
+
+    Args:
+        df: DataFrame à sérialiser.
+
+    Returns:
+        Une chaîne JSON par ligne, dans l'ordre du DataFrame.
+    """
+    return df.to_json(orient="records", lines=True).split("\n")[: len(df)]
+
+
+def copy_json_rows(
+    engine,
+    table: str,
+    columns: list[str],
+    json_lines: Iterable[str],
+    *other_columns: Iterable[str],
+    connection=None,
+) -> None:
+    """
+    Écrit des lignes avec COPY FROM STDIN (format texte) depuis un buffer.
+
+    La première colonne est du JSON produit par records_to_json_lines ; les
+    autres colonnes ne doivent contenir ni tabulation, ni saut de ligne,
+    ni backslash (libellés, identifiants, timestamps).
+
+    Args:
+        engine: Engine SQLAlchemy PostgreSQL (driver psycopg2).
+        table: Nom de la table cible.
+        columns: Colonnes cibles, dans l'ordre des valeurs.
+        json_lines: Valeurs JSON de la première colonne.
+        *other_columns: Valeurs (chaînes) des colonnes suivantes.
+        connection: Connexion SQLAlchemy ouverte : COPY dans sa transaction,
+            validée par l'appelant (défaut: connexion dédiée et commit).
+    """
+    # Format texte de COPY : le backslash est le caractère d'échappement,
+    # les tabulations et sauts de ligne du JSON sont déjà échappés
+    buffer = io.StringIO(
+        "".join(
+            "\t".join(values) + "\n"
+            for values in zip(
+                (line.replace("\\", "\\\\") for line in json_lines),
+                *other_columns,
+            )
+        )
+    )
+
+    if connection is not None:
+        cursor = connection.connection.cursor()
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+        cursor.close()
+        return
+
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+        cursor.close()
+        raw_conn.commit()
+    finally:
+        raw_conn.close()
+
+
+def supports_copy(engine) -> bool:
+    """Indique si l'engine permet COPY FROM STDIN (PostgreSQL + psycopg2)."""
+    return engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+
+
+def bulk_log_predictions(
+    inputs: pd.DataFrame, predictions: np.ndarray, batch_id: str
+) -> int:
+    """
+    Écrit les prédictions d'un lot dans ml_logs en une seule opération bulk.
+
+    Sur PostgreSQL (psycopg2), utilise COPY FROM STDIN ; sinon un
+    executemany dans une transaction.
+
+    Args:
+        inputs: Features des employés, une ligne par prédiction.
+        predictions: Classes prédites (0/1), dans l'ordre des lignes.
+        batch_id: Identifiant du lot, commun à toutes les lignes.
+
+    Returns:
+        Nombre de lignes écrites.
+    """
+    if len(inputs) == 0:
+        return 0
+
+    from sqlalchemy import insert
+
+    from db_models import MLLog
+
+    json_lines = records_to_json_lines(inputs)
+    labels = np.where(np.asarray(predictions) == 1, "Oui", "Non").tolist()
+    created_at = datetime.now()
+    engine = get_engine()
+
+    if supports_copy(engine):
+        copy_json_rows(
+            engine,
+            MLLog.__tablename__,
+            BULK_LOG_COLUMNS,
+            json_lines,
+            labels,
+            repeat(created_at.isoformat(sep=" ")),
+            repeat(batch_id),
+        )
+    else:
+        rows = [
+            {
+                "input_json": json.loads(line),
+                "prediction": label,
+                "created_at": created_at,
+                "batch_id": batch_id,
+            }
+            for line, label in zip(json_lines, labels)
+        ]
+        with engine.begin() as conn:
+            conn.execute(insert(MLLog.__table__), rows)
+
+    return len(json_lines)
+
+
+def log_batch(inputs: pd.DataFrame, predictions: np.ndarray, batch_id: str) -> int:
+    """
+    Écrit un lot dans ml_logs (bloquant).
+
+    Les erreurs de base de données sont loguées et n'interrompent jamais
+    la prédiction batch.
+
+    Returns:
+        Nombre de lignes écrites (0 en cas d'échec).
+    """
+    start_time = time.perf_counter()
+    try:
+        written = bulk_log_predictions(inputs, predictions, batch_id)
+    except Exception as db_error:
+        logger.warning(f"Failed to log batch {batch_id} to database: {db_error}")
+        return 0
+    duration_ms = (time.perf_counter() - start_time) * 1000
+    logger.info(
+        f"Batch {batch_id} logged to database: {written} rows "
+        f"in {duration_ms:.0f} ms"
+    )
+    return written
+
+
+@lru_cache()
+def _bulk_log_executor() -> ThreadPoolExecutor:
+    """Thread unique dédié à l'écriture bulk (hors chemin de la requête)."""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="ml-logs-bulk")
+
+
+@lru_cache()
+def _bulk_log_slots() -> threading.BoundedSemaphore:
+    """Places de la file de _bulk_log_executor (lot en cours compris)."""
+    return threading.BoundedSemaphore(get_settings().DB_LOG_BATCH_MAX_PENDING)
+
+
+def submit_batch_log(
+    inputs: pd.DataFrame, predictions: np.ndarray, batch_id: str
+) -> Future:
+    """
+    Planifie l'écriture bulk d'un lot en arrière-plan.
+
+    La file est bornée (DB_LOG_BATCH_MAX_PENDING lots) : si la base est
+    lente ou indisponible, les lots suivants ne sont pas logués au lieu
+    de s'accumuler en mémoire.
+
+    Args:
+        inputs: Features des employés, une ligne par prédiction.
+        predictions: Classes prédites (0/1), dans l'ordre des lignes.
+        batch_id: Identifiant du lot.
+
+    Returns:
+        Future résolu avec le nombre de lignes écrites (0 en cas d'échec
+        ou si le lot est ignoré).
+    """
+    slots = _bulk_log_slots()
+    if not slots.acquire(blocking=False):
+        logger.warning(f"Batch {batch_id} not logged to database: bulk log queue full")
+        DB_LOG_DROPPED.inc(len(inputs))
+        dropped: Future = Future()
+        dropped.set_result(0)
+        return dropped
+
+    future = _bulk_log_executor().submit(log_batch, inputs, predictions, batch_id)
+    future.add_done_callback(lambda _: slots.release())
+    return future
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Module d'exécution de l'inférence hors de la boucle d'événements.
+
+Le preprocessing pandas et model.predict_proba sont CPU-bound : exécutés
+directement dans les handlers async, un batch de 50k lignes bloquait /health
+et toutes les autres requêtes. InferenceExecutor les délègue à un pool de
+threads ou de processus (modèle préchargé dans chaque worker) avec un
+contrôle d'admission : au-delà de max_pending tâches, la requête est
+refusée (503 + Retry-After) au lieu de s'empiler.
+"""
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from src.config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturatedError(Exception):
+    """Levée quand le pool d'inférence a atteint sa capacité d'admission."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Inference pool saturated")
+        self.retry_after = retry_after
+
+
+def _init_process_worker() -> None:
+    """Initializer des workers du pool de processus : précharge le modèle."""
+    from src.models import load_model
+
+    try:
+        load_model()
+    except Exception as e:
+        # Le worker reste utilisable : le chargement sera retenté à la demande
+        logger.warning(f"Préchargement du modèle impossible dans le worker: {e}")
+
+
+class InferenceExecutor:
+    """
+    Pool dédié à l'inférence avec contrôle d'admission.
+
+    Examples:
+        >>> executor = InferenceExecutor(mode="thread", max_workers=4)
+        >>> result = await executor.run(predict_with_model, model, X)
+    """
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        max_workers: int = 4,
+        max_pending: int = 64,
+        retry_after: int = 1,
+    ):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Mode d'exécution inconnu: {mode}")
+
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+
+        self._pool: Optional[Executor] = None
+        self._pending = 0
+
+        # Métriques
+        self.completed = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "InferenceExecutor":
+        """Construit le pool depuis la configuration de l'application."""
+        return cls(
+            mode=settings.INFERENCE_EXECUTOR,
+            max_workers=settings.INFERENCE_WORKERS,
+            max_pending=settings.INFERENCE_MAX_PENDING,
+            retry_after=settings.INFERENCE_RETRY_AFTER_S,
+        )
+
+    def start(self) -> None:
+        """Crée le pool (idempotent)."""
+        if self._pool is not None:
+            return
+
+        if self.mode == "process":
+            # spawn plutôt que fork : le processus de l'API a déjà des
+            # threads (logs, ml_logs) dont un verrou pourrait être hérité
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_process_worker,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="inference"
+            )
+        logger.info(
+            f"Pool d'inférence démarré: {self.mode} x{self.max_workers}",
+        )
+
+    def restart(self) -> None:
+        """
+        Remplace les processus workers (après un rechargement du modèle).
+
+        Les nouveaux workers préchargent la version courante du modèle ; les
+        tâches déjà soumises se terminent sur les anciens, qui s'arrêtent
+        ensuite et libèrent leur mémoire. Sans effet en mode "thread" : les
+        threads partagent le modèle du processus.
+        """
+        if self.mode != "process" or self._pool is None:
+            return
+
+        previous, self._pool = self._pool, None
+        self.start()
+        previous.shutdown(wait=False)
+
+    def shutdown(self) -> None:
+        """Arrête le pool en attendant la fin des tâches en cours."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    @property
+    def pending(self) -> int:
+        """Nombre de tâches admises (en cours ou en attente)."""
+        return self._pending
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Exécute func(*args) dans le pool sans bloquer la boucle d'événements.
+
+        En mode "process", func et ses arguments doivent être picklables
+        (fonctions définies au niveau module).
+
+        Raises:
+            PoolSaturatedError: Si max_pending tâches sont déjà admises.
+        """
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise PoolSaturatedError(self.retry_after)
+
+        self.start()
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, func, *args)
+        finally:
+            self._pending -= 1
+            self.completed += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Retourne les métriques du pool."""
+        return {
+            "mode": self.mode,
+            "workers": self.max_workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
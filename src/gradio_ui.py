@@ -13,7 +13,14 @@ import pandas as pd
 
 import gradio as gr
 
-from src.models import get_model_info, load_model
+from src import models
+from src.models import (
+    get_model_info,
+    load_model,
+    predict_with_model,
+    summarize_predictions,
+)
+from src.prediction_cache import get_prediction_cache
 from src.preprocessing import preprocess_for_prediction
 from src.schemas import (
     AyantEnfantsEnum,
@@ -109,23 +116,21 @@ def predict_turnover(
             annees_dans_le_poste_actuel=int(annees_dans_le_poste_actuel),
         )
 
-        # Preprocessing
-        features = preprocess_for_prediction(employee)
-
-        # Charger le modèle et prédire
+        # Charger le modèle et prédire (un seul passage predict_proba),
+        # sauf si le résultat est en cache pour cette version du modèle
         model = load_model()
-        prediction = int(model.predict(features)[0])
-        proba = model.predict_proba(features)[0]
-        prob_0 = float(proba[0])
-        prob_1 = float(proba[1])
-
-        # Déterminer le niveau de risque
-        if prob_1 < 0.3:
-            risk_level = "Low"
-        elif prob_1 < 0.7:
-            risk_level = "Medium"
-        else:
-            risk_level = "High"
+        cache = get_prediction_cache()
+        cache_key = cache.key_for(employee, getattr(model, "version", None))
+        inference = cache.get(cache_key) if cache_key else None
+        if inference is None:
+            features = preprocess_for_prediction(employee)
+            inference = predict_with_model(model, features)
+            if cache_key:
+                cache.set(cache_key, inference)
+        prediction = int(inference.predictions[0])
+        prob_0 = float(inference.probabilities[0, 0])
+        prob_1 = float(inference.probabilities[0, 1])
+        risk_level = str(inference.risk_levels[0])
 
         # Affichage
         if risk_level == "High":
@@ -142,29 +147,18 @@ def predict_turnover(
         try:
             # Vérifier si on est sur HF Spaces (variable d'environnement)
             if os.getenv("SPACE_ID") is None:  # Pas sur HF Spaces
-                from sqlalchemy import create_engine
-                from sqlalchemy.orm import sessionmaker
-
-                from src.config import get_settings
+                from src.database import get_prediction_log_queue
 
-                settings = get_settings()
-                engine = create_engine(settings.DATABASE_URL)
-                Session = sessionmaker(bind=engine)
-                session = Session()
-
-                # Importer le modèle MLLog
-                from db_models import MLLog
-
-                # Créer le log
-                log_entry = MLLog(
-                    input_json=employee.dict(),  # Convertir Pydantic en dict
-                    prediction="Oui" if prediction == 1 else "Non",
+                # Le log est écrit par lots en arrière-plan
+                queued = get_prediction_log_queue().enqueue(
+                    employee.model_dump(mode="json"),
+                    "Oui" if prediction == 1 else "Non",
+                )
+                db_status = (
+                    "✅ Enregistrement DB en file"
+                    if queued
+                    else "⚠️ File DB pleine, log ignoré"
                 )
-                session.add(log_entry)
-                session.commit()
-                session.close()
-
-                db_status = "✅ Enregistré en DB"
         except Exception as db_error:
             db_status = f"⚠️ Erreur DB: {str(db_error)}"
 
@@ -328,16 +322,23 @@ print(response.json())
 """
 
 
+def model_status_markdown() -> str:
+    """
+    Statut du modèle affiché par l'UI, évalué à chaque chargement de page.
+
+    Ne charge pas le modèle : la construction de l'interface au démarrage
+    de l'API ne paie ni le téléchargement ni la désérialisation, faits une
+    seule fois par le lifespan de l'API.
+    """
+    if models._model_cache is None:
+        return "**Statut**: ⏳ Modèle en cours de chargement..."
+    model_type = get_model_info().get("model_type", "Unknown")
+    return f"**Statut**: ✅ Modèle chargé: {model_type}"
+
+
 def create_gradio_interface():
     """Crée l'interface Gradio complète."""
 
-    # Obtenir les infos du modèle
-    try:
-        model_info = get_model_info()
-        model_status = f"✅ Modèle chargé: {model_info.get('model_type', 'Unknown')}"
-    except Exception:
-        model_status = "⏳ Modèle en cours de chargement..."
-
     with gr.Blocks(
         title="Employee Turnover Prediction",
     ) as demo:
@@ -352,7 +353,7 @@ def create_gradio_interface():
         """
         )
 
-        gr.Markdown(f"**Statut**: {model_status}")
+        gr.Markdown(model_status_markdown)
 
         with gr.Tabs():
             # Onglet Prédiction
@@ -578,64 +579,38 @@ def create_gradio_interface():
                         # Fusion
                         from src.preprocessing import (
                             merge_csv_dataframes,
-                            preprocess_dataframe_for_prediction,
+                            preprocess_batch_for_prediction,
                         )
 
                         merged_df = merge_csv_dataframes(sondage_df, eval_df, sirh_df)
                         employee_ids = merged_df["original_employee_id"].tolist()
-                        merged_df = merged_df.drop(columns=["original_employee_id"])
-                        if "a_quitte_l_entreprise" in merged_df.columns:
-                            merged_df = merged_df.drop(
-                                columns=["a_quitte_l_entreprise"]
-                            )
 
-                        # Preprocessing
-                        X = preprocess_dataframe_for_prediction(merged_df)
+                        # Preprocessing vectorisé (identifiant et cible ignorés)
+                        X = preprocess_batch_for_prediction(merged_df)
 
-                        # Modèle et prédictions
+                        # Modèle et prédictions (un seul passage predict_proba)
                         from src.models import load_model
 
                         model = load_model()
-                        predictions = model.predict(X.values)
-                        probabilities = model.predict_proba(X.values)
-
-                        results = []
-                        risk_counts = {"Low": 0, "Medium": 0, "High": 0}
-                        leave_count = 0
-
-                        for i, emp_id in enumerate(employee_ids):
-                            prob_stay = float(probabilities[i][0])
-                            prob_leave = float(probabilities[i][1])
-                            pred = int(predictions[i])
-
-                            if prob_leave < 0.3:
-                                risk = "Low"
-                            elif prob_leave < 0.7:
-                                risk = "Medium"
-                            else:
-                                risk = "High"
-
-                            risk_counts[risk] += 1
-                            if pred == 1:
-                                leave_count += 1
-
-                            results.append(
-                                {
-                                    "employee_id": int(emp_id),
-                                    "prediction": pred,
-                                    "probability_stay": prob_stay,
-                                    "probability_leave": prob_leave,
-                                    "risk_level": risk,
-                                }
+                        inference = predict_with_model(model, X)
+
+                        results = [
+                            {
+                                "employee_id": int(emp_id),
+                                "prediction": pred,
+                                "probability_stay": prob_stay,
+                                "probability_leave": prob_leave,
+                                "risk_level": risk,
+                            }
+                            for emp_id, pred, (prob_stay, prob_leave), risk in zip(
+                                employee_ids,
+                                inference.predictions.tolist(),
+                                inference.probabilities.tolist(),
+                                inference.risk_levels.tolist(),
                             )
+                        ]
 
-                        summary = {
-                            "total_stay": len(results) - leave_count,
-                            "total_leave": leave_count,
-                            "high_risk_count": risk_counts["High"],
-                            "medium_risk_count": risk_counts["Medium"],
-                            "low_risk_count": risk_counts["Low"],
-                        }
+                        summary = summarize_predictions(inference)
 
                         return {
                             "total_employees": len(results),
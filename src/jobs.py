@@ -0,0 +1,649 @@
+#!/usr/bin/env python3
+"""
+Jobs de prédiction batch asynchrones.
+
+POST /jobs/batch enregistre les 3 CSV sur disque, crée une ligne dans
+batch_jobs et confie le traitement à un pool local (processus par défaut,
+sans broker externe). Le worker lit les CSV par chunks (ChunkedCsvJoin),
+écrit un fichier de prédictions par chunk puis les assemble en un résultat
+CSV ou Parquet.
+
+La progression est persistée en base : un job interrompu (redémarrage de
+l'API) reprend au premier chunk non écrit, et l'annulation est vérifiée
+entre deux chunks. Une exécution détient le job par un bail prolongé à
+chaque chunk : avec plusieurs workers (server.py), un job n'est repris
+que s'il attend encore ou si le worker qui l'exécutait a cessé de
+progresser. Les prédictions d'un chunk sont écrites dans ml_logs une fois
+son fichier écrit et avant d'enregistrer la progression : un chunk repris
+n'est jamais logué deux fois.
+"""
+import multiprocessing
+import os
+import shutil
+import threading
+import uuid
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+from pathlib import Path
+from typing import IO, Any, Optional
+
+import pandas as pd
+
+from src.config import Settings
+from src.database import get_engine
+from src.logger import logger
+from src.metrics import record_summary
+
+# Statuts d'un job
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINAL_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+# Formats de résultat : (extension, media type)
+JOB_FORMATS = {
+    "csv": ("csv", "text/csv"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+# Noms des CSV d'entrée dans le dossier du job
+INPUT_FILES = ("sondage.csv", "eval.csv", "sirh.csv")
+
+
+def parquet_available() -> bool:
+    """Indique si l'écriture Parquet est possible (pyarrow installé)."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_job(job_id: str) -> Optional[dict[str, Any]]:
+    """
+    Lit un job dans batch_jobs.
+
+    Args:
+        job_id: Identifiant du job.
+
+    Returns:
+        Colonnes du job, ou None si le job n'existe pas.
+    """
+    from sqlalchemy import select
+
+    from db_models import BatchJob
+
+    with get_engine().connect() as conn:
+        row = conn.execute(
+            select(BatchJob.__table__).where(BatchJob.id == job_id)
+        ).first()
+    return dict(row._mapping) if row is not None else None
+
+
+def _update_job(job_id: str, **values) -> None:
+    """Met à jour les colonnes d'un job."""
+    from sqlalchemy import update
+
+    from db_models import BatchJob
+
+    with get_engine().begin() as conn:
+        conn.execute(
+            update(BatchJob.__table__)
+            .where(BatchJob.id == job_id)
+            .values(updated_at=datetime.now(), **values)
+        )
+
+
+def _lease_expired(now: datetime):
+    """Condition SQL : job sans bail ou bail échu."""
+    from sqlalchemy import or_
+
+    from db_models import BatchJob
+
+    return or_(BatchJob.lease_until.is_(None), BatchJob.lease_until < now)
+
+
+def _start_job(job_id: str, owner: str, lease_s: float) -> bool:
+    """
+    Prend le job : pending, ou running dont le bail est échu (worker
+    arrêté), et sans annulation demandée.
+
+    Vérification et prise en un seul UPDATE conditionnel : une annulation
+    concurrente ne peut pas être écrasée, et deux workers ne peuvent pas
+    exécuter le même job.
+
+    Returns:
+        True si le job a démarré.
+    """
+    from sqlalchemy import or_, update
+
+    from db_models import BatchJob
+
+    now = datetime.now()
+    with get_engine().begin() as conn:
+        result = conn.execute(
+            update(BatchJob.__table__)
+            .where(
+                BatchJob.id == job_id,
+                or_(
+                    BatchJob.status == PENDING,
+                    (BatchJob.status == RUNNING) & _lease_expired(now),
+                ),
+                BatchJob.cancel_requested.is_(False),
+            )
+            .values(
+                status=RUNNING,
+                claimed_by=owner,
+                lease_until=now + timedelta(seconds=lease_s),
+                updated_at=now,
+            )
+        )
+    return result.rowcount == 1
+
+
+def _renew_lease(job_id: str, owner: str, lease_s: float, **values) -> bool:
+    """
+    Prolonge le bail du job en enregistrant sa progression.
+
+    Returns:
+        False si le job n'est plus détenu par cette exécution.
+    """
+    from sqlalchemy import update
+
+    from db_models import BatchJob
+
+    now = datetime.now()
+    with get_engine().begin() as conn:
+        result = conn.execute(
+            update(BatchJob.__table__)
+            .where(
+                BatchJob.id == job_id,
+                BatchJob.status == RUNNING,
+                BatchJob.claimed_by == owner,
+            )
+            .values(
+                lease_until=now + timedelta(seconds=lease_s),
+                updated_at=now,
+                **values,
+            )
+        )
+    return result.rowcount == 1
+
+
+def _cancel_abandoned(job_id: str) -> bool:
+    """
+    Annule un job running dont l'annulation a été demandée et dont le
+    worker s'est arrêté (bail échu).
+
+    Returns:
+        True si le job a été annulé.
+    """
+    from sqlalchemy import update
+
+    from db_models import BatchJob
+
+    now = datetime.now()
+    with get_engine().begin() as conn:
+        result = conn.execute(
+            update(BatchJob.__table__)
+            .where(
+                BatchJob.id == job_id,
+                BatchJob.status == RUNNING,
+                BatchJob.cancel_requested.is_(True),
+                _lease_expired(now),
+            )
+            .values(status=CANCELLED, updated_at=now)
+        )
+    return result.rowcount == 1
+
+
+def _write_part(frame: pd.DataFrame, path: Path, output_format: str) -> None:
+    """Écrit un chunk de prédictions de façon atomique (fichier temporaire)."""
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    if output_format == "parquet":
+        frame.to_parquet(tmp_path, index=False)
+    else:
+        frame.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _read_part(path: Path, output_format: str, columns=None) -> pd.DataFrame:
+    if output_format == "parquet":
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def _assemble_result(
+    parts: list[Path], result_path: Path, output_format: str
+) -> dict[str, int]:
+    """
+    Assemble les chunks en un seul fichier, sans tout charger en mémoire.
+
+    Returns:
+        Résumé des prédictions (mêmes clés que summarize_predictions).
+    """
+    counts: Counter = Counter()
+    tmp_path = result_path.with_suffix(result_path.suffix + ".tmp")
+
+    if output_format == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for part in parts:
+                table = pq.read_table(part)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            pd.DataFrame().to_parquet(tmp_path)
+    else:
+        with open(tmp_path, "wb") as out:
+            for i, part in enumerate(parts):
+                with open(part, "rb") as f:
+                    if i > 0:
+                        f.readline()  # en-tête déjà écrit
+                    shutil.copyfileobj(f, out)
+
+    for part in parts:
+        chunk = _read_part(part, output_format, ["prediction", "risk_level"])
+        counts["total_leave"] += int((chunk["prediction"] == 1).sum())
+        counts["total_stay"] += int((chunk["prediction"] == 0).sum())
+        for level in ("High", "Medium", "Low"):
+            counts[f"{level.lower()}_risk_count"] += int(
+                (chunk["risk_level"] == level).sum()
+            )
+
+    os.replace(tmp_path, result_path)
+    return {
+        key: counts[key]
+        for key in (
+            "total_stay",
+            "total_leave",
+            "high_risk_count",
+            "medium_risk_count",
+            "low_risk_count",
+        )
+    }
+
+
+def run_batch_job(
+    job_id: str,
+    job_dir: str,
+    output_format: str,
+    chunk_size: int,
+    lease_s: float = 120.0,
+) -> Optional[str]:
+    """
+    Exécute un job batch (tâche du pool, picklable).
+
+    Les chunks déjà présents sur disque sont ignorés (reprise) : la
+    jointure par chunks est déterministe, le chunk N est toujours le même.
+    Un chunk est écrit dans ml_logs (de façon synchrone) après son fichier :
+    la mémoire du job reste bornée à un chunk même si la base est lente,
+    et un arrêt brutal entre les deux ne perd que les logs de ce chunk,
+    jamais dupliqués à la reprise.
+
+    Args:
+        job_id: Identifiant du job (batch_id dans ml_logs).
+        job_dir: Dossier du job.
+        output_format: "csv" ou "parquet".
+        chunk_size: Lignes lues par chunk dans chaque CSV.
+        lease_s: Bail de l'exécution, prolongé à chaque chunk.
+
+    Returns:
+        Statut final du job, ou None s'il est exécuté ou terminé par un
+        autre worker.
+    """
+    from src.models import ensure_current_model
+    from src.scoring import log_frame, score_prediction_frame
+    from src.streaming import ChunkedCsvJoin
+
+    job_path = Path(job_dir)
+    parts_dir = job_path / "parts"
+    parts_dir.mkdir(parents=True, exist_ok=True)
+    extension, _ = JOB_FORMATS[output_format]
+
+    owner = uuid.uuid4().hex
+    if not _start_job(job_id, owner, lease_s):
+        # Annulation demandée pendant l'arrêt d'un job en cours
+        if _cancel_abandoned(job_id):
+            return CANCELLED
+        job = get_job(job_id)
+        if job is None or job["status"] == CANCELLED:
+            return CANCELLED
+        logger.info(f"Job batch {job_id} déjà pris par un autre worker")
+        return None
+
+    logger.info(f"Job batch {job_id} démarré")
+    # Worker de longue durée : version courante du modèle (rechargement à chaud)
+    ensure_current_model()
+    _renew_lease(job_id, owner, lease_s)
+
+    parts: list[Path] = []
+    processed_rows = 0
+    try:
+        inputs = [open(job_path / "inputs" / name, "rb") for name in INPUT_FILES]
+        try:
+            join = ChunkedCsvJoin(*inputs, chunk_size=chunk_size)
+            for index, merged_df in enumerate(join):
+                job = get_job(job_id)
+                if job is None or job["cancel_requested"]:
+                    _update_job(job_id, status=CANCELLED)
+                    logger.info(f"Job batch {job_id} annulé")
+                    return CANCELLED
+
+                part = parts_dir / f"part-{index:05d}.{extension}"
+                if not part.exists():
+                    frame, _, _ = score_prediction_frame(merged_df)
+                    _write_part(frame, part, output_format)
+                    log_frame(merged_df, frame["prediction"].to_numpy(), job_id)
+
+                parts.append(part)
+                processed_rows += len(merged_df)
+                if not _renew_lease(
+                    job_id,
+                    owner,
+                    lease_s,
+                    processed_rows=processed_rows,
+                    chunks_done=index + 1,
+                ):
+                    # Bail échu et job repris par un autre worker
+                    logger.warning(f"Job batch {job_id} repris par un autre worker")
+                    return None
+        finally:
+            for f in inputs:
+                f.close()
+
+        result_path = job_path / f"result.{extension}"
+        summary = _assemble_result(parts, result_path, output_format)
+        _update_job(
+            job_id,
+            status=SUCCEEDED,
+            total_rows=processed_rows,
+            summary=summary,
+            result_path=str(result_path),
+            lease_until=None,
+        )
+        logger.info(f"Job batch {job_id} terminé: {processed_rows} employés")
+        return SUCCEEDED
+
+    except Exception as e:
+        logger.exception(f"Job batch {job_id} en échec")
+        _update_job(job_id, status=FAILED, error=str(e))
+        return FAILED
+
+
+def _log_pool_failure(future) -> None:
+    """Logue les erreurs du pool lui-même (ex: worker tué)."""
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Job batch interrompu: {future.exception()}")
+
+
+def _record_job_metrics(job_id: str, future) -> None:
+    """
+    Compte un job terminé dans les métriques du processus de l'API.
+
+    Le job tourne dans un processus du pool : ses lots ne sont comptés
+    qu'ici, une fois, à partir du résumé enregistré en base.
+    """
+    if future.cancelled() or future.exception() is not None:
+        return
+    if future.result() != SUCCEEDED:
+        return
+    try:
+        job = get_job(job_id)
+    except Exception as e:
+        logger.warning(f"Métriques du job {job_id} indisponibles: {e}")
+        return
+    if job is not None and job["summary"]:
+        record_summary("job", job["summary"])
+
+
+class BatchJobManager:
+    """
+    Gestion des jobs batch : création, exécution dans un pool local,
+    annulation et reprise des jobs interrompus ou abandonnés par un autre
+    worker.
+
+    Examples:
+        >>> manager = BatchJobManager.from_settings(settings)
+        >>> manager.start()
+        >>> job_id = manager.create_job(sondage, evaluation, sirh, "csv")
+    """
+
+    def __init__(
+        self,
+        jobs_dir: str = "jobs",
+        mode: str = "process",
+        max_workers: int = 1,
+        chunk_size: int = 10000,
+        lease_s: float = 120.0,
+        resume_interval_s: float = 0.0,
+    ):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Mode de pool inconnu: {mode}")
+
+        self.jobs_dir = Path(jobs_dir)
+        self.mode = mode
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.lease_s = lease_s
+        self.resume_interval_s = resume_interval_s
+        self._pool: Optional[Executor] = None
+        # Jobs soumis à ce pool et pas encore terminés
+        self._submitted: set[str] = set()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "BatchJobManager":
+        """Construit le gestionnaire depuis la configuration de l'application."""
+        return cls(
+            jobs_dir=settings.JOBS_DIR,
+            mode=settings.JOBS_EXECUTOR,
+            max_workers=settings.JOBS_WORKERS,
+            chunk_size=settings.JOBS_CHUNK_SIZE,
+            lease_s=settings.JOBS_LEASE_S,
+            resume_interval_s=settings.JOBS_RESUME_INTERVAL_S,
+        )
+
+    @property
+    def started(self) -> bool:
+        """Indique si le pool des jobs est démarré."""
+        return self._pool is not None
+
+    def start(self, resume: bool = True) -> None:
+        """
+        Crée la table batch_jobs si besoin, démarre le pool et reprend les
+        jobs interrompus (idempotent).
+
+        Args:
+            resume: Reprendre les jobs interrompus, puis rechercher toutes
+                les resume_interval_s secondes les jobs abandonnés (worker
+                arrêté). Avec plusieurs workers (server.py), un seul
+                d'entre eux reprend les jobs.
+        """
+        if self._pool is not None:
+            return
+
+        from db_models import BatchJob
+
+        BatchJob.__table__.create(get_engine(), checkfirst=True)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+
+        if self.mode == "process":
+            # spawn : le pool est créé depuis un thread de l'API, qui fait
+            # déjà tourner d'autres threads (logs, ml_logs, inférence) ; un
+            # fork pourrait hériter d'un verrou pris par l'un d'eux
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="batch-job"
+            )
+        if resume:
+            self.resume_incomplete()
+            if self.resume_interval_s > 0:
+                self._stop.clear()
+                self._watcher = threading.Thread(
+                    target=self._watch, name="batch-job-resume", daemon=True
+                )
+                self._watcher.start()
+
+    def shutdown(self) -> None:
+        """Arrête le pool (les jobs en cours reprendront au redémarrage)."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(5.0)
+            self._watcher = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._submitted.clear()
+
+    def _watch(self) -> None:
+        """Reprend périodiquement les jobs abandonnés par un autre worker."""
+        while not self._stop.wait(self.resume_interval_s):
+            try:
+                self.resume_incomplete()
+            except Exception as e:
+                logger.warning(f"Recherche des jobs à reprendre en échec: {e}")
+
+    def _submit(self, job_id: str, job_dir: str, output_format: str) -> None:
+        self._submitted.add(job_id)
+        future = self._pool.submit(
+            run_batch_job,
+            job_id,
+            job_dir,
+            output_format,
+            self.chunk_size,
+            self.lease_s,
+        )
+        future.add_done_callback(lambda _: self._submitted.discard(job_id))
+        future.add_done_callback(_log_pool_failure)
+        future.add_done_callback(partial(_record_job_metrics, job_id))
+
+    def create_job(
+        self, sondage_file: IO, eval_file: IO, sirh_file: IO, output_format: str
+    ) -> str:
+        """
+        Enregistre les CSV sur disque, crée le job et le soumet au pool.
+
+        Args:
+            sondage_file: Fichier CSV du sondage (objet fichier binaire).
+            eval_file: Fichier CSV des évaluations.
+            sirh_file: Fichier CSV SIRH.
+            output_format: "csv" ou "parquet".
+
+        Returns:
+            Identifiant du job.
+        """
+        from sqlalchemy import insert
+
+        from db_models import BatchJob
+
+        self.start()
+        job_id = str(uuid.uuid4())
+        job_dir = self.jobs_dir / job_id
+        inputs_dir = job_dir / "inputs"
+        inputs_dir.mkdir(parents=True)
+
+        for name, source in zip(INPUT_FILES, (sondage_file, eval_file, sirh_file)):
+            source.seek(0)
+            with open(inputs_dir / name, "wb") as out:
+                shutil.copyfileobj(source, out)
+
+        # Estimation du total : lignes du sondage (hors en-tête)
+        with open(inputs_dir / INPUT_FILES[0], "rb") as f:
+            total_rows = max(sum(1 for _ in f) - 1, 0)
+
+        with get_engine().begin() as conn:
+            conn.execute(
+                insert(BatchJob.__table__).values(
+                    id=job_id,
+                    status=PENDING,
+                    output_format=output_format,
+                    job_dir=str(job_dir),
+                    total_rows=total_rows,
+                    processed_rows=0,
+                    chunks_done=0,
+                    cancel_requested=False,
+                    created_at=datetime.now(),
+                    updated_at=datetime.now(),
+                )
+            )
+
+        self._submit(job_id, str(job_dir), output_format)
+        logger.info(f"Job batch {job_id} créé ({total_rows} lignes, {output_format})")
+        return job_id
+
+    def cancel(self, job_id: str) -> Optional[dict[str, Any]]:
+        """
+        Demande l'annulation d'un job (effective entre deux chunks).
+
+        Returns:
+            Le job mis à jour, ou None s'il n'existe pas.
+        """
+        from sqlalchemy import update
+
+        from db_models import BatchJob
+
+        if get_job(job_id) is None:
+            return None
+
+        # UPDATE conditionnels : pas de fenêtre entre la lecture du statut
+        # et son changement (voir _start_job)
+        table = BatchJob.__table__
+        with get_engine().begin() as conn:
+            conn.execute(
+                update(table)
+                .where(BatchJob.id == job_id, BatchJob.status.notin_(FINAL_STATUSES))
+                .values(cancel_requested=True, updated_at=datetime.now())
+            )
+            # Job pas encore démarré : annulé immédiatement
+            conn.execute(
+                update(table)
+                .where(BatchJob.id == job_id, BatchJob.status == PENDING)
+                .values(status=CANCELLED, updated_at=datetime.now())
+            )
+        return get_job(job_id)
+
+    def resume_incomplete(self) -> int:
+        """
+        Resoumet les jobs interrompus : pending, ou running dont le bail est
+        échu. Un job pending encore en file dans un autre worker peut être
+        soumis deux fois : la première exécution qui le prend l'emporte
+        (_start_job), l'autre s'arrête aussitôt.
+
+        Returns:
+            Nombre de jobs repris.
+        """
+        from sqlalchemy import or_, select
+
+        from db_models import BatchJob
+
+        with get_engine().connect() as conn:
+            jobs = conn.execute(
+                select(BatchJob.id, BatchJob.job_dir, BatchJob.output_format).where(
+                    or_(
+                        BatchJob.status == PENDING,
+                        (BatchJob.status == RUNNING) & _lease_expired(datetime.now()),
+                    )
+                )
+            ).all()
+
+        jobs = [job for job in jobs if job.id not in self._submitted]
+        for job in jobs:
+            logger.info(f"Reprise du job batch {job.id}")
+            self._submit(job.id, job.job_dir, job.output_format)
+        return len(jobs)
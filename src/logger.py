@@ -3,32 +3,54 @@
 Module de logging structuré pour l'API Employee Turnover.
 
 Fournit un système de logging centralisé avec :
-- Logs structurés en JSON
-- Rotation automatique des fichiers
+- Logs structurés en JSON (orjson si installé)
+- Écriture non bloquante : les handlers tournent dans un thread dédié
+  (QueueHandler / QueueListener), l'appelant ne fait qu'un put dans la file
+- Rotation des fichiers par taille et par durée, archives gzip compressées
+  en arrière-plan
+- Logs de requêtes échantillonnés par route et statut, et résumé agrégé
+  périodique (volumes, latences, niveaux de risque)
 - Niveaux de log configurables
 - Intégration FastAPI
 """
+import atexit
 import logging
+import math
+import os
+import queue
+import random
 import sys
+import threading
+import time
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import Any, Dict
-
-from pythonjsonlogger.json import JsonFormatter
+from typing import Any, Dict, Optional
 
 from src.config import get_settings
 
+try:
+    # Sérialisation orjson (dépendance de Gradio), repli sur json sinon
+    from pythonjsonlogger.orjson import OrjsonFormatter as _JsonFormatter
+except ImportError:
+    from pythonjsonlogger.json import JsonFormatter as _JsonFormatter
+
 settings = get_settings()
 
-# Créer le dossier logs s'il n'existe pas
+# Dossier des logs (créé à la configuration du logger)
 LOG_DIR = Path("logs")
-LOG_DIR.mkdir(exist_ok=True)
 
 # Fichiers de logs
 LOG_FILE = LOG_DIR / "api.log"
 ERROR_LOG_FILE = LOG_DIR / "error.log"
 
+JSON_LOG_FORMAT = "%(timestamp)s %(level)s %(name)s %(message)s"
+
+# Files et threads d'écriture actifs (redémarrés après un fork)
+_listeners: list[tuple[QueueListener, QueueHandler]] = []
 
-class CustomJsonFormatter(JsonFormatter):
+
+class CustomJsonFormatter(_JsonFormatter):
     """
     Formatter JSON personnalisé avec champs supplémentaires.
     """
@@ -56,12 +78,174 @@ class CustomJsonFormatter(JsonFormatter):
             log_record["timestamp"] = self.formatTime(record, self.datefmt)
 
 
-def setup_logger(name: str = "employee_turnover_api") -> logging.Logger:
+def _gzip_file(source: str, dest: str) -> None:
+    """Compresse source en dest puis supprime source."""
+    import gzip
+    import shutil
+
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """
+    Fichier de logs avec rotation par taille et par durée.
+
+    Les archives sont nommées api.log.1.gz, api.log.2.gz... : à la rotation
+    le fichier courant est renommé, sa compression tourne dans un thread.
+    Avec plusieurs processus (server.py), un fichier déjà tourné par un
+    autre processus est rouvert au lieu d'écrire dans l'archive.
+
+    Examples:
+        >>> handler = CompressingRotatingFileHandler(
+        ...     "logs/api.log", max_bytes=10_000_000, interval_s=86400, backup_count=7
+        ... )
+    """
+
+    def __init__(
+        self,
+        filename: Path,
+        max_bytes: int = 0,
+        interval_s: float = 0,
+        backup_count: int = 0,
+        compress: bool = True,
+    ):
+        super().__init__(
+            filename,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+            delay=True,  # fichier ouvert au premier log écrit
+        )
+        self.interval_s = interval_s
+        self.rollover_at = time.time() + interval_s if interval_s else None
+        self._compression: Optional[threading.Thread] = None
+        if compress:
+            self.namer = lambda name: name + ".gz"
+            self.rotator = self._rotate_compressed
+
+    def _reopen_if_rotated(self) -> None:
+        """Ferme le fichier s'il a été renommé par un autre processus."""
+        if self.stream is None:
+            return
+        try:
+            current = os.stat(self.baseFilename).st_ino
+        except FileNotFoundError:
+            current = None
+        if current != os.fstat(self.stream.fileno()).st_ino:
+            self.stream.close()
+            self.stream = None
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.backupCount <= 0:
+            return False
+        self._reopen_if_rotated()
+
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            if os.path.isfile(self.baseFilename) and os.path.getsize(self.baseFilename):
+                return True
+            self.rollover_at = time.time() + self.interval_s
+
+        if self.maxBytes > 0 and os.path.isfile(self.baseFilename):
+            # Taille du fichier sans reformater le message (la limite peut
+            # être dépassée d'un enregistrement)
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.seek(0, 2)
+            return self.stream.tell() >= self.maxBytes
+        return False
+
+    def doRollover(self) -> None:
+        # L'archive précédente doit être complète avant le décalage .1 -> .2
+        self._wait_compression()
+        super().doRollover()
+        if self.interval_s:
+            self.rollover_at = time.time() + self.interval_s
+
+    def _rotate_compressed(self, source: str, dest: str) -> None:
+        plain = dest[: -len(".gz")]
+        os.rename(source, plain)
+        self._compression = threading.Thread(
+            target=_gzip_file, args=(plain, dest), name="log-compress", daemon=True
+        )
+        self._compression.start()
+
+    def _wait_compression(self) -> None:
+        if self._compression is not None:
+            self._compression.join()
+            self._compression = None
+
+    def close(self) -> None:
+        self._wait_compression()
+        super().close()
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Dépose les logs dans une file bornée, sans jamais bloquer l'appelant.
+
+    File pleine (disque lent) : le log est ignoré et compté dans dropped.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Même processus : l'enregistrement est transmis tel quel (exception
+        # comprise), seul le message est figé avant que ses arguments changent
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogQueueListener(QueueListener):
+    """QueueListener dont l'arrêt attend une place dans une file bornée."""
+
+    def enqueue_sentinel(self) -> None:
+        # put_nowait lèverait queue.Full si la file est pleine à l'arrêt
+        self.queue.put(self._sentinel)
+
+
+def _restart_listeners_after_fork() -> None:
+    """Dans un processus forké, le thread d'écriture n'existe plus."""
+    for listener, handler in _listeners:
+        listener.queue = handler.queue = queue.Queue(handler.queue.maxsize)
+        listener._thread = None
+        listener.start()
+
+
+def stop_log_listeners() -> None:
+    """Écrit les logs encore en file et arrête les threads d'écriture."""
+    for listener, _ in _listeners:
+        if listener._thread is not None:
+            listener.stop()
+
+
+atexit.register(stop_log_listeners)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listeners_after_fork)
+
+
+def setup_logger(
+    name: str = "employee_turnover_api",
+    log_dir: Optional[Path] = None,
+    queued: Optional[bool] = None,
+) -> logging.Logger:
     """
     Configure et retourne un logger structuré.
 
     Args:
         name: Nom du logger.
+        log_dir: Dossier des fichiers de logs (défaut: logs/).
+        queued: Écriture dans un thread dédié (défaut: LOG_QUEUE_ENABLED).
 
     Returns:
         Logger configuré avec handlers console et fichiers.
@@ -91,28 +275,45 @@ def setup_logger(name: str = "employee_turnover_api") -> logging.Logger:
             datefmt="%Y-%m-%d %H:%M:%S",
         )
     else:
-        console_format = CustomJsonFormatter(
-            "%(timestamp)s %(level)s %(name)s %(message)s"
-        )
+        console_format = CustomJsonFormatter(JSON_LOG_FORMAT)
 
     console_handler.setFormatter(console_format)
-    logger.addHandler(console_handler)
 
     # === HANDLER FICHIER (tous les logs) ===
-    file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+    log_dir = LOG_DIR if log_dir is None else Path(log_dir)
+    log_dir.mkdir(exist_ok=True)
+    rotation = {
+        "max_bytes": settings.LOG_MAX_BYTES,
+        "interval_s": settings.LOG_ROTATE_INTERVAL_S,
+        "backup_count": settings.LOG_BACKUP_COUNT,
+        "compress": settings.LOG_COMPRESS,
+    }
+    file_handler = CompressingRotatingFileHandler(log_dir / LOG_FILE.name, **rotation)
     file_handler.setLevel(log_level)
-    file_handler.setFormatter(
-        CustomJsonFormatter("%(timestamp)s %(level)s %(name)s %(message)s")
-    )
-    logger.addHandler(file_handler)
+    file_handler.setFormatter(CustomJsonFormatter(JSON_LOG_FORMAT))
 
     # === HANDLER ERREURS UNIQUEMENT ===
-    error_handler = logging.FileHandler(ERROR_LOG_FILE, encoding="utf-8")
-    error_handler.setLevel(logging.ERROR)
-    error_handler.setFormatter(
-        CustomJsonFormatter("%(timestamp)s %(level)s %(name)s %(message)s")
+    error_handler = CompressingRotatingFileHandler(
+        log_dir / ERROR_LOG_FILE.name, **rotation
     )
-    logger.addHandler(error_handler)
+    error_handler.setLevel(logging.ERROR)
+    error_handler.setFormatter(CustomJsonFormatter(JSON_LOG_FORMAT))
+
+    handlers = [console_handler, file_handler, error_handler]
+    if queued is None:
+        queued = settings.LOG_QUEUE_ENABLED
+    if queued:
+        # Formatage JSON et écritures dans le thread du QueueListener
+        queue_handler = NonBlockingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+        listener = LogQueueListener(
+            queue_handler.queue, *handlers, respect_handler_level=True
+        )
+        listener.start()
+        _listeners.append((listener, queue_handler))
+        handlers = [queue_handler]
+
+    for handler in handlers:
+        logger.addHandler(handler)
 
     # Éviter propagation au root logger
     logger.propagate = False
@@ -120,26 +321,292 @@ def setup_logger(name: str = "employee_turnover_api") -> logging.Logger:
     return logger
 
 
+def _status_class(status_code: int) -> str:
+    """Classe de statut HTTP : 200 -> "2xx"."""
+    return f"{status_code // 100}xx"
+
+
+class RequestLogSampler:
+    """
+    Échantillonnage des logs de requêtes par route et classe de statut.
+
+    Les règles "route:classe=taux" sont cherchées de la plus précise à la
+    moins précise : "/predict:2xx", "/predict", "2xx", puis "*". Les
+    erreurs serveur (5xx) et les requêtes lentes sont toujours gardées ;
+    les lignes échantillonnées portent leur sample_rate (poids = 1/taux).
+
+    Examples:
+        >>> rates = RequestLogSampler.parse_rates("/predict:2xx=0.01,/health=0")
+        >>> RequestLogSampler(rates, slow_ms=1000).keep("/predict", 200, 12.0)
+        (False, 0.01)  # 99 fois sur 100
+    """
+
+    def __init__(
+        self,
+        rates: Optional[Dict[str, float]] = None,
+        slow_ms: float = 1000.0,
+        default_rate: float = 1.0,
+    ):
+        self.rates = dict(rates or {})
+        self.slow_ms = slow_ms
+        self.default_rate = self.rates.pop("*", default_rate)
+        self._resolved: Dict[tuple[str, str], float] = {}
+
+    @classmethod
+    def from_settings(cls, settings) -> "RequestLogSampler":
+        """Construit l'échantillonneur depuis la configuration."""
+        return cls(
+            rates=cls.parse_rates(settings.LOG_SAMPLE_RATES),
+            slow_ms=settings.LOG_SLOW_REQUEST_MS,
+        )
+
+    @staticmethod
+    def parse_rates(spec: str) -> Dict[str, float]:
+        """
+        Parse "/predict:2xx=0.01,/health=0,4xx=0.5".
+
+        Raises:
+            ValueError: Si une règle est mal formée ou hors de [0, 1].
+        """
+        rates = {}
+        for rule in filter(None, (part.strip() for part in spec.split(","))):
+            key, sep, value = rule.rpartition("=")
+            rate = float(value)
+            if not sep or not key.strip() or not 0.0 <= rate <= 1.0:
+                raise ValueError(f"Règle d'échantillonnage invalide: {rule!r}")
+            rates[key.strip()] = rate
+        return rates
+
+    def rate_for(self, route: str, status_code: int) -> float:
+        """Taux de la règle la plus précise pour (route, statut)."""
+        status = _status_class(status_code)
+        try:
+            return self._resolved[(route, status)]
+        except KeyError:
+            pass
+        for key in (f"{route}:{status}", route, status):
+            if key in self.rates:
+                rate = self.rates[key]
+                break
+        else:
+            rate = self.default_rate
+        if len(self._resolved) < 1024:  # routes inconnues (404) non mémorisées
+            self._resolved[(route, status)] = rate
+        return rate
+
+    def keep(
+        self, route: str, status_code: int, duration_ms: float
+    ) -> tuple[bool, float]:
+        """Retourne (ligne à écrire, taux appliqué)."""
+        if status_code >= 500 or duration_ms >= self.slow_ms:
+            return True, 1.0
+        rate = self.rate_for(route, status_code)
+        if rate >= 1.0:
+            return True, 1.0
+        return rate > 0.0 and random.random() < rate, rate
+
+
+class _LatencyReservoir:
+    """Échantillon uniforme de taille bornée (percentiles à mémoire fixe)."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.count = 0
+        self.max = 0.0
+        self.values: list[float] = []
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.max = max(self.max, value)
+        if len(self.values) < self.size:
+            self.values.append(value)
+        else:
+            index = random.randrange(self.count)
+            if index < self.size:
+                self.values[index] = value
+
+    def percentiles(self, *quantiles: float) -> list[float]:
+        ordered = sorted(self.values)
+        return [
+            round(
+                ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))],
+                2,
+            )
+            for q in quantiles
+        ]
+
+
+class RequestSummary:
+    """
+    Agrégats périodiques des requêtes, écrits en un log par intervalle.
+
+    Chaque intervalle produit un log "Request summary" : volume par route
+    et classe de statut, latences p50 / p95 / p99 / max par route, lignes
+    non écrites par l'échantillonnage et répartition des niveaux de risque
+    des prédictions. Toutes les requêtes sont comptées, échantillonnées ou
+    non.
+
+    Examples:
+        >>> summary = RequestSummary(interval_s=60)
+        >>> summary.start()
+        >>> summary.record_request("/predict", 200, 12.5, logged=False)
+        >>> summary.record_prediction("High")
+    """
+
+    def __init__(self, interval_s: float = 60.0, reservoir_size: int = 10_000):
+        self.interval_s = interval_s
+        self.reservoir_size = reservoir_size
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._reset()
+
+    @classmethod
+    def from_settings(cls, settings) -> "RequestSummary":
+        """Construit l'agrégateur depuis la configuration."""
+        return cls(interval_s=settings.LOG_SUMMARY_INTERVAL_S)
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval_s > 0
+
+    def _reset(self) -> None:
+        self._started_at = time.monotonic()
+        self._statuses: Dict[str, Dict[str, int]] = {}
+        self._latencies: Dict[str, _LatencyReservoir] = {}
+        self._risk_levels: Dict[str, int] = {}
+        self._sampled_out = 0
+
+    def record_request(
+        self, route: str, status_code: int, duration_ms: float, logged: bool = True
+    ) -> None:
+        """Compte une requête (appelé par log_request)."""
+        if not self.enabled:
+            return
+        status = _status_class(status_code)
+        with self._lock:
+            statuses = self._statuses.setdefault(route, {})
+            statuses[status] = statuses.get(status, 0) + 1
+            reservoir = self._latencies.get(route)
+            if reservoir is None:
+                reservoir = self._latencies[route] = _LatencyReservoir(
+                    self.reservoir_size
+                )
+            reservoir.add(duration_ms)
+            if not logged:
+                self._sampled_out += 1
+
+    def record_prediction(self, risk_level: str) -> None:
+        """Compte le niveau de risque d'une prédiction."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._risk_levels[risk_level] = self._risk_levels.get(risk_level, 0) + 1
+
+    def snapshot(self, reset: bool = True) -> Dict[str, Any]:
+        """Agrégats de l'intervalle en cours (remis à zéro si reset)."""
+        with self._lock:
+            routes = {}
+            for route, statuses in self._statuses.items():
+                reservoir = self._latencies[route]
+                p50, p95, p99 = reservoir.percentiles(0.50, 0.95, 0.99)
+                routes[route] = {
+                    "count": reservoir.count,
+                    "status": dict(statuses),
+                    "p50_ms": p50,
+                    "p95_ms": p95,
+                    "p99_ms": p99,
+                    "max_ms": round(reservoir.max, 2),
+                }
+            summary = {
+                "interval_s": round(time.monotonic() - self._started_at, 1),
+                "requests": sum(route["count"] for route in routes.values()),
+                "sampled_out": self._sampled_out,
+                "routes": routes,
+                "risk_levels": dict(self._risk_levels),
+            }
+            if reset:
+                self._reset()
+        return summary
+
+    def flush(self) -> None:
+        """Écrit le log de l'intervalle en cours s'il contient des requêtes."""
+        summary = self.snapshot()
+        if summary["requests"] or summary["risk_levels"]:
+            logging.getLogger("employee_turnover_api").info(
+                "Request summary", extra=summary
+            )
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self.flush()
+
+    def start(self) -> None:
+        """Démarre l'écriture périodique (idempotent)."""
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._reset()
+        self._thread = threading.Thread(
+            target=self._run, name="request-summary", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Arrête l'écriture périodique et écrit le dernier intervalle."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+
+@lru_cache()
+def get_request_sampler() -> RequestLogSampler:
+    """Échantillonneur partagé des logs de requêtes."""
+    return RequestLogSampler.from_settings(settings)
+
+
+@lru_cache()
+def get_request_summary() -> RequestSummary:
+    """Agrégateur partagé (démarré dans le lifespan de l'API)."""
+    return RequestSummary.from_settings(settings)
+
+
 def log_request(
     method: str,
     path: str,
     status_code: int,
     duration_ms: float,
+    route: Optional[str] = None,
     **kwargs: Any,
 ) -> None:
     """
     Log une requête HTTP avec métadonnées.
 
+    La requête est toujours comptée dans le résumé périodique ; la ligne
+    elle-même est soumise à l'échantillonnage (LOG_SAMPLE_RATES).
+
     Args:
         method: Méthode HTTP (GET, POST...).
         path: Chemin de l'endpoint.
         status_code: Code de statut HTTP.
         duration_ms: Durée de la requête en millisecondes.
+        route: Route FastAPI ("/jobs/{job_id}") pour l'échantillonnage et
+            les agrégats (défaut: path).
         **kwargs: Métadonnées additionnelles.
 
     Examples:
         >>> log_request("POST", "/predict", 200, 45.3, user_id="123")
     """
+    route = route or path
+    keep, sample_rate = get_request_sampler().keep(route, status_code, duration_ms)
+    get_request_summary().record_request(route, status_code, duration_ms, keep)
+    if not keep:
+        return
+
     logger = logging.getLogger("employee_turnover_api")
 
     log_data = {
@@ -149,6 +616,8 @@ def log_request(
         "duration_ms": round(duration_ms, 2),
         **kwargs,
     }
+    if sample_rate < 1.0:
+        log_data["sample_rate"] = sample_rate
 
     # Niveau selon status code
     if status_code >= 500:
@@ -193,7 +662,13 @@ def log_prediction(
     )
 
 
-def log_model_load(model_type: str, duration_ms: float, success: bool) -> None:
+def log_model_load(
+    model_type: str,
+    duration_ms: float,
+    success: bool,
+    phase: str = "load",
+    **kwargs: Any,
+) -> None:
     """
     Log le chargement du modèle.
 
@@ -201,9 +676,12 @@ def log_model_load(model_type: str, duration_ms: float, success: bool) -> None:
         model_type: Type de modèle chargé.
         duration_ms: Durée du chargement.
         success: Si le chargement a réussi.
+        phase: "load" (chargement) ou "warmup" (préchauffage au démarrage).
+        **kwargs: Métadonnées additionnelles (durée de chaque étape...).
 
     Examples:
         >>> log_model_load("XGBoost Pipeline", 1234.5, True)
+        >>> log_model_load("NativeBoosterModel", 85.2, True, phase="warmup")
     """
     logger = logging.getLogger("employee_turnover_api")
 
@@ -211,12 +689,19 @@ def log_model_load(model_type: str, duration_ms: float, success: bool) -> None:
         "model_type": model_type,
         "duration_ms": round(duration_ms, 2),
         "success": success,
+        "phase": phase,
+        **kwargs,
     }
 
+    if phase == "warmup":
+        message = "Model warmup completed" if success else "Model warmup failed"
+    else:
+        message = "Model loaded successfully" if success else "Model loading failed"
+
     if success:
-        logger.info("Model loaded successfully", extra=log_data)
+        logger.info(message, extra=log_data)
     else:
-        logger.error("Model loading failed", extra=log_data)
+        logger.error(message, extra=log_data)
 
 
 # Créer le logger global
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Métriques Prometheus de l'API (GET /metrics).
+
+- Latence des requêtes par route, méthode et classe de statut
+- Durée des étapes de /predict (voir src.timing)
+- Lignes par lot scoré (micro-batch, /predict/batch, chunks du flux,
+  jobs) et prédictions par niveau de risque
+- Durée de chargement du modèle
+- File de logs ml_logs : profondeur, lignes écrites, en échec, ignorées
+- Cache des prédictions : hits (mémoire, disque) et misses
+
+Avec plusieurs processus (server.py, uvicorn --workers), chaque processus
+écrit ses valeurs dans des fichiers mmap de METRICS_MULTIPROC_DIR
+(PROMETHEUS_MULTIPROC_DIR) et /metrics les agrège tous : le résultat ne
+dépend pas du worker qui répond au scrape. Le dossier doit être choisi
+avant l'import de prometheus_client, donc avant celui de ce module.
+
+Côté requêtes, une mesure est une écriture en mémoire (mmap) du
+processus ; le scrape lit les fichiers dans un thread, sans verrou commun
+avec le chemin d'inférence.
+
+Les lots et prédictions sont comptés dans le processus de l'API, à partir
+des résultats renvoyés par les pools (inférence, scoring parallèle,
+jobs) : rien n'est perdu quand ces pools sont des processus. Le trafic
+synthétique du préchauffage est exclu (suppress_metrics).
+
+prometheus_client est optionnel : sans lui (ou METRICS_ENABLED=False), les
+mesures sont ignorées et /metrics répond 503.
+"""
+import logging
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Doit précéder l'import de prometheus_client (mode choisi à l'import)
+if settings.METRICS_ENABLED and settings.METRICS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.METRICS_MULTIPROC_DIR)
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR", "")
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram
+except ImportError:
+    prometheus_client = None
+
+# Bornes des histogrammes (secondes, lignes)
+LATENCY_BUCKETS_S = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+STAGE_BUCKETS_S = (0.0001, 0.00025, 0.0005, *LATENCY_BUCKETS_S)
+BATCH_ROWS_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 1000, 10000, 100000, 1000000)
+MODEL_LOAD_BUCKETS_S = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class _NoopMetric:
+    """Métrique sans effet (prometheus_client absent ou métriques désactivées)."""
+
+    def labels(self, *args: Any, **kwargs: Any) -> "_NoopMetric":
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def observe(self, amount: float) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+
+def metrics_available() -> bool:
+    """Indique si les métriques sont collectées et exposées."""
+    return prometheus_client is not None and settings.METRICS_ENABLED
+
+
+if metrics_available():
+    REQUEST_DURATION = Histogram(
+        "http_request_duration_seconds",
+        "Durée des requêtes HTTP",
+        ["method", "route", "status"],
+        buckets=LATENCY_BUCKETS_S,
+    )
+    STAGE_DURATION = Histogram(
+        "predict_stage_duration_seconds",
+        "Durée des étapes de /predict et de l'écriture ml_logs",
+        ["stage"],
+        buckets=STAGE_BUCKETS_S,
+    )
+    BATCH_ROWS = Histogram(
+        "batch_rows",
+        "Lignes par lot scoré",
+        ["source"],
+        buckets=BATCH_ROWS_BUCKETS,
+    )
+    PREDICTIONS = Counter(
+        "predictions",
+        "Prédictions servies par niveau de risque",
+        ["source", "risk_level"],
+    )
+    MODEL_LOAD_DURATION = Histogram(
+        "model_load_duration_seconds",
+        "Durée de chargement du modèle (démarrage et rechargements)",
+        ["backend"],
+        buckets=MODEL_LOAD_BUCKETS_S,
+    )
+    DB_LOG_QUEUE_DEPTH = Gauge(
+        "db_log_queue_depth",
+        "Logs de prédiction en attente d'écriture dans ml_logs",
+        multiprocess_mode="livesum",
+    )
+    DB_LOG_ROWS = Counter(
+        "db_log_rows",
+        "Logs de prédiction par issue (written, failed, dropped)",
+        ["outcome"],
+    )
+    CACHE_LOOKUPS = Counter(
+        "prediction_cache_lookups",
+        "Lectures du cache des prédictions (hit, disk_hit, miss)",
+        ["result"],
+    )
+else:
+    REQUEST_DURATION = STAGE_DURATION = BATCH_ROWS = PREDICTIONS = _NoopMetric()
+    MODEL_LOAD_DURATION = DB_LOG_QUEUE_DEPTH = DB_LOG_ROWS = _NoopMetric()
+    CACHE_LOOKUPS = _NoopMetric()
+
+# Séries résolues une fois (pas de recherche de labels sur le chemin chaud)
+CACHE_HIT = CACHE_LOOKUPS.labels(result="hit")
+CACHE_DISK_HIT = CACHE_LOOKUPS.labels(result="disk_hit")
+CACHE_MISS = CACHE_LOOKUPS.labels(result="miss")
+DB_LOG_WRITTEN = DB_LOG_ROWS.labels(outcome="written")
+DB_LOG_FAILED = DB_LOG_ROWS.labels(outcome="failed")
+DB_LOG_DROPPED = DB_LOG_ROWS.labels(outcome="dropped")
+
+
+# Mesures des lots et prédictions actives (False pendant le préchauffage)
+_recording: ContextVar[bool] = ContextVar("metrics_recording", default=True)
+
+
+def metrics_recording() -> bool:
+    """Indique si les lots et prédictions du contexte courant sont comptés."""
+    return _recording.get()
+
+
+@contextmanager
+def suppress_metrics() -> Iterator[None]:
+    """
+    N'enregistre ni lots ni prédictions dans le bloc (trafic synthétique).
+
+    Examples:
+        >>> with suppress_metrics():
+        ...     await warm_up_inference(executor, micro_batcher)
+    """
+    token = _recording.set(False)
+    try:
+        yield
+    finally:
+        _recording.reset(token)
+
+
+def observe_request(
+    method: str, route: str, status_code: int, duration_ms: float
+) -> None:
+    """Latence d'une requête (route déclarée, statut par classe : "2xx")."""
+    REQUEST_DURATION.labels(method, route, f"{status_code // 100}xx").observe(
+        duration_ms / 1000
+    )
+
+
+def observe_stages(stages: dict[str, float]) -> None:
+    """Durées (ms) des étapes d'une requête ou d'une tâche de fond."""
+    for name, duration_ms in stages.items():
+        STAGE_DURATION.labels(name).observe(duration_ms / 1000)
+
+
+def record_prediction(source: str, risk_level: str) -> None:
+    """Compte une prédiction unitaire."""
+    if _recording.get():
+        PREDICTIONS.labels(source, risk_level).inc()
+
+
+def observe_batch_rows(source: str, n_rows: int) -> None:
+    """Taille d'un lot scoré."""
+    if _recording.get():
+        BATCH_ROWS.labels(source).observe(n_rows)
+
+
+def record_summary(source: str, summary: dict) -> None:
+    """
+    Taille d'un lot scoré et ses prédictions par niveau de risque.
+
+    Args:
+        source: "batch", "chunk" (flux) ou "job".
+        summary: Résumé du lot (summarize_predictions).
+    """
+    if not _recording.get():
+        return
+    BATCH_ROWS.labels(source).observe(summary["total_stay"] + summary["total_leave"])
+    for level in ("High", "Medium", "Low"):
+        count = summary[f"{level.lower()}_risk_count"]
+        if count:
+            PREDICTIONS.labels(source, level).inc(count)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    Exposition texte Prometheus de toutes les métriques.
+
+    En mode multi-processus, agrège les fichiers de tous les processus
+    (vivants ou non : les compteurs des workers remplacés sont conservés).
+
+    Returns:
+        Tuple (contenu, content-type).
+    """
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return (
+        prometheus_client.generate_latest(registry),
+        prometheus_client.CONTENT_TYPE_LATEST,
+    )
+
+
+def mark_process_dead(pid: int) -> None:
+    """Retire les jauges "live" d'un worker arrêté (appelé par le maître)."""
+    if MULTIPROC_DIR and prometheus_client is not None:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid, MULTIPROC_DIR)
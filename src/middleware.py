@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Middlewares ASGI de l'API.
+
+Le logging des requêtes passait par @app.middleware("http"), donc par
+BaseHTTPMiddleware de Starlette : chaque requête était servie dans une
+tâche séparée et le corps de la réponse recopié à travers un flux
+mémoire, ce qui coûte du débit et casse le streaming (le corps n'est
+transmis qu'une fois relu par le middleware).
+
+RequestLoggingMiddleware est un middleware ASGI pur : il enveloppe
+seulement `send` pour relever le code de statut (et ajouter l'en-tête
+Server-Timing) et laisse passer les messages du corps tels quels.
+"""
+import time
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import get_settings
+from src.logger import log_request
+from src.metrics import observe_request, observe_stages
+from src.timing import collect_stages, get_stage_histograms
+
+
+class RequestLoggingMiddleware:
+    """
+    Log chaque requête HTTP : méthode, chemin, route, statut, durée, client.
+
+    La durée court jusqu'au dernier message du corps : pour une réponse en
+    streaming, c'est la durée complète du flux.
+
+    Avec l'instrumentation par étape, la requête est servie dans un
+    collecteur (src.timing) : les étapes mesurées jusqu'à l'envoi des
+    en-têtes forment l'en-tête Server-Timing, toutes sont loggées dans le
+    champ "timings" et ajoutées aux histogrammes.
+
+    Examples:
+        >>> app.add_middleware(RequestLoggingMiddleware)
+    """
+
+    def __init__(self, app: ASGIApp, timing: Optional[bool] = None):
+        self.app = app
+        # Instrumentation par étape (défaut: STAGE_TIMING_ENABLED)
+        self.timing = get_settings().STAGE_TIMING_ENABLED if timing is None else timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code: Optional[int] = None
+
+        with collect_stages(self.timing) as timings:
+
+            async def send_wrapper(message: Message) -> None:
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    if timings is not None:
+                        server_timing = timings.header(
+                            (time.perf_counter() - start_time) * 1000
+                        )
+                        message = {
+                            **message,
+                            "headers": [
+                                *message.get("headers", []),
+                                (b"server-timing", server_timing.encode()),
+                            ],
+                        }
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                duration_ms = (time.perf_counter() - start_time) * 1000
+                # Pas de réponse : exception non gérée, le serveur répond 500
+                status_code = status_code or 500
+                # Route déclarée ("/jobs/{job_id}") posée dans le scope par le
+                # routeur : échantillonnage, agrégats et métriques par route
+                route = getattr(scope.get("route"), "path", None)
+
+                extra = {}
+                if timings is not None and timings.stages:
+                    extra["timings"] = timings.rounded()
+                    get_stage_histograms().observe_all(timings.stages)
+                    observe_stages(timings.stages)
+                observe_request(
+                    scope["method"], route or "<unmatched>", status_code, duration_ms
+                )
+
+                client = scope.get("client")
+                log_request(
+                    method=scope["method"],
+                    path=scope["path"],
+                    route=route,
+                    status_code=status_code,
+                    duration_ms=duration_ms,
+                    client_host=client[0] if client else None,
+                    **extra,
+                )
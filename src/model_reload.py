@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Rechargement à chaud du modèle.
+
+Une nouvelle version est chargée en arrière-plan, préchauffée sur des
+lignes synthétiques puis installée par un swap atomique de la référence
+globale (src.models.install_model) : les requêtes en cours se terminent
+sur l'ancienne version, les suivantes utilisent la nouvelle, sans
+redémarrage de l'API. L'ancien modèle n'est plus référencé et sa mémoire
+est récupérée ; les workers d'un pool de processus sont remplacés.
+
+Déclencheurs :
+- POST /admin/model/reload (version du cache, ou dernière version HF Hub)
+- surveillance du manifest du cache (MODEL_WATCH_INTERVAL_S) : une
+  nouvelle version courante (scripts/seed_model_cache.py) est chargée
+"""
+import gc
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+import numpy as np
+
+from src import models
+from src.artifacts import ArtifactCacheError, ModelArtifactCache, resolve_model_path
+from src.config import Settings, get_settings
+from src.preprocessing import preprocess_for_prediction
+from src.warmup import synthetic_employees
+
+logger = logging.getLogger(__name__)
+
+# États du rechargement
+IDLE = "idle"
+LOADING = "loading"
+FAILED = "failed"
+
+
+def synthetic_features(n_rows: int) -> np.ndarray:
+    """Features préprocessées de n_rows employés (exemple du schéma)."""
+    employee = synthetic_employees(1)[0]
+    return np.repeat(preprocess_for_prediction(employee), n_rows, 0)
+
+
+def warm_up(model: Any, n_rows: int) -> None:
+    """
+    Préchauffe un modèle (1 ligne puis n_rows) et valide ses sorties.
+
+    Raises:
+        ValueError: Si les probabilités sont invalides.
+    """
+    X = synthetic_features(max(n_rows, 1))
+    for batch in (X[:1], X):
+        probabilities = models.predict_with_model(model, batch).probabilities
+        if (
+            probabilities.shape != (len(batch), 2)
+            or not np.isfinite(probabilities).all()
+            or (probabilities < 0).any()
+            or (probabilities > 1).any()
+        ):
+            raise ValueError("Préchauffage du modèle: probabilités invalides")
+
+
+class ModelReloader:
+    """
+    Rechargement à chaud du modèle, un seul à la fois.
+
+    Examples:
+        >>> reloader = ModelReloader(
+        ...     watch_interval_s=30, pools=[executor], on_swap=[cache.clear]
+        ... )
+        >>> reloader.start()
+        >>> reloader.request_reload(version="3b1f0c9a2e47")
+        True
+    """
+
+    def __init__(
+        self,
+        watch_interval_s: float = 0.0,
+        warmup_rows: int = 32,
+        pools: Iterable[Any] = (),
+        on_swap: Iterable[Callable[[], None]] = (),
+    ):
+        self.watch_interval_s = watch_interval_s
+        self.warmup_rows = warmup_rows
+        # Pools à redémarrer après le swap (méthode restart())
+        self.pools = list(pools)
+        # Appelés après le swap (ex: vider le cache des prédictions)
+        self.on_swap = list(on_swap)
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._failed_sha256: Optional[str] = None
+
+        # État exposé par /admin/model
+        self.state = IDLE
+        self.last_reload_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.reloads = 0
+
+    @classmethod
+    def from_settings(
+        cls,
+        settings: Settings,
+        pools: Iterable[Any] = (),
+        on_swap: Iterable[Callable[[], None]] = (),
+    ) -> "ModelReloader":
+        """Construit le rechargeur depuis la configuration de l'application."""
+        return cls(
+            watch_interval_s=settings.MODEL_WATCH_INTERVAL_S,
+            warmup_rows=settings.MODEL_WARMUP_ROWS,
+            pools=pools,
+            on_swap=on_swap,
+        )
+
+    @property
+    def reloading(self) -> bool:
+        """Indique si un rechargement est en cours."""
+        return self._lock.locked()
+
+    def start(self) -> None:
+        """Démarre la surveillance du manifest (si MODEL_WATCH_INTERVAL_S > 0)."""
+        if self.watch_interval_s <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, name="model-watch", daemon=True
+        )
+        self._watcher.start()
+        logger.info(
+            f"Surveillance du cache modèle: toutes les {self.watch_interval_s} s"
+        )
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Arrête la surveillance du manifest."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout)
+            self._watcher = None
+
+    def request_reload(
+        self, version: Optional[str] = None, refresh: bool = False
+    ) -> bool:
+        """
+        Lance un rechargement en arrière-plan.
+
+        Returns:
+            False si un rechargement est déjà en cours.
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+        threading.Thread(
+            target=self._reload_in_background,
+            args=(version, refresh),
+            name="model-reload",
+            daemon=True,
+        ).start()
+        return True
+
+    def reload(self, version: Optional[str] = None, refresh: bool = False) -> str:
+        """
+        Recharge le modèle (bloquant).
+
+        Args:
+            version: Version du cache à installer (sha256 ou préfixe) ;
+                devient la version courante du cache.
+            refresh: Télécharger la dernière version depuis HF Hub.
+                Sans version ni refresh : version courante du cache.
+
+        Returns:
+            Version installée.
+
+        Raises:
+            RuntimeError: Si un rechargement est déjà en cours.
+            ArtifactCacheError: Si la version est absente ou invalide.
+            ValueError: Si le préchauffage échoue.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("Rechargement du modèle déjà en cours")
+        return self._reload_locked(version, refresh)
+
+    def _reload_in_background(self, version: Optional[str], refresh: bool) -> None:
+        try:
+            self._reload_locked(version, refresh)
+        except Exception:
+            # Erreur déjà journalisée et exposée dans status()
+            pass
+
+    def _reload_locked(self, version: Optional[str], refresh: bool) -> str:
+        """Rechargement, verrou déjà acquis (relâché à la fin)."""
+        previous_version = models.current_model_version()
+        try:
+            self.state = LOADING
+            path = self._resolve(version, refresh)
+            new_version = models.model_version(path)
+
+            if new_version != previous_version:
+                model = models.load_model_from_path(path)
+                warm_up(model, self.warmup_rows)
+
+                # Version courante du cache : redémarrages et workers
+                ModelArtifactCache(get_settings().MODEL_CACHE_DIR).set_current(
+                    path.parent.name
+                )
+                retired = [models.install_model(model)]
+                for pool in self.pools:
+                    pool.restart()
+                for callback in self.on_swap:
+                    callback()
+
+                # Plus aucune référence à l'ancien modèle hors requêtes en cours
+                retired.clear()
+                del model
+                gc.collect()
+                logger.info(f"🔄 Modèle rechargé: {previous_version} -> {new_version}")
+
+            self.state = IDLE
+            self.last_error = None
+            self.last_reload_at = datetime.now()
+            self.reloads += 1
+            return new_version
+
+        except Exception as e:
+            self.state = FAILED
+            self.last_error = str(e)
+            logger.error(f"❌ Rechargement du modèle impossible: {e}")
+            raise
+        finally:
+            self._lock.release()
+
+    def _resolve(self, version: Optional[str], refresh: bool) -> Path:
+        """Fichier de la version à charger (sha256 vérifié)."""
+        settings = get_settings()
+        cache = ModelArtifactCache(
+            settings.MODEL_CACHE_DIR, verify=settings.MODEL_CACHE_VERIFY
+        )
+        checks = {
+            "expected_sha256": settings.MODEL_SHA256,
+            "repo_id": models.HF_MODEL_REPO,
+            "filename": models.MODEL_FILENAME,
+        }
+
+        if version:
+            return cache.resolve(cache.find(version), **checks)
+        if refresh:
+            if settings.MODEL_OFFLINE:
+                raise ArtifactCacheError("MODEL_OFFLINE: HF Hub n'est pas contacté")
+            return resolve_model_path(
+                models.HF_MODEL_REPO, models.MODEL_FILENAME, settings, refresh=True
+            )
+        return cache.resolve(**checks)
+
+    def _watch(self) -> None:
+        """Recharge la version courante du manifest quand elle change."""
+        while not self._stop.wait(self.watch_interval_s):
+            try:
+                current = ModelArtifactCache(get_settings().MODEL_CACHE_DIR).current()
+            except Exception as e:
+                logger.warning(f"Manifest du cache modèle illisible: {e}")
+                continue
+
+            if (
+                current is None
+                or current["sha256"][:12] == models.current_model_version()
+                or current["sha256"] == self._failed_sha256
+                or self.reloading
+            ):
+                continue
+
+            try:
+                self.reload(version=current["sha256"])
+            except RuntimeError:
+                continue
+            except Exception:
+                # Ne pas réessayer en boucle une version invalide
+                self._failed_sha256 = current["sha256"]
+
+    def status(self) -> dict[str, Any]:
+        """État du modèle servi et des rechargements (GET /admin/model)."""
+        manifest = ModelArtifactCache(get_settings().MODEL_CACHE_DIR).read_manifest()
+        versions = [
+            {
+                "version": sha256[:12],
+                "sha256": sha256,
+                "revision": entry.get("revision"),
+                "added_at": entry.get("added_at"),
+                "current": sha256 == manifest.get("current"),
+            }
+            for sha256, entry in manifest["versions"].items()
+        ]
+        return {
+            "model_version": models.current_model_version(),
+            "backend": getattr(models._model_cache, "name", None),
+            "reload_state": self.state,
+            "last_reload_at": self.last_reload_at,
+            "last_error": self.last_error,
+            "reloads": self.reloads,
+            "versions": sorted(versions, key=lambda v: v["added_at"] or ""),
+        }
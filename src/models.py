@@ -5,32 +5,609 @@ Module de chargement et gestion du modèle MLflow.
 Ce module encapsule la logique de chargement du modèle depuis Hugging Face Hub
 via MLflow, avec gestion des erreurs et versioning.
 """
-from typing import Any, Optional
-
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
 from fastapi import HTTPException
-from huggingface_hub import hf_hub_download
+
+from src.artifacts import ModelArtifactCache, resolve_model_path
+from src.config import get_settings
+from src.metrics import MODEL_LOAD_DURATION
+from src.timing import stage
+
+logger = logging.getLogger(__name__)
 
 # Configuration
 HF_MODEL_REPO = "ASI-Engineer/employee-turnover-model"
 MODEL_FILENAME = "model/model.pkl"
 
+# Seuils des niveaux de risque sur la probabilité de départ
+RISK_THRESHOLDS = (0.3, 0.7)
+RISK_LEVELS = np.array(["Low", "Medium", "High"])
+
+# Backends d'inférence disponibles (INFERENCE_BACKEND)
+INFERENCE_BACKENDS = ("joblib", "xgboost", "numpy", "onnx")
+
+# Formats dérivés, à côté du fichier du modèle en cache
+NATIVE_MODEL_NAME = "booster.ubj"
+ONNX_MODEL_NAME = "model.onnx"
+ONNX_TARGET_OPSET = 15
+
 # Cache global du modèle
 _model_cache: Optional[Any] = None
 
 
+class InferenceResult(NamedTuple):
+    """Résultat vectorisé d'une inférence sur un batch de n employés."""
+
+    predictions: np.ndarray  # (n,) classes prédites (0=reste, 1=part)
+    probabilities: np.ndarray  # (n, 2) probabilités [rester, partir]
+    risk_levels: np.ndarray  # (n,) niveaux de risque (Low/Medium/High)
+    model_version: Optional[str] = None  # version du modèle utilisé
+    timings: Optional[dict] = None  # durées (ms) des étapes de la tâche (src.timing)
+
+    def take(self, rows: slice) -> "InferenceResult":
+        """Sous-ensemble de lignes du batch (même version du modèle)."""
+        return self._replace(
+            predictions=self.predictions[rows],
+            probabilities=self.probabilities[rows],
+            risk_levels=self.risk_levels[rows],
+        )
+
+
+class InferenceBackend:
+    """
+    Interface commune des backends d'inférence.
+
+    predict_with_model n'utilise que predict_proba (et predict en repli) :
+    chaque backend expose ces deux méthodes sur une matrice de features
+    préprocessées (n, 50), quel que soit le moteur sous-jacent.
+    """
+
+    # Nom du backend (valeur de INFERENCE_BACKEND)
+    name = ""
+    # Version du modèle servi (sha256 abrégé de l'artefact), fixée au chargement
+    version: Optional[str] = None
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probabilités [rester, partir] (n, 2)."""
+        raise NotImplementedError
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Classes prédites (seuil 0.5, comme XGBClassifier.predict)."""
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(np.int64)
+
+
+class PipelineBackend(InferenceBackend):
+    """Modèle désérialisé par joblib (Pipeline imblearn), appelé tel quel."""
+
+    name = "joblib"
+
+    def __init__(self, model: Any):
+        self.model = model
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self.model.predict_proba(X)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.model.predict(X)
+
+
+class NativeBoosterModel(InferenceBackend):
+    """
+    Booster XGBoost extrait du Pipeline, appelé directement en inférence.
+
+    Le SMOTE du Pipeline imblearn est inactif en prédiction : seul le
+    XGBClassifier travaille. predict_proba passe par booster.inplace_predict
+    sur un tableau contigu, sans le dispatch du Pipeline, la validation
+    sklearn ni la construction d'une DMatrix, avec les mêmes probabilités
+    que XGBClassifier.predict_proba.
+
+    Examples:
+        >>> model = unwrap_native_booster(joblib.load("model.pkl"))
+        >>> model.predict_proba(X)[:, 1]
+        array([0.12, 0.87], dtype=float32)
+    """
+
+    name = "xgboost"
+
+    def __init__(self, booster: Any, iteration_end: int = 0, missing: float = np.nan):
+        self.booster = booster
+        self.iteration_range = (0, iteration_end)
+        self.missing = missing
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probabilités [rester, partir] (n, 2), comme XGBClassifier."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        proba = self.booster.inplace_predict(
+            X,
+            iteration_range=self.iteration_range,
+            missing=self.missing,
+            validate_features=False,
+        )
+        return np.vstack((1 - proba, proba)).transpose()
+
+
+class OnnxBackend(InferenceBackend):
+    """
+    Modèle exporté en ONNX et exécuté par ONNX Runtime.
+
+    Le graphe (TreeEnsembleClassifier) est exporté depuis le XGBClassifier
+    du Pipeline par export_onnx. ONNX Runtime calcule en float32 : les
+    probabilités diffèrent de XGBoost de l'ordre de 1e-7.
+    """
+
+    name = "onnx"
+
+    def __init__(self, session: Any):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+
+    @classmethod
+    def from_file(cls, path: Path) -> "OnnxBackend":
+        """Ouvre une session ONNX Runtime (CPU) sur un fichier .onnx."""
+        import onnxruntime
+
+        return cls(
+            onnxruntime.InferenceSession(str(path), providers=["CPUExecutionProvider"])
+        )
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        _, probabilities = self.session.run(None, {self.input_name: X})
+        return probabilities
+
+
+class NumpyTreeEnsemble(InferenceBackend):
+    """
+    Évaluateur NumPy vectorisé des arbres du booster XGBoost.
+
+    Les arbres sont aplatis une fois, depuis le dump JSON du booster, en
+    tableaux parallèles (struct-of-arrays) : feature, seuil, enfant gauche,
+    enfant droit, direction par défaut (valeur manquante) et valeur de
+    feuille. Les feuilles pointent sur elles-mêmes : tous les arbres sont
+    parcourus en parallèle pour tout le batch, un niveau de profondeur par
+    itération, sans branchement par arbre ni par ligne.
+
+    Pour une ligne, le coût se réduit à quelques opérations NumPy par
+    niveau, bien en dessous du coût fixe d'un appel XGBoost. Les calculs
+    sont faits en float32 comme XGBoost (comparaisons aux seuils, somme
+    des feuilles dans l'ordre des arbres, sigmoïde).
+
+    Examples:
+        >>> ensemble = NumpyTreeEnsemble.from_booster(booster)
+        >>> ensemble.predict_proba(X)[:, 1]
+        array([0.12, 0.87], dtype=float32)
+    """
+
+    name = "numpy"
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        default_left: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        depth: int,
+        base_margin: float,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.children = np.stack([right, left], axis=1).ravel().astype(np.intp)
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.base_margin = np.float32(base_margin)
+
+    @classmethod
+    def from_booster(cls, booster: Any, iteration_end: int = 0) -> "NumpyTreeEnsemble":
+        """
+        Construit l'évaluateur depuis le dump JSON d'un booster binary:logistic.
+
+        Args:
+            booster: xgboost.Booster entraîné.
+            iteration_end: Nombre d'itérations utilisées (0 = toutes).
+
+        Raises:
+            ValueError: Si l'objectif n'est pas binary:logistic ou si le
+                modèle contient des splits catégoriels.
+        """
+        learner = json.loads(booster.save_raw(raw_format="json"))["learner"]
+        if learner["objective"]["name"] != "binary:logistic":
+            raise ValueError("Évaluateur NumPy: objectif binary:logistic attendu")
+
+        gbtree = learner["gradient_booster"]["model"]
+        trees = gbtree["trees"]
+        if iteration_end:
+            indptr = gbtree.get("iteration_indptr")
+            n_trees = (
+                indptr[iteration_end]
+                if indptr
+                else iteration_end
+                * int(gbtree["gbtree_model_param"]["num_parallel_tree"])
+            )
+            trees = trees[:n_trees]
+
+        feature, threshold, left, right, default_left, value, roots = (
+            [] for _ in range(7)
+        )
+        depth = 0
+        offset = 0
+        for tree in trees:
+            if any(tree["split_type"]):
+                raise ValueError("Évaluateur NumPy: splits catégoriels non supportés")
+            tree_left = np.asarray(tree["left_children"], dtype=np.int32)
+            tree_right = np.asarray(tree["right_children"], dtype=np.int32)
+            n_nodes = len(tree_left)
+            nodes = np.arange(n_nodes, dtype=np.int32)
+            is_leaf = tree_left == -1
+
+            # Feuilles : boucle sur elles-mêmes, split neutre sur la feature 0
+            left.append(np.where(is_leaf, nodes, tree_left) + offset)
+            right.append(np.where(is_leaf, nodes, tree_right) + offset)
+            feature.append(
+                np.where(is_leaf, 0, np.asarray(tree["split_indices"], dtype=np.int32))
+            )
+            conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+            threshold.append(conditions)
+            value.append(np.where(is_leaf, conditions, np.float32(0)))
+            default_left.append(np.asarray(tree["default_left"], dtype=bool))
+            roots.append(offset)
+            depth = max(depth, _tree_depth(tree_left, tree_right))
+            offset += n_nodes
+
+        # base_score en probabilité ("5E-1" ou "[5E-1]"), marge = logit
+        base_score = float(
+            learner["learner_model_param"]["base_score"].strip("[]").split(",")[0]
+        )
+        return cls(
+            feature=np.concatenate(feature),
+            threshold=np.concatenate(threshold),
+            left=np.concatenate(left),
+            right=np.concatenate(right),
+            default_left=np.concatenate(default_left),
+            value=np.concatenate(value).astype(np.float32),
+            roots=np.asarray(roots, dtype=np.int32),
+            depth=depth,
+            base_margin=-np.log(1.0 / base_score - 1.0),
+        )
+
+    # Lignes traitées ensemble : les tableaux (lignes, arbres) restent en cache CPU
+    block_rows = 256
+
+    def leaf_values(self, X: np.ndarray) -> np.ndarray:
+        """Valeurs des feuilles atteintes (n, nombre d'arbres)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if len(X) > self.block_rows:
+            return np.concatenate(
+                [
+                    self._block_leaf_values(X[slice(start, start + self.block_rows)])
+                    for start in range(0, len(X), self.block_rows)
+                ]
+            )
+        return self._block_leaf_values(X)
+
+    def _block_leaf_values(self, X: np.ndarray) -> np.ndarray:
+        """Parcours simultané de tous les arbres pour un bloc de lignes."""
+        flat_X = X.ravel()
+        row_offsets = (np.arange(len(X), dtype=np.intp) * X.shape[1])[:, None]
+        has_missing = bool(np.isnan(flat_X).any())
+        nodes = np.broadcast_to(self.roots.astype(np.intp), (len(X), len(self.roots)))
+
+        for _ in range(self.depth):
+            x = flat_X.take(row_offsets + self.feature.take(nodes))
+            go_left = x < self.threshold.take(nodes)
+            if has_missing:
+                go_left |= np.isnan(x) & self.default_left.take(nodes)
+            # children[2 * noeud] = enfant droit, children[2 * noeud + 1] = gauche
+            nodes = self.children.take(2 * nodes + go_left)
+
+        return self.value.take(nodes)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probabilités [rester, partir] (n, 2), comme XGBClassifier."""
+        leaves = self.leaf_values(X)
+        # Somme séquentielle en float32 à partir de la marge de base (ordre XGBoost)
+        terms = np.empty((len(leaves), leaves.shape[1] + 1), dtype=np.float32)
+        terms[:, 0] = self.base_margin
+        terms[:, 1:] = leaves
+        margin = np.cumsum(terms, axis=1, dtype=np.float32)[:, -1]
+        proba = np.float32(1) / (np.float32(1) + np.exp(-margin))
+        return np.vstack((1 - proba, proba)).transpose()
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    """Profondeur maximale d'un arbre (nombre de splits jusqu'à une feuille)."""
+    depth = np.zeros(len(left), dtype=np.int32)
+    # Les enfants ont toujours un indice supérieur à leur parent
+    for node in range(len(left)):
+        if left[node] != -1:
+            depth[left[node]] = depth[right[node]] = depth[node] + 1
+    return int(depth.max())
+
+
+def _xgb_classifier(model: Any) -> Optional[Any]:
+    """
+    Retourne le XGBClassifier binaire d'un modèle, ou None.
+
+    Le modèle doit être un XGBClassifier binaire, éventuellement précédé
+    dans un Pipeline d'étapes inactives en prédiction (samplers,
+    "passthrough").
+    """
+    classifier = model
+    steps = getattr(model, "steps", None)
+    if steps is not None:
+        if not all(
+            step is None or step == "passthrough" or hasattr(step, "fit_resample")
+            for _, step in steps[:-1]
+        ):
+            return None
+        classifier = steps[-1][1]
+
+    try:
+        from xgboost import XGBClassifier
+    except ImportError:
+        return None
+
+    if (
+        not isinstance(classifier, XGBClassifier)
+        or classifier.objective != "binary:logistic"
+        or getattr(classifier, "booster", None) == "gblinear"
+    ):
+        return None
+    return classifier
+
+
+def unwrap_native_booster(model: Any) -> Any:
+    """
+    Extrait le booster d'un Pipeline (samplers + XGBClassifier binaire).
+
+    Args:
+        model: Modèle désérialisé (Pipeline imblearn ou XGBClassifier).
+
+    Returns:
+        NativeBoosterModel, ou le modèle inchangé s'il ne s'agit pas d'un
+        XGBClassifier binaire précédé uniquement d'étapes inactives en
+        prédiction (samplers, "passthrough").
+    """
+    classifier = _xgb_classifier(model)
+    if classifier is None:
+        return model
+
+    # Même plage d'arbres que XGBClassifier (best_iteration si early stopping)
+    try:
+        iteration_end = classifier.best_iteration + 1
+    except AttributeError:
+        iteration_end = 0
+
+    return NativeBoosterModel(
+        classifier.get_booster(), iteration_end, missing=classifier.missing
+    )
+
+
+def save_native_booster(model: NativeBoosterModel, path: Path) -> None:
+    """Sauvegarde le booster au format natif UBJSON (écriture atomique)."""
+    model.booster.set_attr(
+        fast_path_iteration_end=str(model.iteration_range[1]),
+        fast_path_missing=repr(float(model.missing)),
+    )
+    tmp_path = path.with_name(path.stem + ".tmp" + path.suffix)
+    model.booster.save_model(str(tmp_path))
+    os.replace(tmp_path, path)
+
+
+def load_native_booster(path: Path) -> NativeBoosterModel:
+    """Charge un booster UBJSON sauvegardé par save_native_booster (sans pickle)."""
+    import xgboost
+
+    booster = xgboost.Booster(model_file=str(path))
+    return NativeBoosterModel(
+        booster,
+        int(booster.attr("fast_path_iteration_end") or 0),
+        missing=float(booster.attr("fast_path_missing") or "nan"),
+    )
+
+
+def export_onnx(model: Any, path: Path) -> None:
+    """
+    Exporte le XGBClassifier d'un modèle au format ONNX (écriture atomique).
+
+    Args:
+        model: Pipeline imblearn ou XGBClassifier entraîné.
+        path: Fichier .onnx à écrire.
+
+    Raises:
+        ImportError: Si onnxmltools n'est pas installé.
+        ValueError: Si le modèle n'est pas un XGBClassifier binaire, ou
+            entraîné avec early stopping (toujours tous les arbres en ONNX).
+    """
+    from onnxmltools import convert_xgboost
+    from onnxmltools.convert.common.data_types import FloatTensorType
+
+    classifier = _xgb_classifier(model)
+    if classifier is None:
+        raise ValueError("Export ONNX: modèle XGBClassifier binaire attendu")
+    if hasattr(classifier, "best_iteration"):
+        raise ValueError("Export ONNX: modèle entraîné avec early stopping")
+
+    onnx_model = convert_xgboost(
+        classifier,
+        initial_types=[("input", FloatTensorType([None, classifier.n_features_in_]))],
+        target_opset=ONNX_TARGET_OPSET,
+    )
+    tmp_path = path.with_name(path.stem + ".tmp" + path.suffix)
+    tmp_path.write_bytes(onnx_model.SerializeToString())
+    os.replace(tmp_path, path)
+
+
+def load_backend(backend: str, model_path: Path) -> InferenceBackend:
+    """
+    Charge le fichier du modèle avec le backend d'inférence demandé.
+
+    Les formats dérivés (booster UBJSON, graphe ONNX) sont écrits à côté du
+    fichier du modèle en cache et réutilisés aux démarrages suivants. Si le
+    backend demandé ne s'applique pas (dépendance absente, modèle non
+    XGBoost), on se replie sur xgboost puis joblib avec un avertissement.
+
+    Args:
+        backend: "joblib", "xgboost", "numpy" ou "onnx" (INFERENCE_BACKENDS).
+        model_path: Fichier du modèle (pickle joblib) résolu par le cache.
+
+    Returns:
+        Backend prêt pour l'inférence.
+
+    Raises:
+        ValueError: Si le backend est inconnu.
+    """
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(
+            f"INFERENCE_BACKEND inconnu: {backend} (attendu: {INFERENCE_BACKENDS})"
+        )
+
+    settings = get_settings()
+    model_path = Path(model_path)
+    native_path = model_path.with_name(NATIVE_MODEL_NAME)
+    onnx_path = model_path.with_name(ONNX_MODEL_NAME)
+
+    if backend == "onnx" and onnx_path.exists():
+        try:
+            return OnnxBackend.from_file(onnx_path)
+        except ImportError as e:
+            logger.warning(f"Backend onnx indisponible ({e}), repli sur xgboost")
+            backend = "xgboost"
+
+    if (
+        backend in ("xgboost", "numpy")
+        and settings.MODEL_NATIVE_FORMAT
+        and (native_path.exists())
+    ):
+        # Booster natif dérivé de cette version : pas de désérialisation pickle
+        native = load_native_booster(native_path)
+    else:
+        import joblib
+
+        model = joblib.load(model_path)
+        if backend == "joblib":
+            return PipelineBackend(model)
+
+        if backend == "onnx":
+            try:
+                export_onnx(model, onnx_path)
+                return OnnxBackend.from_file(onnx_path)
+            except (ImportError, ValueError) as e:
+                logger.warning(f"Backend onnx indisponible ({e}), repli sur xgboost")
+                backend = "xgboost"
+
+        native = unwrap_native_booster(model)
+        if not isinstance(native, NativeBoosterModel):
+            logger.warning(
+                f"Backend {backend} non applicable à ce modèle, repli sur joblib"
+            )
+            return PipelineBackend(model)
+        if settings.MODEL_NATIVE_FORMAT:
+            save_native_booster(native, native_path)
+
+    if backend == "numpy":
+        try:
+            return NumpyTreeEnsemble.from_booster(
+                native.booster, native.iteration_range[1]
+            )
+        except ValueError as e:
+            logger.warning(f"Backend numpy indisponible ({e}), repli sur xgboost")
+
+    return native
+
+
+def model_version(model_path: Path) -> str:
+    """Version d'un fichier du modèle en cache : sha256 abrégé (nom du dossier)."""
+    return Path(model_path).parent.name[:12]
+
+
+def load_model_from_path(model_path: Path) -> InferenceBackend:
+    """
+    Charge un fichier du modèle avec le backend configuré, sans l'installer.
+
+    Args:
+        model_path: Fichier du modèle résolu par le cache d'artefacts.
+
+    Returns:
+        Backend d'inférence, avec sa version (voir model_version).
+    """
+    backend = get_settings().INFERENCE_BACKEND
+    start = time.perf_counter()
+    model = load_backend(backend, model_path)
+    MODEL_LOAD_DURATION.labels(backend).observe(time.perf_counter() - start)
+    model.version = model_version(model_path)
+    return model
+
+
+def install_model(model: Any) -> Optional[Any]:
+    """
+    Remplace le modèle servi par un modèle déjà chargé (swap atomique).
+
+    Les requêtes en cours gardent leur référence à l'ancien modèle et se
+    terminent avec lui ; les suivantes utilisent le nouveau.
+
+    Returns:
+        Le modèle remplacé (None si aucun).
+    """
+    global _model_cache
+
+    previous, _model_cache = _model_cache, model
+    return previous
+
+
+def current_model_version() -> Optional[str]:
+    """Version du modèle actuellement servi (None si non chargé)."""
+    return getattr(_model_cache, "version", None)
+
+
+def ensure_current_model() -> None:
+    """
+    Recharge le modèle si la version courante du cache a changé.
+
+    Pour les processus workers de longue durée (jobs batch) : le
+    rechargement à chaud ne remplace le modèle que dans le processus de
+    l'API, les workers s'alignent sur le manifest au début de chaque job.
+    """
+    current = ModelArtifactCache(get_settings().MODEL_CACHE_DIR).current()
+    if (
+        _model_cache is not None
+        and current is not None
+        and current["sha256"][:12] != current_model_version()
+    ):
+        load_model(force_reload=True)
+
+
 def load_model(force_reload: bool = False) -> Any:
     """
-    Charge le modèle depuis Hugging Face Hub via MLflow.
+    Charge le modèle depuis le cache local d'artefacts ou Hugging Face Hub.
 
     Cette fonction implémente un système de cache pour éviter de recharger
     le modèle à chaque appel. Le modèle est chargé une seule fois au démarrage
-    de l'application et mis en cache.
+    de l'application et mis en cache. Le fichier est lu depuis MODEL_CACHE_DIR
+    (sha256 vérifié) et n'est téléchargé que si le cache est vide ; en mode
+    MODEL_OFFLINE, HF Hub n'est jamais contacté (voir src.artifacts).
+    Le modèle est servi par le backend INFERENCE_BACKEND (voir
+    load_backend) : Pipeline joblib, booster XGBoost natif, évaluateur
+    NumPy des arbres ou ONNX Runtime.
 
     Args:
         force_reload: Si True, force le rechargement du modèle même s'il est en cache.
 
     Returns:
-        Le modèle MLflow chargé et prêt pour l'inférence.
+        Le backend d'inférence chargé (InferenceBackend).
 
     Raises:
         HTTPException: 500 si le modèle ne peut pas être chargé.
@@ -47,39 +624,20 @@ def load_model(force_reload: bool = False) -> Any:
         return _model_cache
 
     try:
-        import joblib
-        import logging
-
-        logger = logging.getLogger(__name__)
-
-        logger.info(f"🔄 Chargement du modèle depuis HF Hub: {HF_MODEL_REPO}")
-
-        # Télécharger le modèle depuis Hugging Face Hub
-        try:
-            model_path = hf_hub_download(
-                repo_id=HF_MODEL_REPO,
-                filename=MODEL_FILENAME,
-                repo_type="model",
-            )
-        except Exception as download_error:
-            logger.error(f"Erreur téléchargement HF Hub: {download_error}")
-            raise
-
-        logger.info(f"📦 Modèle téléchargé: {model_path}")
-
-        # Charger le modèle avec joblib
-        model = joblib.load(model_path)
+        # Fichier du modèle : cache local (sha256 vérifié), HF Hub sinon
+        model_path = resolve_model_path(HF_MODEL_REPO, MODEL_FILENAME)
+        model = load_model_from_path(model_path)
 
         # Mettre en cache
         _model_cache = model
 
-        logger.info(f"✅ Modèle chargé avec succès: {type(model).__name__}")
+        logger.info(
+            f"✅ Modèle chargé avec succès: {type(model).__name__} "
+            f"(backend {getattr(model, 'name', 'joblib')}, version {model.version})"
+        )
         return model
 
     except Exception as e:
-        import logging
-
-        logger = logging.getLogger(__name__)
         error_msg = f"❌ Erreur lors du chargement du modèle: {str(e)}"
         logger.error(error_msg)
         raise HTTPException(
@@ -108,10 +666,12 @@ def get_model_info() -> dict:
 
         return {
             "status": "✅ Modèle chargé",
-            "model_type": type(model).__name__,
+            "model_type": type(getattr(model, "model", model)).__name__,
             "hf_hub_repo": HF_MODEL_REPO,
             "model_file": MODEL_FILENAME,
             "cached": _model_cache is not None,
+            "backend": getattr(model, "name", "joblib"),
+            "artifact": ModelArtifactCache(get_settings().MODEL_CACHE_DIR).current(),
         }
 
     except Exception as e:
@@ -121,6 +681,96 @@ def get_model_info() -> dict:
         )
 
 
+def predict_with_model(
+    model: Any, X: np.ndarray, threshold: Optional[float] = None
+) -> InferenceResult:
+    """
+    Effectue l'inférence complète d'un batch en un seul passage du modèle.
+
+    Appelle predict_proba une seule fois, puis dérive la classe depuis le
+    seuil de décision et le niveau de risque (< 0.3 Low, < 0.7 Medium,
+    sinon High) de manière vectorisée sur tout le batch.
+
+    Args:
+        model: Modèle chargé (Pipeline XGBoost + SMOTE).
+        X: Matrice de features préprocessées (n, 50).
+        threshold: Seuil de décision (défaut: settings.DECISION_THRESHOLD).
+            Comme XGBClassifier.predict, la classe 1 exige proba > seuil.
+
+    Returns:
+        InferenceResult: Classes, probabilités et niveaux de risque.
+
+    Examples:
+        >>> result = predict_with_model(load_model(), X)
+        >>> result.risk_levels
+        array(['Low', 'High'], dtype='<U6')
+    """
+    if not hasattr(model, "predict_proba"):
+        # Si le modèle ne supporte pas predict_proba
+        predictions = np.asarray(model.predict(X)).astype(np.int64)
+        probabilities = np.column_stack([predictions == 0, predictions == 1]).astype(
+            np.float64
+        )
+        risk_levels = RISK_LEVELS[np.digitize(probabilities[:, 1], RISK_THRESHOLDS)]
+        return InferenceResult(
+            predictions, probabilities, risk_levels, getattr(model, "version", None)
+        )
+
+    with stage("model"):
+        probabilities = model.predict_proba(X)
+    return result_from_probabilities(
+        probabilities, threshold, getattr(model, "version", None)
+    )
+
+
+def result_from_probabilities(
+    probabilities: np.ndarray,
+    threshold: Optional[float] = None,
+    model_version: Optional[str] = None,
+) -> InferenceResult:
+    """
+    Dérive classes et niveaux de risque de probabilités déjà calculées.
+
+    Args:
+        probabilities: Probabilités [rester, partir] (n, 2).
+        threshold: Seuil de décision (défaut: settings.DECISION_THRESHOLD).
+        model_version: Version du modèle qui a produit les probabilités.
+
+    Returns:
+        InferenceResult: Identique à celui de predict_with_model.
+    """
+    if threshold is None:
+        threshold = get_settings().DECISION_THRESHOLD
+
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    predictions = (probabilities[:, 1] > threshold).astype(np.int64)
+    risk_levels = RISK_LEVELS[np.digitize(probabilities[:, 1], RISK_THRESHOLDS)]
+
+    return InferenceResult(predictions, probabilities, risk_levels, model_version)
+
+
+def summarize_predictions(result: InferenceResult) -> dict:
+    """
+    Calcule le résumé agrégé d'un batch de prédictions.
+
+    Args:
+        result: Résultat de predict_with_model.
+
+    Returns:
+        Dict avec les totaux par classe et par niveau de risque.
+    """
+    total = len(result.predictions)
+    total_leave = int(result.predictions.sum())
+
+    return {
+        "total_stay": total - total_leave,
+        "total_leave": total_leave,
+        "high_risk_count": int((result.risk_levels == "High").sum()),
+        "medium_risk_count": int((result.risk_levels == "Medium").sum()),
+        "low_risk_count": int((result.risk_levels == "Low").sum()),
+    }
+
+
 def load_preprocessing_artifacts(run_id: str) -> dict:
     """
     Charge les artifacts de preprocessing (scaler, encoders) depuis MLflow.
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Scoring batch parallèle par shards en mémoire partagée.
+
+Même hors de la boucle d'événements, un gros /predict/batch était scoré
+d'un bloc : preprocessing pandas mono-thread puis un seul predict_proba.
+ShardedScorer découpe le lot fusionné en shards de lignes, préprocessés et
+scorés en parallèle dans un pool de processus dédié (modèle préchargé,
+un thread natif par processus).
+
+Les shards ne sont pas picklés : le processus appelant copie une fois les
+colonnes utiles dans des segments multiprocessing.shared_memory (colonnes
+numériques en float64, colonnes catégorielles en codes int32 + modalités),
+chaque worker lit sa plage de lignes et écrit ses probabilités à la même
+plage d'un segment de sortie. Le résultat est donc dans l'ordre des
+employés, sans réassemblage.
+"""
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import Settings, get_settings
+from src.models import (
+    InferenceResult,
+    load_model,
+    predict_with_model,
+    result_from_probabilities,
+)
+from src.preprocessing import (
+    CATEGORIES,
+    get_feature_plan,
+    preprocess_batch_for_prediction,
+)
+
+logger = logging.getLogger(__name__)
+
+# Colonnes catégorielles lues par le FeaturePlan (OneHot puis ordinale)
+CATEGORICAL_COLUMNS = (*CATEGORIES, "frequence_deplacement")
+
+
+@dataclass(frozen=True)
+class SharedFrameSpec:
+    """Description picklable d'un lot en mémoire partagée (envoyée aux workers)."""
+
+    n_rows: int
+    numeric_block: str  # (colonnes numériques, n_rows) float64
+    numeric_columns: tuple[str, ...]
+    codes_block: str  # (colonnes catégorielles, n_rows) int32, -1 = manquant
+    categories: dict[str, list]  # modalités de chaque colonne catégorielle
+    output_block: str  # (n_rows, 2) float64, probabilités [rester, partir]
+
+
+class SharedFrame:
+    """
+    Lot d'employés copié en mémoire partagée, colonne par colonne.
+
+    Examples:
+        >>> with SharedFrame(merged_df) as frame:
+        ...     pool.submit(score_shard, frame.spec, 0, 1000)
+        ...     probabilities = frame.probabilities()
+    """
+
+    def __init__(self, merged_df: pd.DataFrame):
+        numeric_columns = tuple(get_feature_plan().numeric_columns)
+        n_rows = len(merged_df)
+
+        codes = {}
+        categories = {}
+        for col in CATEGORICAL_COLUMNS:
+            codes[col], uniques = pd.factorize(merged_df[col])
+            categories[col] = list(uniques)
+
+        self._blocks = []
+        numeric, numeric_block = self._allocate((len(numeric_columns), n_rows), "f8")
+        for i, col in enumerate(numeric_columns):
+            numeric[i] = merged_df[col].to_numpy(dtype=np.float64)
+        shared_codes, codes_block = self._allocate((len(codes), n_rows), "i4")
+        for i, col_codes in enumerate(codes.values()):
+            shared_codes[i] = col_codes
+        self._output, output_block = self._allocate((n_rows, 2), "f8")
+
+        self.spec = SharedFrameSpec(
+            n_rows=n_rows,
+            numeric_block=numeric_block,
+            numeric_columns=numeric_columns,
+            codes_block=codes_block,
+            categories=categories,
+            output_block=output_block,
+        )
+
+    def _allocate(self, shape: tuple, dtype: str) -> tuple[np.ndarray, str]:
+        """Crée un segment partagé et retourne (vue numpy, nom du segment)."""
+        size = max(1, math.prod(shape) * np.dtype(dtype).itemsize)
+        block = shared_memory.SharedMemory(create=True, size=size)
+        self._blocks.append(block)
+        return np.ndarray(shape, dtype=dtype, buffer=block.buf), block.name
+
+    def probabilities(self) -> np.ndarray:
+        """Copie des probabilités écrites par les workers."""
+        return self._output.copy()
+
+    def close(self) -> None:
+        """Libère les segments (les workers n'y accèdent plus)."""
+        self._output = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> "SharedFrame":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _attach(spec: SharedFrameSpec) -> list[shared_memory.SharedMemory]:
+    """Ouvre les segments du lot dans un worker."""
+    return [
+        shared_memory.SharedMemory(name=name)
+        for name in (spec.numeric_block, spec.codes_block, spec.output_block)
+    ]
+
+
+def _shard_frame(
+    spec: SharedFrameSpec, blocks: list, start: int, stop: int
+) -> pd.DataFrame:
+    """Reconstruit les lignes [start, stop) en DataFrame (copie du shard)."""
+    numeric = np.ndarray(
+        (len(spec.numeric_columns), spec.n_rows), dtype="f8", buffer=blocks[0].buf
+    )
+    codes = np.ndarray(
+        (len(spec.categories), spec.n_rows), dtype="i4", buffer=blocks[1].buf
+    )
+
+    data = {
+        col: numeric[i, start:stop].copy() for i, col in enumerate(spec.numeric_columns)
+    }
+    for i, (col, categories) in enumerate(spec.categories.items()):
+        data[col] = pd.Categorical.from_codes(
+            codes[i, start:stop].copy(), categories=categories
+        )
+    return pd.DataFrame(data)
+
+
+def score_shard(spec: SharedFrameSpec, start: int, stop: int) -> Optional[str]:
+    """
+    Préprocesse et score les lignes [start, stop) d'un lot partagé.
+
+    Exécutée dans un worker du pool : les probabilités sont écrites à la
+    même plage du segment de sortie.
+
+    Returns:
+        Version du modèle utilisé.
+    """
+    blocks = _attach(spec)
+    try:
+        X = preprocess_batch_for_prediction(_shard_frame(spec, blocks, start, stop))
+        result = predict_with_model(load_model(), X)
+        output = np.ndarray((spec.n_rows, 2), dtype="f8", buffer=blocks[2].buf)
+        output[start:stop] = result.probabilities
+        del output
+        return result.model_version
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def _init_shard_worker() -> None:
+    """Initializer des workers : un thread natif chacun, modèle préchargé."""
+    try:
+        # Les workers se partagent les cœurs : pas de pool OpenMP / BLAS
+        # par processus (sursouscription)
+        from threadpoolctl import threadpool_limits
+
+        threadpool_limits(1)
+    except ImportError:
+        pass
+
+    try:
+        load_model()
+    except Exception as e:
+        # Le worker reste utilisable : le chargement sera retenté à la demande
+        logger.warning(f"Préchargement du modèle impossible dans le worker: {e}")
+
+
+def _noop() -> None:
+    """Tâche vide : force la création des workers."""
+
+
+class ShardedScorer:
+    """
+    Pool de processus qui score un gros lot par shards en mémoire partagée.
+
+    Examples:
+        >>> scorer = ShardedScorer(max_workers=8)
+        >>> scorer.start()
+        >>> if scorer.accepts(len(merged_df)):
+        ...     result = scorer.score(merged_df)
+    """
+
+    def __init__(
+        self, max_workers: int = 0, min_rows: int = 20000, shard_rows: int = 50000
+    ):
+        self.max_workers = max_workers
+        self.min_rows = min_rows
+        self.shard_rows = shard_rows
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pid: Optional[int] = None
+
+        # Métriques
+        self.batches = 0
+        self.shards = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ShardedScorer":
+        """Construit le scorer depuis la configuration de l'application."""
+        return cls(
+            max_workers=settings.PARALLEL_SCORING_WORKERS,
+            min_rows=settings.PARALLEL_SCORING_MIN_ROWS,
+            shard_rows=settings.PARALLEL_SCORING_SHARD_ROWS,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_workers > 0
+
+    @property
+    def running(self) -> bool:
+        """Pool démarré dans ce processus (pas hérité d'un fork)."""
+        return self._pool is not None and self._pid == os.getpid()
+
+    def start(self) -> None:
+        """
+        Crée le pool et ses workers (idempotent, sans effet si désactivé).
+
+        À appeler au démarrage, avant toute prédiction dans ce processus :
+        les workers sont forkés avant l'initialisation d'OpenMP.
+        """
+        if not self.enabled or self.running:
+            return
+
+        # Tracker partagé avec les workers : les segments ne sont enregistrés
+        # qu'une fois et libérés par le processus qui les a créés
+        resource_tracker.ensure_running()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers, initializer=_init_shard_worker
+        )
+        self._pid = os.getpid()
+        self._pool.submit(_noop).result()
+        logger.info(f"Scoring parallèle démarré: {self.max_workers} processus")
+
+    def restart(self) -> None:
+        """Remplace les workers (après un rechargement du modèle)."""
+        if not self.running:
+            return
+
+        previous, self._pool = self._pool, None
+        self.start()
+        previous.shutdown(wait=False)
+
+    def shutdown(self) -> None:
+        """Arrête le pool en attendant la fin des shards en cours."""
+        if self.running:
+            self._pool.shutdown(wait=True)
+        self._pool = None
+
+    def accepts(self, n_rows: int) -> bool:
+        """Indique si un lot de n_rows lignes doit être découpé."""
+        return self.running and n_rows >= self.min_rows
+
+    def shard_bounds(self, n_rows: int) -> list[tuple[int, int]]:
+        """Plages [start, stop) : au moins un shard par worker."""
+        per_worker = math.ceil(n_rows / max(1, self.max_workers))
+        shard_rows = max(1, min(self.shard_rows, per_worker))
+        return [
+            (start, min(start + shard_rows, n_rows))
+            for start in range(0, n_rows, shard_rows)
+        ]
+
+    def score(self, merged_df: pd.DataFrame) -> InferenceResult:
+        """
+        Préprocesse et score un lot fusionné, shard par shard.
+
+        Args:
+            merged_df: Employés fusionnés (colonnes brutes des 3 CSV).
+
+        Returns:
+            InferenceResult identique à celui du scoring d'un bloc, dans
+            l'ordre des lignes de merged_df.
+
+        Raises:
+            KeyError: Si une colonne requise est absente.
+            ValueError: Si un shard contient une valeur invalide.
+        """
+        self.start()
+        bounds = self.shard_bounds(len(merged_df))
+
+        with SharedFrame(merged_df) as frame:
+            futures = [
+                self._pool.submit(score_shard, frame.spec, start, stop)
+                for start, stop in bounds
+            ]
+            try:
+                versions = [future.result() for future in futures]
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+            probabilities = frame.probabilities()
+
+        self.batches += 1
+        self.shards += len(bounds)
+        return result_from_probabilities(
+            probabilities, model_version=versions[0] if versions else None
+        )
+
+    def stats(self) -> dict:
+        """Retourne les métriques du scorer."""
+        return {
+            "workers": self.max_workers if self.running else 0,
+            "min_rows": self.min_rows,
+            "batches": self.batches,
+            "shards": self.shards,
+        }
+
+
+@lru_cache()
+def get_sharded_scorer() -> ShardedScorer:
+    """Scorer parallèle partagé par l'application (démarré dans le lifespan)."""
+    return ShardedScorer.from_settings(get_settings())
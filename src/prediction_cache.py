@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Cache des résultats de prédiction unitaire.
+
+Les outils RH re-scorent plusieurs fois par jour les mêmes employés avec
+des données inchangées. Le résultat d'une prédiction est mis en cache,
+indexé par le hash de l'EmployeeInput validé (JSON canonique) et la
+version du modèle : une nouvelle version ne réutilise jamais un ancien
+résultat, et le cache est vidé à chaque rechargement du modèle.
+
+- Niveau mémoire : LRU borné (PREDICTION_CACHE_MAX_ENTRIES) avec TTL.
+- Niveau disque optionnel (PREDICTION_CACHE_DB) : base SQLite partagée par
+  les workers d'un même hôte, bornée (PREDICTION_CACHE_DB_MAX_ENTRIES).
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from src.config import Settings, get_settings
+from src.metrics import CACHE_DISK_HIT, CACHE_HIT, CACHE_MISS
+from src.models import InferenceResult
+from src.schemas import EmployeeInput
+
+logger = logging.getLogger(__name__)
+
+
+def prediction_cache_key(employee: EmployeeInput, model_version: str) -> str:
+    """
+    Clé de cache d'un employé pour une version du modèle.
+
+    Le JSON canonique (clés triées, sans espaces) rend la clé indépendante
+    de l'ordre des champs de la requête.
+    """
+    payload = json.dumps(
+        employee.model_dump(mode="json"), sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(f"{model_version}:{payload}".encode()).hexdigest()
+
+
+def _encode(result: InferenceResult) -> str:
+    """Sérialise un résultat d'une ligne pour le niveau disque."""
+    return json.dumps(
+        {
+            "prediction": int(result.predictions[0]),
+            "probabilities": result.probabilities[0].tolist(),
+            "risk_level": str(result.risk_levels[0]),
+            "model_version": result.model_version,
+        }
+    )
+
+
+def _decode(value: str) -> InferenceResult:
+    data = json.loads(value)
+    return InferenceResult(
+        predictions=np.array([data["prediction"]]),
+        probabilities=np.array([data["probabilities"]]),
+        risk_levels=np.array([data["risk_level"]], dtype=object),
+        model_version=data["model_version"],
+    )
+
+
+class SQLiteResultStore:
+    """
+    Niveau disque du cache, partagé entre processus (SQLite en mode WAL).
+
+    Une connexion par thread ; les entrées expirées et les moins récemment
+    utilisées au-delà de max_entries sont supprimées périodiquement.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000, trim_every: int = 256):
+        self.path = path
+        self.max_entries = max_entries
+        self.trim_every = trim_every
+        self._local = threading.local()
+        self._writes = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        # Une connexion SQLite ne doit pas être réutilisée après un fork
+        # (workers de server.py) : nouvelle connexion par processus
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key: str, now: float) -> Optional[tuple[str, float]]:
+        """Retourne (valeur, expiration) si l'entrée existe et n'a pas expiré."""
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT value, expires_at FROM predictions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        connection.execute(
+            "UPDATE predictions SET accessed_at = ? WHERE key = ?", (now, key)
+        )
+        return row
+
+    def set(self, key: str, value: str, expires_at: float, now: float) -> None:
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+            (key, value, expires_at, now),
+        )
+        self._writes += 1
+        if self._writes % self.trim_every == 0:
+            self.trim(now)
+
+    def trim(self, now: float) -> None:
+        """Supprime les entrées expirées puis les plus anciennes en surnombre."""
+        connection = self._connection()
+        connection.execute("DELETE FROM predictions WHERE expires_at <= ?", (now,))
+        connection.execute(
+            "DELETE FROM predictions WHERE key IN (SELECT key FROM predictions "
+            "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM predictions")
+
+    def __len__(self) -> int:
+        query = "SELECT COUNT(*) FROM predictions"
+        return self._connection().execute(query).fetchone()[0]
+
+
+class PredictionCache:
+    """
+    Cache LRU + TTL des résultats de prédiction unitaire.
+
+    Examples:
+        >>> cache = PredictionCache(max_entries=10000, ttl_s=3600)
+        >>> key = prediction_cache_key(employee, "3b1f0c9a2e47")
+        >>> cache.get(key) is None
+        True
+        >>> cache.set(key, result)
+        >>> cache.get(key).model_version
+        '3b1f0c9a2e47'
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_s: float = 3600.0,
+        store: Optional[SQLiteResultStore] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.store = store
+
+        self._entries: "OrderedDict[str, tuple[float, InferenceResult]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Compteurs exposés par /admin/model
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "PredictionCache":
+        """Construit le cache depuis la configuration de l'application."""
+        if not settings.PREDICTION_CACHE_ENABLED:
+            return cls(max_entries=0)
+        store = None
+        if settings.PREDICTION_CACHE_DB:
+            store = SQLiteResultStore(
+                settings.PREDICTION_CACHE_DB,
+                max_entries=settings.PREDICTION_CACHE_DB_MAX_ENTRIES,
+            )
+        return cls(
+            max_entries=settings.PREDICTION_CACHE_MAX_ENTRIES,
+            ttl_s=settings.PREDICTION_CACHE_TTL_S,
+            store=store,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_s > 0
+
+    def key_for(
+        self, employee: EmployeeInput, model_version: Optional[str]
+    ) -> Optional[str]:
+        """
+        Clé de cache de l'employé, ou None si le résultat ne doit pas être
+        mis en cache (cache désactivé, modèle sans version).
+        """
+        if not self.enabled or not model_version:
+            return None
+        return prediction_cache_key(employee, model_version)
+
+    def get(self, key: str) -> Optional[InferenceResult]:
+        """Retourne le résultat en cache, ou None (absent ou expiré)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    CACHE_HIT.inc()
+                    return entry[1]
+                del self._entries[key]
+
+        if self.store is not None:
+            try:
+                row = self.store.get(key, time.time())
+            except sqlite3.Error as e:
+                logger.warning(f"Cache de prédictions SQLite indisponible: {e}")
+                row = None
+            if row is not None:
+                result = _decode(row[0])
+                # Le TTL restant est conservé dans le niveau mémoire
+                self._put(key, result, now + row[1] - time.time())
+                with self._lock:
+                    self.disk_hits += 1
+                CACHE_DISK_HIT.inc()
+                return result
+
+        with self._lock:
+            self.misses += 1
+        CACHE_MISS.inc()
+        return None
+
+    def set(self, key: str, result: InferenceResult) -> None:
+        """Met en cache le résultat d'une ligne."""
+        self._put(key, result, time.monotonic() + self.ttl_s)
+        if self.store is not None:
+            now = time.time()
+            try:
+                self.store.set(key, _encode(result), now + self.ttl_s, now)
+            except sqlite3.Error as e:
+                logger.warning(f"Cache de prédictions SQLite indisponible: {e}")
+
+    def _put(self, key: str, result: InferenceResult, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Vide le cache (rechargement du modèle)."""
+        with self._lock:
+            self._entries.clear()
+        if self.store is not None:
+            try:
+                self.store.clear()
+            except sqlite3.Error as e:
+                logger.warning(f"Cache de prédictions SQLite indisponible: {e}")
+
+    def stats(self) -> dict[str, Any]:
+        """Compteurs du cache (GET /admin/model)."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (
+                    (self.hits + self.disk_hits) / lookups if lookups else 0.0
+                ),
+                "disk": self.store.path if self.store is not None else None,
+            }
+
+
+@lru_cache()
+def get_prediction_cache() -> PredictionCache:
+    """
+    Retourne le cache singleton des prédictions unitaires.
+
+    Returns:
+        PredictionCache: Cache configuré depuis les settings.
+    """
+    return PredictionCache.from_settings(get_settings())
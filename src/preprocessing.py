@@ -7,11 +7,15 @@ Ce module applique les mêmes transformations que le pipeline d'entraînement :
 - Encoding (OneHot, Ordinal)
 - Scaling (StandardScaler avec paramètres sauvegardés)
 """
+import operator
+from functools import lru_cache
+from typing import Any, Optional
+
 import numpy as np
 import pandas as pd
-from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
 
 from src.schemas import EmployeeInput
+from src.timing import stage
 
 # Paramètres du scaler sauvegardés depuis l'entraînement
 # Ces valeurs doivent correspondre exactement à celles utilisées lors du training
@@ -106,6 +110,106 @@ SCALER_PARAMS = {
 }
 
 
+# Catégories des variables encodées en OneHot (depuis training data)
+CATEGORIES = {
+    "genre": ["F", "M"],
+    "statut_marital": ["Célibataire", "Divorcé(e)", "Marié(e)"],
+    "departement": ["Commercial", "Consulting", "Ressources Humaines"],
+    "poste": [
+        "Assistant de Direction",
+        "Cadre Commercial",
+        "Consultant",
+        "Directeur Technique",
+        "Manager",
+        "Représentant Commercial",
+        "Ressources Humaines",
+        "Senior Manager",
+        "Tech Lead",
+    ],
+    "domaine_etude": [
+        "Autre",
+        "Entrepreunariat",
+        "Infra & Cloud",
+        "Marketing",
+        "Ressources Humaines",
+        "Transformation Digitale",
+    ],
+}
+
+# Catégories ordonnées de la fréquence de déplacement (OrdinalEncoder)
+ORDINAL_CATEGORIES = ["Aucun", "Occasionnel", "Frequent"]
+
+# Ordre exact des features attendues par le modèle (50 colonnes)
+EXPECTED_COLUMNS = [
+    "nombre_participation_pee",
+    "nb_formations_suivies",
+    "nombre_employee_sous_responsabilite",
+    "distance_domicile_travail",
+    "niveau_education",
+    "annees_depuis_la_derniere_promotion",
+    "annes_sous_responsable_actuel",
+    "satisfaction_employee_environnement",
+    "note_evaluation_precedente",
+    "niveau_hierarchique_poste",
+    "satisfaction_employee_nature_travail",
+    "satisfaction_employee_equipe",
+    "satisfaction_employee_equilibre_pro_perso",
+    "note_evaluation_actuelle",
+    "augementation_salaire_precedente",
+    "age",
+    "revenu_mensuel",
+    "nombre_experiences_precedentes",
+    "nombre_heures_travailless",
+    "annee_experience_totale",
+    "annees_dans_l_entreprise",
+    "annees_dans_le_poste_actuel",
+    "revenu_par_anciennete",
+    "experience_par_anciennete",
+    "satisfaction_moyenne",
+    "promo_par_anciennete",
+    "genre_F",
+    "genre_M",
+    "statut_marital_Célibataire",
+    "statut_marital_Divorcé(e)",
+    "statut_marital_Marié(e)",
+    "departement_Commercial",
+    "departement_Consulting",
+    "departement_Ressources Humaines",
+    "poste_Assistant de Direction",
+    "poste_Cadre Commercial",
+    "poste_Consultant",
+    "poste_Directeur Technique",
+    "poste_Manager",
+    "poste_Représentant Commercial",
+    "poste_Ressources Humaines",
+    "poste_Senior Manager",
+    "poste_Tech Lead",
+    "domaine_etude_Autre",
+    "domaine_etude_Entrepreunariat",
+    "domaine_etude_Infra & Cloud",
+    "domaine_etude_Marketing",
+    "domaine_etude_Ressources Humaines",
+    "domaine_etude_Transformation Digitale",
+    "frequence_deplacement",
+]
+
+# Colonnes utilisées pour la moyenne de satisfaction
+SATISFACTION_COLUMNS = [
+    "satisfaction_employee_environnement",
+    "satisfaction_employee_nature_travail",
+    "satisfaction_employee_equipe",
+    "satisfaction_employee_equilibre_pro_perso",
+]
+
+# Features calculées par engineer_features
+ENGINEERED_COLUMNS = [
+    "revenu_par_anciennete",
+    "experience_par_anciennete",
+    "satisfaction_moyenne",
+    "promo_par_anciennete",
+]
+
+
 def create_input_dataframe(employee: EmployeeInput) -> pd.DataFrame:
     """
     Convertit un objet EmployeeInput Pydantic en DataFrame pandas.
@@ -189,14 +293,7 @@ def engineer_features(df: pd.DataFrame) -> pd.DataFrame:
     )
 
     # Moyenne de satisfaction
-    df["satisfaction_moyenne"] = df[
-        [
-            "satisfaction_employee_environnement",
-            "satisfaction_employee_nature_travail",
-            "satisfaction_employee_equipe",
-            "satisfaction_employee_equilibre_pro_perso",
-        ]
-    ].mean(axis=1)
+    df["satisfaction_moyenne"] = df[SATISFACTION_COLUMNS].mean(axis=1)
 
     return df
 
@@ -212,6 +309,10 @@ def encode_and_scale(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame transformé avec 50 colonnes dans l'ordre exact du modèle.
     """
+    # Import à la demande : chemin de référence uniquement (tests, benchmarks),
+    # scikit-learn n'est pas chargé au démarrage de l'API
+    from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
+
     df = df.copy()
 
     # === ENCODING ===
@@ -225,36 +326,10 @@ def encode_and_scale(df: pd.DataFrame) -> pd.DataFrame:
     # IMPORTANT: Utiliser les mêmes catégories que lors de l'entraînement
     cat_non_ord = ["genre", "statut_marital", "departement", "poste", "domaine_etude"]
 
-    # Définir toutes les catégories possibles (depuis training data)
-    categories_dict = {
-        "genre": ["F", "M"],
-        "statut_marital": ["Célibataire", "Divorcé(e)", "Marié(e)"],
-        "departement": ["Commercial", "Consulting", "Ressources Humaines"],
-        "poste": [
-            "Assistant de Direction",
-            "Cadre Commercial",
-            "Consultant",
-            "Directeur Technique",
-            "Manager",
-            "Représentant Commercial",
-            "Ressources Humaines",
-            "Senior Manager",
-            "Tech Lead",
-        ],
-        "domaine_etude": [
-            "Autre",
-            "Entrepreunariat",
-            "Infra & Cloud",
-            "Marketing",
-            "Ressources Humaines",
-            "Transformation Digitale",
-        ],
-    }
-
     onehot = OneHotEncoder(
         sparse_output=False,
         handle_unknown="ignore",
-        categories=[categories_dict[col] for col in cat_non_ord],
+        categories=[CATEGORIES[col] for col in cat_non_ord],
     )
 
     encoded_non_ord = pd.DataFrame(
@@ -264,7 +339,7 @@ def encode_and_scale(df: pd.DataFrame) -> pd.DataFrame:
     )
 
     # Ordinal pour fréquence déplacement
-    ordinal = OrdinalEncoder(categories=[["Aucun", "Occasionnel", "Frequent"]])
+    ordinal = OrdinalEncoder(categories=[ORDINAL_CATEGORIES])
     df["frequence_deplacement"] = ordinal.fit_transform(
         df[["frequence_deplacement"]]
     ).flatten()
@@ -276,62 +351,8 @@ def encode_and_scale(df: pd.DataFrame) -> pd.DataFrame:
     df = pd.concat([df, encoded_non_ord], axis=1)
 
     # === RÉORDONNER LES COLONNES SELON L'ORDRE DU MODÈLE ===
-    # Ordre exact des features attendues par le modèle (50 colonnes)
-    expected_columns = [
-        "nombre_participation_pee",
-        "nb_formations_suivies",
-        "nombre_employee_sous_responsabilite",
-        "distance_domicile_travail",
-        "niveau_education",
-        "annees_depuis_la_derniere_promotion",
-        "annes_sous_responsable_actuel",
-        "satisfaction_employee_environnement",
-        "note_evaluation_precedente",
-        "niveau_hierarchique_poste",
-        "satisfaction_employee_nature_travail",
-        "satisfaction_employee_equipe",
-        "satisfaction_employee_equilibre_pro_perso",
-        "note_evaluation_actuelle",
-        "augementation_salaire_precedente",
-        "age",
-        "revenu_mensuel",
-        "nombre_experiences_precedentes",
-        "nombre_heures_travailless",
-        "annee_experience_totale",
-        "annees_dans_l_entreprise",
-        "annees_dans_le_poste_actuel",
-        "revenu_par_anciennete",
-        "experience_par_anciennete",
-        "satisfaction_moyenne",
-        "promo_par_anciennete",
-        "genre_F",
-        "genre_M",
-        "statut_marital_Célibataire",
-        "statut_marital_Divorcé(e)",
-        "statut_marital_Marié(e)",
-        "departement_Commercial",
-        "departement_Consulting",
-        "departement_Ressources Humaines",
-        "poste_Assistant de Direction",
-        "poste_Cadre Commercial",
-        "poste_Consultant",
-        "poste_Directeur Technique",
-        "poste_Manager",
-        "poste_Représentant Commercial",
-        "poste_Ressources Humaines",
-        "poste_Senior Manager",
-        "poste_Tech Lead",
-        "domaine_etude_Autre",
-        "domaine_etude_Entrepreunariat",
-        "domaine_etude_Infra & Cloud",
-        "domaine_etude_Marketing",
-        "domaine_etude_Ressources Humaines",
-        "domaine_etude_Transformation Digitale",
-        "frequence_deplacement",
-    ]
-
-    # Réordonner les colonnes
-    df = df[expected_columns]
+    # Réordonner les colonnes (ordre exact des 50 features attendues par le modèle)
+    df = df[EXPECTED_COLUMNS]
 
     # === SCALING ===
     # Appliquer le StandardScaler avec les paramètres sauvegardés
@@ -344,6 +365,230 @@ def encode_and_scale(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def _category_value(value: Any) -> Any:
+    """Retourne la valeur brute d'une catégorie (les Enums Pydantic → str)."""
+    return getattr(value, "value", value)
+
+
+class FeaturePlan:
+    """
+    Plan de preprocessing précompilé pour l'inférence.
+
+    Construit une seule fois à partir de SCALER_PARAMS, CATEGORIES et
+    EXPECTED_COLUMNS : chaque feature a un indice de slot fixe dans la ligne
+    de 50 colonnes, et le StandardScaler est appliqué en une seule opération
+    vectorisée (moyenne 0 / échelle 1 pour les colonnes OneHot).
+
+    Le résultat est identique bit à bit à la chaîne
+    create_input_dataframe -> engineer_features -> encode_and_scale,
+    sans DataFrame ni encodeurs sklearn réajustés à chaque appel.
+
+    Examples:
+        >>> plan = get_feature_plan()
+        >>> X = plan.transform_employee(employee)
+        >>> X.shape
+        (1, 50)
+    """
+
+    def __init__(self, dtype: Any = np.float64):
+        self.columns = list(EXPECTED_COLUMNS)
+        self.n_features = len(self.columns)
+        self.dtype = np.dtype(dtype)
+
+        slots = {col: i for i, col in enumerate(self.columns)}
+        self._slots = slots
+
+        # Colonnes numériques copiées telles quelles depuis l'input
+        self.numeric_columns = [
+            col
+            for col in SCALER_PARAMS["columns"]
+            if col not in ENGINEERED_COLUMNS and col != "frequence_deplacement"
+        ]
+        self._numeric_slots = np.array(
+            [slots[col] for col in self.numeric_columns], dtype=np.intp
+        )
+        self._numeric_getter = operator.attrgetter(*self.numeric_columns)
+
+        # Features calculées
+        self._revenu_slot = slots["revenu_par_anciennete"]
+        self._experience_slot = slots["experience_par_anciennete"]
+        self._satisfaction_slot = slots["satisfaction_moyenne"]
+        self._promo_slot = slots["promo_par_anciennete"]
+
+        # OneHot : catégorie -> slot, pour chaque variable non ordonnée
+        self.onehot_slots = {
+            col: {cat: slots[f"{col}_{cat}"] for cat in categories}
+            for col, categories in CATEGORIES.items()
+        }
+
+        # Ordinal : catégorie -> code
+        self._ordinal_slot = slots["frequence_deplacement"]
+        self.ordinal_codes = {
+            cat: float(code) for code, cat in enumerate(ORDINAL_CATEGORIES)
+        }
+
+        # Scaling vectorisé sur les 50 colonnes
+        self.mean = np.zeros(self.n_features, dtype=np.float64)
+        self.scale = np.ones(self.n_features, dtype=np.float64)
+        for col, mean, scale in zip(
+            SCALER_PARAMS["columns"], SCALER_PARAMS["mean"], SCALER_PARAMS["scale"]
+        ):
+            self.mean[slots[col]] = mean
+            self.scale[slots[col]] = scale
+        self._scaled_slots = [slots[col] for col in SCALER_PARAMS["columns"]]
+
+    def _slot(self, col: str) -> int:
+        """Retourne l'indice de slot d'une colonne."""
+        return self._slots[col]
+
+    def transform_employee(
+        self, employee: EmployeeInput, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Transforme un employé en une ligne de features prête pour le modèle.
+
+        Args:
+            employee: Données validées d'un employé.
+            out: Ligne préallouée (1, 50) à remplir (optionnel).
+
+        Returns:
+            Array numpy de forme (1, 50) au dtype du plan.
+
+        Raises:
+            ValueError: Si la fréquence de déplacement est inconnue.
+        """
+        row = np.zeros(self.n_features, dtype=np.float64)
+        row[self._numeric_slots] = self._numeric_getter(employee)
+
+        # Feature engineering (+ 1 pour éviter division par zéro)
+        tenure = employee.annees_dans_l_entreprise + 1
+        row[self._revenu_slot] = employee.revenu_mensuel / tenure
+        row[self._experience_slot] = employee.annee_experience_totale / tenure
+        row[self._promo_slot] = employee.annees_depuis_la_derniere_promotion / tenure
+        row[self._satisfaction_slot] = (
+            employee.satisfaction_employee_environnement
+            + employee.satisfaction_employee_nature_travail
+            + employee.satisfaction_employee_equipe
+            + employee.satisfaction_employee_equilibre_pro_perso
+        ) / len(SATISFACTION_COLUMNS)
+
+        # OneHot (catégorie inconnue -> que des zéros, comme handle_unknown="ignore")
+        for col, lookup in self.onehot_slots.items():
+            slot = lookup.get(_category_value(getattr(employee, col)))
+            if slot is not None:
+                row[slot] = 1.0
+
+        # Ordinal
+        frequence = _category_value(employee.frequence_deplacement)
+        try:
+            row[self._ordinal_slot] = self.ordinal_codes[frequence]
+        except KeyError:
+            raise ValueError(
+                f"Found unknown categories ['{frequence}'] in column "
+                "frequence_deplacement during transform"
+            )
+
+        # Scaling
+        row -= self.mean
+        row /= self.scale
+
+        if out is None:
+            return row.astype(self.dtype, copy=False).reshape(1, self.n_features)
+
+        out[...] = row
+        return out
+
+    def transform_dataframe(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Transforme un DataFrame brut (CSV fusionnés) en matrice de features.
+
+        Toutes les étapes sont des opérations numpy sur des colonnes entières :
+        OneHot via des tables catégorie -> slot précalculées, mapping ordinal,
+        puis scaling affine contre SCALER_PARAMS. Les colonnes superflues
+        (identifiants, cible...) sont ignorées.
+
+        Args:
+            df: DataFrame avec les colonnes brutes des 3 fichiers CSV.
+
+        Returns:
+            Matrice (n, 50) C-contiguë au dtype du plan, prête pour
+            model.predict_proba().
+
+        Raises:
+            KeyError: Si une colonne requise est absente.
+            ValueError: Si la fréquence de déplacement est inconnue.
+        """
+        # Construction colonne par colonne dans un buffer Fortran (colonnes
+        # contiguës), puis une seule copie finale en ordre C pour le modèle
+        n_rows = len(df)
+        X = np.zeros((n_rows, self.n_features), dtype=np.float64, order="F")
+
+        for col, slot in zip(self.numeric_columns, self._numeric_slots):
+            X[:, slot] = df[col].to_numpy(dtype=np.float64)
+
+        # Feature engineering (+ 1 pour éviter division par zéro)
+        tenure = X[:, self._slot("annees_dans_l_entreprise")] + 1
+        revenu = X[:, self._slot("revenu_mensuel")]
+        experience = X[:, self._slot("annee_experience_totale")]
+        promotion = X[:, self._slot("annees_depuis_la_derniere_promotion")]
+        np.divide(revenu, tenure, out=X[:, self._revenu_slot])
+        np.divide(experience, tenure, out=X[:, self._experience_slot])
+        np.divide(promotion, tenure, out=X[:, self._promo_slot])
+
+        # Moyenne de satisfaction (ignore les NaN, comme DataFrame.mean)
+        satisfaction = X[:, [self._slot(col) for col in SATISFACTION_COLUMNS]]
+        missing = np.isnan(satisfaction)
+        if missing.any():
+            counts = (~missing).sum(axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                X[:, self._satisfaction_slot] = (
+                    np.where(missing, 0.0, satisfaction).sum(axis=1) / counts
+                )
+        else:
+            X[:, self._satisfaction_slot] = satisfaction.sum(axis=1) / len(
+                SATISFACTION_COLUMNS
+            )
+
+        # OneHot (catégorie inconnue ou manquante -> que des zéros)
+        for col, lookup in self.onehot_slots.items():
+            codes = pd.Index(list(lookup)).get_indexer(df[col])
+            for code, slot in enumerate(lookup.values()):
+                np.equal(codes, code, out=X[:, slot], casting="unsafe")
+
+        # Ordinal (catégorie inconnue ou manquante -> erreur, comme OrdinalEncoder)
+        frequence = df["frequence_deplacement"]
+        codes = pd.Index(ORDINAL_CATEGORIES).get_indexer(frequence)
+        unknown = codes < 0
+        if unknown.any():
+            raise ValueError(
+                f"Found unknown categories {list(pd.unique(frequence[unknown]))} "
+                "in column frequence_deplacement during transform"
+            )
+        X[:, self._ordinal_slot] = codes
+
+        # Scaling (colonnes OneHot inchangées : moyenne 0, échelle 1)
+        for slot in self._scaled_slots:
+            column = X[:, slot]
+            column -= self.mean[slot]
+            column /= self.scale[slot]
+
+        return np.ascontiguousarray(X, dtype=self.dtype)
+
+
+@lru_cache()
+def get_feature_plan(dtype: str = "float64") -> FeaturePlan:
+    """
+    Retourne le plan de preprocessing compilé (une instance par dtype).
+
+    Args:
+        dtype: Type numpy de sortie ("float64" par défaut, ou "float32").
+
+    Returns:
+        FeaturePlan: Plan prêt à l'emploi.
+    """
+    return FeaturePlan(dtype=dtype)
+
+
 def preprocess_for_prediction(employee: EmployeeInput) -> np.ndarray:
     """
     Pipeline complet de preprocessing pour une prédiction.
@@ -360,17 +605,25 @@ def preprocess_for_prediction(employee: EmployeeInput) -> np.ndarray:
         >>> X = preprocess_for_prediction(employee)
         >>> prediction = model.predict(X)
     """
-    # 1. Créer DataFrame
-    df = create_input_dataframe(employee)
+    # Plan précompilé : équivalent bit à bit de
+    # create_input_dataframe -> engineer_features -> encode_and_scale
+    with stage("preprocess"):
+        return get_feature_plan().transform_employee(employee)
+
 
-    # 2. Feature engineering
-    df = engineer_features(df)
+def preprocess_batch_for_prediction(df: pd.DataFrame) -> np.ndarray:
+    """
+    Préprocess un DataFrame complet (issu de CSV fusionnés) en matrice numpy.
 
-    # 3. Encoding et scaling
-    df = encode_and_scale(df)
+    Args:
+        df: DataFrame avec toutes les colonnes nécessaires.
 
-    # 4. Convertir en numpy array (le modèle attend un array)
-    return df.values
+    Returns:
+        Matrice (n, 50) C-contiguë prête pour model.predict_proba().
+    """
+    # Moteur vectorisé : équivalent de engineer_features -> encode_and_scale
+    with stage("preprocess"):
+        return get_feature_plan().transform_dataframe(df)
 
 
 def preprocess_dataframe_for_prediction(df: pd.DataFrame) -> pd.DataFrame:
@@ -383,13 +636,28 @@ def preprocess_dataframe_for_prediction(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame transformé prêt pour model.predict().
     """
-    # Feature engineering
-    df_processed = engineer_features(df)
+    return pd.DataFrame(
+        preprocess_batch_for_prediction(df), columns=EXPECTED_COLUMNS, index=df.index
+    )
+
+
+def sondage_employee_ids(sondage_df: pd.DataFrame) -> pd.Series:
+    """Identifiants employés du CSV sondage (colonne code_sondage)."""
+    return sondage_df["code_sondage"].apply(
+        lambda x: int(x) if isinstance(x, (str, int)) else None
+    )
+
+
+def eval_employee_ids(eval_df: pd.DataFrame) -> pd.Series:
+    """Identifiants employés du CSV évaluation (eval_number "E_<id>")."""
+    return eval_df["eval_number"].apply(
+        lambda x: int(str(x).replace("E_", "")) if isinstance(x, str) else x
+    )
 
-    # Encoding et scaling
-    df_processed = encode_and_scale(df_processed)
 
-    return df_processed
+def sirh_employee_ids(sirh_df: pd.DataFrame) -> pd.Series:
+    """Identifiants employés du CSV SIRH (colonne id_employee)."""
+    return sirh_df["id_employee"]
 
 
 def merge_csv_dataframes(
@@ -413,15 +681,11 @@ def merge_csv_dataframes(
     eval_df["augementation_salaire_precedente"] = eval_df[
         "augementation_salaire_precedente"
     ].apply(lambda x: float(str(x).replace(" %", "")) if isinstance(x, str) else x)
-    eval_df["employee_id"] = eval_df["eval_number"].apply(
-        lambda x: int(str(x).replace("E_", "")) if isinstance(x, str) else x
-    )
+    eval_df["employee_id"] = eval_employee_ids(eval_df)
 
     # Nettoyage du sondage
     sondage_df = sondage_df.copy()
-    sondage_df["employee_id"] = sondage_df["code_sondage"].apply(
-        lambda x: int(x) if isinstance(x, (str, int)) else None
-    )
+    sondage_df["employee_id"] = sondage_employee_ids(sondage_df)
 
     # Fusion
     central_df = pd.merge(sondage_df, eval_df, on="employee_id", how="inner")
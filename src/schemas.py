@@ -5,8 +5,9 @@ Schémas Pydantic pour validation des données d'entrée de l'API.
 Ces schémas correspondent aux colonnes brutes du dataset avant preprocessing,
 permettant une validation stricte des inputs avec messages d'erreur clairs.
 """
+from datetime import datetime
 from enum import Enum
-from typing import Annotated
+from typing import Annotated, Any, Optional
 
 from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
 
@@ -237,6 +238,9 @@ class PredictionOutput(BaseModel):
         ..., ge=0, le=1, description="Probabilité de partir (classe 1)"
     )
     risk_level: str = Field(..., description="Niveau de risque (Low/Medium/High)")
+    model_version: Optional[str] = Field(
+        None, description="Version du modèle utilisé (sha256 abrégé)"
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -245,6 +249,7 @@ class PredictionOutput(BaseModel):
                 "probability_0": 0.35,
                 "probability_1": 0.65,
                 "risk_level": "High",
+                "model_version": "3b1f0c9a2e47",
             }
         }
     )
@@ -257,6 +262,7 @@ class HealthCheck(BaseModel):
     model_loaded: bool = Field(..., description="Modèle chargé ou non")
     model_type: str = Field(..., description="Type du modèle")
     version: str = Field(..., description="Version de l'API")
+    ready: bool = Field(True, description="Modèle chargé et préchauffé (voir /ready)")
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -265,6 +271,7 @@ class HealthCheck(BaseModel):
                 "model_loaded": True,
                 "model_type": "Pipeline",
                 "version": "1.0.0",
+                "ready": True,
             }
         }
     )
@@ -292,6 +299,10 @@ class BatchPredictionOutput(BaseModel):
         ..., description="Liste des prédictions"
     )
     summary: dict = Field(..., description="Résumé des prédictions")
+    batch_id: Optional[str] = Field(None, description="Identifiant du lot dans ml_logs")
+    model_version: Optional[str] = Field(
+        None, description="Version du modèle utilisé (sha256 abrégé)"
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -313,6 +324,109 @@ class BatchPredictionOutput(BaseModel):
                     "medium_risk_count": 10,
                     "low_risk_count": 75,
                 },
+                "batch_id": "3f2b8c1e-9a4d-4e7b-8f0a-2c6d1e5b7a90",
+                "model_version": "3b1f0c9a2e47",
+            }
+        }
+    )
+
+
+class BatchJobStatus(BaseModel):
+    """Schéma de statut d'un job de prédiction batch asynchrone."""
+
+    job_id: str = Field(..., description="Identifiant du job (batch_id dans ml_logs)")
+    status: str = Field(
+        ..., description="pending, running, succeeded, failed ou cancelled"
+    )
+    output_format: str = Field(..., description="Format du résultat (csv ou parquet)")
+    total_rows: Optional[int] = Field(
+        None, description="Nombre d'employés (estimé tant que le job tourne)"
+    )
+    processed_rows: int = Field(..., description="Employés déjà scorés")
+    chunks_done: int = Field(..., description="Chunks écrits sur disque")
+    progress: float = Field(..., ge=0, le=1, description="Progression (0 à 1)")
+    summary: Optional[dict] = Field(None, description="Résumé (job terminé)")
+    error: Optional[str] = Field(None, description="Message d'erreur (job en échec)")
+    result_url: Optional[str] = Field(
+        None, description="URL de téléchargement du résultat (job terminé)"
+    )
+    created_at: Optional[datetime] = Field(None, description="Date de création")
+    updated_at: Optional[datetime] = Field(None, description="Dernière mise à jour")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "job_id": "3f2b8c1e-9a4d-4e7b-8f0a-2c6d1e5b7a90",
+                "status": "running",
+                "output_format": "csv",
+                "total_rows": 500000,
+                "processed_rows": 120000,
+                "chunks_done": 12,
+                "progress": 0.24,
+                "summary": None,
+                "error": None,
+                "result_url": None,
+                "created_at": "2026-01-11T17:35:22",
+                "updated_at": "2026-01-11T17:36:02",
+            }
+        }
+    )
+
+
+class ModelVersion(BaseModel):
+    """Version du modèle disponible dans le cache local."""
+
+    version: str = Field(..., description="sha256 abrégé")
+    sha256: str = Field(..., description="Empreinte sha256 complète")
+    revision: Optional[str] = Field(None, description="Révision HF Hub")
+    added_at: Optional[str] = Field(None, description="Date d'ajout au cache")
+    current: bool = Field(..., description="Version courante du cache")
+
+
+class ModelStatus(BaseModel):
+    """Schéma de l'état du modèle servi et des rechargements à chaud."""
+
+    model_version: Optional[str] = Field(None, description="Version servie")
+    backend: Optional[str] = Field(None, description="Backend d'inférence")
+    reload_state: str = Field(..., description="idle, loading ou failed")
+    last_reload_at: Optional[datetime] = Field(
+        None, description="Date du dernier rechargement réussi"
+    )
+    last_error: Optional[str] = Field(None, description="Erreur du dernier échec")
+    reloads: int = Field(..., description="Rechargements réussis depuis le démarrage")
+    versions: list[ModelVersion] = Field(
+        default_factory=list, description="Versions disponibles dans le cache"
+    )
+    prediction_cache: Optional[dict[str, Any]] = Field(
+        None, description="Compteurs du cache des prédictions (hits, misses...)"
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "model_version": "3b1f0c9a2e47",
+                "backend": "xgboost",
+                "reload_state": "idle",
+                "last_reload_at": "2026-01-11T17:35:22",
+                "last_error": None,
+                "reloads": 1,
+                "versions": [
+                    {
+                        "version": "3b1f0c9a2e47",
+                        "sha256": "3b1f0c9a2e47...",
+                        "revision": "a1b2c3d",
+                        "added_at": "2026-01-11T17:35:20",
+                        "current": True,
+                    }
+                ],
+                "prediction_cache": {
+                    "size": 812,
+                    "hits": 5230,
+                    "disk_hits": 0,
+                    "misses": 812,
+                    "evictions": 0,
+                    "hit_rate": 0.866,
+                },
             }
         }
     )
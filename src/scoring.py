@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Tâches de scoring exécutées dans le pool d'inférence.
+
+Fonctions définies au niveau module (donc picklables) regroupant tout le
+travail CPU-bound d'une requête : parsing CSV, fusion, preprocessing,
+predict_proba et sérialisation de la réponse. Elles tournent dans un
+thread ou un processus worker (voir src.executor), jamais sur la boucle
+d'événements.
+"""
+import io
+import uuid
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import get_settings
+from src.database import log_batch, submit_batch_log
+from src.logger import logger
+from src.models import (
+    InferenceResult,
+    load_model,
+    predict_with_model,
+    summarize_predictions,
+)
+from src.parallel_scoring import get_sharded_scorer
+from src.preprocessing import (
+    get_feature_plan,
+    merge_csv_dataframes,
+    preprocess_batch_for_prediction,
+)
+from src.schemas import BatchPredictionOutput, EmployeeInput, EmployeePrediction
+from src.streaming import format_predictions, predictions_frame
+from src.timing import collect_stages, stage
+
+
+def score_employees(employees: list[EmployeeInput]) -> InferenceResult:
+    """
+    Préprocesse des employés en une seule matrice et exécute un predict_proba.
+
+    Args:
+        employees: Données validées des employés.
+
+    Returns:
+        InferenceResult avec une ligne par employé, dans le même ordre, et
+        les durées du preprocessing et du modèle (timings) si
+        l'instrumentation est active.
+    """
+    with collect_stages() as timings:
+        plan = get_feature_plan()
+        with stage("preprocess"):
+            X = np.empty((len(employees), plan.n_features), dtype=plan.dtype)
+            for i, employee in enumerate(employees):
+                plan.transform_employee(employee, out=X[i, None])
+
+        result = predict_with_model(load_model(), X)
+
+    # Exécutée dans le pool : les durées repartent avec le résultat
+    return result._replace(timings=timings.stages) if timings else result
+
+
+def build_batch_output(
+    employee_ids: list, result: InferenceResult, batch_id: Optional[str] = None
+) -> BatchPredictionOutput:
+    """
+    Construit la réponse batch à partir des prédictions vectorisées.
+
+    Args:
+        employee_ids: Identifiants des employés, dans l'ordre des lignes.
+        result: Résultat de predict_with_model.
+        batch_id: Identifiant du lot dans ml_logs (optionnel).
+
+    Returns:
+        BatchPredictionOutput: Prédictions et résumé.
+    """
+    predictions = [
+        EmployeePrediction(
+            employee_id=int(emp_id),
+            prediction=pred,
+            probability_stay=prob_stay,
+            probability_leave=prob_leave,
+            risk_level=risk,
+        )
+        for emp_id, pred, (prob_stay, prob_leave), risk in zip(
+            employee_ids,
+            result.predictions.tolist(),
+            result.probabilities.tolist(),
+            result.risk_levels.tolist(),
+        )
+    ]
+
+    return BatchPredictionOutput(
+        total_employees=len(predictions),
+        predictions=predictions,
+        summary=summarize_predictions(result),
+        batch_id=batch_id,
+        model_version=result.model_version,
+    )
+
+
+def score_csv_batch(
+    sondage_content: bytes,
+    eval_content: bytes,
+    sirh_content: bytes,
+    batch_id: Optional[str] = None,
+) -> tuple[bytes, dict]:
+    """
+    Prédiction batch complète à partir du contenu des 3 fichiers CSV.
+
+    Les prédictions sont écrites dans ml_logs en arrière-plan (écriture
+    bulk), sous un batch_id renvoyé dans la réponse.
+
+    Args:
+        sondage_content: Contenu du CSV sondage.
+        eval_content: Contenu du CSV évaluation.
+        sirh_content: Contenu du CSV SIRH.
+        batch_id: Identifiant du lot (généré si absent).
+
+    Returns:
+        Tuple (réponse BatchPredictionOutput sérialisée en JSON, résumé des
+        prédictions pour les métriques du processus appelant).
+
+    Raises:
+        pd.errors.EmptyDataError: Si un des fichiers est vide.
+        KeyError: Si une colonne requise est absente.
+    """
+    sondage_df = pd.read_csv(io.BytesIO(sondage_content))
+    eval_df = pd.read_csv(io.BytesIO(eval_content))
+    sirh_df = pd.read_csv(io.BytesIO(sirh_content))
+
+    logger.info(
+        f"Fichiers CSV chargés: sondage={len(sondage_df)}, "
+        f"eval={len(eval_df)}, sirh={len(sirh_df)} lignes"
+    )
+
+    # Fusionner les DataFrames
+    merged_df = merge_csv_dataframes(sondage_df, eval_df, sirh_df)
+    employee_ids = merged_df["original_employee_id"].tolist()
+
+    logger.info(f"DataFrame fusionné: {len(merged_df)} employés")
+
+    scorer = get_sharded_scorer()
+    if scorer.accepts(len(merged_df)):
+        # Gros lot : shards préprocessés et scorés en parallèle
+        result = scorer.score(merged_df)
+    else:
+        # Preprocessing vectorisé (identifiant et cible sont ignorés)
+        X = preprocess_batch_for_prediction(merged_df)
+
+        # Prédiction (un seul passage predict_proba)
+        result = predict_with_model(load_model(), X)
+
+    # Persistance bulk dans ml_logs, hors du chemin de la réponse
+    if get_settings().DB_LOG_BATCH_ENABLED:
+        batch_id = batch_id or str(uuid.uuid4())
+        submit_frame_log(merged_df, result.predictions, batch_id)
+    else:
+        batch_id = None
+
+    output = build_batch_output(employee_ids, result, batch_id)
+
+    logger.info(f"Prédictions terminées: {output.summary}")
+
+    return output.model_dump_json().encode("utf-8"), output.summary
+
+
+def _log_inputs(merged_df: pd.DataFrame) -> pd.DataFrame:
+    """Features loguées dans ml_logs (sans la cible)."""
+    return merged_df.drop(columns=["a_quitte_l_entreprise"], errors="ignore")
+
+
+def submit_frame_log(
+    merged_df: pd.DataFrame, predictions: np.ndarray, batch_id: str
+) -> None:
+    """Planifie l'écriture dans ml_logs des prédictions d'employés fusionnés."""
+    submit_batch_log(_log_inputs(merged_df), predictions, batch_id)
+
+
+def log_frame(merged_df: pd.DataFrame, predictions: np.ndarray, batch_id: str) -> int:
+    """
+    Écrit dans ml_logs les prédictions d'employés fusionnés (bloquant).
+
+    Returns:
+        Nombre de lignes écrites (0 en cas d'échec).
+    """
+    return log_batch(_log_inputs(merged_df), predictions, batch_id)
+
+
+def score_prediction_frame(
+    merged_df: pd.DataFrame, batch_id: Optional[str] = None
+) -> tuple[pd.DataFrame, dict, Optional[str]]:
+    """
+    Score un chunk d'employés fusionnés (streaming et jobs batch).
+
+    Args:
+        merged_df: Chunk issu de ChunkedCsvJoin.
+        batch_id: Identifiant du lot pour ml_logs (pas de log si None).
+
+    Returns:
+        Tuple (prédictions du chunk, résumé du chunk, version du modèle).
+    """
+    X = preprocess_batch_for_prediction(merged_df)
+    result = predict_with_model(load_model(), X)
+
+    if batch_id is not None:
+        submit_frame_log(merged_df, result.predictions, batch_id)
+
+    frame = predictions_frame(merged_df["original_employee_id"], result)
+    return frame, summarize_predictions(result), result.model_version
+
+
+def score_merged_chunk(
+    merged_df: pd.DataFrame, output_format: str, batch_id: Optional[str] = None
+) -> tuple[bytes, dict, Optional[str]]:
+    """
+    Score un chunk d'employés fusionnés pour la prédiction en streaming.
+
+    Args:
+        merged_df: Chunk issu de ChunkedCsvJoin.
+        output_format: "ndjson" ou "csv".
+        batch_id: Identifiant du lot pour ml_logs (pas de log si None).
+
+    Returns:
+        Tuple (lignes sérialisées du chunk, résumé du chunk, version du modèle).
+    """
+    frame, summary, version = score_prediction_frame(merged_df, batch_id)
+    return format_predictions(frame, output_format), summary, version
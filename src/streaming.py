@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Prédiction batch en streaming.
+
+Lit les 3 CSV par chunks, les joint par identifiant employé au fil de la
+lecture et sérialise les prédictions de chaque chunk en NDJSON ou CSV.
+La mémoire reste bornée par la taille des chunks tant que les fichiers
+sont à peu près dans le même ordre (cas des extraits RH).
+"""
+import json
+from collections.abc import Iterator
+from typing import IO, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.models import InferenceResult
+from src.preprocessing import (
+    eval_employee_ids,
+    merge_csv_dataframes,
+    sirh_employee_ids,
+    sondage_employee_ids,
+)
+
+# Formats de sortie supportés et leur media type
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Colonnes d'une prédiction (mêmes champs que EmployeePrediction)
+PREDICTION_COLUMNS = [
+    "employee_id",
+    "prediction",
+    "probability_stay",
+    "probability_leave",
+    "risk_level",
+]
+
+
+class ChunkedCsvJoin:
+    """
+    Jointure par identifiant employé de 3 CSV lus par chunks.
+
+    Jointure de hachage symétrique : à chaque tour, un chunk est lu dans
+    chaque fichier et ajouté aux lignes en attente de son fichier ; les
+    identifiants présents dans les 3 fichiers sont fusionnés (comme
+    merge_csv_dataframes) puis retirés de l'attente. Les lignes sans
+    correspondance sont ignorées (jointure interne) et comptées.
+
+    Examples:
+        >>> join = ChunkedCsvJoin(sondage, evaluation, sirh, chunk_size=5000)
+        >>> for merged_df in join:
+        ...     score(merged_df)
+    """
+
+    def __init__(
+        self,
+        sondage_file: IO,
+        eval_file: IO,
+        sirh_file: IO,
+        chunk_size: int = 5000,
+    ):
+        self.chunk_size = chunk_size
+        self.unmatched = 0
+        self._sources = [
+            (sondage_file, sondage_employee_ids),
+            (eval_file, eval_employee_ids),
+            (sirh_file, sirh_employee_ids),
+        ]
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        readers = [
+            pd.read_csv(file, chunksize=self.chunk_size) for file, _ in self._sources
+        ]
+        key_funcs = [key_func for _, key_func in self._sources]
+        pending: list[Optional[pd.DataFrame]] = [None, None, None]
+        exhausted = [False, False, False]
+
+        while not all(exhausted):
+            for i, reader in enumerate(readers):
+                if exhausted[i]:
+                    continue
+                chunk = next(reader, None)
+                if chunk is None:
+                    exhausted[i] = True
+                    continue
+                chunk.index = pd.Index(key_funcs[i](chunk))
+                if pending[i] is not None:
+                    chunk = pd.concat([pending[i], chunk])
+                pending[i] = chunk
+
+            if all(df is not None and not df.empty for df in pending):
+                common = pending[0].index.intersection(pending[1].index)
+                common = common.intersection(pending[2].index)
+                if len(common):
+                    matched = [df[df.index.isin(common)] for df in pending]
+                    pending = [df[~df.index.isin(common)] for df in pending]
+                    yield merge_csv_dataframes(
+                        *(df.reset_index(drop=True) for df in matched)
+                    )
+
+            # Un fichier épuisé sans ligne en attente : plus aucune jointure possible
+            if any(
+                exhausted[i] and (pending[i] is None or pending[i].empty)
+                for i in range(3)
+            ):
+                break
+
+        self.unmatched = sum(len(df) for df in pending if df is not None)
+
+
+def predictions_frame(employee_ids, result: InferenceResult) -> pd.DataFrame:
+    """
+    Construit le tableau des prédictions d'un chunk (une ligne par employé).
+
+    Args:
+        employee_ids: Identifiants des employés, dans l'ordre des lignes.
+        result: Résultat de predict_with_model pour le chunk.
+
+    Returns:
+        DataFrame avec les colonnes PREDICTION_COLUMNS.
+    """
+    return pd.DataFrame(
+        {
+            "employee_id": np.asarray(employee_ids, dtype=np.int64),
+            "prediction": result.predictions.astype(np.int64),
+            "probability_stay": result.probabilities[:, 0],
+            "probability_leave": result.probabilities[:, 1],
+            "risk_level": result.risk_levels,
+        },
+        columns=PREDICTION_COLUMNS,
+    )
+
+
+def format_predictions(frame: pd.DataFrame, output_format: str) -> bytes:
+    """
+    Sérialise les prédictions d'un chunk.
+
+    Args:
+        frame: Prédictions construites par predictions_frame.
+        output_format: "ndjson" ou "csv" (sans ligne d'en-tête).
+
+    Returns:
+        Lignes sérialisées, terminées par un saut de ligne.
+    """
+    if output_format == "csv":
+        return frame.to_csv(index=False, header=False).encode("utf-8")
+    return (frame.to_json(orient="records", lines=True).rstrip("\n") + "\n").encode(
+        "utf-8"
+    )
+
+
+def format_header(output_format: str) -> bytes:
+    """Ligne d'en-tête du flux (CSV uniquement)."""
+    if output_format == "csv":
+        return (",".join(PREDICTION_COLUMNS) + "\n").encode("utf-8")
+    return b""
+
+
+def format_trailer(record: dict, output_format: str) -> bytes:
+    """
+    Enregistrement final du flux (résumé ou erreur).
+
+    En NDJSON, c'est une dernière ligne JSON ; en CSV, une ligne de
+    commentaire "# " suivie du JSON.
+    """
+    line = json.dumps(record, ensure_ascii=False)
+    if output_format == "csv":
+        line = f"# {line}"
+    return (line + "\n").encode("utf-8")
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Instrumentation par étape du chemin de prédiction.
+
+Quand /predict était lent, rien ne disait où passait le temps : validation
+Pydantic, cache, attente dans le micro-batcher ou le pool d'inférence,
+preprocessing, modèle, mise en file du log en base. Chaque étape est
+chronométrée par stage("nom") et exposée de trois façons :
+- l'en-tête Server-Timing de la réponse (DevTools, curl -i) ;
+- le champ "timings" du log de la requête ;
+- des histogrammes en mémoire par étape (GET /admin/timings).
+
+Les durées d'une requête sont portées par une ContextVar posée par le
+middleware. Le preprocessing et le modèle tournent dans le pool
+d'inférence (thread ou processus, hors du contexte de la requête) : la
+tâche ouvre son propre collecteur (collect_stages) et renvoie ses durées
+avec le résultat.
+
+Désactivée (STAGE_TIMING_ENABLED=False), stage() se limite à une lecture
+de ContextVar et retourne un context manager vide.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Iterator, Optional
+
+from src.config import get_settings
+from src.metrics import observe_stages
+
+# Bornes supérieures des buckets des histogrammes (ms)
+STAGE_BUCKETS_MS = (
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    25.0,
+    50.0,
+    100.0,
+    250.0,
+    500.0,
+    1000.0,
+    2500.0,
+    5000.0,
+    10000.0,
+)
+
+
+class StageTimings:
+    """Durées (ms) des étapes d'une requête ou d'une tâche, dans l'ordre."""
+
+    __slots__ = ("started", "stages")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+
+    def add(self, name: str, duration_ms: float) -> None:
+        """Ajoute une durée (cumulée si l'étape est déjà mesurée)."""
+        self.stages[name] = self.stages.get(name, 0.0) + duration_ms
+
+    def elapsed_ms(self) -> float:
+        """Temps écoulé depuis le début de la requête."""
+        return (time.perf_counter() - self.started) * 1000
+
+    def rounded(self) -> dict[str, float]:
+        """Durées arrondies pour les logs."""
+        return {name: round(ms, 3) for name, ms in self.stages.items()}
+
+    def header(self, total_ms: Optional[float] = None) -> str:
+        """
+        Valeur de l'en-tête Server-Timing.
+
+        Examples:
+            >>> timings.header(12.5)
+            'validation;dur=0.41, preprocess;dur=0.12, total;dur=12.50'
+        """
+        entries = [f"{name};dur={ms:.2f}" for name, ms in self.stages.items()]
+        if total_ms is not None:
+            entries.append(f"total;dur={total_ms:.2f}")
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[StageTimings]] = ContextVar("stage_timings", default=None)
+
+# Retourné par stage() hors requête ou instrumentation désactivée
+_NO_STAGE = nullcontext()
+
+
+class _Stage:
+    """Chronomètre d'une étape (context manager sans générateur)."""
+
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings: StageTimings, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.timings.add(self.name, (time.perf_counter() - self.start) * 1000)
+
+
+def stage(name: str):
+    """
+    Chronomètre une étape de la requête ou de la tâche en cours.
+
+    Examples:
+        >>> with stage("preprocess"):
+        ...     X = preprocess_for_prediction(employee)
+    """
+    timings = _current.get()
+    if timings is None:
+        return _NO_STAGE
+    return _Stage(timings, name)
+
+
+def mark(name: str) -> None:
+    """Enregistre une étape qui court depuis le début de la requête."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, timings.elapsed_ms())
+
+
+@contextmanager
+def collect_stages(enabled: Optional[bool] = None) -> Iterator[Optional[StageTimings]]:
+    """
+    Collecteur des étapes chronométrées dans le bloc (None si désactivé).
+
+    Ouvert par le middleware pour chaque requête, et par les tâches du pool
+    d'inférence qui renvoient leurs durées avec le résultat.
+
+    Args:
+        enabled: Force l'activation (défaut: STAGE_TIMING_ENABLED).
+    """
+    if enabled is None:
+        enabled = get_settings().STAGE_TIMING_ENABLED
+    if not enabled:
+        yield None
+        return
+
+    timings = StageTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def record_offloaded(stages: Optional[dict[str, float]], wait_ms: float) -> None:
+    """
+    Reporte dans la requête les durées mesurées dans le pool d'inférence.
+
+    Le temps d'attente qui n'est couvert par aucune de ces étapes (file du
+    micro-batcher, pool occupé, transfert vers le processus) devient
+    l'étape "queue".
+
+    Args:
+        stages: Durées renvoyées par la tâche (InferenceResult.timings).
+        wait_ms: Durée de l'await côté requête.
+    """
+    timings = _current.get()
+    if timings is None or not stages:
+        return
+    timings.add("queue", max(0.0, wait_ms - sum(stages.values())))
+    for name, duration_ms in stages.items():
+        timings.add(name, duration_ms)
+
+
+class StageHistograms:
+    """
+    Histogrammes cumulés des durées par étape (buckets fixes, thread-safe).
+
+    Examples:
+        >>> histograms = StageHistograms()
+        >>> histograms.observe("model", 1.8)
+        >>> histograms.snapshot()["model"]["p50_ms"]
+        2.5
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = STAGE_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # Comptes par bucket, le dernier pour les durées > buckets[-1]
+        self._counts: dict[str, list[int]] = {}
+        self._sums: dict[str, float] = {}
+
+    def observe(self, name: str, duration_ms: float) -> None:
+        """Ajoute une durée à l'histogramme de l'étape."""
+        i = bisect.bisect_left(self.buckets, duration_ms)
+        with self._lock:
+            counts = self._counts.get(name)
+            if counts is None:
+                counts = self._counts[name] = [0] * (len(self.buckets) + 1)
+            counts[i] += 1
+            self._sums[name] = self._sums.get(name, 0.0) + duration_ms
+
+    def observe_all(self, stages: dict[str, float]) -> None:
+        for name, duration_ms in stages.items():
+            self.observe(name, duration_ms)
+
+    def _quantile(self, counts: list[int], total: int, q: float) -> Optional[float]:
+        """Borne supérieure du bucket du quantile q (None au-delà du dernier)."""
+        rank = q * total
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return None
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """
+        État des histogrammes.
+
+        Returns:
+            Dict étape -> count, sum_ms, mean_ms, p50_ms / p95_ms / p99_ms
+            (borne supérieure du bucket) et buckets cumulés {borne: count}
+            comme un histogramme Prometheus ("+Inf" = total).
+        """
+        with self._lock:
+            counts = {name: list(values) for name, values in self._counts.items()}
+            sums = dict(self._sums)
+
+        snapshot = {}
+        for name, values in counts.items():
+            total = sum(values)
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                buckets[f"{bound:g}"] = cumulative
+            buckets["+Inf"] = total
+            snapshot[name] = {
+                "count": total,
+                "sum_ms": round(sums[name], 3),
+                "mean_ms": round(sums[name] / total, 3),
+                "p50_ms": self._quantile(values, total, 0.50),
+                "p95_ms": self._quantile(values, total, 0.95),
+                "p99_ms": self._quantile(values, total, 0.99),
+                "buckets": buckets,
+            }
+        return snapshot
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._sums.clear()
+
+
+@lru_cache()
+def get_stage_histograms() -> StageHistograms:
+    """Histogrammes des étapes partagés par le processus."""
+    return StageHistograms()
+
+
+def observe_stage(name: str, duration_ms: float) -> None:
+    """Ajoute une durée mesurée hors requête (thread de fond) aux histogrammes."""
+    if get_settings().STAGE_TIMING_ENABLED:
+        get_stage_histograms().observe(name, duration_ms)
+        observe_stages({name: duration_ms})
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Préchauffage de l'inférence au démarrage de l'API.
+
+Le premier /predict après le démarrage payait la création du pool de
+threads XGBoost, des allocations paresseuses et les premiers passages dans
+le code pandas : une dizaine de fois la latence normale. Avant que l'API
+ne soit déclarée prête (/ready), le lifespan exécute du trafic synthétique
+(exemple du schéma EmployeeInput) sur chaque chemin d'inférence :
+
+- single : une ligne dans le pool d'inférence (chemin de /predict)
+- workers : une tâche par worker du pool (threads ou processus)
+- micro_batch : un lot complet via le MicroBatcher, s'il est actif
+- batch : un lot de taille moyenne via le preprocessing DataFrame
+  (chemin de /predict/batch, du streaming et des jobs)
+"""
+import asyncio
+import time
+from typing import Optional
+
+import pandas as pd
+
+from src.batching import MicroBatcher
+from src.executor import InferenceExecutor
+from src.schemas import EmployeeInput
+from src.scoring import score_employees, score_prediction_frame
+
+
+def synthetic_employees(n_rows: int) -> list[EmployeeInput]:
+    """n_rows employés construits depuis l'exemple du schéma EmployeeInput."""
+    example = EmployeeInput.model_config["json_schema_extra"]["example"]
+    return [EmployeeInput(**example)] * n_rows
+
+
+def synthetic_frame(n_rows: int) -> pd.DataFrame:
+    """Lot d'employés au format fusionné des CSV (identifiants 0..n_rows-1)."""
+    frame = pd.DataFrame(
+        [employee.model_dump(mode="json") for employee in synthetic_employees(n_rows)]
+    )
+    frame["original_employee_id"] = range(n_rows)
+    return frame
+
+
+async def warm_up_inference(
+    executor: InferenceExecutor,
+    micro_batcher: Optional[MicroBatcher] = None,
+    batch_rows: int = 256,
+    rounds: int = 2,
+) -> dict[str, float]:
+    """
+    Exécute le trafic synthétique de préchauffage.
+
+    Aucune prédiction n'est enregistrée dans ml_logs ni dans le cache des
+    prédictions.
+
+    Args:
+        executor: Pool d'inférence démarré.
+        micro_batcher: MicroBatcher (ignoré s'il n'est pas démarré).
+        batch_rows: Taille du lot moyen (chemin batch).
+        rounds: Passages par étape (le premier paie l'initialisation).
+
+    Returns:
+        Durée de chaque étape en millisecondes.
+
+    Raises:
+        PoolSaturatedError: Si le pool refuse les tâches de préchauffage.
+    """
+    employee = synthetic_employees(1)
+    frame = synthetic_frame(batch_rows)
+    timings: dict[str, float] = {}
+
+    async def timed(phase: str, coroutine_factory) -> None:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await coroutine_factory()
+        timings[phase] = round((time.perf_counter() - start) * 1000, 2)
+
+    await timed("single", lambda: executor.run(score_employees, employee))
+    await timed(
+        "workers",
+        lambda: asyncio.gather(
+            *(
+                executor.run(score_employees, employee)
+                for _ in range(min(executor.max_workers, executor.max_pending))
+            )
+        ),
+    )
+    if micro_batcher is not None and micro_batcher.running:
+        await timed(
+            "micro_batch",
+            lambda: asyncio.gather(
+                *(
+                    micro_batcher.submit(employee[0])
+                    for _ in range(micro_batcher.max_batch_size)
+                )
+            ),
+        )
+    await timed("batch", lambda: executor.run(score_prediction_frame, frame))
+    return timings
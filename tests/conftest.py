@@ -21,7 +21,7 @@ from api import app
 
 
 @pytest.fixture(autouse=True)
-def mock_model_loading(monkeypatch):
+def mock_model_loading(monkeypatch, tmp_path):
     """
     Mock automatique du chargement du modèle pour éviter les appels à HF Hub pendant les tests.
 
@@ -52,6 +52,11 @@ def mock_model_loading(monkeypatch):
     monkeypatch.setattr("src.models.load_model", lambda: mock_model)
     monkeypatch.setattr("src.models._model_cache", mock_model)  # Aussi patcher le cache
 
+    # Cache local des artefacts isolé par test (pas d'écriture dans le dépôt)
+    from src.config import Settings
+
+    monkeypatch.setattr(Settings, "MODEL_CACHE_DIR", str(tmp_path / "model_cache"))
+
     # Par sécurité, mocker aussi hf_hub_download pour éviter tout accès réseau accidentel
     try:
         import tempfile
@@ -88,6 +93,37 @@ def client():
         yield test_client
 
 
+@pytest.fixture
+def process_pool_model(tmp_path, monkeypatch):
+    """
+    Modèle factice pour les pools de processus (démarrés en spawn).
+
+    Les workers ne voient pas les mocks du processus de test, seulement son
+    environnement : le modèle est un DummyClassifier placé dans un cache
+    local hors ligne. Sa probabilité de départ est toujours 0.75.
+    """
+    import joblib
+    import numpy as np
+    from sklearn.dummy import DummyClassifier
+
+    from src.artifacts import ModelArtifactCache
+    from src.models import HF_MODEL_REPO, MODEL_FILENAME
+
+    model_file = tmp_path / "spawn_model.pkl"
+    X = np.zeros((4, 1))
+    joblib.dump(DummyClassifier(strategy="prior").fit(X, [0, 1, 1, 1]), model_file)
+    cache_dir = tmp_path / "spawn_model_cache"
+    ModelArtifactCache(str(cache_dir)).add(
+        str(model_file), HF_MODEL_REPO, MODEL_FILENAME
+    )
+
+    monkeypatch.setenv("MODEL_CACHE_DIR", str(cache_dir))
+    monkeypatch.setenv("MODEL_OFFLINE", "True")
+    monkeypatch.setenv("MODEL_SHA256", "")
+    monkeypatch.setenv("INFERENCE_BACKEND", "joblib")
+    monkeypatch.setenv("GRADIO_ENABLED", "False")
+
+
 @pytest.fixture
 def valid_employee_data():
     """
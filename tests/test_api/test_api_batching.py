@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests du micro-batching des prédictions unitaires (/predict).
+
+Ces tests vérifient que les requêtes concurrentes sont regroupées en un
+seul appel au modèle, que chaque requête reçoit sa propre prédiction et
+que plusieurs lots sont scorés en parallèle dans le pool d'inférence.
+"""
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.batching import MicroBatcher
+from src.executor import InferenceExecutor
+from src.schemas import EmployeeInput
+
+
+class CountingModel:
+    """Modèle factice : proba de départ = âge / 100, compte les appels."""
+
+    def __init__(self, age_slot):
+        self.age_slot = age_slot
+        self.batch_sizes = []
+
+    def predict_proba(self, X):
+        self.batch_sizes.append(X.shape[0])
+        # L'âge est scalé : on retrouve une proba monotone et distincte par ligne
+        prob_leave = 1 / (1 + np.exp(-X[:, self.age_slot]))
+        return np.column_stack([1 - prob_leave, prob_leave])
+
+
+@pytest.fixture
+def counting_model(monkeypatch):
+    """Remplace le modèle en cache par un CountingModel."""
+    from src.preprocessing import EXPECTED_COLUMNS
+
+    model = CountingModel(EXPECTED_COLUMNS.index("age"))
+    monkeypatch.setattr("src.models._model_cache", model)
+    return model
+
+
+def test_concurrent_requests_share_one_model_call(counting_model, valid_employee_data):
+    """Test que 8 requêtes concurrentes donnent un seul predict_proba."""
+    employees = [
+        EmployeeInput(**{**valid_employee_data, "age": 20 + 5 * i}) for i in range(8)
+    ]
+
+    async def scenario():
+        batcher = MicroBatcher(max_batch_size=8, max_wait_ms=50)
+        await batcher.start()
+        try:
+            results = await asyncio.gather(*(batcher.submit(e) for e in employees))
+        finally:
+            await batcher.stop()
+        return batcher, results
+
+    batcher, results = asyncio.run(scenario())
+
+    assert counting_model.batch_sizes == [8]
+    # Chaque requête reçoit sa ligne : proba croissante avec l'âge
+    probas = [float(r.probabilities[0, 1]) for r in results]
+    assert probas == sorted(probas)
+    assert len(set(probas)) == 8
+
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["rows"] == 8
+    assert stats["fill_rate"] == 1.0
+
+
+def test_batch_is_flushed_after_max_wait(counting_model, valid_employee_data):
+    """Test qu'une requête seule est traitée après max_wait_ms."""
+    employee = EmployeeInput(**valid_employee_data)
+
+    async def scenario():
+        batcher = MicroBatcher(max_batch_size=32, max_wait_ms=1)
+        await batcher.start()
+        try:
+            return await asyncio.wait_for(batcher.submit(employee), timeout=5)
+        finally:
+            await batcher.stop()
+
+    result = asyncio.run(scenario())
+
+    assert counting_model.batch_sizes == [1]
+    assert result.predictions.shape == (1,)
+
+
+class SlowModel:
+    """Modèle factice lent qui mesure le nombre d'appels simultanés."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+
+    def predict_proba(self, X):
+        with self._lock:
+            self.active += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.2)
+        with self._lock:
+            self.active -= 1
+        return np.tile([0.5, 0.5], (X.shape[0], 1))
+
+
+def test_batches_run_concurrently_up_to_pool_workers(monkeypatch, valid_employee_data):
+    """Deux workers : deux lots scorés en même temps, jamais trois."""
+    model = SlowModel()
+    monkeypatch.setattr("src.models._model_cache", model)
+    employees = [EmployeeInput(**valid_employee_data) for _ in range(6)]
+    executor = InferenceExecutor(mode="thread", max_workers=2)
+
+    async def scenario():
+        batcher = MicroBatcher(max_batch_size=2, max_wait_ms=1, executor=executor)
+        await batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(e) for e in employees))
+        finally:
+            await batcher.stop()
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert len(results) == 6
+    assert model.calls == 3
+    assert model.peak == 2
+
+
+def test_full_queue_rejects_requests(counting_model, valid_employee_data):
+    """Test que la file bornée rejette les requêtes en surplus."""
+    employee = EmployeeInput(**valid_employee_data)
+
+    async def scenario():
+        batcher = MicroBatcher(max_batch_size=1, max_wait_ms=1, max_queue_size=1)
+        await batcher.start()
+        try:
+            # Les deux soumissions s'exécutent avant que le batcher ne dépile
+            first = asyncio.ensure_future(batcher.submit(employee))
+            second = asyncio.ensure_future(batcher.submit(employee))
+            await asyncio.wait([first, second])
+            with pytest.raises(asyncio.QueueFull):
+                second.result()
+            assert first.result().predictions.shape == (1,)
+        finally:
+            await batcher.stop()
+        return batcher
+
+    batcher = asyncio.run(scenario())
+
+    assert batcher.stats()["rejected"] == 1
+
+
+def test_predict_endpoint_uses_micro_batcher(client, valid_employee_data):
+    """Test que /predict passe par le micro-batcher démarré dans le lifespan."""
+    from api import micro_batcher
+
+    rows_before = micro_batcher.rows
+    response = client.post("/predict", json=valid_employee_data)
+
+    assert response.status_code == 200
+    assert micro_batcher.running
+    assert micro_batcher.rows == rows_before + 1
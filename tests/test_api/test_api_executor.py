@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests du pool d'inférence (exécution hors boucle d'événements).
+
+Ces tests vérifient le contrôle d'admission (503 + Retry-After), que
+/health reste réactif pendant un batch, et le mode pool de processus.
+"""
+import asyncio
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.executor import InferenceExecutor
+from src.schemas import EmployeeInput
+from src.scoring import score_employees
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data")
+
+
+def _csv_files():
+    """Charge les 3 CSV d'exemple au format attendu par /predict/batch."""
+    files = {}
+    for field, name in [
+        ("sondage_file", "extrait_sondage.csv"),
+        ("eval_file", "extrait_eval.csv"),
+        ("sirh_file", "extrait_sirh.csv"),
+    ]:
+        with open(os.path.join(DATA_DIR, name), "rb") as f:
+            files[field] = (name, f.read(), "text/csv")
+    return files
+
+
+def test_saturated_pool_returns_503_with_retry_after(
+    client, valid_employee_data, monkeypatch
+):
+    """Test que /predict et /predict/batch répondent 503 quand le pool est plein."""
+    from api import inference_executor, micro_batcher
+
+    monkeypatch.setattr(inference_executor, "max_pending", 0)
+    monkeypatch.setattr(inference_executor, "retry_after", 7)
+
+    response = client.post("/predict", json=valid_employee_data)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+    assert micro_batcher.running
+
+    response = client.post("/predict/batch", files=_csv_files())
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+
+
+def test_health_stays_responsive_during_batch(client, monkeypatch):
+    """Test que /health répond pendant qu'un batch occupe le modèle."""
+
+    class SlowModel:
+        def predict_proba(self, X):
+            time.sleep(1.0)
+            return np.tile([0.5, 0.5], (X.shape[0], 1))
+
+    monkeypatch.setattr("src.models._model_cache", SlowModel())
+
+    batch_response = {}
+
+    def run_batch():
+        batch_response["r"] = client.post("/predict/batch", files=_csv_files())
+
+    worker = threading.Thread(target=run_batch)
+    worker.start()
+    time.sleep(0.3)  # Laisser le batch entrer dans predict_proba
+
+    start = time.perf_counter()
+    health = client.get("/health")
+    health_duration = time.perf_counter() - start
+    worker.join()
+
+    assert health.status_code == 200
+    assert health_duration < 0.5, "La boucle d'événements ne doit pas être bloquée"
+    assert batch_response["r"].status_code == 200
+
+
+def test_process_pool_runs_scoring(valid_employee_data, process_pool_model):
+    """Test le mode processus : le worker exécute la tâche de scoring."""
+    employee = EmployeeInput(**valid_employee_data)
+    executor = InferenceExecutor(mode="process", max_workers=1)
+
+    try:
+        result = asyncio.run(executor.run(score_employees, [employee]))
+    finally:
+        executor.shutdown()
+
+    assert result.predictions.shape == (1,)
+    assert result.risk_levels[0] in ("Low", "Medium", "High")
+    # Worker démarré en spawn : modèle du cache local, pas le mock hérité
+    # d'un fork (0.5)
+    assert result.probabilities[0, 1] == pytest.approx(0.75)
+    assert executor.stats()["completed"] == 1
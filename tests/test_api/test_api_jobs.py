@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Tests des jobs de prédiction batch asynchrones (/jobs/batch).
+
+Utilise une base SQLite temporaire et un dossier de jobs temporaire :
+création, progression, téléchargement du résultat, annulation et reprise.
+"""
+import io
+import os
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from db_models import Base
+from src.config import get_settings
+from src.database import get_engine
+from src.jobs import (
+    CANCELLED,
+    RUNNING,
+    SUCCEEDED,
+    BatchJobManager,
+    _start_job,
+    _update_job,
+    get_job,
+    parquet_available,
+    run_batch_job,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data")
+
+
+def _csv_files():
+    """Charge les 3 CSV d'exemple au format attendu par /jobs/batch."""
+    files = {}
+    for field, name in [
+        ("sondage_file", "extrait_sondage.csv"),
+        ("eval_file", "extrait_eval.csv"),
+        ("sirh_file", "extrait_sirh.csv"),
+    ]:
+        with open(os.path.join(DATA_DIR, name), "rb") as f:
+            files[field] = (name, f.read(), "text/csv")
+    return files
+
+
+def _open_inputs():
+    return [
+        open(os.path.join(DATA_DIR, name), "rb")
+        for name in ("extrait_sondage.csv", "extrait_eval.csv", "extrait_sirh.csv")
+    ]
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """Base SQLite temporaire pour batch_jobs (et ml_logs)."""
+    url = f"sqlite:///{tmp_path / 'jobs.db'}"
+    monkeypatch.setattr(get_settings(), "DATABASE_URL", url)
+    # Workers du pool de processus (spawn) : configurés par l'environnement
+    monkeypatch.setenv("DATABASE_URL", url)
+    get_engine.cache_clear()
+    Base.metadata.create_all(get_engine())
+    yield
+    get_engine().dispose()
+    get_engine.cache_clear()
+
+
+@pytest.fixture
+def manager(tmp_path, sqlite_db, monkeypatch):
+    """Gestionnaire de jobs en mode thread, branché sur l'API."""
+    job_manager = BatchJobManager(
+        jobs_dir=str(tmp_path / "jobs"), mode="thread", chunk_size=200
+    )
+    monkeypatch.setattr("api.batch_jobs", job_manager)
+    yield job_manager
+    job_manager.shutdown()
+
+
+def wait_for_status(job_id, statuses=(SUCCEEDED,), timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = get_job(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} bloqué en {job['status']}")
+
+
+def test_job_lifecycle(client, manager):
+    """Création (202), progression puis téléchargement du résultat CSV."""
+    response = client.post("/jobs/batch", files=_csv_files())
+
+    assert response.status_code == 202
+    created = response.json()
+    assert created["status"] in ("pending", "running", "succeeded")
+    assert created["total_rows"] == 1470
+
+    wait_for_status(created["job_id"], ("succeeded", "failed"))
+    status = client.get(f"/jobs/{created['job_id']}").json()
+    assert status["status"] == "succeeded"
+    assert status["progress"] == 1.0
+    assert status["processed_rows"] == 1470
+    assert status["chunks_done"] > 1
+
+    result = client.get(status["result_url"])
+    assert result.status_code == 200
+    df = pd.read_csv(io.StringIO(result.text))
+    assert len(df) == 1470
+    assert df["employee_id"].is_unique
+
+    expected = client.post("/predict/batch", files=_csv_files()).json()
+    assert status["summary"] == expected["summary"]
+
+
+def test_unknown_job_and_unfinished_result(client, manager, monkeypatch):
+    """404 pour un job inconnu, 409 pour le résultat d'un job non terminé."""
+    assert client.get("/jobs/unknown").status_code == 404
+    assert client.post("/jobs/unknown/cancel").status_code == 404
+
+    # Job créé mais jamais exécuté
+    monkeypatch.setattr(manager, "_submit", lambda *args: None)
+    job_id = client.post("/jobs/batch", files=_csv_files()).json()["job_id"]
+
+    assert client.get(f"/jobs/{job_id}/result").status_code == 409
+
+
+def test_cancel_pending_job(client, manager, monkeypatch):
+    """Un job annulé avant son démarrage n'est jamais exécuté."""
+    monkeypatch.setattr(manager, "_submit", lambda *args: None)
+    manager.start()
+    job_id = manager.create_job(*_open_inputs(), "csv")
+
+    response = client.post(f"/jobs/{job_id}/cancel")
+
+    assert response.status_code == 202
+    assert response.json()["status"] == CANCELLED
+    job = get_job(job_id)
+    assert run_batch_job(job_id, job["job_dir"], "csv", 200) == CANCELLED
+    assert get_job(job_id)["chunks_done"] == 0
+
+
+def test_cancel_running_job_between_chunks(manager, monkeypatch):
+    """L'annulation d'un job en cours prend effet avant le chunk suivant."""
+    import src.scoring
+
+    monkeypatch.setattr(manager, "_submit", lambda *args: None)
+    manager.start()
+    job_id = manager.create_job(*_open_inputs(), "csv")
+    score = src.scoring.score_prediction_frame
+
+    def score_then_cancel(merged_df, batch_id=None):
+        manager.cancel(job_id)
+        return score(merged_df, batch_id)
+
+    monkeypatch.setattr(src.scoring, "score_prediction_frame", score_then_cancel)
+
+    status = run_batch_job(job_id, get_job(job_id)["job_dir"], "csv", 200)
+
+    assert status == CANCELLED
+    job = get_job(job_id)
+    assert job["status"] == CANCELLED
+    assert job["chunks_done"] == 1
+    assert job["result_path"] is None
+
+
+def test_cancel_is_not_overwritten_by_start(manager, monkeypatch):
+    """Un job annulé pendant un arrêt de l'API ne repasse pas en running."""
+    monkeypatch.setattr(manager, "_submit", lambda *args: None)
+    manager.start()
+    job_id = manager.create_job(*_open_inputs(), "csv")
+    # Annulation enregistrée alors que le job était en cours
+    _update_job(job_id, status=RUNNING, cancel_requested=True)
+
+    status = run_batch_job(job_id, get_job(job_id)["job_dir"], "csv", 200)
+
+    assert status == CANCELLED
+    job = get_job(job_id)
+    assert job["status"] == CANCELLED
+    assert job["chunks_done"] == 0
+
+
+def test_job_with_live_lease_is_not_started_twice(manager, monkeypatch):
+    """Un job en cours dans un autre worker n'est repris qu'à la fin de
+    son bail."""
+    monkeypatch.setattr(manager, "_submit", lambda *args: None)
+    manager.start()
+    job_id = manager.create_job(*_open_inputs(), "csv")
+    job_dir = get_job(job_id)["job_dir"]
+    assert _start_job(job_id, "autre-worker", lease_s=60)
+
+    assert manager.resume_incomplete() == 0
+    assert run_batch_job(job_id, job_dir, "csv", 200) is None
+    job = get_job(job_id)
+    assert (job["status"], job["claimed_by"], job["chunks_done"]) == (
+        RUNNING,
+        "autre-worker",
+        0,
+    )
+
+    # Worker arrêté : bail échu, le job est repris
+    _update_job(job_id, lease_until=datetime.now() - timedelta(seconds=1))
+    assert run_batch_job(job_id, job_dir, "csv", 200) == SUCCEEDED
+
+
+def test_abandoned_jobs_resumed_periodically(tmp_path, sqlite_db, monkeypatch):
+    """Les jobs en file d'un worker arrêté sont repris par le worker qui
+    reprend les jobs, sans attendre son redémarrage."""
+    stopped = BatchJobManager(jobs_dir=str(tmp_path / "jobs"), mode="thread")
+    # File du worker arrêté perdue (shutdown avec cancel_futures)
+    monkeypatch.setattr(stopped, "_submit", lambda *args: None)
+    resumer = BatchJobManager(
+        jobs_dir=str(tmp_path / "jobs"),
+        mode="thread",
+        chunk_size=500,
+        resume_interval_s=0.05,
+    )
+    resumer.start()
+    try:
+        job_id = stopped.create_job(*_open_inputs(), "csv")
+        job = wait_for_status(job_id, ("succeeded", "failed"))
+    finally:
+        resumer.shutdown()
+
+    assert job["status"] == SUCCEEDED
+    assert job["processed_rows"] == 1470
+
+
+def test_chunks_logged_once_after_part_written(manager, monkeypatch):
+    """ml_logs est alimenté après l'écriture du chunk et avant sa
+    progression, une seule fois."""
+    import src.scoring
+
+    monkeypatch.setattr(manager, "_submit", lambda *args: None)
+    manager.start()
+    job_id = manager.create_job(*_open_inputs(), "csv")
+    parts_dir = os.path.join(get_job(job_id)["job_dir"], "parts")
+
+    logged = []
+
+    def record_log(merged_df, predictions, batch_id):
+        # Le fichier du chunk est déjà sur disque, sa progression pas encore
+        # enregistrée (écriture synchrone)
+        written = len(os.listdir(parts_dir))
+        assert get_job(job_id)["chunks_done"] == written - 1
+        logged.append((written, len(predictions), batch_id))
+
+    monkeypatch.setattr(src.scoring, "log_frame", record_log)
+
+    run_batch_job(job_id, get_job(job_id)["job_dir"], "csv", 200)
+    assert [count for count, _, _ in logged] == list(range(1, len(logged) + 1))
+    assert sum(rows for _, rows, _ in logged) == 1470
+    assert {batch_id for _, _, batch_id in logged} == {job_id}
+
+    # Reprise après la perte du dernier chunk : lui seul est relogué
+    os.remove(os.path.join(parts_dir, sorted(os.listdir(parts_dir))[-1]))
+    _update_job(job_id, status=RUNNING)
+    chunks = len(logged)
+    assert run_batch_job(job_id, get_job(job_id)["job_dir"], "csv", 200) == SUCCEEDED
+    assert len(logged) == chunks + 1
+
+
+def test_interrupted_job_resumes_from_written_chunks(manager, monkeypatch):
+    """Un job interrompu reprend au premier chunk non écrit."""
+    import src.scoring
+
+    manager.start()
+    job_id = manager.create_job(*_open_inputs(), "csv")
+    job_dir = wait_for_status(job_id)["job_dir"]
+
+    # Simuler une interruption : 2 chunks et le résultat manquants
+    parts = sorted(os.listdir(os.path.join(job_dir, "parts")))
+    for name in parts[-2:]:
+        os.remove(os.path.join(job_dir, "parts", name))
+    os.remove(os.path.join(job_dir, "result.csv"))
+    _update_job(job_id, status=RUNNING, result_path=None)
+
+    calls = []
+    score = src.scoring.score_prediction_frame
+
+    def counting_score(merged_df, batch_id=None):
+        calls.append(len(merged_df))
+        return score(merged_df, batch_id)
+
+    monkeypatch.setattr(src.scoring, "score_prediction_frame", counting_score)
+
+    assert manager.resume_incomplete() == 1
+    job = wait_for_status(job_id, ("succeeded", "failed"))
+
+    assert job["status"] == SUCCEEDED
+    assert len(calls) == 2
+    assert len(pd.read_csv(job["result_path"])) == 1470
+
+
+def test_job_runs_in_process_pool(tmp_path, sqlite_db, process_pool_model):
+    """Le mode par défaut exécute le job dans un pool de processus local."""
+    job_manager = BatchJobManager(
+        jobs_dir=str(tmp_path / "jobs"), mode="process", chunk_size=500
+    )
+    try:
+        job_manager.start()
+        job_id = job_manager.create_job(*_open_inputs(), "csv")
+        job = wait_for_status(job_id, ("succeeded", "failed"))
+    finally:
+        job_manager.shutdown()
+
+    assert job["status"] == SUCCEEDED
+    assert job["processed_rows"] == 1470
+
+
+def test_process_job_counted_in_api_process(tmp_path, sqlite_db, process_pool_model):
+    """Les prédictions d'un job exécuté dans un processus du pool sont
+    comptées dans les métriques du processus de l'API."""
+    prometheus_client = pytest.importorskip("prometheus_client")
+
+    def job_predictions():
+        return sum(
+            prometheus_client.REGISTRY.get_sample_value(
+                "predictions_total", {"source": "job", "risk_level": level}
+            )
+            or 0
+            for level in ("Low", "Medium", "High")
+        )
+
+    before = job_predictions()
+    job_manager = BatchJobManager(
+        jobs_dir=str(tmp_path / "jobs"), mode="process", chunk_size=500
+    )
+    try:
+        job_manager.start()
+        job_id = job_manager.create_job(*_open_inputs(), "csv")
+        wait_for_status(job_id, ("succeeded", "failed"))
+        deadline = time.monotonic() + 10
+        while job_predictions() < before + 1470 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        job_manager.shutdown()
+
+    assert job_predictions() == before + 1470
+
+
+def test_start_without_resume(tmp_path, sqlite_db, monkeypatch):
+    """Avec server.py, seul le worker 0 reprend les jobs interrompus."""
+    job_manager = BatchJobManager(jobs_dir=str(tmp_path / "jobs"), mode="thread")
+    resumed = []
+    monkeypatch.setattr(job_manager, "resume_incomplete", lambda: resumed.append(1))
+    try:
+        job_manager.start(resume=False)
+    finally:
+        job_manager.shutdown()
+
+    assert resumed == []
+
+
+@pytest.mark.skipif(not parquet_available(), reason="pyarrow non installé")
+def test_parquet_result(client, manager):
+    """Le résultat peut être produit en Parquet."""
+    response = client.post(
+        "/jobs/batch", params={"format": "parquet"}, files=_csv_files()
+    )
+    job_id = response.json()["job_id"]
+    wait_for_status(job_id, ("succeeded", "failed"))
+
+    result = client.get(f"/jobs/{job_id}/result")
+    assert result.status_code == 200
+    assert len(pd.read_parquet(io.BytesIO(result.content))) == 1470
+
+
+def test_parquet_unavailable_returns_400(client, manager, monkeypatch):
+    monkeypatch.setattr("api.parquet_available", lambda: False)
+
+    response = client.post(
+        "/jobs/batch", params={"format": "parquet"}, files=_csv_files()
+    )
+
+    assert response.status_code == 400
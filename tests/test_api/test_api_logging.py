@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Tests du logging non bloquant (src.logger).
+
+File d'écriture (QueueHandler / QueueListener), file pleine, rotation des
+fichiers par taille et par durée avec archives gzip, réouverture d'un
+fichier tourné par un autre processus, échantillonnage des logs de
+requêtes, résumé agrégé périodique et middleware ASGI de logging.
+"""
+import gzip
+import json
+import logging
+import queue
+import random
+import asyncio
+import time
+
+import pytest
+
+from src import logger as logger_module
+from src.logger import (
+    CompressingRotatingFileHandler,
+    CustomJsonFormatter,
+    LogQueueListener,
+    NonBlockingQueueHandler,
+    RequestLogSampler,
+    RequestSummary,
+    setup_logger,
+)
+from src.middleware import RequestLoggingMiddleware
+
+
+def make_record(message: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord("test", level, __file__, 1, message, None, None)
+
+
+def rotating_handler(path, **kwargs) -> CompressingRotatingFileHandler:
+    handler = CompressingRotatingFileHandler(path, **kwargs)
+    handler.setFormatter(CustomJsonFormatter("%(timestamp)s %(level)s %(message)s"))
+    return handler
+
+
+def test_queued_logger_writes_json_in_background(tmp_path):
+    logger = setup_logger("test_queued_logger", log_dir=tmp_path, queued=True)
+    (queue_handler,) = logger.handlers
+    assert isinstance(queue_handler, NonBlockingQueueHandler)
+
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logger.exception("Request %s failed", "/predict", extra={"status_code": 500})
+
+    listener = next(
+        listener
+        for listener, handler in logger_module._listeners
+        if handler is queue_handler
+    )
+    listener.stop()
+    logger_module._listeners.remove((listener, queue_handler))
+
+    (line,) = (tmp_path / "api.log").read_text().splitlines()
+    record = json.loads(line)
+    assert record["message"] == "Request /predict failed"
+    assert record["status_code"] == 500
+    assert "RuntimeError: boom" in record["exc_info"]
+    assert (tmp_path / "error.log").read_text() == line + "\n"
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+
+    handler.emit(make_record("premier"))
+    handler.emit(make_record("second"))
+
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1
+
+
+def test_size_rotation_compresses_archives(tmp_path):
+    path = tmp_path / "api.log"
+    handler = rotating_handler(path, max_bytes=300, backup_count=2)
+
+    for i in range(20):
+        handler.emit(make_record(f"message {i}"))
+    handler.close()
+
+    archives = sorted(p.name for p in tmp_path.iterdir() if p.name != "api.log")
+    assert archives == ["api.log.1.gz", "api.log.2.gz"]
+    lines = gzip.decompress((tmp_path / "api.log.1.gz").read_bytes()).splitlines()
+    assert all(json.loads(line)["message"].startswith("message") for line in lines)
+    # Les archives précédant les 2 dernières sont supprimées
+    assert json.loads(path.read_text().splitlines()[-1])["message"] == "message 19"
+
+
+def test_time_rotation(tmp_path):
+    path = tmp_path / "api.log"
+    handler = rotating_handler(path, interval_s=0.05, backup_count=3, compress=False)
+
+    handler.emit(make_record("avant"))
+    time.sleep(0.1)
+    handler.emit(make_record("après"))
+    handler.close()
+
+    assert "avant" in (tmp_path / "api.log.1").read_text()
+    assert "avant" not in path.read_text()
+
+
+def test_reopens_file_rotated_by_another_process(tmp_path):
+    path = tmp_path / "api.log"
+    handler = rotating_handler(path, max_bytes=10_000, backup_count=1)
+
+    handler.emit(make_record("avant"))
+    path.rename(tmp_path / "autre.log")
+    handler.emit(make_record("après"))
+    handler.close()
+
+    assert "après" in path.read_text()
+    assert "après" not in (tmp_path / "autre.log").read_text()
+
+
+def test_listener_stops_with_full_queue(tmp_path):
+    handler = rotating_handler(tmp_path / "api.log")
+    log_queue = queue.Queue(2)
+    listener = LogQueueListener(log_queue, handler)
+    log_queue.put_nowait(make_record("un"))
+    log_queue.put_nowait(make_record("deux"))
+
+    listener.start()
+    listener.stop()
+    handler.close()
+
+    assert len((tmp_path / "api.log").read_text().splitlines()) == 2
+
+
+def test_parse_sample_rates():
+    assert RequestLogSampler.parse_rates(" /predict:2xx=0.01, /health=0,4xx=1 ") == {
+        "/predict:2xx": 0.01,
+        "/health": 0.0,
+        "4xx": 1.0,
+    }
+    with pytest.raises(ValueError):
+        RequestLogSampler.parse_rates("/predict=2")
+    with pytest.raises(ValueError):
+        RequestLogSampler.parse_rates("/predict")
+
+
+def test_sampler_rule_precedence_and_always_kept():
+    sampler = RequestLogSampler(
+        {"/predict:2xx": 0.0, "/predict": 0.5, "4xx": 0.0, "*": 0.25}, slow_ms=500
+    )
+
+    assert sampler.rate_for("/predict", 200) == 0.0
+    assert sampler.rate_for("/predict", 404) == 0.5
+    assert sampler.rate_for("/health", 422) == 0.0
+    assert sampler.rate_for("/health", 200) == 0.25
+    # Erreurs serveur et requêtes lentes toujours gardées
+    assert sampler.keep("/predict", 503, 1.0) == (True, 1.0)
+    assert sampler.keep("/predict", 200, 800.0) == (True, 1.0)
+    assert sampler.keep("/predict", 200, 1.0) == (False, 0.0)
+
+
+def test_sampling_rate_is_respected():
+    random.seed(0)
+    sampler = RequestLogSampler({"/predict": 0.1})
+
+    kept = sum(sampler.keep("/predict", 200, 1.0)[0] for _ in range(10_000))
+
+    assert 800 < kept < 1200
+
+
+def test_request_summary_aggregates_interval():
+    summary = RequestSummary(interval_s=60)
+    for duration in range(1, 101):
+        summary.record_request("/predict", 200, float(duration), logged=duration > 90)
+    summary.record_request("/predict", 503, 250.0)
+    summary.record_prediction("High")
+    summary.record_prediction("High")
+    summary.record_prediction("Low")
+
+    snapshot = summary.snapshot()
+
+    route = snapshot["routes"]["/predict"]
+    assert route["count"] == 101
+    assert route["status"] == {"2xx": 100, "5xx": 1}
+    assert (route["p50_ms"], route["p99_ms"], route["max_ms"]) == (51.0, 100.0, 250.0)
+    assert snapshot["sampled_out"] == 90
+    assert snapshot["risk_levels"] == {"High": 2, "Low": 1}
+    # Intervalle suivant remis à zéro
+    assert summary.snapshot()["requests"] == 0
+
+
+def test_sampled_requests_still_counted(client, monkeypatch):
+    import api
+
+    monkeypatch.setattr(
+        "src.logger.get_request_sampler", lambda: RequestLogSampler({"*": 0.0})
+    )
+    monkeypatch.setattr(api, "get_job", lambda job_id: None)
+    api.request_summary.snapshot()
+
+    client.get("/health")
+    client.get("/jobs/inconnu", headers={"X-API-Key": "test-api-key-12345"})
+
+    routes = api.request_summary.snapshot()["routes"]
+    assert routes["/health"]["count"] == 1
+    # Agrégé par route déclarée, pas par identifiant
+    assert routes["/jobs/{job_id}"]["status"] == {"4xx": 1}
+
+
+def run_asgi(app, scope: dict) -> list[dict]:
+    """Appelle une application ASGI et retourne les messages envoyés."""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent
+
+
+def http_scope(path: str) -> dict:
+    return {"type": "http", "method": "GET", "path": path, "client": ("1.2.3.4", 80)}
+
+
+def test_asgi_middleware_passes_streamed_body_through(monkeypatch):
+    logged = []
+    monkeypatch.setattr(
+        "src.middleware.log_request", lambda **kwargs: logged.append(kwargs)
+    )
+
+    async def streaming_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 206, "headers": []})
+        for chunk in (b"un", b"deux"):
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    sent = run_asgi(RequestLoggingMiddleware(streaming_app), http_scope("/stream"))
+
+    # Messages transmis un par un, sans mise en tampon du corps
+    assert [m.get("body") for m in sent] == [None, b"un", b"deux", b""]
+    (entry,) = logged
+    assert (entry["path"], entry["status_code"], entry["client_host"]) == (
+        "/stream",
+        206,
+        "1.2.3.4",
+    )
+
+
+def test_asgi_middleware_logs_unhandled_error_as_500(monkeypatch):
+    logged = []
+    monkeypatch.setattr(
+        "src.middleware.log_request", lambda **kwargs: logged.append(kwargs)
+    )
+
+    async def failing_app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        run_asgi(RequestLoggingMiddleware(failing_app), http_scope("/predict"))
+
+    assert logged[0]["status_code"] == 500
+
+
+def test_app_has_no_base_http_middleware():
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    import api
+
+    classes = [middleware.cls for middleware in api.app.user_middleware]
+    assert RequestLoggingMiddleware in classes
+    assert BaseHTTPMiddleware not in classes
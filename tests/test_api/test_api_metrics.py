@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Tests de l'endpoint Prometheus GET /metrics (src.metrics).
+
+Format d'exposition, compteurs de prédictions et du cache, latence par
+route déclarée, lots scorés dans un pool de processus, préchauffage exclu
+et agrégation des valeurs de plusieurs processus via
+PROMETHEUS_MULTIPROC_DIR.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.config import Settings
+
+prometheus_client = pytest.importorskip("prometheus_client")
+from prometheus_client.parser import text_string_to_metric_families  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[2]
+DATA_DIR = ROOT / "data"
+
+
+def sample_value(text: str, name: str, **labels) -> float:
+    """Valeur d'une série de l'exposition texte (0 si absente)."""
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            if sample.name == name and all(
+                sample.labels.get(key) == value for key, value in labels.items()
+            ):
+                return sample.value
+    return 0.0
+
+
+def test_metrics_endpoint_format(client):
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    names = {family.name for family in text_string_to_metric_families(response.text)}
+    assert {
+        "http_request_duration_seconds",
+        "predictions",
+        "prediction_cache_lookups",
+        "db_log_rows",
+    } <= names
+
+
+def test_predict_updates_counters(client, valid_employee_data):
+    before = client.get("/metrics").text
+    assert client.post("/predict", json=valid_employee_data).status_code == 200
+    assert client.post("/predict", json=valid_employee_data).status_code == 200
+    after = client.get("/metrics").text
+
+    def delta(name, **labels):
+        return sample_value(after, name, **labels) - sample_value(
+            before, name, **labels
+        )
+
+    predictions = sum(
+        delta("predictions_total", source="single", risk_level=level)
+        for level in ("Low", "Medium", "High")
+    )
+    assert predictions == 2
+    # Route déclarée, statut par classe
+    assert (
+        delta(
+            "http_request_duration_seconds_count",
+            method="POST",
+            route="/predict",
+            status="2xx",
+        )
+        == 2
+    )
+
+
+def test_cache_lookups_counted():
+    from prometheus_client import REGISTRY
+
+    from src.models import InferenceResult
+    from src.prediction_cache import PredictionCache
+
+    def lookups(result):
+        return REGISTRY.get_sample_value(
+            "prediction_cache_lookups_total", {"result": result}
+        )
+
+    hits, misses = lookups("hit"), lookups("miss")
+    cache = PredictionCache(max_entries=4)
+    cache.set("a", InferenceResult(None, None, None, "v1"))
+    cache.get("a")
+    cache.get("b")
+
+    assert lookups("hit") == hits + 1
+    assert lookups("miss") == misses + 1
+
+
+def prediction_counts(text: str) -> dict:
+    """predictions_total et batch_rows_count par série."""
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(text)
+        for sample in family.samples
+        if sample.name in ("predictions_total", "batch_rows_count")
+    }
+
+
+def test_warmup_is_not_counted(monkeypatch):
+    import api
+    from src.metrics import render_metrics
+
+    monkeypatch.setattr(Settings, "WARMUP_ENABLED", True)
+    monkeypatch.setattr(Settings, "MICRO_BATCH_ENABLED", True)
+    before = prediction_counts(render_metrics()[0].decode())
+
+    with TestClient(api.app) as client:
+        assert client.get("/ready").status_code == 200
+        after = prediction_counts(client.get("/metrics").text)
+
+    # Aucune prédiction ni aucun lot compté par le trafic synthétique
+    assert after == before
+
+
+def test_process_pool_batch_counted_in_api_process(
+    client, monkeypatch, process_pool_model
+):
+    from src.executor import InferenceExecutor
+
+    executor = InferenceExecutor(mode="process", max_workers=1)
+    monkeypatch.setattr("api.inference_executor", executor)
+    monkeypatch.setattr(Settings, "DB_LOG_BATCH_ENABLED", False)
+    files = {
+        field: (name, (DATA_DIR / name).read_bytes(), "text/csv")
+        for field, name in [
+            ("sondage_file", "extrait_sondage.csv"),
+            ("eval_file", "extrait_eval.csv"),
+            ("sirh_file", "extrait_sirh.csv"),
+        ]
+    }
+    before = client.get("/metrics").text
+    try:
+        assert client.post("/predict/batch", files=files).status_code == 200
+    finally:
+        executor.shutdown()
+    after = client.get("/metrics").text
+
+    predictions = sum(
+        sample_value(after, "predictions_total", source="batch", risk_level=level)
+        - sample_value(before, "predictions_total", source="batch", risk_level=level)
+        for level in ("Low", "Medium", "High")
+    )
+    assert predictions == 1470
+    assert (
+        sample_value(after, "batch_rows_sum", source="batch")
+        - sample_value(before, "batch_rows_sum", source="batch")
+        == 1470
+    )
+
+
+def test_unmatched_routes_share_one_series(client):
+    client.get("/nope/1")
+    client.get("/nope/2")
+
+    text = client.get("/metrics").text
+
+    assert "/nope/1" not in text
+    assert (
+        sample_value(
+            text,
+            "http_request_duration_seconds_count",
+            route="<unmatched>",
+            status="4xx",
+        )
+        >= 2
+    )
+
+
+def test_metrics_disabled_returns_503(client, monkeypatch):
+    monkeypatch.setattr("api.metrics_available", lambda: False)
+
+    assert client.get("/metrics").status_code == 503
+
+
+RECORD = """
+from src.metrics import CACHE_HIT, DB_LOG_QUEUE_DEPTH, record_summary
+CACHE_HIT.inc(3)
+DB_LOG_QUEUE_DEPTH.set(5)
+record_summary(
+    "batch",
+    {
+        "total_stay": 2,
+        "total_leave": 1,
+        "high_risk_count": 1,
+        "medium_risk_count": 0,
+        "low_risk_count": 2,
+    },
+)
+"""
+
+RENDER = """
+import sys
+from src.metrics import render_metrics
+sys.stdout.write(render_metrics()[0].decode())
+"""
+
+
+def test_multiprocess_aggregation(tmp_path):
+    env = {
+        **os.environ,
+        "PROMETHEUS_MULTIPROC_DIR": str(tmp_path),
+        "METRICS_ENABLED": "True",
+        "GRADIO_ENABLED": "False",
+    }
+
+    def run(code):
+        return subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+    # Deux "workers" terminés, un troisième répond au scrape
+    run(RECORD)
+    run(RECORD)
+    text = run(RENDER)
+
+    assert sample_value(text, "prediction_cache_lookups_total", result="hit") == 6
+    assert sample_value(text, "predictions_total", risk_level="Low") == 4
+    assert sample_value(text, "batch_rows_count", source="batch") == 2
+    # Jauge "livesum" : fichiers de processus arrêtés conservés tant que
+    # le maître ne les a pas marqués morts
+    assert sample_value(text, "db_log_queue_depth") == 10
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Tests du rechargement à chaud du modèle (src.model_reload, /admin/model).
+
+Le cache local est pré-rempli avec deux versions d'un modèle factice :
+swap atomique, version rapportée par les réponses, préchauffage qui
+échoue, surveillance du manifest et endpoints d'administration.
+"""
+import time
+
+import joblib
+import numpy as np
+import pytest
+
+from src import models
+from src.artifacts import ModelArtifactCache
+from src.config import Settings, get_settings
+from src.model_reload import FAILED, IDLE, ModelReloader
+from src.models import load_model as real_load_model
+
+REPO_ID = "org/model"
+FILENAME = "model/model.pkl"
+
+
+class ConstantModel:
+    """Modèle factice retournant toujours la même probabilité de départ."""
+
+    def __init__(self, probability: float):
+        self.probability = probability
+
+    def predict_proba(self, X):
+        return np.tile([1 - self.probability, self.probability], (len(X), 1))
+
+
+@pytest.fixture
+def versions(tmp_path, monkeypatch):
+    """Cache avec deux versions (0.2 courante, puis 0.9) ; 0.2 est servie."""
+    monkeypatch.setattr(Settings, "MODEL_OFFLINE", True)
+    monkeypatch.setattr(Settings, "MODEL_SHA256", "")
+    monkeypatch.setattr(Settings, "INFERENCE_BACKEND", "joblib")
+    monkeypatch.setattr(Settings, "MODEL_WATCH_INTERVAL_S", 0.0)
+    monkeypatch.setattr("src.models.HF_MODEL_REPO", REPO_ID)
+    monkeypatch.setattr("src.models.MODEL_FILENAME", FILENAME)
+    monkeypatch.setattr("src.models.load_model", real_load_model)
+
+    cache = ModelArtifactCache(get_settings().MODEL_CACHE_DIR)
+    entries = {}
+    for name, probability in [("v2", 0.9), ("nan", np.nan), ("v1", 0.2)]:
+        source = tmp_path / name / "model.pkl"
+        source.parent.mkdir()
+        joblib.dump(ConstantModel(probability), source)
+        entries[name] = cache.add(str(source), REPO_ID, FILENAME)["sha256"][:12]
+
+    monkeypatch.setattr(
+        "src.models._model_cache",
+        models.load_model_from_path(cache.resolve()),
+    )
+    return entries
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    """Attend qu'une condition soit vraie (rechargement en arrière-plan)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class TestModelReloader:
+    """Tests du swap atomique et de la validation des versions."""
+
+    def test_reload_swaps_version(self, versions):
+        reloader = ModelReloader(warmup_rows=4)
+
+        assert reloader.reload(version=versions["v2"]) == versions["v2"]
+
+        assert models.current_model_version() == versions["v2"]
+        assert reloader.status()["reloads"] == 1
+        # La version installée devient la version courante du cache
+        current = ModelArtifactCache(get_settings().MODEL_CACHE_DIR).current()
+        assert current["sha256"].startswith(versions["v2"])
+
+    def test_in_flight_requests_keep_previous_model(self, versions):
+        in_flight = models.load_model()
+
+        ModelReloader().reload(version=versions["v2"])
+
+        # Une requête démarrée avant le swap se termine sur l'ancienne version
+        result = models.predict_with_model(in_flight, np.zeros((2, 3)))
+        assert result.model_version == versions["v1"]
+        assert result.probabilities[0, 1] == pytest.approx(0.2)
+        new_result = models.predict_with_model(models.load_model(), np.zeros((2, 3)))
+        assert new_result.model_version == versions["v2"]
+
+    def test_failed_warmup_keeps_serving_model(self, versions):
+        reloader = ModelReloader()
+
+        with pytest.raises(ValueError):
+            reloader.reload(version=versions["nan"])
+
+        assert models.current_model_version() == versions["v1"]
+        assert reloader.state == FAILED
+        current = ModelArtifactCache(get_settings().MODEL_CACHE_DIR).current()
+        assert current["sha256"].startswith(versions["v1"])
+        assert not reloader.reloading
+
+    def test_reload_rejected_while_busy(self, versions):
+        reloader = ModelReloader()
+        reloader._lock.acquire()
+        try:
+            assert reloader.request_reload(version=versions["v2"]) is False
+            with pytest.raises(RuntimeError):
+                reloader.reload(version=versions["v2"])
+        finally:
+            reloader._lock.release()
+
+    def test_pools_and_callbacks_after_swap(self, versions):
+        class Pool:
+            restarts = 0
+
+            def restart(self):
+                self.restarts += 1
+
+        pool = Pool()
+        swaps = []
+        ModelReloader(pools=[pool], on_swap=[lambda: swaps.append(1)]).reload(
+            version=versions["v2"]
+        )
+
+        assert pool.restarts == 1
+        assert swaps == [1]
+
+    def test_watcher_follows_manifest(self, versions):
+        reloader = ModelReloader(watch_interval_s=0.02)
+        reloader.start()
+        try:
+            ModelArtifactCache(get_settings().MODEL_CACHE_DIR).set_current(
+                ModelArtifactCache(get_settings().MODEL_CACHE_DIR).find(versions["v2"])[
+                    "sha256"
+                ]
+            )
+            assert wait_for(lambda: models.current_model_version() == versions["v2"])
+        finally:
+            reloader.stop()
+        assert reloader.state == IDLE
+
+    def test_ensure_current_model(self, versions):
+        cache = ModelArtifactCache(get_settings().MODEL_CACHE_DIR)
+        cache.set_current(cache.find(versions["v2"])["sha256"])
+
+        models.ensure_current_model()
+
+        assert models.current_model_version() == versions["v2"]
+
+
+class TestAdminEndpoints:
+    """Tests de /admin/model et /admin/model/reload."""
+
+    def test_reload_endpoint(self, client, versions, valid_employee_data):
+        response = client.post("/predict", json=valid_employee_data)
+        assert response.json()["model_version"] == versions["v1"]
+
+        response = client.post(
+            "/admin/model/reload", params={"version": versions["v2"]}
+        )
+        assert response.status_code == 202
+
+        assert wait_for(lambda: models.current_model_version() == versions["v2"])
+        response = client.post("/predict", json=valid_employee_data)
+        assert response.json()["model_version"] == versions["v2"]
+        assert response.json()["probability_1"] == pytest.approx(0.9)
+
+        status = client.get("/admin/model").json()
+        assert status["model_version"] == versions["v2"]
+        assert status["reload_state"] == IDLE
+        assert [v["current"] for v in status["versions"]].count(True) == 1
+
+    def test_unknown_version_returns_404(self, client, versions):
+        response = client.post("/admin/model/reload", params={"version": "inconnue"})
+        assert response.status_code == 404
+
+    def test_reload_in_progress_returns_409(self, client, versions):
+        from api import model_reloader
+
+        model_reloader._lock.acquire()
+        try:
+            response = client.post(
+                "/admin/model/reload", params={"version": versions["v2"]}
+            )
+        finally:
+            model_reloader._lock.release()
+        assert response.status_code == 409
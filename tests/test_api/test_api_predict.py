@@ -147,3 +147,33 @@ def test_predict_consistency(client, valid_employee_data):
     ), "Prédictions doivent être identiques"
     assert abs(data1["probability_0"] - data2["probability_0"]) < 0.001
     assert abs(data1["probability_1"] - data2["probability_1"]) < 0.001
+
+
+def test_predict_batch_with_csv_files(client):
+    """
+    Test que /predict/batch retourne une prédiction par employé des CSV.
+
+    Args:
+        client: Fixture TestClient FastAPI.
+    """
+    import os
+
+    data_dir = os.path.join(os.path.dirname(__file__), "..", "..", "data")
+    files = {}
+    for field, name in [
+        ("sondage_file", "extrait_sondage.csv"),
+        ("eval_file", "extrait_eval.csv"),
+        ("sirh_file", "extrait_sirh.csv"),
+    ]:
+        with open(os.path.join(data_dir, name), "rb") as f:
+            files[field] = (name, f.read(), "text/csv")
+
+    response = client.post("/predict/batch", files=files)
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data["total_employees"] == 1470
+    assert len(data["predictions"]) == 1470
+    assert data["predictions"][0]["employee_id"] == 1
+    summary = data["summary"]
+    assert summary["total_stay"] + summary["total_leave"] == 1470
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Tests du cache des prédictions unitaires (src.prediction_cache).
+
+Vérifient la clé canonique, l'éviction LRU + TTL, le niveau disque SQLite
+partagé entre instances et l'intégration dans /predict.
+"""
+import time
+
+import numpy as np
+import pytest
+
+from src.models import InferenceResult
+from src.prediction_cache import (
+    PredictionCache,
+    SQLiteResultStore,
+    prediction_cache_key,
+)
+from src.schemas import EmployeeInput
+
+
+def make_result(probability: float, version: str = "v1") -> InferenceResult:
+    return InferenceResult(
+        predictions=np.array([int(probability > 0.5)]),
+        probabilities=np.array([[1 - probability, probability]]),
+        risk_levels=np.array(["High" if probability > 0.7 else "Low"], dtype=object),
+        model_version=version,
+    )
+
+
+@pytest.fixture
+def employee(valid_employee_data):
+    return EmployeeInput(**valid_employee_data)
+
+
+class TestPredictionCache:
+    """Tests de la clé, de l'éviction et du niveau disque."""
+
+    def test_key_is_canonical_and_versioned(self, employee, valid_employee_data):
+        reordered = EmployeeInput(**dict(reversed(list(valid_employee_data.items()))))
+
+        assert prediction_cache_key(employee, "v1") == prediction_cache_key(
+            reordered, "v1"
+        )
+        assert prediction_cache_key(employee, "v1") != prediction_cache_key(
+            employee, "v2"
+        )
+        changed = employee.model_copy(update={"age": employee.age + 1})
+        assert prediction_cache_key(changed, "v1") != prediction_cache_key(
+            employee, "v1"
+        )
+
+    def test_no_key_without_model_version(self, employee):
+        assert PredictionCache().key_for(employee, None) is None
+        assert PredictionCache(max_entries=0).key_for(employee, "v1") is None
+
+    def test_lru_eviction(self):
+        cache = PredictionCache(max_entries=2)
+        cache.set("a", make_result(0.1))
+        cache.set("b", make_result(0.2))
+        cache.get("a")
+        cache.set("c", make_result(0.3))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["size"] == 2
+
+    def test_ttl_expiry(self):
+        cache = PredictionCache(ttl_s=0.05)
+        cache.set("a", make_result(0.1))
+        assert cache.get("a") is not None
+
+        time.sleep(0.1)
+
+        assert cache.get("a") is None
+        assert cache.stats()["misses"] == 1
+
+    def test_disk_tier_shared_between_instances(self, tmp_path):
+        path = str(tmp_path / "predictions.sqlite")
+        first = PredictionCache(store=SQLiteResultStore(path))
+        second = PredictionCache(store=SQLiteResultStore(path))
+
+        first.set("a", make_result(0.8, "3b1f0c9a2e47"))
+        result = second.get("a")
+
+        assert second.stats()["disk_hits"] == 1
+        assert result.model_version == "3b1f0c9a2e47"
+        assert result.probabilities[0, 1] == pytest.approx(0.8)
+        assert result.risk_levels[0] == "High"
+        # Promu dans le niveau mémoire
+        second.get("a")
+        assert second.stats()["hits"] == 1
+
+        second.clear()
+        assert first.store.get("a", time.time()) is None
+
+    def test_disk_tier_trimmed(self, tmp_path):
+        store = SQLiteResultStore(
+            str(tmp_path / "predictions.sqlite"), max_entries=3, trim_every=1
+        )
+        cache = PredictionCache(store=store)
+        for key in "abcde":
+            cache.set(key, make_result(0.1))
+
+        assert len(store) == 3
+
+
+class TestPredictEndpointCache:
+    """Intégration du cache dans /predict."""
+
+    @pytest.fixture
+    def counting_model(self, monkeypatch):
+        class CountingModel:
+            version = "3b1f0c9a2e47"
+            calls = 0
+
+            def predict_proba(self, X):
+                type(self).calls += 1
+                return np.tile([0.3, 0.7], (len(X), 1))
+
+        from api import prediction_cache
+
+        prediction_cache.clear()
+        monkeypatch.setattr("src.models._model_cache", CountingModel())
+        return CountingModel
+
+    def test_repeated_employee_served_from_cache(
+        self, client, counting_model, valid_employee_data
+    ):
+        from api import prediction_cache
+
+        first = client.post("/predict", json=valid_employee_data)
+        second = client.post("/predict", json=valid_employee_data)
+
+        assert first.status_code == second.status_code == 200
+        assert first.json() == second.json()
+        assert second.json()["model_version"] == "3b1f0c9a2e47"
+        assert counting_model.calls == 1
+        assert prediction_cache.stats()["hits"] >= 1
+
+        status = client.get("/admin/model").json()
+        assert status["prediction_cache"]["hits"] >= 1
+
+    def test_model_swap_invalidates_cache(
+        self, client, counting_model, valid_employee_data
+    ):
+        from api import prediction_cache
+
+        client.post("/predict", json=valid_employee_data)
+        prediction_cache.clear()
+        client.post("/predict", json=valid_employee_data)
+
+        assert counting_model.calls == 2
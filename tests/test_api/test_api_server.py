@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Tests du serveur multi-workers (server.py).
+
+Répartition des threads natifs entre workers, puis démarrage réel de deux workers forkés sur un cache modèle
+pré-rempli : /ready, /predict, arrêt gracieux sur SIGTERM et reprise d'un
+job batch après un redémarrage progressif (SIGHUP).
+"""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import joblib
+import numpy as np
+import pytest
+from sklearn.dummy import DummyClassifier
+
+from server import THREAD_ENV_VARS, limit_threads, threads_per_worker
+from src.artifacts import ModelArtifactCache
+from src.config import get_settings
+from src.models import HF_MODEL_REPO, MODEL_FILENAME
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
+DATA_DIR = os.path.join(ROOT_DIR, "data")
+
+
+def test_threads_per_worker_splits_cores():
+    assert threads_per_worker(4, cpu_count=16) == 4
+    assert threads_per_worker(3, cpu_count=8) == 2
+    # Jamais zéro thread, même avec plus de workers que de cœurs
+    assert threads_per_worker(8, cpu_count=2) == 1
+
+
+def test_limit_threads_sets_native_env(monkeypatch):
+    for name in THREAD_ENV_VARS:
+        monkeypatch.delenv(name, raising=False)
+
+    limit_threads(3)
+
+    assert {os.environ[name] for name in THREAD_ENV_VARS} == {"3"}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(tmp_path, workers: int = 2, **extra_env) -> tuple:
+    """Démarre server.py sur un cache modèle pré-rempli, attend /ready."""
+    model_file = tmp_path / "model.pkl"
+    X = np.zeros((4, 1))
+    joblib.dump(DummyClassifier(strategy="prior").fit(X, [0, 1, 1, 1]), model_file)
+    cache_dir = tmp_path / "model_cache"
+    ModelArtifactCache(str(cache_dir)).add(
+        str(model_file), HF_MODEL_REPO, MODEL_FILENAME
+    )
+
+    port = free_port()
+    env = {
+        **os.environ,
+        "MODEL_CACHE_DIR": str(cache_dir),
+        "MODEL_OFFLINE": "True",
+        "MODEL_SHA256": "",
+        "INFERENCE_BACKEND": "joblib",
+        "GRADIO_ENABLED": "False",
+        "PREDICTION_CACHE_ENABLED": "False",
+        "JOBS_DIR": str(tmp_path / "jobs"),
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'logs.db'}",
+        "DEBUG": "True",
+        "WARMUP_BATCH_ROWS": "8",
+        **extra_env,
+    }
+    process = subprocess.Popen(
+        [sys.executable, "server.py", "--workers", str(workers)]
+        + ["--host", "127.0.0.1", "--port", str(port), "--graceful-timeout", "5"],
+        cwd=ROOT_DIR,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/ready", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            pytest.fail(process.stdout.read().decode())
+        time.sleep(0.2)
+    process.kill()
+    pytest.fail("server.py pas prêt")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork indisponible")
+def test_prefork_server_serves_and_stops(tmp_path):
+    process, url = start_server(tmp_path)
+    try:
+        from src.schemas import EmployeeInput
+
+        employee = EmployeeInput.model_config["json_schema_extra"]["example"]
+        response = httpx.post(f"{url}/predict", json=employee, timeout=10)
+
+        assert response.status_code == 200
+        assert response.json()["probability_1"] == pytest.approx(0.75)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        returncode = process.wait(timeout=30)
+
+    assert returncode == 0
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork indisponible")
+def test_rolling_restart_resumes_pending_job(tmp_path, monkeypatch):
+    """Un job resté pending (file d'un worker arrêté) est repris par le
+    worker 0 qui remplace l'ancien après SIGHUP."""
+    from src.database import get_engine
+    from src.jobs import SUCCEEDED, BatchJobManager, get_job
+
+    # Recherche périodique désactivée : seule la reprise au démarrage joue
+    process, _ = start_server(tmp_path, JOBS_RESUME_INTERVAL_S="0")
+    monkeypatch.setattr(
+        get_settings(), "DATABASE_URL", f"sqlite:///{tmp_path / 'logs.db'}"
+    )
+    get_engine.cache_clear()
+    try:
+        # Job accepté par un worker dont la file a été perdue à l'arrêt
+        stopped = BatchJobManager(jobs_dir=str(tmp_path / "jobs"), mode="thread")
+        monkeypatch.setattr(stopped, "_submit", lambda *args: None)
+        inputs = [
+            open(os.path.join(DATA_DIR, name), "rb")
+            for name in ("extrait_sondage.csv", "extrait_eval.csv", "extrait_sirh.csv")
+        ]
+        try:
+            job_id = stopped.create_job(*inputs, "csv")
+        finally:
+            for f in inputs:
+                f.close()
+
+        process.send_signal(signal.SIGHUP)
+        deadline = time.monotonic() + 60
+        while get_job(job_id)["status"] != SUCCEEDED:
+            assert time.monotonic() < deadline, get_job(job_id)
+            assert process.poll() is None, process.stdout.read().decode()
+            time.sleep(0.2)
+        assert get_job(job_id)["processed_rows"] == 1470
+    finally:
+        process.send_signal(signal.SIGTERM)
+        returncode = process.wait(timeout=30)
+        get_engine().dispose()
+        get_engine.cache_clear()
+
+    assert returncode == 0
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests du budget de démarrage de l'API seule (GRADIO_ENABLED=False).
+
+L'import de api.py tourne dans un processus neuf : les dépendances lourdes
+(Gradio, scikit-learn, SQLAlchemy, XGBoost, MLflow) ne doivent pas être
+importées, et le temps d'import doit rester sous le budget.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+# Budget (s) de l'import de api.py, ajustable pour les machines de CI lentes
+STARTUP_IMPORT_BUDGET_S = float(os.getenv("STARTUP_IMPORT_BUDGET_S", "4.0"))
+
+# Importés à la demande uniquement (UI, chemin de référence, base, modèle)
+DEFERRED_MODULES = ["gradio", "sklearn", "sqlalchemy", "xgboost", "mlflow"]
+
+CHILD_CODE = """
+import json, sys
+import api
+print(json.dumps([m for m in {modules!r} if m in sys.modules]))
+"""
+
+
+def import_api() -> tuple[float, list]:
+    """Importe api.py dans un processus neuf : (secondes, modules lourds)."""
+    env = {**os.environ, "GRADIO_ENABLED": "False"}
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD_CODE.format(modules=DEFERRED_MODULES)],
+        cwd=ROOT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed = time.perf_counter() - start
+    return elapsed, json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def test_api_only_startup_defers_heavy_imports():
+    """Test qu'aucune dépendance lourde n'est importée au démarrage."""
+    _, imported = import_api()
+    assert imported == []
+
+
+def test_api_only_startup_within_budget():
+    """Test que l'import de l'API reste sous le budget de démarrage."""
+    # Meilleur de deux essais : le premier peut payer le cache disque froid
+    elapsed = min(import_api()[0] for _ in range(2))
+    assert elapsed < STARTUP_IMPORT_BUDGET_S, (
+        f"Import de api.py en {elapsed:.2f} s > {STARTUP_IMPORT_BUDGET_S} s "
+        "(voir scripts/report_import_time.py)"
+    )
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Tests de la prédiction batch en streaming (/predict/batch/stream).
+
+Ces tests vérifient la jointure par chunks des 3 CSV, les formats NDJSON
+et CSV, l'enregistrement final de résumé et les erreurs 400.
+"""
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.config import get_settings
+from src.preprocessing import merge_csv_dataframes
+from src.streaming import ChunkedCsvJoin
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data")
+
+
+class VaryingModel:
+    """Modèle factice dont la probabilité dépend des features."""
+
+    def predict_proba(self, X):
+        proba = 1 / (1 + np.exp(-X[:, :3].sum(axis=1)))
+        return np.column_stack([1 - proba, proba])
+
+
+@pytest.fixture
+def varying_model(monkeypatch):
+    model = VaryingModel()
+    monkeypatch.setattr("src.models._model_cache", model)
+    return model
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    """Force plusieurs chunks sur les 1470 employés d'exemple."""
+    monkeypatch.setattr(get_settings(), "STREAM_CHUNK_SIZE", 200)
+
+
+def _read_csvs():
+    return [
+        pd.read_csv(os.path.join(DATA_DIR, name))
+        for name in ("extrait_sondage.csv", "extrait_eval.csv", "extrait_sirh.csv")
+    ]
+
+
+def _files(sondage_df, eval_df, sirh_df):
+    """Encode les DataFrames au format multipart attendu par l'endpoint."""
+    return {
+        field: (f"{field}.csv", df.to_csv(index=False).encode("utf-8"), "text/csv")
+        for field, df in [
+            ("sondage_file", sondage_df),
+            ("eval_file", eval_df),
+            ("sirh_file", sirh_df),
+        ]
+    }
+
+
+def test_chunked_join_matches_full_merge():
+    """La jointure par chunks donne les mêmes lignes que merge_csv_dataframes."""
+    sondage_df, eval_df, sirh_df = _read_csvs()
+    # Fichiers désalignés et employés sans correspondance
+    eval_df = eval_df.sample(frac=1, random_state=0)
+    sirh_df = sirh_df.iloc[:-30]
+
+    join = ChunkedCsvJoin(
+        *(io.StringIO(df.to_csv(index=False)) for df in (sondage_df, eval_df, sirh_df)),
+        chunk_size=100,
+    )
+    chunks = list(join)
+
+    assert len(chunks) > 1
+    streamed = pd.concat(chunks).sort_values("original_employee_id")
+    expected = merge_csv_dataframes(sondage_df, eval_df, sirh_df)
+    expected = expected.sort_values("original_employee_id")
+    pd.testing.assert_frame_equal(
+        streamed.reset_index(drop=True),
+        expected[streamed.columns].reset_index(drop=True),
+        check_dtype=False,
+    )
+    assert join.unmatched == 60  # 30 lignes sondage + 30 lignes eval
+
+
+def test_stream_ndjson_matches_batch_endpoint(client, varying_model, small_chunks):
+    """Le flux NDJSON contient les mêmes prédictions que /predict/batch."""
+    files = _files(*_read_csvs())
+
+    response = client.post("/predict/batch/stream", files=files)
+    batch = client.post("/predict/batch", files=files).json()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    rows, trailer = records[:-1], records[-1]
+
+    assert len(rows) == 1470
+    by_id = {p["employee_id"]: p for p in batch["predictions"]}
+    for row in rows:
+        expected = by_id[row["employee_id"]]
+        assert row["prediction"] == expected["prediction"]
+        assert row["risk_level"] == expected["risk_level"]
+        assert row["probability_leave"] == pytest.approx(expected["probability_leave"])
+
+    assert trailer["total_employees"] == 1470
+    assert trailer["unmatched_rows"] == 0
+    assert trailer["summary"] == batch["summary"]
+    assert trailer["batch_id"] == response.headers["x-batch-id"]
+
+
+def test_stream_csv_format(client, varying_model, small_chunks):
+    """Le format CSV a un en-tête, une ligne par employé et un résumé en commentaire."""
+    response = client.post(
+        "/predict/batch/stream", params={"format": "csv"}, files=_files(*_read_csvs())
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[-1].startswith("# ")
+    trailer = json.loads(lines[-1][2:])
+
+    df = pd.read_csv(io.StringIO("\n".join(lines[:-1])))
+    assert list(df.columns) == [
+        "employee_id",
+        "prediction",
+        "probability_stay",
+        "probability_leave",
+        "risk_level",
+    ]
+    assert len(df) == trailer["total_employees"] == 1470
+    assert df["prediction"].sum() == trailer["summary"]["total_leave"]
+
+
+def test_stream_missing_column_returns_400(client):
+    """Une colonne d'identifiant manquante est refusée avant le début du flux."""
+    sondage_df, eval_df, sirh_df = _read_csvs()
+
+    response = client.post(
+        "/predict/batch/stream",
+        files=_files(sondage_df, eval_df, sirh_df.drop(columns=["id_employee"])),
+    )
+
+    assert response.status_code == 400
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests de l'instrumentation par étape (src.timing).
+
+Durées collectées dans la requête et dans le pool d'inférence, étape
+"queue" déduite de l'attente, en-tête Server-Timing, champ "timings" des
+logs, histogrammes et chemin désactivé.
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.middleware import RequestLoggingMiddleware
+from src.scoring import score_employees
+from src.timing import (
+    StageHistograms,
+    collect_stages,
+    get_stage_histograms,
+    mark,
+    record_offloaded,
+    stage,
+)
+
+
+def test_stage_without_collector_is_noop():
+    with stage("model"):
+        pass
+    mark("validation")
+
+    with collect_stages(enabled=False) as timings:
+        with stage("model"):
+            pass
+
+    assert timings is None
+
+
+def test_offloaded_stages_and_queue():
+    with collect_stages(enabled=True) as timings:
+        with stage("cache"):
+            pass
+        with stage("cache"):
+            pass
+        record_offloaded({"preprocess": 2.0, "model": 3.0}, wait_ms=9.0)
+
+    assert list(timings.stages) == ["cache", "queue", "preprocess", "model"]
+    assert timings.stages["queue"] == 4.0
+    assert timings.header(12.0).endswith(
+        "queue;dur=4.00, preprocess;dur=2.00, model;dur=3.00, total;dur=12.00"
+    )
+
+
+def test_task_returns_its_timings(valid_employee_data):
+    from src.schemas import EmployeeInput
+
+    employee = EmployeeInput(**valid_employee_data)
+
+    with collect_stages(enabled=True) as request_timings:
+        result = score_employees([employee, employee])
+
+    # Durées renvoyées avec le résultat, pas dans le collecteur appelant
+    assert set(result.timings) == {"preprocess", "model"}
+    assert request_timings.stages == {}
+    assert result.take(slice(0, 1)).timings == result.timings
+
+
+def test_histogram_buckets_and_quantiles():
+    histograms = StageHistograms(buckets=(1.0, 10.0, 100.0))
+    for duration in (0.5, 1.0, 5.0, 50.0, 500.0):
+        histograms.observe("model", duration)
+
+    snapshot = histograms.snapshot()["model"]
+
+    assert snapshot["count"] == 5
+    assert snapshot["buckets"] == {"1": 2, "10": 3, "100": 4, "+Inf": 5}
+    assert snapshot["p50_ms"] == 10.0
+    assert snapshot["p99_ms"] is None
+    assert snapshot["mean_ms"] == 111.3
+
+
+def test_predict_server_timing_header(client, valid_employee_data):
+    import api
+
+    api.prediction_cache.clear()
+    get_stage_histograms().reset()
+
+    response = client.post("/predict", json=valid_employee_data)
+
+    assert response.status_code == 200
+    names = [
+        entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")
+    ]
+    assert names == [
+        "validation",
+        "cache",
+        "queue",
+        "preprocess",
+        "model",
+        "db_log",
+        "total",
+    ]
+    stages = client.get("/admin/timings").json()["stages"]
+    assert stages["model"]["count"] == 1
+
+
+def test_disabled_timing_adds_no_header(monkeypatch):
+    logged = []
+    monkeypatch.setattr(
+        "src.middleware.log_request", lambda **kwargs: logged.append(kwargs)
+    )
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        with stage("model"):
+            return {"pong": True}
+
+    app.add_middleware(RequestLoggingMiddleware, timing=False)
+    response = TestClient(app).get("/ping")
+    assert "server-timing" not in response.headers
+    assert "timings" not in logged[0]
+
+    app.user_middleware.clear()
+    app.middleware_stack = None
+    app.add_middleware(RequestLoggingMiddleware, timing=True)
+    response = TestClient(app).get("/ping")
+    assert response.headers["server-timing"].startswith("model;dur=")
+    assert "model" in logged[1]["timings"]
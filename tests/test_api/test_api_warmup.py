@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests du préchauffage de l'inférence au démarrage (src.warmup, /ready).
+
+Vérifient que chaque chemin d'inférence reçoit du trafic synthétique, que
+la durée est journalisée via log_model_load et que /ready ne répond 200
+que si le modèle est chargé et préchauffé.
+"""
+import asyncio
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from src.batching import MicroBatcher
+from src.executor import InferenceExecutor
+from src.warmup import synthetic_frame, warm_up_inference
+
+
+class CountingModel:
+    """Modèle factice qui compte les lignes prédites."""
+
+    def __init__(self):
+        self.rows = []
+
+    def predict_proba(self, X):
+        self.rows.append(len(X))
+        return np.tile([0.5, 0.5], (len(X), 1))
+
+
+def test_synthetic_frame_matches_batch_format():
+    frame = synthetic_frame(3)
+
+    assert list(frame["original_employee_id"]) == [0, 1, 2]
+    assert frame["age"].nunique() == 1
+
+
+def test_warm_up_covers_every_path(monkeypatch):
+    model = CountingModel()
+    monkeypatch.setattr("src.models._model_cache", model)
+
+    async def scenario():
+        executor = InferenceExecutor(max_workers=3)
+        batcher = MicroBatcher(max_batch_size=4, max_wait_ms=50, executor=executor)
+        await batcher.start()
+        try:
+            return await warm_up_inference(executor, batcher, batch_rows=64, rounds=2)
+        finally:
+            await batcher.stop()
+            executor.shutdown()
+
+    timings = asyncio.run(scenario())
+
+    assert set(timings) == {"single", "workers", "micro_batch", "batch"}
+    # 2 passages single + 2 x 3 workers, 2 lots de 4 via le MicroBatcher,
+    # puis 2 lots de 64 lignes
+    assert model.rows.count(64) == 2
+    assert sum(model.rows) == 2 + 6 + 8 + 128
+
+
+def test_ready_after_warmup(monkeypatch):
+    import api
+
+    calls = []
+    monkeypatch.setattr(
+        api, "log_model_load", lambda *args, **kwargs: calls.append((args, kwargs))
+    )
+
+    with TestClient(api.app) as client:
+        assert client.get("/ready").status_code == 200
+        assert client.get("/health").json()["ready"] is True
+
+    warmup = [kwargs for _, kwargs in calls if kwargs.get("phase") == "warmup"]
+    assert len(warmup) == 1
+    assert set(warmup[0]["steps_ms"]) >= {"single", "workers", "batch"}
+
+
+def test_warmup_failure_keeps_worker_not_ready(monkeypatch):
+    import api
+
+    async def failing_warmup(*args, **kwargs):
+        raise RuntimeError("préchauffage impossible")
+
+    calls = []
+    monkeypatch.setattr(api, "warm_up_inference", failing_warmup)
+    monkeypatch.setattr(
+        api, "log_model_load", lambda *args, **kwargs: calls.append((args, kwargs))
+    )
+
+    # Le démarrage n'est pas bloqué, mais le worker reste hors du trafic
+    with TestClient(api.app) as client:
+        assert client.get("/health").status_code == 200
+        assert client.get("/ready").status_code == 503
+
+    assert any(
+        kwargs.get("phase") == "warmup" and args[2] is False for args, kwargs in calls
+    )
+
+
+def test_model_load_failure_keeps_worker_not_ready(monkeypatch):
+    import api
+
+    def failing_load():
+        raise RuntimeError("modèle introuvable")
+
+    monkeypatch.setattr(api, "load_model", failing_load)
+
+    with TestClient(api.app) as client:
+        assert client.get("/ready").status_code == 503
+        assert client.get("/health").json()["ready"] is False
+
+
+def test_not_ready_returns_503(client):
+    client.app.state.ready = False
+
+    response = client.get("/ready")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
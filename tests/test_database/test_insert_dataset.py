@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests du chargement bulk du dataset (scripts/insert_dataset.py).
+
+Utilise une base SQLite temporaire à la place de PostgreSQL.
+"""
+import importlib.util
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select
+
+from db_models import Base, Dataset
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+
+@pytest.fixture(scope="module")
+def insert_dataset():
+    """Importe le script insert_dataset comme module."""
+    spec = importlib.util.spec_from_file_location(
+        "insert_dataset", ROOT_DIR / "scripts" / "insert_dataset.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def sqlite_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'dataset.db'}"
+    Base.metadata.create_all(create_engine(url))
+    return url
+
+
+def load_prepared(insert_dataset):
+    frames = insert_dataset.load_csv_files(str(ROOT_DIR / "data"))
+    merged = insert_dataset.merge_datasets(*frames)
+    return insert_dataset.prepare_for_db(merged)
+
+
+def test_bulk_insert_joins_on_employee_id(insert_dataset, sqlite_url):
+    """Chaque ligne insérée associe les features du bon employé."""
+    features_df, target_df = load_prepared(insert_dataset)
+
+    inserted = insert_dataset.insert_into_db(
+        features_df, target_df, sqlite_url, chunk_size=500, workers=2
+    )
+
+    assert inserted == len(features_df) == 1470
+    sirh = pd.read_csv(ROOT_DIR / "data" / "extrait_sirh.csv").set_index("id_employee")
+    with create_engine(sqlite_url).connect() as conn:
+        rows = conn.execute(select(Dataset.features_json, Dataset.target)).all()
+    assert len(rows) == 1470
+    assert {row.target for row in rows} == {"Oui", "Non"}
+    for features, _ in rows[:50]:
+        employee = sirh.loc[features["original_employee_id"]]
+        assert features["age"] == employee["age"]
+        assert features["revenu_mensuel"] == employee["revenu_mensuel"]
+
+
+def test_reload_truncates_table(insert_dataset, sqlite_url):
+    """Un second chargement remplace les lignes au lieu de les dupliquer."""
+    features_df, target_df = load_prepared(insert_dataset)
+
+    insert_dataset.insert_into_db(features_df, target_df, sqlite_url)
+    insert_dataset.insert_into_db(features_df, target_df, sqlite_url)
+
+    with create_engine(sqlite_url).connect() as conn:
+        count = len(conn.execute(select(Dataset.id)).all())
+    assert count == 1470
+
+
+def test_failed_reload_keeps_previous_rows(insert_dataset, sqlite_url, monkeypatch):
+    """Un rechargement en échec annule aussi le vidage de la table."""
+    features_df, target_df = load_prepared(insert_dataset)
+    insert_dataset.insert_into_db(features_df, target_df, sqlite_url)
+
+    insert_chunk = insert_dataset.insert_chunk
+    calls = []
+
+    def failing_insert_chunk(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("connexion perdue")
+        return insert_chunk(*args, **kwargs)
+
+    monkeypatch.setattr(insert_dataset, "insert_chunk", failing_insert_chunk)
+    with pytest.raises(RuntimeError):
+        insert_dataset.insert_into_db(
+            features_df, target_df, sqlite_url, chunk_size=500
+        )
+
+    with create_engine(sqlite_url).connect() as conn:
+        count = len(conn.execute(select(Dataset.id)).all())
+    assert count == 1470
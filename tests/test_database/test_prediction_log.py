@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Tests du logging des prédictions (src/database.py) : file de /predict
+et écriture bulk de /predict/batch.
+
+Utilise une base SQLite temporaire à la place de PostgreSQL.
+"""
+import json
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from db_models import Base, MLLog
+from src.config import Settings, get_settings
+from src.database import (
+    PredictionLogQueue,
+    _bulk_log_executor,
+    _bulk_log_slots,
+    bulk_log_predictions,
+    copy_json_rows,
+    get_engine,
+    records_to_json_lines,
+    submit_batch_log,
+)
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path, monkeypatch):
+    """Pointe DATABASE_URL vers une base SQLite temporaire avec ml_logs créée."""
+    url = f"sqlite:///{tmp_path / 'ml_logs.db'}"
+    monkeypatch.setattr(get_settings(), "DATABASE_URL", url)
+    get_engine.cache_clear()
+
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+    yield engine
+
+    engine.dispose()
+    get_engine.cache_clear()
+
+
+def count_logs(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(MLLog.__table__)).scalar()
+
+
+def test_logs_are_written_in_batches(sqlite_engine):
+    """Les logs en file sont écrits en quelques INSERT multi-lignes."""
+    log_queue = PredictionLogQueue(flush_rows=50, flush_interval_ms=20)
+
+    for i in range(120):
+        assert log_queue.enqueue({"age": i}, "Oui" if i % 2 else "Non")
+    log_queue.stop()
+
+    stats = log_queue.stats()
+    assert count_logs(sqlite_engine) == 120
+    assert stats["written"] == 120
+    assert stats["failed"] == 0
+    assert stats["flushes"] < 120
+
+
+def test_flush_after_interval(sqlite_engine):
+    """Un log isolé est écrit après l'intervalle sans attendre le lot complet."""
+    log_queue = PredictionLogQueue(flush_rows=500, flush_interval_ms=20)
+    log_queue.enqueue({"age": 41}, "Non")
+
+    deadline = time.monotonic() + 2
+    while log_queue.written == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    log_queue.stop()
+
+    assert count_logs(sqlite_engine) == 1
+
+
+@pytest.mark.parametrize("policy", ["drop_newest", "drop_oldest"])
+def test_overflow_policy_counts_drops(policy, monkeypatch):
+    """File pleine : le log ignoré ou évincé est compté sans bloquer."""
+    log_queue = PredictionLogQueue(max_size=2, overflow_policy=policy)
+    # Pas de thread d'écriture : la file se remplit
+    monkeypatch.setattr(log_queue, "start", lambda: None)
+
+    results = [log_queue.enqueue({"age": i}, "Non") for i in range(5)]
+
+    assert log_queue.dropped == 3
+    assert log_queue.stats()["queue_depth"] == 2
+    if policy == "drop_newest":
+        assert results == [True, True, False, False, False]
+    else:
+        assert all(results)
+
+
+def test_unknown_overflow_policy():
+    with pytest.raises(ValueError):
+        PredictionLogQueue(overflow_policy="block")
+
+
+def test_database_failure_is_counted(monkeypatch):
+    """Base indisponible : les logs sont comptés en échec, sans exception."""
+    get_engine.cache_clear()
+    monkeypatch.setattr(
+        "src.database.get_engine",
+        lambda: create_engine("sqlite:////nonexistent/dir/ml_logs.db"),
+    )
+    log_queue = PredictionLogQueue(flush_interval_ms=10)
+    log_queue.enqueue({"age": 41}, "Non")
+    log_queue.stop()
+
+    assert log_queue.failed == 1
+    assert log_queue.written == 0
+
+
+def test_predict_enqueues_log(client, valid_employee_data, monkeypatch):
+    """/predict met le log en file au lieu d'écrire dans la base."""
+    log_queue = PredictionLogQueue()
+    monkeypatch.setattr(log_queue, "start", lambda: None)
+    monkeypatch.setattr("api.get_prediction_log_queue", lambda: log_queue)
+
+    response = client.post("/predict", json=valid_employee_data)
+
+    assert response.status_code == 200
+    assert log_queue.enqueued == 1
+    row = log_queue._queue.get_nowait()
+    assert row["prediction"] == "Non"
+    assert row["input_json"]["genre"] == valid_employee_data["genre"]
+
+
+def test_bulk_log_predictions_executemany(sqlite_engine):
+    """Hors PostgreSQL, le lot est écrit en un executemany avec son batch_id."""
+    inputs = pd.DataFrame({"age": [41, 49, 37], "genre": ["F", "M", "M"]})
+
+    written = bulk_log_predictions(inputs, np.array([1, 0, 1]), "batch-1")
+
+    assert written == 3
+    with sqlite_engine.connect() as conn:
+        rows = conn.execute(
+            select(MLLog.input_json, MLLog.prediction, MLLog.batch_id).order_by(
+                MLLog.id
+            )
+        ).all()
+    assert [row.prediction for row in rows] == ["Oui", "Non", "Oui"]
+    assert {row.batch_id for row in rows} == {"batch-1"}
+    assert rows[1].input_json == {"age": 49, "genre": "M"}
+
+
+def test_bulk_log_queue_is_bounded(monkeypatch):
+    """Base lente : au-delà de DB_LOG_BATCH_MAX_PENDING lots en attente, les
+    lots suivants sont ignorés au lieu de s'accumuler en mémoire."""
+    release = threading.Event()
+    written = []
+
+    def slow_log_batch(inputs, predictions, batch_id):
+        release.wait(10)
+        written.append(batch_id)
+        return len(inputs)
+
+    monkeypatch.setattr("src.database.log_batch", slow_log_batch)
+    monkeypatch.setattr(Settings, "DB_LOG_BATCH_MAX_PENDING", 2)
+    _bulk_log_slots.cache_clear()
+    inputs = pd.DataFrame({"age": [41, 49]})
+    try:
+        futures = [
+            submit_batch_log(inputs, np.array([1, 0]), f"batch-{i}") for i in range(3)
+        ]
+        # Troisième lot ignoré sans attendre la base
+        assert futures[2].done() and futures[2].result() == 0
+
+        release.set()
+        assert [future.result(timeout=10) for future in futures[:2]] == [2, 2]
+        assert written == ["batch-0", "batch-1"]
+        # Places libérées une fois les lots écrits
+        assert submit_batch_log(inputs, np.array([1, 0]), "batch-3").result(10) == 2
+    finally:
+        release.set()
+        _bulk_log_slots.cache_clear()
+
+
+def test_copy_buffer_round_trips_json():
+    """Le buffer COPY (format texte) restitue exactement les JSON d'entrée."""
+    captured = {}
+
+    class FakeCursor:
+        def copy_expert(self, sql, buffer):
+            captured["sql"] = sql
+            captured["data"] = buffer.getvalue()
+
+        def close(self):
+            pass
+
+    class FakeRawConnection:
+        def cursor(self):
+            return FakeCursor()
+
+        def commit(self):
+            captured["committed"] = True
+
+        def close(self):
+            pass
+
+    engine = SimpleNamespace(raw_connection=FakeRawConnection)
+    inputs = pd.DataFrame(
+        {"texte": ['a\tb\nc "d" \\ é', "simple"], "age": [41, np.nan]}
+    )
+    json_lines = records_to_json_lines(inputs)
+
+    copy_json_rows(
+        engine,
+        "ml_logs",
+        ["input_json", "prediction", "created_at", "batch_id"],
+        json_lines,
+        ["Oui", "Non"],
+        ["2024-01-02 03:04:05"] * 2,
+        ["b1"] * 2,
+    )
+
+    assert captured["committed"]
+    assert captured["sql"].startswith("COPY ml_logs (input_json, prediction")
+    lines = captured["data"].split("\n")
+    assert lines[-1] == ""
+    fields = [line.split("\t") for line in lines[:-1]]
+    assert all(len(f) == 4 for f in fields)
+    # Désechappement du format texte de COPY
+    decoded = [json.loads(f[0].replace("\\\\", "\\")) for f in fields]
+    assert decoded[0] == {"texte": 'a\tb\nc "d" \\ é', "age": 41.0}
+    assert decoded[1] == {"texte": "simple", "age": None}
+    assert fields[0][1:] == ["Oui", "2024-01-02 03:04:05", "b1"]
+
+
+def test_predict_batch_logs_rows(client, sqlite_engine):
+    """/predict/batch renvoie un batch_id et écrit chaque prédiction en base."""
+    files = {
+        f"{name}_file": (
+            f"extrait_{name}.csv",
+            (DATA_DIR / f"extrait_{name}.csv").read_bytes(),
+            "text/csv",
+        )
+        for name in ("sondage", "eval", "sirh")
+    }
+
+    response = client.post("/predict/batch", files=files)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["batch_id"]
+
+    # Attendre la fin de l'écriture en arrière-plan (executor FIFO)
+    _bulk_log_executor().submit(lambda: None).result(timeout=30)
+
+    with sqlite_engine.connect() as conn:
+        count = conn.execute(
+            select(func.count())
+            .select_from(MLLog.__table__)
+            .where(MLLog.batch_id == data["batch_id"])
+        ).scalar()
+    assert count == data["total_employees"]
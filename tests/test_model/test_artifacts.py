@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Tests du cache local des artefacts du modèle (src.artifacts).
+
+Vérifient le manifest des versions, la validation sha256, le mode hors
+ligne (aucun appel HF Hub) et le chargement de load_model depuis un
+cache pré-rempli.
+"""
+import json
+
+import joblib
+import pytest
+
+from src import artifacts
+from src.artifacts import ArtifactCacheError, ModelArtifactCache, resolve_model_path
+from src.config import Settings
+from src.models import load_model as real_load_model
+
+REPO_ID = "org/model"
+FILENAME = "model/model.pkl"
+
+
+@pytest.fixture
+def model_file(tmp_path):
+    """Fichier de modèle sérialisé avec joblib."""
+    path = tmp_path / "source" / "model.pkl"
+    path.parent.mkdir()
+    joblib.dump({"kind": "dummy-model", "version": 1}, path)
+    return path
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    """Settings pointant vers un cache temporaire."""
+    monkeypatch.setattr(Settings, "MODEL_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(Settings, "MODEL_OFFLINE", False)
+    monkeypatch.setattr(Settings, "MODEL_CACHE_REFRESH", False)
+    monkeypatch.setattr(Settings, "MODEL_CACHE_VERIFY", True)
+    monkeypatch.setattr(Settings, "MODEL_SHA256", "")
+    return Settings()
+
+
+def forbid_download(monkeypatch):
+    """Fait échouer tout téléchargement HF Hub."""
+
+    def download(*args, **kwargs):
+        raise AssertionError("HF Hub ne doit pas être contacté")
+
+    monkeypatch.setattr(artifacts, "_download_from_hub", download)
+
+
+class TestModelArtifactCache:
+    """Tests du manifest et de la validation sha256."""
+
+    def test_add_and_resolve(self, tmp_path, model_file):
+        cache = ModelArtifactCache(str(tmp_path / "cache"))
+        entry = cache.add(str(model_file), REPO_ID, FILENAME, revision="abc123")
+
+        assert entry["sha256"] == artifacts.file_sha256(model_file)
+        assert entry["size"] == model_file.stat().st_size
+        path = cache.resolve(repo_id=REPO_ID, filename=FILENAME)
+        assert path.read_bytes() == model_file.read_bytes()
+
+        manifest = json.loads(cache.manifest_path.read_text())
+        assert manifest["current"] == entry["sha256"]
+        assert manifest["versions"][entry["sha256"]]["revision"] == "abc123"
+
+    def test_versions_kept_in_manifest(self, tmp_path, model_file):
+        cache = ModelArtifactCache(str(tmp_path / "cache"))
+        first = cache.add(str(model_file), REPO_ID, FILENAME)
+        joblib.dump({"kind": "dummy-model", "version": 2}, model_file)
+        second = cache.add(str(model_file), REPO_ID, FILENAME)
+
+        assert set(cache.read_manifest()["versions"]) == {
+            first["sha256"],
+            second["sha256"],
+        }
+        assert cache.current()["sha256"] == second["sha256"]
+
+        # Retour à la version précédente
+        cache.set_current(first["sha256"])
+        assert cache.resolve() == tmp_path / "cache" / first["path"]
+
+    def test_corrupted_file_detected(self, tmp_path, model_file):
+        cache = ModelArtifactCache(str(tmp_path / "cache"))
+        entry = cache.add(str(model_file), REPO_ID, FILENAME)
+        (tmp_path / "cache" / entry["path"]).write_bytes(b"corrompu")
+
+        with pytest.raises(ArtifactCacheError, match="sha256"):
+            cache.resolve()
+
+    def test_empty_cache(self, tmp_path):
+        with pytest.raises(ArtifactCacheError):
+            ModelArtifactCache(str(tmp_path / "cache")).resolve()
+
+    def test_pinned_sha256_mismatch(self, tmp_path, model_file):
+        cache = ModelArtifactCache(str(tmp_path / "cache"))
+        cache.add(str(model_file), REPO_ID, FILENAME)
+
+        with pytest.raises(ArtifactCacheError, match="MODEL_SHA256"):
+            cache.resolve(expected_sha256="0" * 64)
+
+    def test_other_repo_rejected(self, tmp_path, model_file):
+        cache = ModelArtifactCache(str(tmp_path / "cache"))
+        cache.add(str(model_file), "org/other-model", FILENAME)
+
+        with pytest.raises(ArtifactCacheError):
+            cache.resolve(repo_id=REPO_ID, filename=FILENAME)
+
+
+class TestResolveModelPath:
+    """Tests de la résolution du fichier du modèle au démarrage."""
+
+    def test_offline_uses_cache_only(self, settings, model_file, monkeypatch):
+        ModelArtifactCache(settings.MODEL_CACHE_DIR).add(
+            str(model_file), REPO_ID, FILENAME
+        )
+        monkeypatch.setattr(Settings, "MODEL_OFFLINE", True)
+        forbid_download(monkeypatch)
+
+        path = resolve_model_path(REPO_ID, FILENAME, settings)
+        assert path.read_bytes() == model_file.read_bytes()
+
+    def test_offline_without_cache_fails(self, settings, monkeypatch):
+        monkeypatch.setattr(Settings, "MODEL_OFFLINE", True)
+        forbid_download(monkeypatch)
+
+        with pytest.raises(ArtifactCacheError):
+            resolve_model_path(REPO_ID, FILENAME, settings)
+
+    def test_cache_hit_skips_download(self, settings, model_file, monkeypatch):
+        ModelArtifactCache(settings.MODEL_CACHE_DIR).add(
+            str(model_file), REPO_ID, FILENAME
+        )
+        forbid_download(monkeypatch)
+
+        assert resolve_model_path(REPO_ID, FILENAME, settings).exists()
+
+    def test_cache_miss_downloads_and_records(self, settings, model_file, monkeypatch):
+        monkeypatch.setattr(
+            artifacts,
+            "_download_from_hub",
+            lambda repo_id, filename: (str(model_file), "rev42"),
+        )
+
+        resolve_model_path(REPO_ID, FILENAME, settings)
+
+        current = ModelArtifactCache(settings.MODEL_CACHE_DIR).current()
+        assert current["revision"] == "rev42"
+        assert current["repo_id"] == REPO_ID
+
+    def test_download_rejected_by_pinned_sha256(
+        self, settings, model_file, monkeypatch
+    ):
+        monkeypatch.setattr(Settings, "MODEL_SHA256", "0" * 64)
+        monkeypatch.setattr(
+            artifacts,
+            "_download_from_hub",
+            lambda repo_id, filename: (str(model_file), None),
+        )
+
+        with pytest.raises(ArtifactCacheError):
+            resolve_model_path(REPO_ID, FILENAME, settings)
+        # La version téléchargée n'est pas devenue courante
+        assert ModelArtifactCache(settings.MODEL_CACHE_DIR).current() is None
+
+    def test_refresh_falls_back_to_cache(self, settings, model_file, monkeypatch):
+        ModelArtifactCache(settings.MODEL_CACHE_DIR).add(
+            str(model_file), REPO_ID, FILENAME
+        )
+        monkeypatch.setattr(Settings, "MODEL_CACHE_REFRESH", True)
+
+        def unreachable(repo_id, filename):
+            raise ConnectionError("hub injoignable")
+
+        monkeypatch.setattr(artifacts, "_download_from_hub", unreachable)
+
+        assert resolve_model_path(REPO_ID, FILENAME, settings).exists()
+
+
+class TestLoadModelFromCache:
+    """Démarrage de load_model depuis un cache pré-rempli, sans réseau."""
+
+    def test_load_model_offline(self, settings, model_file, monkeypatch):
+        ModelArtifactCache(settings.MODEL_CACHE_DIR).add(
+            str(model_file), REPO_ID, FILENAME
+        )
+        monkeypatch.setattr(Settings, "MODEL_OFFLINE", True)
+        monkeypatch.setattr("src.models.HF_MODEL_REPO", REPO_ID)
+        monkeypatch.setattr("src.models.MODEL_FILENAME", FILENAME)
+        monkeypatch.setattr("src.models._model_cache", None)
+        forbid_download(monkeypatch)
+
+        model = real_load_model()
+
+        assert model.model == {"kind": "dummy-model", "version": 1}
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Tests des backends d'inférence (joblib, xgboost natif, ONNX Runtime).
+
+Un Pipeline SMOTE + XGBClassifier réduit est entraîné sur des données
+aléatoires : le booster extrait doit donner exactement les mêmes
+probabilités que le Pipeline, y compris après un aller-retour UBJSON,
+et le graphe ONNX les mêmes à la précision float32 près.
+"""
+import joblib
+import numpy as np
+import pytest
+
+from src.artifacts import ModelArtifactCache
+from src.config import Settings
+from fastapi import HTTPException
+
+from src.models import (
+    NATIVE_MODEL_NAME,
+    ONNX_MODEL_NAME,
+    NativeBoosterModel,
+    NumpyTreeEnsemble,
+    OnnxBackend,
+    PipelineBackend,
+    export_onnx,
+    load_model as real_load_model,
+    load_native_booster,
+    predict_with_model,
+    save_native_booster,
+    unwrap_native_booster,
+)
+
+pytest.importorskip("xgboost")
+pytest.importorskip("imblearn")
+
+N_FEATURES = 50
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(400, N_FEATURES))
+    y = (X[:, 0] + 0.5 * X[:, 1] + rng.normal(scale=0.5, size=400) > 1.0).astype(int)
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def pipeline(training_data):
+    """Pipeline de même structure que le modèle de production."""
+    from imblearn.over_sampling import SMOTE
+    from imblearn.pipeline import Pipeline
+    from xgboost import XGBClassifier
+
+    model = Pipeline(
+        [
+            ("sampler", SMOTE(random_state=42)),
+            ("clf", XGBClassifier(n_estimators=30, max_depth=4, random_state=42)),
+        ]
+    )
+    return model.fit(*training_data)
+
+
+@pytest.fixture
+def X_test():
+    rng = np.random.default_rng(7)
+    X = rng.normal(size=(257, N_FEATURES))
+    X[::11, 3] = np.nan
+    return X
+
+
+class TestNativeBoosterParity:
+    """Le chemin rapide doit être strictement identique au Pipeline."""
+
+    def test_unwrap_pipeline(self, pipeline):
+        assert isinstance(unwrap_native_booster(pipeline), NativeBoosterModel)
+
+    def test_identical_probabilities(self, pipeline, X_test):
+        native = unwrap_native_booster(pipeline)
+
+        np.testing.assert_array_equal(
+            native.predict_proba(X_test), pipeline.predict_proba(X_test)
+        )
+        np.testing.assert_array_equal(native.predict(X_test), pipeline.predict(X_test))
+
+    def test_identical_inference_result(self, pipeline, X_test):
+        expected = predict_with_model(pipeline, X_test)
+        result = predict_with_model(unwrap_native_booster(pipeline), X_test)
+
+        np.testing.assert_array_equal(result.probabilities, expected.probabilities)
+        np.testing.assert_array_equal(result.predictions, expected.predictions)
+        np.testing.assert_array_equal(result.risk_levels, expected.risk_levels)
+
+    def test_single_row(self, pipeline, X_test):
+        native = unwrap_native_booster(pipeline)
+        np.testing.assert_array_equal(
+            native.predict_proba(X_test[:1]), pipeline.predict_proba(X_test[:1])
+        )
+
+    def test_ubjson_round_trip(self, pipeline, X_test, tmp_path):
+        path = tmp_path / NATIVE_MODEL_NAME
+        save_native_booster(unwrap_native_booster(pipeline), path)
+
+        np.testing.assert_array_equal(
+            load_native_booster(path).predict_proba(X_test),
+            pipeline.predict_proba(X_test),
+        )
+
+    def test_early_stopping_iteration_range(self, training_data, X_test, tmp_path):
+        from xgboost import XGBClassifier
+
+        X, y = training_data
+        clf = XGBClassifier(n_estimators=200, early_stopping_rounds=3)
+        clf.fit(X[:300], y[:300], eval_set=[(X[300:], y[300:])], verbose=False)
+        native = unwrap_native_booster(clf)
+
+        assert native.iteration_range == (0, clf.best_iteration + 1)
+        np.testing.assert_array_equal(
+            native.predict_proba(X_test), clf.predict_proba(X_test)
+        )
+
+        path = tmp_path / NATIVE_MODEL_NAME
+        save_native_booster(native, path)
+        assert load_native_booster(path).iteration_range == native.iteration_range
+
+    def test_other_models_unchanged(self, training_data):
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import StandardScaler
+
+        model = Pipeline(
+            [("scaler", StandardScaler()), ("clf", LogisticRegression())]
+        ).fit(*training_data)
+
+        assert unwrap_native_booster(model) is model
+        assert unwrap_native_booster({"kind": "dummy"}) == {"kind": "dummy"}
+
+
+class TestNumpyTreeEnsemble:
+    """Évaluateur NumPy construit depuis le dump JSON du booster."""
+
+    def test_probabilities_match_pipeline(self, pipeline, X_test):
+        native = unwrap_native_booster(pipeline)
+        ensemble = NumpyTreeEnsemble.from_booster(native.booster)
+
+        assert len(ensemble.roots) == 30
+        np.testing.assert_allclose(
+            ensemble.predict_proba(X_test), pipeline.predict_proba(X_test), atol=1e-6
+        )
+        np.testing.assert_array_equal(
+            ensemble.predict(X_test), pipeline.predict(X_test)
+        )
+
+    def test_leaf_values_match_xgboost(self, pipeline, X_test):
+        """Mêmes feuilles atteintes que XGBoost (valeurs manquantes comprises)."""
+        import xgboost
+
+        booster = unwrap_native_booster(pipeline).booster
+        leaf_ids = booster.predict(xgboost.DMatrix(X_test), pred_leaf=True)
+        ensemble = NumpyTreeEnsemble.from_booster(booster)
+
+        # Indices globaux des feuilles XGBoost dans les tableaux aplatis
+        expected = ensemble.value[ensemble.roots + leaf_ids.astype(np.int32)]
+        np.testing.assert_array_equal(ensemble.leaf_values(X_test), expected)
+
+    def test_blocks_match_single_pass(self, pipeline, X_test):
+        ensemble = NumpyTreeEnsemble.from_booster(
+            unwrap_native_booster(pipeline).booster
+        )
+        expected = ensemble.leaf_values(X_test)
+
+        ensemble.block_rows = 16
+        np.testing.assert_array_equal(ensemble.leaf_values(X_test), expected)
+
+    def test_early_stopping_iteration_range(self, training_data, X_test):
+        from xgboost import XGBClassifier
+
+        X, y = training_data
+        clf = XGBClassifier(n_estimators=200, early_stopping_rounds=3)
+        clf.fit(X[:300], y[:300], eval_set=[(X[300:], y[300:])], verbose=False)
+        native = unwrap_native_booster(clf)
+        ensemble = NumpyTreeEnsemble.from_booster(
+            native.booster, native.iteration_range[1]
+        )
+
+        assert len(ensemble.roots) == clf.best_iteration + 1
+        np.testing.assert_allclose(
+            ensemble.predict_proba(X_test), clf.predict_proba(X_test), atol=1e-6
+        )
+
+    def test_rejects_other_objectives(self, training_data):
+        from xgboost import XGBRegressor
+
+        regressor = XGBRegressor(n_estimators=5).fit(*training_data)
+
+        with pytest.raises(ValueError, match="binary:logistic"):
+            NumpyTreeEnsemble.from_booster(regressor.get_booster())
+
+
+class TestOnnxBackend:
+    """Graphe ONNX exporté depuis le XGBClassifier du Pipeline."""
+
+    @pytest.fixture(autouse=True)
+    def onnx_dependencies(self):
+        pytest.importorskip("onnxruntime")
+        pytest.importorskip("onnxmltools")
+
+    def test_probabilities_match_pipeline(self, pipeline, X_test, tmp_path):
+        path = tmp_path / ONNX_MODEL_NAME
+        export_onnx(pipeline, path)
+        backend = OnnxBackend.from_file(path)
+
+        expected = pipeline.predict_proba(X_test)
+        np.testing.assert_allclose(backend.predict_proba(X_test), expected, atol=1e-6)
+        np.testing.assert_array_equal(backend.predict(X_test), pipeline.predict(X_test))
+
+    def test_export_rejects_other_models(self, tmp_path):
+        with pytest.raises(ValueError):
+            export_onnx({"kind": "dummy"}, tmp_path / ONNX_MODEL_NAME)
+
+
+class TestLoadModelBackends:
+    """load_model depuis le cache avec chaque backend d'inférence."""
+
+    @pytest.fixture
+    def seeded_cache(self, tmp_path, pipeline, monkeypatch):
+        model_file = tmp_path / "model.pkl"
+        joblib.dump(pipeline, model_file)
+        cache_dir = tmp_path / "cache"
+        entry = ModelArtifactCache(str(cache_dir)).add(
+            str(model_file), "org/model", "model/model.pkl"
+        )
+
+        monkeypatch.setattr(Settings, "MODEL_CACHE_DIR", str(cache_dir))
+        monkeypatch.setattr(Settings, "MODEL_OFFLINE", True)
+        monkeypatch.setattr(Settings, "MODEL_SHA256", "")
+        monkeypatch.setattr(Settings, "INFERENCE_BACKEND", "xgboost")
+        monkeypatch.setattr("src.models.HF_MODEL_REPO", "org/model")
+        monkeypatch.setattr("src.models.MODEL_FILENAME", "model/model.pkl")
+        monkeypatch.setattr("src.models._model_cache", None)
+        return cache_dir / entry["sha256"]
+
+    def test_xgboost_backend(self, seeded_cache, monkeypatch):
+        monkeypatch.setattr(Settings, "MODEL_NATIVE_FORMAT", False)
+
+        assert isinstance(real_load_model(), NativeBoosterModel)
+        assert not (seeded_cache / NATIVE_MODEL_NAME).exists()
+
+    def test_joblib_backend(self, seeded_cache, monkeypatch, pipeline):
+        monkeypatch.setattr(Settings, "INFERENCE_BACKEND", "joblib")
+
+        model = real_load_model()
+        assert isinstance(model, PipelineBackend)
+        assert type(model.model) is type(pipeline)
+
+    def test_onnx_backend_exported_once(
+        self, seeded_cache, monkeypatch, pipeline, X_test
+    ):
+        pytest.importorskip("onnxruntime")
+        pytest.importorskip("onnxmltools")
+        monkeypatch.setattr(Settings, "INFERENCE_BACKEND", "onnx")
+
+        assert isinstance(real_load_model(), OnnxBackend)
+        assert (seeded_cache / ONNX_MODEL_NAME).exists()
+
+        # Second démarrage : le graphe exporté est réutilisé sans pickle
+        def no_pickle(*args, **kwargs):
+            raise AssertionError("joblib.load ne doit pas être appelé")
+
+        monkeypatch.setattr("joblib.load", no_pickle)
+        model = real_load_model(force_reload=True)
+        np.testing.assert_allclose(
+            model.predict_proba(X_test), pipeline.predict_proba(X_test), atol=1e-6
+        )
+
+    def test_numpy_backend(self, seeded_cache, monkeypatch, pipeline, X_test):
+        monkeypatch.setattr(Settings, "INFERENCE_BACKEND", "numpy")
+        monkeypatch.setattr(Settings, "MODEL_NATIVE_FORMAT", False)
+
+        model = real_load_model()
+
+        assert isinstance(model, NumpyTreeEnsemble)
+        np.testing.assert_allclose(
+            model.predict_proba(X_test), pipeline.predict_proba(X_test), atol=1e-6
+        )
+
+    def test_unknown_backend(self, seeded_cache, monkeypatch):
+        monkeypatch.setattr(Settings, "INFERENCE_BACKEND", "tensorrt")
+
+        with pytest.raises(HTTPException) as exc_info:
+            real_load_model()
+        assert "INFERENCE_BACKEND" in exc_info.value.detail["message"]
+
+    def test_native_format_reused(self, seeded_cache, monkeypatch, pipeline, X_test):
+        monkeypatch.setattr(Settings, "MODEL_NATIVE_FORMAT", True)
+
+        real_load_model()
+        assert (seeded_cache / NATIVE_MODEL_NAME).exists()
+
+        # Second démarrage : le pickle n'est plus désérialisé
+        def no_pickle(*args, **kwargs):
+            raise AssertionError("joblib.load ne doit pas être appelé")
+
+        monkeypatch.setattr("joblib.load", no_pickle)
+        model = real_load_model(force_reload=True)
+
+        np.testing.assert_array_equal(
+            model.predict_proba(X_test), pipeline.predict_proba(X_test)
+        )
@@ -13,9 +13,11 @@ from pydantic import ValidationError
 
 from src.models import get_model_info, load_model
 from src.preprocessing import (
+    FeaturePlan,
     create_input_dataframe,
     encode_and_scale,
     engineer_features,
+    get_feature_plan,
     preprocess_for_prediction,
 )
 from src.schemas import EmployeeInput
@@ -184,6 +186,192 @@ class TestPreprocessing:
             assert result.shape[1] == 50
 
 
+class TestFeaturePlan:
+    """Tests du plan de preprocessing précompilé (parité avec le pipeline pandas)."""
+
+    @staticmethod
+    def _reference(employee):
+        df = engineer_features(create_input_dataframe(employee))
+        return encode_and_scale(df).values
+
+    def test_plan_is_bit_identical_to_pandas_pipeline(
+        self, valid_employee_data, high_risk_employee_data, sample_dataset_rows
+    ):
+        """Test que le plan produit exactement la même ligne que le pipeline pandas."""
+        rows = [valid_employee_data, high_risk_employee_data, *sample_dataset_rows]
+        for data in rows:
+            employee = EmployeeInput(**data)
+            expected = self._reference(employee)
+            result = preprocess_for_prediction(employee)
+
+            assert result.dtype == expected.dtype
+            assert result.shape == expected.shape == (1, 50)
+            assert np.array_equal(result, expected)
+
+    def test_plan_parity_on_all_categories(self, valid_employee_data):
+        """Test la parité pour chaque catégorie OneHot et ordinale."""
+        from src.preprocessing import CATEGORIES, ORDINAL_CATEGORIES
+
+        plan = get_feature_plan()
+        variants = [(col, cat) for col, cats in CATEGORIES.items() for cat in cats]
+        variants += [("frequence_deplacement", cat) for cat in ORDINAL_CATEGORIES]
+
+        for col, cat in variants:
+            data = {**valid_employee_data, col: cat}
+            employee = EmployeeInput(**data)
+            assert np.array_equal(
+                plan.transform_employee(employee), self._reference(employee)
+            ), f"Écart pour {col}={cat}"
+
+    def test_plan_float32_and_preallocated_row(self, valid_employee_data):
+        """Test la sortie float32 et l'écriture dans une ligne préallouée."""
+        employee = EmployeeInput(**valid_employee_data)
+        expected = self._reference(employee)
+
+        plan32 = FeaturePlan(dtype=np.float32)
+        result = plan32.transform_employee(employee)
+        assert result.dtype == np.float32
+        assert np.array_equal(result, expected.astype(np.float32))
+
+        out = np.empty((1, 50), dtype=np.float64)
+        returned = get_feature_plan().transform_employee(employee, out=out)
+        assert returned is out
+        assert np.array_equal(out, expected)
+
+    def test_batch_engine_parity_with_pandas_pipeline(self):
+        """Test que le moteur batch est identique au pipeline pandas sur les CSV."""
+        import os
+
+        from src.preprocessing import (
+            merge_csv_dataframes,
+            preprocess_batch_for_prediction,
+        )
+
+        data_dir = os.path.join(os.path.dirname(__file__), "..", "..", "data")
+        merged = merge_csv_dataframes(
+            pd.read_csv(os.path.join(data_dir, "extrait_sondage.csv")),
+            pd.read_csv(os.path.join(data_dir, "extrait_eval.csv")),
+            pd.read_csv(os.path.join(data_dir, "extrait_sirh.csv")),
+        )
+        merged = merged.drop(columns=["original_employee_id", "a_quitte_l_entreprise"])
+
+        # Cas limites : catégorie inconnue et satisfaction manquante
+        merged.loc[0, "genre"] = "X"
+        merged.loc[1, "satisfaction_employee_equipe"] = np.nan
+
+        expected = encode_and_scale(engineer_features(merged)).values
+        result = preprocess_batch_for_prediction(merged)
+
+        assert result.flags["C_CONTIGUOUS"]
+        assert result.dtype == expected.dtype
+        # La satisfaction manquante reste NaN après scaling dans les deux chemins
+        assert np.array_equal(result, expected, equal_nan=True)
+
+    def test_batch_engine_rejects_unknown_ordinal(self, valid_employee_data):
+        """Test que le moteur batch rejette une fréquence inconnue."""
+        from src.preprocessing import preprocess_batch_for_prediction
+
+        df = pd.DataFrame([{**valid_employee_data, "frequence_deplacement": "Jamais"}])
+
+        with pytest.raises(ValueError, match="unknown categories"):
+            preprocess_batch_for_prediction(df)
+
+    def test_get_feature_plan_is_cached(self):
+        """Test que le plan n'est compilé qu'une fois."""
+        assert get_feature_plan() is get_feature_plan()
+
+
+class TestInference:
+    """Tests de l'inférence partagée (un seul passage predict_proba)."""
+
+    class ProbaModel:
+        """Modèle factice renvoyant des probabilités fixées et comptant les appels."""
+
+        def __init__(self, prob_leave):
+            self.prob_leave = np.asarray(prob_leave, dtype=np.float64)
+            self.proba_calls = 0
+
+        def predict_proba(self, X):
+            self.proba_calls += 1
+            return np.column_stack([1 - self.prob_leave, self.prob_leave])
+
+        def predict(self, X):
+            raise AssertionError("predict ne doit pas être appelé")
+
+    def test_predict_with_model_single_pass(self):
+        """Test que predict_proba est appelé une seule fois et predict jamais."""
+        from src.models import predict_with_model
+
+        model = self.ProbaModel([0.1, 0.5, 0.9])
+        result = predict_with_model(model, np.zeros((3, 50)))
+
+        assert model.proba_calls == 1
+        assert result.predictions.tolist() == [0, 0, 1]
+        assert result.probabilities.shape == (3, 2)
+
+    def test_predict_with_model_risk_levels(self):
+        """Test les bornes des niveaux de risque (0.3 / 0.7)."""
+        from src.models import predict_with_model
+
+        prob_leave = [0.0, 0.2999, 0.3, 0.6999, 0.7, 1.0]
+        result = predict_with_model(
+            self.ProbaModel(prob_leave), np.zeros((len(prob_leave), 50))
+        )
+
+        assert result.risk_levels.tolist() == [
+            "Low",
+            "Low",
+            "Medium",
+            "Medium",
+            "High",
+            "High",
+        ]
+
+    def test_predict_with_model_custom_threshold(self, monkeypatch):
+        """Test le seuil de décision explicite et celui des settings."""
+        from src.config import get_settings
+        from src.models import predict_with_model
+
+        model = self.ProbaModel([0.25, 0.4])
+        X = np.zeros((2, 50))
+
+        assert predict_with_model(model, X, threshold=0.2).predictions.tolist() == [
+            1,
+            1,
+        ]
+
+        monkeypatch.setattr(get_settings(), "DECISION_THRESHOLD", 0.3)
+        assert predict_with_model(model, X).predictions.tolist() == [0, 1]
+
+    def test_predict_with_model_without_predict_proba(self):
+        """Test le repli sur predict pour un modèle sans predict_proba."""
+        from src.models import predict_with_model
+
+        class LabelOnlyModel:
+            def predict(self, X):
+                return np.array([0, 1])
+
+        result = predict_with_model(LabelOnlyModel(), np.zeros((2, 50)))
+
+        assert result.probabilities.tolist() == [[1.0, 0.0], [0.0, 1.0]]
+        assert result.risk_levels.tolist() == ["Low", "High"]
+
+    def test_summarize_predictions(self):
+        """Test le résumé agrégé d'un batch."""
+        from src.models import predict_with_model, summarize_predictions
+
+        model = self.ProbaModel([0.1, 0.5, 0.9, 0.95])
+        summary = summarize_predictions(predict_with_model(model, np.zeros((4, 50))))
+
+        assert summary == {
+            "total_stay": 2,
+            "total_leave": 2,
+            "high_risk_count": 2,
+            "medium_risk_count": 1,
+            "low_risk_count": 1,
+        }
+
+
 class TestPydanticValidation:
     """Tests unitaires pour la validation Pydantic (sans API)."""
 
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests du scoring batch parallèle (src.parallel_scoring).
+
+Le lot des CSV de data/ est scoré par shards dans un pool de processus,
+via la mémoire partagée : le résultat doit être identique, ligne à ligne
+et dans le même ordre, au scoring d'un bloc.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.config import Settings
+from src.models import predict_with_model
+from src.parallel_scoring import ShardedScorer
+from src.preprocessing import merge_csv_dataframes, preprocess_batch_for_prediction
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data")
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="fork indisponible")
+
+
+class LinearModel:
+    """Modèle factice dont la probabilité dépend de chaque feature."""
+
+    version = "linear"
+
+    def predict_proba(self, X):
+        weights = np.linspace(-0.5, 0.5, X.shape[1])
+        leave = 1 / (1 + np.exp(-np.nan_to_num(X) @ weights))
+        return np.column_stack([1 - leave, leave])
+
+
+@pytest.fixture
+def merged():
+    return merge_csv_dataframes(
+        pd.read_csv(os.path.join(DATA_DIR, "extrait_sondage.csv")),
+        pd.read_csv(os.path.join(DATA_DIR, "extrait_eval.csv")),
+        pd.read_csv(os.path.join(DATA_DIR, "extrait_sirh.csv")),
+    )
+
+
+@pytest.fixture
+def scorer(monkeypatch):
+    # Installé avant le fork : les workers héritent du modèle factice
+    monkeypatch.setattr("src.models._model_cache", LinearModel())
+    sharded = ShardedScorer(max_workers=2, min_rows=100, shard_rows=300)
+    sharded.start()
+    yield sharded
+    sharded.shutdown()
+
+
+def test_shard_bounds_cover_rows_in_order():
+    scorer = ShardedScorer(max_workers=4, shard_rows=300)
+
+    assert scorer.shard_bounds(1000) == [(0, 250), (250, 500), (500, 750), (750, 1000)]
+    bounds = scorer.shard_bounds(1470)
+    assert bounds[0] == (0, 300) and bounds[-1] == (1200, 1470)
+
+
+def test_sharded_result_matches_single_block(scorer, merged):
+    # Cas limites : catégorie inconnue et satisfaction manquante
+    merged.loc[0, "genre"] = "X"
+    merged.loc[1, "satisfaction_employee_equipe"] = np.nan
+
+    expected = predict_with_model(
+        LinearModel(), preprocess_batch_for_prediction(merged)
+    )
+    result = scorer.score(merged)
+
+    assert np.array_equal(result.probabilities, expected.probabilities)
+    assert np.array_equal(result.predictions, expected.predictions)
+    assert list(result.risk_levels) == list(expected.risk_levels)
+    assert result.model_version == "linear"
+    assert scorer.stats()["shards"] == 5
+
+
+def test_sharded_rejects_unknown_ordinal(scorer, merged):
+    merged.loc[1000, "frequence_deplacement"] = "Jamais"
+
+    with pytest.raises(ValueError, match="frequence_deplacement"):
+        scorer.score(merged)
+
+
+def test_accepts_only_large_batches_when_running(scorer):
+    assert scorer.accepts(100)
+    assert not scorer.accepts(99)
+    assert not ShardedScorer(max_workers=0, min_rows=1).accepts(10_000)
+
+
+def test_csv_batch_uses_sharded_scorer(scorer, monkeypatch):
+    from src.scoring import score_csv_batch
+
+    files = [
+        open(os.path.join(DATA_DIR, name), "rb").read()
+        for name in ("extrait_sondage.csv", "extrait_eval.csv", "extrait_sirh.csv")
+    ]
+    monkeypatch.setattr(Settings, "DB_LOG_BATCH_ENABLED", False)
+    monkeypatch.setattr("src.scoring.get_sharded_scorer", lambda: scorer)
+    sharded = score_csv_batch(*files)
+    monkeypatch.setattr(
+        "src.scoring.get_sharded_scorer", lambda: ShardedScorer(max_workers=0)
+    )
+    single = score_csv_batch(*files)
+
+    assert scorer.stats()["batches"] == 1
+    assert sharded == single